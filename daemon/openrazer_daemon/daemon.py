@@ -5,6 +5,7 @@ This class is the main core of the daemon, this serves a basic dbus module to co
 """
 __version__ = '2.0.0'
 
+import concurrent.futures
 import configparser
 import logging
 import logging.handlers
@@ -29,7 +30,21 @@ import json
 import openrazer_daemon.hardware
 from openrazer_daemon.dbus_services.service import DBusService
 from openrazer_daemon.device import DeviceCollection
+from openrazer_daemon.hardware.device_base import RazerDevice
+from openrazer_daemon.misc.canvas import Canvas
+from openrazer_daemon.misc.device_profile import ProfileStore
+from openrazer_daemon.misc.device_snapshot import SnapshotStore
+from openrazer_daemon.misc.effect_sync import get_effect_tables
+from openrazer_daemon.misc.key_event_management import KeyboardKeyManager
+from openrazer_daemon.misc.macro import close_uinput_keyboard
+from openrazer_daemon.misc.macro_store import MacroStore
+from openrazer_daemon.misc.metrics import MetricsRegistry
+from openrazer_daemon.misc.profiler import ProfilerSession
 from openrazer_daemon.misc.screensaver_monitor import ScreensaverMonitor
+from openrazer_daemon.misc.timer_service import close_timer_service
+
+# Seconds each device is given to suspend or resume
+DEVICE_SUSPEND_TIMEOUT = 2.0
 
 class RazerDaemon(DBusService):
     """
@@ -42,11 +57,12 @@ class RazerDaemon(DBusService):
     * getDevices - Returns a list of serial numbers
     * enableTurnOffOnScreensaver - Starts/Continues the run loop on the screensaver thread
     * disableTurnOffOnScreensaver - Pauses the run loop on the screensaver thread
+    * setLayout/getLayout/getDimensions/submitFrame - Composite canvas spanning multiple devices
     """
 
     BUS_NAME = 'org.razer'
 
-    def __init__(self, verbose=False, log_dir=None, console_log=False, run_dir=None, config_file=None, test_dir=None):
+    def __init__(self, verbose=False, log_dir=None, console_log=False, run_dir=None, config_file=None, test_dir=None, data_dir=None):
 
         setproctitle.setproctitle('openrazer-daemon')
 
@@ -58,6 +74,9 @@ class RazerDaemon(DBusService):
             if run_dir is not None:
                 run_dir = os.path.expanduser(run_dir)
                 os.makedirs(run_dir, exist_ok=True)
+            if data_dir is not None:
+                data_dir = os.path.expanduser(data_dir)
+                os.makedirs(data_dir, exist_ok=True)
         except NotADirectoryError as e:
             print("Failed to create {}".format(e.filename), file=sys.stderr)
             sys.exit(1)
@@ -70,6 +89,10 @@ class RazerDaemon(DBusService):
 
         self._test_dir = test_dir
         self._run_dir = run_dir
+        self._log_dir = log_dir
+        self._data_dir = data_dir
+        self._profiler = None
+        self._profiler_timeout = None
         self._config_file = config_file
         self._config = configparser.ConfigParser()
         self.read_config(config_file)
@@ -85,6 +108,17 @@ class RazerDaemon(DBusService):
             self.logger.critical("User is not a member of the plugdev group")
             sys.exit(1)
 
+        # Must be set before any DBus methods are added
+        if self._config.getboolean('Statistics', 'endpoint_metrics'):
+            self.logger.info("Recording endpoint metrics")
+            DBusService.METRICS = MetricsRegistry()
+
+        # Must be set before any devices are loaded
+        if data_dir is not None:
+            KeyboardKeyManager.MACRO_STORE = MacroStore(os.path.join(data_dir, 'macros'))
+            RazerDevice.PROFILE_STORE = ProfileStore(os.path.join(data_dir, 'profiles'))
+            RazerDevice.SNAPSHOT_STORE = SnapshotStore(os.path.join(data_dir, 'snapshots'))
+
         # Setup DBus to use gobject main loop
         dbus.mainloop.glib.threads_init()
         dbus.mainloop.glib.DBusGMainLoop(set_as_default=True)
@@ -102,9 +136,11 @@ class RazerDaemon(DBusService):
         self.logger.info("Initialising Daemon (v%s). Pid: %d", __version__, os.getpid())
         self._init_screensaver_monitor()
 
-        self._razer_devices = DeviceCollection()
+        self._razer_devices = DeviceCollection(sync_window=self._config.getint('Startup', 'sync_effects_window_ms') / 1000)
         self._load_devices(first_run=True)
 
+        self._canvas = Canvas(self._razer_devices)
+
         # Add DBus methods
         methods = {
             # interface, method, callback, in-args, out-args
@@ -114,14 +150,27 @@ class RazerDaemon(DBusService):
             ('razer.devices', 'getOffOnScreensaver', self.get_off_on_screensaver, None, 'b'),
             ('razer.devices', 'syncEffects', self.sync_effects, 'b', None),
             ('razer.devices', 'getSyncEffects', self.get_sync_effects, None, 'b'),
+            ('razer.devices', 'getSyncEffectsStats', self.get_sync_effects_stats, None, 's'),
             ('razer.daemon', 'version', self.version, None, 's'),
             ('razer.daemon', 'stop', self.stop, None, None),
+            ('razer.daemon', 'startProfiling', self.start_profiling, 'd', 's'),
+            ('razer.daemon', 'stopProfiling', self.stop_profiling, None, 'as'),
+            ('razer.daemon', 'isProfiling', self.is_profiling, None, 'b'),
+            ('razer.canvas', 'setLayout', self.canvas_set_layout, 's', None),
+            ('razer.canvas', 'getLayout', self.canvas_get_layout, None, 's'),
+            ('razer.canvas', 'getDimensions', self.canvas_get_dimensions, None, 'ai'),
+            ('razer.daemon.metrics', 'getMetrics', self.get_metrics, None, 's'),
+            ('razer.daemon.metrics', 'getMetricsText', self.get_metrics_text, None, 's'),
+            ('razer.daemon.metrics', 'resetMetrics', self.reset_metrics, None, None),
         }
 
         for m in methods:
             self.logger.debug("Adding {}.{} method to DBus".format(m[0], m[1]))
             self.add_dbus_method(m[0], m[1], m[2], in_signature=m[3], out_signature=m[4])
 
+        self.logger.debug("Adding razer.canvas.submitFrame method to DBus")
+        self.add_dbus_method('razer.canvas', 'submitFrame', self.canvas_submit_frame, in_signature='ay', out_signature='d', byte_arrays=True)
+
         # TODO remove
         self.sync_effects(self._config.getboolean('Startup', 'sync_effects_enabled'))
         # TODO ======
@@ -257,8 +306,10 @@ class RazerDaemon(DBusService):
         self._config['DEFAULT'] = {
             'verbose_logging': True,
             'sync_effects_enabled': True,
+            'sync_effects_window_ms': 50,
             'devices_off_on_screensaver': True,
             'key_statistics': False,
+            'endpoint_metrics': False,
         }
 
         if config_file is not None and os.path.exists(config_file):
@@ -293,19 +344,127 @@ class RazerDaemon(DBusService):
         """
         return __version__
 
+    def get_metrics(self):
+        """
+        Get the endpoint metrics
+
+        :return: JSON object, empty if metrics are disabled
+        :rtype: str
+        """
+        if DBusService.METRICS is None:
+            return '{}'
+        return DBusService.METRICS.to_json()
+
+    def get_metrics_text(self):
+        """
+        Get the endpoint metrics as a table
+
+        :return: Text dump
+        :rtype: str
+        """
+        if DBusService.METRICS is None:
+            return 'Endpoint metrics are disabled, set endpoint_metrics in the Statistics section of the config'
+        return DBusService.METRICS.to_text()
+
+    def reset_metrics(self):
+        """
+        Clear the endpoint metrics
+        """
+        if DBusService.METRICS is not None:
+            DBusService.METRICS.reset()
+
+    def start_profiling(self, seconds):
+        """
+        Profile all daemon threads for a number of seconds
+
+        Stacks of every thread are sampled and the main loop is run under cProfile, the collapsed stacks and pstats
+        are written to the log directory.
+
+        :param seconds: Duration, 0 or less to run until stopProfiling is called
+        :type seconds: float
+
+        :return: Output path prefix
+        :rtype: str
+        """
+        if self._profiler is not None:
+            return self._profiler.output_prefix
+
+        output_dir = self._log_dir if self._log_dir is not None else tempfile.gettempdir()
+        self._profiler = ProfilerSession(output_dir)
+        self._profiler.start()
+
+        if seconds > 0:
+            self._profiler_timeout = GLib.timeout_add(int(seconds * 1000), self._profiling_timeout)
+
+        return self._profiler.output_prefix
+
+    def _profiling_timeout(self):
+        """
+        GLib timeout to end a timed profiling session
+        """
+        self._profiler_timeout = None
+        self.stop_profiling()
+        return False
+
+    def stop_profiling(self):
+        """
+        Stop profiling and write the results
+
+        :return: Paths of the written files
+        :rtype: list of str
+        """
+        if self._profiler is None:
+            return []
+
+        if self._profiler_timeout is not None:
+            GLib.source_remove(self._profiler_timeout)
+            self._profiler_timeout = None
+
+        profiler, self._profiler = self._profiler, None
+        return list(profiler.stop())
+
+    def is_profiling(self):
+        """
+        If a profiling session is running
+
+        :return: Profiling
+        :rtype: bool
+        """
+        return self._profiler is not None
+
     def suspend_devices(self):
         """
         Suspend all devices
         """
-        for device in self._razer_devices:
-            device.dbus.suspend_device()
+        self._call_devices('suspend_device', 'Suspended')
 
     def resume_devices(self):
         """
         Resume all devices
         """
-        for device in self._razer_devices:
-            device.dbus.resume_device()
+        self._call_devices('resume_device', 'Resumed')
+
+    def _call_devices(self, method_name, action):
+        """
+        Run a method on all devices concurrently and log how long it took
+
+        :param method_name: Device method name
+        :type method_name: str
+
+        :param action: Word used in the log message
+        :type action: str
+        """
+        start = time.monotonic()
+        errors = self._razer_devices.call_all(method_name, timeout=DEVICE_SUSPEND_TIMEOUT)
+        elapsed = time.monotonic() - start
+
+        for serial, error in errors.items():
+            if isinstance(error, concurrent.futures.TimeoutError):
+                self.logger.warning("%s: %s did not finish within %.1fs", serial, method_name, DEVICE_SUSPEND_TIMEOUT)
+            else:
+                self.logger.error("%s: %s failed: %s", serial, method_name, error)
+
+        self.logger.info("%s %d device(s) in %.1fms", action, len(self._razer_devices) - len(errors), elapsed * 1000)
 
     def get_serial_list(self):
         """
@@ -340,6 +499,61 @@ class RazerDaemon(DBusService):
 
         return result
 
+    def get_sync_effects_stats(self):
+        """
+        Get the effect sync tables' coverage and hit counters and the coalescer's counters
+
+        :return: JSON of {tables: [{source, target, effects, translated, hits, misses}...], coalescer: {window,
+                 delivered, coalesced} or null, devices: {serial: {stalled, replaced}}}
+        :rtype: str
+        """
+        coalescer = self._razer_devices.coalescer
+
+        return json.dumps({
+            'tables': [table.as_dict() for table in get_effect_tables()],
+            'coalescer': coalescer.as_dict() if coalescer is not None else None,
+            'devices': {device.serial: {'stalled': device.sync_stalled, 'replaced': device.sync_replaced} for device in self._razer_devices}
+        })
+
+    def canvas_set_layout(self, layout):
+        """
+        Position devices on the composite canvas
+
+        :param layout: JSON object of serial: [x, y]
+        :type layout: str
+        """
+        self._canvas.set_layout(layout)
+
+    def canvas_get_layout(self):
+        """
+        Get the composite canvas layout
+
+        :return: JSON object of serial: [x, y]
+        :rtype: str
+        """
+        return self._canvas.get_layout()
+
+    def canvas_get_dimensions(self):
+        """
+        Get the size of the composite canvas
+
+        :return: Rows, Columns
+        :rtype: list of int
+        """
+        return list(self._canvas.dimensions)
+
+    def canvas_submit_frame(self, frame):
+        """
+        Display a frame across all devices on the canvas
+
+        :param frame: Row-major RGB frame the size of the canvas
+        :type frame: bytes
+
+        :return: Monotonic time the frame will be presented at
+        :rtype: float
+        """
+        return self._canvas.submit_frame(frame)
+
     def _load_devices(self, first_run=False):
         """
         Go through supported devices and load them
@@ -417,6 +631,10 @@ class RazerDaemon(DBusService):
 
                     device_number += 1
 
+        # Put every device back in the state it was last in, each on its own I/O worker
+        if len(self._razer_devices) > 0:
+            self._call_devices('restore_snapshot', 'Restored')
+
     def _add_device(self, device):
         """
         Add device event from udev
@@ -445,6 +663,7 @@ class RazerDaemon(DBusService):
                 if len(device_serial) > 0:
                     # Add Device
                     self._razer_devices.add(sys_name, device_serial, razer_device)
+                    razer_device.restore_snapshot()
                     self.device_added()
                 else:
                     logging.warning("Could not get serial for device {0}. Skipping".format(sys_name))
@@ -461,6 +680,8 @@ class RazerDaemon(DBusService):
         try:
             device = self._razer_devices[device_id]
 
+            self._canvas.remove_device(device.serial)
+            device.close()
             device.dbus.close()
             device.dbus.remove_from_connection()
             self.logger.warning("Removing %s", device_id)
@@ -517,10 +738,17 @@ class RazerDaemon(DBusService):
         else:
             self.logger.info('Stopping daemon on signal %d', signum)
 
+        self.stop_profiling()
+
         self._main_loop.quit()
 
         # Stop udev monitor
         self._udev_observer.send_stop()
 
+        self._razer_devices.close()
         for device in self._razer_devices:
+            device.close()
             device.dbus.close()
+
+        close_uinput_keyboard()
+        close_timer_service()
@@ -3,6 +3,7 @@ DBus methods available for all devices.
 """
 import os
 from openrazer_daemon.dbus_services import endpoint
+from openrazer_daemon.misc.metrics import timed_open
 
 
 @endpoint('razer.device.misc', 'getDriverVersion', out_sig='s')
@@ -25,7 +26,7 @@ def version(self):
 
     if os.path.exists(driver_path):
         # Check it exists, as people might not have reloaded driver
-        with open(driver_path, 'r') as driver_file:
+        with timed_open(driver_path, 'r') as driver_file:
             driver_version = driver_file.read().strip()
 
     self.method_args['driver_version'] = driver_version
@@ -44,7 +45,7 @@ def get_firmware(self):
 
     driver_path = self.get_driver_path('firmware_version')
 
-    with open(driver_path, 'r') as driver_file:
+    with timed_open(driver_path, 'r') as driver_file:
         return driver_file.read().strip()
 
 
@@ -60,7 +61,7 @@ def get_device_name(self):
 
     driver_path = self.get_driver_path('device_type')
 
-    with open(driver_path, 'r') as driver_file:
+    with timed_open(driver_path, 'r') as driver_file:
         return driver_file.read().strip()
 
 
@@ -2,6 +2,7 @@
 BlackWidow Ultimate 2013 effects
 """
 from openrazer_daemon.dbus_services import endpoint
+from openrazer_daemon.misc.metrics import timed_open
 
 @endpoint('razer.device.lighting.bw2013', 'getEffect', out_sig='y')
 def bw_get_effect(self):
@@ -15,7 +16,7 @@ def bw_get_effect(self):
 
     driver_path = self.get_driver_path('matrix_effect_pulsate')
 
-    with open(driver_path, 'r') as driver_file:
+    with timed_open(driver_path, 'r') as driver_file:
         brightness = int(driver_file.read().strip())
         return brightness
 
@@ -29,7 +30,7 @@ def bw_set_pulsate(self):
 
     driver_path = self.get_driver_path('matrix_effect_pulsate')
 
-    with open(driver_path, 'w') as driver_file:
+    with timed_open(driver_path, 'w') as driver_file:
         driver_file.write('1')
 
     # Notify others
@@ -45,7 +46,7 @@ def bw_set_static(self):
 
     driver_path = self.get_driver_path('matrix_effect_static')
 
-    with open(driver_path, 'w') as driver_file:
+    with timed_open(driver_path, 'w') as driver_file:
         driver_file.write('1')
 
     # Notify others
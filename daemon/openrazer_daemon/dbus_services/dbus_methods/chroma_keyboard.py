@@ -3,6 +3,7 @@ BlackWidow Chroma Effects
 """
 import os
 from openrazer_daemon.dbus_services import endpoint
+from openrazer_daemon.misc.metrics import timed_open
 
 
 @endpoint('razer.device.lighting.brightness', 'getBrightness', out_sig='d')
@@ -17,7 +18,7 @@ def get_brightness(self):
 
     driver_path = self.get_driver_path('matrix_brightness')
 
-    with open(driver_path, 'r') as driver_file:
+    with timed_open(driver_path, 'r') as driver_file:
         brightness = round(float(driver_file.read()) * (100.0/255.0), 2)
 
         self.method_args['brightness'] = brightness
@@ -45,7 +46,7 @@ def set_brightness(self, brightness):
     elif brightness < 0:
         brightness = 0
 
-    with open(driver_path, 'w') as driver_file:
+    with timed_open(driver_path, 'w') as driver_file:
         driver_file.write(str(brightness))
 
     # Notify others
@@ -64,7 +65,7 @@ def get_game_mode(self):
 
     driver_path = self.get_driver_path('game_led_state')
 
-    with open(driver_path, 'r') as driver_file:
+    with timed_open(driver_path, 'r') as driver_file:
         return driver_file.read().strip() == '1'
 
 
@@ -86,15 +87,15 @@ def set_game_mode(self, enable):
         alt_f4 = os.path.join(kb_int, 'key_alt_f4')
 
         if enable:
-            open(super_file, 'wb').write(b'\x01')
-            open(alt_tab, 'wb').write(b'\x01')
-            open(alt_f4, 'wb').write(b'\x01')
+            timed_open(super_file, 'wb').write(b'\x01')
+            timed_open(alt_tab, 'wb').write(b'\x01')
+            timed_open(alt_f4, 'wb').write(b'\x01')
         else:
-            open(super_file, 'wb').write(b'\x00')
-            open(alt_tab, 'wb').write(b'\x00')
-            open(alt_f4, 'wb').write(b'\x00')
+            timed_open(super_file, 'wb').write(b'\x00')
+            timed_open(alt_tab, 'wb').write(b'\x00')
+            timed_open(alt_f4, 'wb').write(b'\x00')
 
-    with open(driver_path, 'w') as driver_file:
+    with timed_open(driver_path, 'w') as driver_file:
         if enable:
             driver_file.write('1')
         else:
@@ -113,7 +114,7 @@ def get_macro_mode(self):
 
     driver_path = self.get_driver_path('macro_led_state')
 
-    with open(driver_path, 'r') as driver_file:
+    with timed_open(driver_path, 'r') as driver_file:
         return driver_file.read().strip() == '1'
 
 
@@ -129,7 +130,7 @@ def set_macro_mode(self, enable):
 
     driver_path = self.get_driver_path('macro_led_state')
 
-    with open(driver_path, 'w') as driver_file:
+    with timed_open(driver_path, 'w') as driver_file:
         if enable:
             driver_file.write('1')
         else:
@@ -148,7 +149,7 @@ def get_macro_effect(self):
 
     driver_path = self.get_driver_path('macro_led_effect')
 
-    with open(driver_path, 'r') as driver_file:
+    with timed_open(driver_path, 'r') as driver_file:
         return int(driver_file.read().strip())
 
 
@@ -164,7 +165,7 @@ def set_macro_effect(self, effect):
 
     driver_path = self.get_driver_path('macro_led_effect')
 
-    with open(driver_path, 'w') as driver_file:
+    with timed_open(driver_path, 'w') as driver_file:
         driver_file.write(str(int(effect)))
 
 
@@ -186,7 +187,7 @@ def set_wave_effect(self, direction):
     if direction not in self.WAVE_DIRS:
         direction = self.WAVE_DIRS[0]
 
-    with open(driver_path, 'w') as driver_file:
+    with timed_open(driver_path, 'w') as driver_file:
         driver_file.write(str(direction))
 
 
@@ -213,7 +214,7 @@ def set_static_effect(self, red, green, blue):
 
     payload = bytes([red, green, blue])
 
-    with open(driver_path, 'wb') as driver_file:
+    with timed_open(driver_path, 'wb') as driver_file:
         driver_file.write(payload)
 
 
@@ -240,7 +241,7 @@ def set_blinking_effect(self, red, green, blue):
 
     payload = bytes([red, green, blue])
 
-    with open(driver_path, 'wb') as driver_file:
+    with timed_open(driver_path, 'wb') as driver_file:
         driver_file.write(payload)
 
 
@@ -256,7 +257,7 @@ def set_spectrum_effect(self):
 
     driver_path = self.get_driver_path('matrix_effect_spectrum')
 
-    with open(driver_path, 'w') as driver_file:
+    with timed_open(driver_path, 'w') as driver_file:
         driver_file.write('1')
 
 
@@ -272,7 +273,7 @@ def set_none_effect(self):
 
     driver_path = self.get_driver_path('matrix_effect_none')
 
-    with open(driver_path, 'w') as driver_file:
+    with timed_open(driver_path, 'w') as driver_file:
         driver_file.write('1')
 
 
@@ -288,7 +289,7 @@ def trigger_reactive_effect(self):
 
     driver_path = self.get_driver_path('matrix_reactive_trigger')
 
-    with open(driver_path, 'w') as driver_file:
+    with timed_open(driver_path, 'w') as driver_file:
         driver_file.write('1')
 
 
@@ -321,7 +322,7 @@ def set_reactive_effect(self, red, green, blue, speed):
 
     payload = bytes([speed, red, green, blue])
 
-    with open(driver_path, 'wb') as driver_file:
+    with timed_open(driver_path, 'wb') as driver_file:
         driver_file.write(payload)
 
 
@@ -339,7 +340,7 @@ def set_breath_random_effect(self):
 
     payload = b'1'
 
-    with open(driver_path, 'wb') as driver_file:
+    with timed_open(driver_path, 'wb') as driver_file:
         driver_file.write(payload)
 
 
@@ -366,7 +367,7 @@ def set_breath_single_effect(self, red, green, blue):
 
     payload = bytes([red, green, blue])
 
-    with open(driver_path, 'wb') as driver_file:
+    with timed_open(driver_path, 'wb') as driver_file:
         driver_file.write(payload)
 
 
@@ -411,7 +412,7 @@ def set_breath_triple_effect(self, red1, green1, blue1, red2, green2, blue2, red
 
     payload = bytes([red1, green1, blue1, red2, green2, blue2, red3, green3, blue3])
 
-    with open(driver_path, 'wb') as driver_file:
+    with timed_open(driver_path, 'wb') as driver_file:
         driver_file.write(payload)
 
 @endpoint('razer.device.lighting.chroma', 'setBreathDual', in_sig='yyyyyy')
@@ -446,7 +447,7 @@ def set_breath_dual_effect(self, red1, green1, blue1, red2, green2, blue2):
 
     payload = bytes([red1, green1, blue1, red2, green2, blue2])
 
-    with open(driver_path, 'wb') as driver_file:
+    with timed_open(driver_path, 'wb') as driver_file:
         driver_file.write(payload)
 
 
@@ -462,7 +463,7 @@ def set_custom_effect(self):
 
     payload = b'1'
 
-    with open(driver_path, 'wb') as driver_file:
+    with timed_open(driver_path, 'wb') as driver_file:
         driver_file.write(payload)
 
 
@@ -486,7 +487,7 @@ def set_key_row(self, payload):
 
     driver_path = self.get_driver_path('matrix_custom_frame')
 
-    with open(driver_path, 'wb') as driver_file:
+    with timed_open(driver_path, 'wb') as driver_file:
         driver_file.write(payload)
 
 
@@ -536,7 +537,7 @@ def set_starlight_random_effect(self, speed):
 
     driver_path = self.get_driver_path('matrix_effect_starlight')
 
-    with open(driver_path, 'wb') as driver_file:
+    with timed_open(driver_path, 'wb') as driver_file:
         driver_file.write(bytes([speed]))
 
     # Notify others
@@ -552,7 +553,7 @@ def set_starlight_single_effect(self, speed, red, green, blue):
 
     driver_path = self.get_driver_path('matrix_effect_starlight')
 
-    with open(driver_path, 'wb') as driver_file:
+    with timed_open(driver_path, 'wb') as driver_file:
         driver_file.write(bytes([speed, red, green, blue]))
 
     # Notify others
@@ -568,7 +569,7 @@ def set_starlight_dual_effect(self, speed, red1, green1, blue1, red2, green2, bl
 
     driver_path = self.get_driver_path('matrix_effect_starlight')
 
-    with open(driver_path, 'wb') as driver_file:
+    with timed_open(driver_path, 'wb') as driver_file:
         driver_file.write(bytes([speed, red1, green1, blue1, red2, green2, blue2]))
 
     # Notify others
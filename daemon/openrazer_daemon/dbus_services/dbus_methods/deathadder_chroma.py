@@ -1,4 +1,5 @@
 from openrazer_daemon.dbus_services import endpoint
+from openrazer_daemon.misc.metrics import timed_open
 
 
 @endpoint('razer.device.lighting.backlight', 'getBacklightActive', out_sig='b')
@@ -13,7 +14,7 @@ def get_backlight_active(self):
 
     driver_path = self.get_driver_path('backlight_led_state')
 
-    with open(driver_path, 'r') as driver_file:
+    with timed_open(driver_path, 'r') as driver_file:
         active = int(driver_file.read().strip())
         return active == 1
 
@@ -30,7 +31,7 @@ def set_backlight_active(self, active):
 
     driver_path = self.get_driver_path('backlight_led_state')
 
-    with open(driver_path, 'w') as driver_file:
+    with timed_open(driver_path, 'w') as driver_file:
         if active:
             driver_file.write('1')
         else:
@@ -49,7 +50,7 @@ def get_logo_active(self):
 
     driver_path = self.get_driver_path('logo_led_state')
 
-    with open(driver_path, 'r') as driver_file:
+    with timed_open(driver_path, 'r') as driver_file:
         active = int(driver_file.read().strip())
         return active == 1
 
@@ -66,7 +67,7 @@ def set_logo_active(self, active):
 
     driver_path = self.get_driver_path('logo_led_state')
 
-    with open(driver_path, 'w') as driver_file:
+    with timed_open(driver_path, 'w') as driver_file:
         if active:
             driver_file.write('1')
         else:
@@ -85,7 +86,7 @@ def get_logo_effect(self):
 
     driver_path = self.get_driver_path('logo_led_effect')
 
-    with open(driver_path, 'r') as driver_file:
+    with timed_open(driver_path, 'r') as driver_file:
         effect = int(driver_file.read().strip())
         return effect
 
@@ -102,7 +103,7 @@ def get_logo_brightness(self):
 
     driver_path = self.get_driver_path('logo_led_brightness')
 
-    with open(driver_path, 'r') as driver_file:
+    with timed_open(driver_path, 'r') as driver_file:
         brightness = round(float(driver_file.read()) * (100.0/255.0), 2)
 
         return brightness
@@ -128,7 +129,7 @@ def set_logo_brightness(self, brightness):
     elif brightness < 0:
         brightness = 0
 
-    with open(driver_path, 'w') as driver_file:
+    with timed_open(driver_path, 'w') as driver_file:
         driver_file.write(str(brightness))
 
     # Notify others
@@ -159,7 +160,7 @@ def set_logo_static(self, red, green, blue):
 
     payload = bytes([red, green, blue])
 
-    with open(rgb_driver_path, 'wb') as rgb_driver_file, open(effect_driver_path, 'w') as effect_driver_file:
+    with timed_open(rgb_driver_path, 'wb') as rgb_driver_file, timed_open(effect_driver_path, 'w') as effect_driver_file:
         rgb_driver_file.write(payload)
         effect_driver_file.write('0')
 
@@ -188,7 +189,7 @@ def set_logo_blinking(self, red, green, blue):
 
     payload = bytes([red, green, blue])
 
-    with open(rgb_driver_path, 'wb') as rgb_driver_file, open(effect_driver_path, 'w') as effect_driver_file:
+    with timed_open(rgb_driver_path, 'wb') as rgb_driver_file, timed_open(effect_driver_path, 'w') as effect_driver_file:
         rgb_driver_file.write(payload)
         effect_driver_file.write('1')
 
@@ -217,7 +218,7 @@ def set_logo_pulsate(self, red, green, blue):
 
     payload = bytes([red, green, blue])
 
-    with open(rgb_driver_path, 'wb') as rgb_driver_file, open(effect_driver_path, 'w') as effect_driver_file:
+    with timed_open(rgb_driver_path, 'wb') as rgb_driver_file, timed_open(effect_driver_path, 'w') as effect_driver_file:
         rgb_driver_file.write(payload)
         effect_driver_file.write('2')
 
@@ -243,7 +244,7 @@ def set_logo_spectrum(self):
 
     effect_driver_path = self.get_driver_path('logo_led_effect')
 
-    with open(effect_driver_path, 'w') as effect_driver_file:
+    with timed_open(effect_driver_path, 'w') as effect_driver_file:
         effect_driver_file.write('4')
 
 
@@ -259,7 +260,7 @@ def get_scroll_active(self):
 
     driver_path = self.get_driver_path('scroll_led_state')
 
-    with open(driver_path, 'r') as driver_file:
+    with timed_open(driver_path, 'r') as driver_file:
         active = int(driver_file.read().strip())
         return active == 1
 
@@ -276,7 +277,7 @@ def set_scroll_active(self, active):
 
     driver_path = self.get_driver_path('scroll_led_state')
 
-    with open(driver_path, 'w') as driver_file:
+    with timed_open(driver_path, 'w') as driver_file:
         if active:
             driver_file.write('1')
         else:
@@ -295,7 +296,7 @@ def get_scroll_effect(self):
 
     driver_path = self.get_driver_path('scroll_led_effect')
 
-    with open(driver_path, 'r') as driver_file:
+    with timed_open(driver_path, 'r') as driver_file:
         effect = int(driver_file.read().strip())
         return effect
 
@@ -312,7 +313,7 @@ def get_scroll_brightness(self):
 
     driver_path = self.get_driver_path('scroll_led_brightness')
 
-    with open(driver_path, 'r') as driver_file:
+    with timed_open(driver_path, 'r') as driver_file:
         brightness = round(float(driver_file.read()) * (100.0/255.0), 2)
 
         return brightness
@@ -338,7 +339,7 @@ def set_scroll_brightness(self, brightness):
     elif brightness < 0:
         brightness = 0
 
-    with open(driver_path, 'w') as driver_file:
+    with timed_open(driver_path, 'w') as driver_file:
         driver_file.write(str(brightness))
 
     # Notify others
@@ -369,7 +370,7 @@ def set_scroll_static(self, red, green, blue):
 
     payload = bytes([red, green, blue])
 
-    with open(rgb_driver_path, 'wb') as rgb_driver_file, open(effect_driver_path, 'w') as effect_driver_file:
+    with timed_open(rgb_driver_path, 'wb') as rgb_driver_file, timed_open(effect_driver_path, 'w') as effect_driver_file:
         rgb_driver_file.write(payload)
         effect_driver_file.write('0')
 
@@ -398,7 +399,7 @@ def set_scroll_blinking(self, red, green, blue):
 
     payload = bytes([red, green, blue])
 
-    with open(rgb_driver_path, 'wb') as rgb_driver_file, open(effect_driver_path, 'w') as effect_driver_file:
+    with timed_open(rgb_driver_path, 'wb') as rgb_driver_file, timed_open(effect_driver_path, 'w') as effect_driver_file:
         rgb_driver_file.write(payload)
         effect_driver_file.write('1')
 
@@ -427,7 +428,7 @@ def set_scroll_pulsate(self, red, green, blue):
 
     payload = bytes([red, green, blue])
 
-    with open(rgb_driver_path, 'wb') as rgb_driver_file, open(effect_driver_path, 'w') as effect_driver_file:
+    with timed_open(rgb_driver_path, 'wb') as rgb_driver_file, timed_open(effect_driver_path, 'w') as effect_driver_file:
         rgb_driver_file.write(payload)
         effect_driver_file.write('2')
 
@@ -453,5 +454,5 @@ def set_scroll_spectrum(self):
 
     effect_driver_path = self.get_driver_path('scroll_led_effect')
 
-    with open(effect_driver_path, 'w') as effect_driver_file:
+    with timed_open(effect_driver_path, 'w') as effect_driver_file:
         effect_driver_file.write('4')
@@ -2,6 +2,7 @@
 Module for kraken methods
 """
 from openrazer_daemon.dbus_services import endpoint
+from openrazer_daemon.misc.metrics import timed_open
 
 
 @endpoint('razer.device.lighting.kraken', 'getCurrentEffect', out_sig='y')
@@ -16,7 +17,7 @@ def get_current_effect_kraken(self):
 
     driver_path = self.get_driver_path('matrix_current_effect')
 
-    with open(driver_path, 'r') as driver_file:
+    with timed_open(driver_path, 'r') as driver_file:
         return int(driver_file.read().strip(), 16)
 
 
@@ -32,7 +33,7 @@ def get_static_effect_args_kraken(self):
 
     driver_path = self.get_driver_path('matrix_effect_static')
 
-    with open(driver_path, 'rb') as driver_file:
+    with timed_open(driver_path, 'rb') as driver_file:
         bytestring = driver_file.read()
         if len(bytestring) != 4:
             raise ValueError("Response from driver is not valid, should be length 4 got: {0}".format(len(bytestring)))
@@ -52,7 +53,7 @@ def get_breath_effect_args_kraken(self):
 
     driver_path = self.get_driver_path('matrix_effect_breath')
 
-    with open(driver_path, 'rb') as driver_file:
+    with timed_open(driver_path, 'rb') as driver_file:
         bytestring = driver_file.read()
         if len(bytestring) % 4 != 0:
             raise ValueError("Response from driver is not valid, should be length 4 got: {0}".format(len(bytestring)))
@@ -97,6 +98,6 @@ def set_custom_kraken(self, rgbi):
         else:
             rgbi_list[index] = item
 
-    with open(driver_path, 'wb') as driver_file:
+    with timed_open(driver_path, 'wb') as driver_file:
         driver_file.write(bytes(rgbi_list))
 
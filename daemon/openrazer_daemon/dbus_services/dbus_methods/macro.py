@@ -45,3 +45,50 @@ def add_macro(self, macro_bind_key, macro_json):
     self.logger.debug("DBus call add_macro")
 
     self.key_manager.dbus_add_macro(macro_bind_key, macro_json)
+
+
+@endpoint('razer.device.macro', 'getMacroPolicy', in_sig='s', out_sig='s')
+def get_macro_policy(self, macro_bind_key):
+    """
+    Get what happens when a macro key is pressed while its macro is still playing
+
+    :param macro_bind_key: Macro key
+    :type macro_bind_key: str
+
+    :return: queue, restart or ignore
+    :rtype: str
+    """
+    self.logger.debug("DBus call get_macro_policy")
+
+    return self.key_manager.dbus_get_macro_policy(macro_bind_key)
+
+
+@endpoint('razer.device.macro', 'setMacroPolicy', in_sig='ss')
+def set_macro_policy(self, macro_bind_key, policy):
+    """
+    Set what happens when a macro key is pressed while its macro is still playing
+
+    queue plays it again once the current run finishes, restart stops the current run and starts again, ignore
+    drops the press
+    :param macro_bind_key: Macro key
+    :type macro_bind_key: str
+
+    :param policy: queue, restart or ignore
+    :type policy: str
+    """
+    self.logger.debug("DBus call set_macro_policy")
+
+    self.key_manager.dbus_set_macro_policy(macro_bind_key, policy)
+
+
+@endpoint('razer.device.macro', 'getMacroQueueDepth', out_sig='u')
+def get_macro_queue_depth(self):
+    """
+    Get the number of macros waiting to play
+
+    :return: Queued macros
+    :rtype: int
+    """
+    self.logger.debug("DBus call get_macro_queue_depth")
+
+    return self.key_manager.dbus_get_macro_queue_depth()
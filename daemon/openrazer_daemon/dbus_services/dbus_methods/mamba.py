@@ -4,6 +4,7 @@ BlackWidow Chroma Effects
 import math
 import struct
 from openrazer_daemon.dbus_services import endpoint
+from openrazer_daemon.misc.metrics import timed_open
 
 
 @endpoint('razer.device.power', 'getBattery', out_sig='d')
@@ -15,7 +16,7 @@ def get_battery(self):
 
     driver_path = self.get_driver_path('charge_level')
 
-    with open(driver_path, 'r') as driver_file:
+    with timed_open(driver_path, 'r') as driver_file:
         battery_255 = float(driver_file.read().strip())
         if battery_255 < 0:
             return -1.0
@@ -33,7 +34,7 @@ def is_charging(self):
 
     driver_path = self.get_driver_path('charge_status')
 
-    with open(driver_path, 'r') as driver_file:
+    with timed_open(driver_path, 'r') as driver_file:
         return bool(int(driver_file.read().strip()))
 
 
@@ -49,7 +50,7 @@ def set_idle_time(self, idle_time):
 
     driver_path = self.get_driver_path('device_idle_time')
 
-    with open(driver_path, 'w') as driver_file:
+    with timed_open(driver_path, 'w') as driver_file:
         driver_file.write(str(idle_time))
 
 
@@ -67,7 +68,7 @@ def set_low_battery_threshold(self, threshold):
 
     threshold = math.floor((threshold/100) * 255)
 
-    with open(driver_path, 'w') as driver_file:
+    with timed_open(driver_path, 'w') as driver_file:
         driver_file.write(str(threshold))
 
 
@@ -87,7 +88,7 @@ def set_charge_effect(self, charge_effect):
 
     driver_path = self.get_driver_path('charge_effect')
 
-    with open(driver_path, 'wb') as driver_file:
+    with timed_open(driver_path, 'wb') as driver_file:
         driver_file.write(bytes([charge_effect]))
 
 
@@ -111,7 +112,7 @@ def set_charge_colour(self, red, green, blue):
 
     payload = bytes([red, green, blue])
 
-    with open(driver_path, 'wb') as driver_file:
+    with timed_open(driver_path, 'wb') as driver_file:
         driver_file.write(payload)
 
 
@@ -131,7 +132,7 @@ def set_dpi_xy(self, dpi_x, dpi_y):
 
     dpi_bytes = struct.pack('>HH', dpi_x, dpi_y)
 
-    with open(driver_path, 'wb') as driver_file:
+    with timed_open(driver_path, 'wb') as driver_file:
         driver_file.write(dpi_bytes)
 
 
@@ -147,7 +148,7 @@ def get_dpi_xy(self):
 
     driver_path = self.get_driver_path('dpi')
 
-    with open(driver_path, 'r') as driver_file:
+    with timed_open(driver_path, 'r') as driver_file:
         result = driver_file.read()
         dpi_x, dpi_y = [int(dpi) for dpi in result.strip().split(':')]
 
@@ -179,7 +180,7 @@ def set_poll_rate(self, rate):
     if rate in (1000, 500, 125):
         driver_path = self.get_driver_path('poll_rate')
 
-        with open(driver_path, 'w') as driver_file:
+        with timed_open(driver_path, 'w') as driver_file:
             driver_file.write(str(rate))
     else:
         self.logger.error("Poll rate %d is invalid", rate)
@@ -197,7 +198,7 @@ def get_poll_rate(self):
 
     driver_path = self.get_driver_path('poll_rate')
 
-    with open(driver_path, 'r') as driver_file:
+    with timed_open(driver_path, 'r') as driver_file:
         result = driver_file.read()
         result = int(result.strip())
 
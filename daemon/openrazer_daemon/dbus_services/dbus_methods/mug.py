@@ -2,6 +2,7 @@
 Module for mug methods
 """
 from openrazer_daemon.dbus_services import endpoint
+from openrazer_daemon.misc.metrics import timed_open
 
 @endpoint('razer.device.misc.mug', 'isMugPresent', out_sig='b')
 def is_mug_present(self):
@@ -15,5 +16,5 @@ def is_mug_present(self):
 
     driver_path = self.get_driver_path('is_mug_present')
 
-    with open(driver_path, 'r') as driver_file:
+    with timed_open(driver_path, 'r') as driver_file:
         return int(driver_file.read().strip()) == 1
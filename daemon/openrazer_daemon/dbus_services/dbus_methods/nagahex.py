@@ -3,6 +3,7 @@ Naga Hex DPI
 """
 import struct
 from openrazer_daemon.dbus_services import endpoint
+from openrazer_daemon.misc.metrics import timed_open
 
 @endpoint('razer.device.dpi', 'setDPI', in_sig='qq')
 def set_dpi_xy_byte(self, dpi_x, dpi_y):
@@ -32,7 +33,7 @@ def set_dpi_xy_byte(self, dpi_x, dpi_y):
 
     dpi_bytes = struct.pack('>BB', dpi_x_scaled, dpi_y_scaled)
 
-    with open(driver_path, 'wb') as driver_file:
+    with timed_open(driver_path, 'wb') as driver_file:
         driver_file.write(dpi_bytes)
 
 
@@ -48,7 +49,7 @@ def get_dpi_xy_byte(self):
 
     driver_path = self.get_driver_path('dpi')
 
-    with open(driver_path, 'r') as driver_file:
+    with timed_open(driver_path, 'r') as driver_file:
         result = driver_file.read()
         dpi_x, dpi_y = [int(dpi) for dpi in result.strip().split(':')]
 
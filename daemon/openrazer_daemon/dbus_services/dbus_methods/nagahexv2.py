@@ -1,4 +1,5 @@
 from openrazer_daemon.dbus_services import endpoint
+from openrazer_daemon.misc.metrics import timed_open
 
 @endpoint('razer.device.lighting.logo', 'setLogoStatic', in_sig='yyy')
 def set_logo_static_naga_hex_v2(self, red, green, blue):
@@ -23,7 +24,7 @@ def set_logo_static_naga_hex_v2(self, red, green, blue):
 
     payload = bytes([red, green, blue])
 
-    with open(rgb_driver_path, 'wb') as rgb_driver_file:
+    with timed_open(rgb_driver_path, 'wb') as rgb_driver_file:
         rgb_driver_file.write(payload)
 
 
@@ -48,7 +49,7 @@ def set_logo_spectrum_naga_hex_v2(self):
 
     effect_driver_path = self.get_driver_path('logo_matrix_effect_spectrum')
 
-    with open(effect_driver_path, 'w') as effect_driver_file:
+    with timed_open(effect_driver_path, 'w') as effect_driver_file:
         effect_driver_file.write('1')
 
 
@@ -64,7 +65,7 @@ def set_logo_none_naga_hex_v2(self):
 
     driver_path = self.get_driver_path('logo_matrix_effect_none')
 
-    with open(driver_path, 'w') as driver_file:
+    with timed_open(driver_path, 'w') as driver_file:
         driver_file.write('1')
 
 
@@ -97,7 +98,7 @@ def set_logo_reactive_naga_hex_v2(self, red, green, blue, speed):
 
     payload = bytes([speed, red, green, blue])
 
-    with open(driver_path, 'wb') as driver_file:
+    with timed_open(driver_path, 'wb') as driver_file:
         driver_file.write(payload)
 
 
@@ -115,7 +116,7 @@ def set_logo_breath_random_naga_hex_v2(self):
 
     payload = b'1'
 
-    with open(driver_path, 'wb') as driver_file:
+    with timed_open(driver_path, 'wb') as driver_file:
         driver_file.write(payload)
 
 
@@ -142,7 +143,7 @@ def set_logo_breath_single_naga_hex_v2(self, red, green, blue):
 
     payload = bytes([red, green, blue])
 
-    with open(driver_path, 'wb') as driver_file:
+    with timed_open(driver_path, 'wb') as driver_file:
         driver_file.write(payload)
 
 
@@ -178,7 +179,7 @@ def set_logo_breath_dual_naga_hex_v2(self, red1, green1, blue1, red2, green2, bl
 
     payload = bytes([red1, green1, blue1, red2, green2, blue2])
 
-    with open(driver_path, 'wb') as driver_file:
+    with timed_open(driver_path, 'wb') as driver_file:
         driver_file.write(payload)
 
 
@@ -205,7 +206,7 @@ def set_scroll_static_naga_hex_v2(self, red, green, blue):
 
     payload = bytes([red, green, blue])
 
-    with open(rgb_driver_path, 'wb') as rgb_driver_file:
+    with timed_open(rgb_driver_path, 'wb') as rgb_driver_file:
         rgb_driver_file.write(payload)
 
 
@@ -230,7 +231,7 @@ def set_scroll_spectrum_naga_hex_v2(self):
 
     effect_driver_path = self.get_driver_path('scroll_matrix_effect_spectrum')
 
-    with open(effect_driver_path, 'w') as effect_driver_file:
+    with timed_open(effect_driver_path, 'w') as effect_driver_file:
         effect_driver_file.write('1')
 
 
@@ -246,7 +247,7 @@ def set_scroll_none_naga_hex_v2(self):
 
     driver_path = self.get_driver_path('scroll_matrix_effect_none')
 
-    with open(driver_path, 'w') as driver_file:
+    with timed_open(driver_path, 'w') as driver_file:
         driver_file.write('1')
 
 
@@ -279,7 +280,7 @@ def set_scroll_reactive_naga_hex_v2(self, red, green, blue, speed):
 
     payload = bytes([speed, red, green, blue])
 
-    with open(driver_path, 'wb') as driver_file:
+    with timed_open(driver_path, 'wb') as driver_file:
         driver_file.write(payload)
 
 
@@ -297,7 +298,7 @@ def set_scroll_breath_random_naga_hex_v2(self):
 
     payload = b'1'
 
-    with open(driver_path, 'wb') as driver_file:
+    with timed_open(driver_path, 'wb') as driver_file:
         driver_file.write(payload)
 
 
@@ -324,7 +325,7 @@ def set_scroll_breath_single_naga_hex_v2(self, red, green, blue):
 
     payload = bytes([red, green, blue])
 
-    with open(driver_path, 'wb') as driver_file:
+    with timed_open(driver_path, 'wb') as driver_file:
         driver_file.write(payload)
 
 
@@ -360,5 +361,5 @@ def set_scroll_breath_dual_naga_hex_v2(self, red1, green1, blue1, red2, green2,
 
     payload = bytes([red1, green1, blue1, red2, green2, blue2])
 
-    with open(driver_path, 'wb') as driver_file:
+    with timed_open(driver_path, 'wb') as driver_file:
         driver_file.write(payload)
@@ -2,6 +2,7 @@
 Tartarus Chroma Effects
 """
 from openrazer_daemon.dbus_services import endpoint
+from openrazer_daemon.misc.metrics import timed_open
 
 @endpoint('razer.device.lighting.profile_led', 'getRedLED', out_sig='b')
 def tartarus_get_profile_led_red(self):
@@ -15,7 +16,7 @@ def tartarus_get_profile_led_red(self):
 
     driver_path = self.get_driver_path('profile_led_red')
 
-    with open(driver_path, 'r') as driver_file:
+    with timed_open(driver_path, 'r') as driver_file:
         return driver_file.read().strip() == '1'
 
 
@@ -31,7 +32,7 @@ def tartarus_set_profile_led_red(self, enable):
 
     driver_path = self.get_driver_path('profile_led_red')
 
-    with open(driver_path, 'w') as driver_file:
+    with timed_open(driver_path, 'w') as driver_file:
         if enable:
             driver_file.write('1')
         else:
@@ -50,7 +51,7 @@ def tartarus_get_profile_led_green(self):
 
     driver_path = self.get_driver_path('profile_led_green')
 
-    with open(driver_path, 'r') as driver_file:
+    with timed_open(driver_path, 'r') as driver_file:
         return driver_file.read().strip() == '1'
 
 
@@ -66,7 +67,7 @@ def tartarus_set_profile_led_green(self, enable):
 
     driver_path = self.get_driver_path('profile_led_green')
 
-    with open(driver_path, 'w') as driver_file:
+    with timed_open(driver_path, 'w') as driver_file:
         if enable:
             driver_file.write('1')
         else:
@@ -85,7 +86,7 @@ def tartarus_get_profile_led_blue(self):
 
     driver_path = self.get_driver_path('profile_led_blue')
 
-    with open(driver_path, 'r') as driver_file:
+    with timed_open(driver_path, 'r') as driver_file:
         return driver_file.read().strip() == '1'
 
 
@@ -101,7 +102,7 @@ def tartarus_set_profile_led_blue(self, enable):
 
     driver_path = self.get_driver_path('profile_led_blue')
 
-    with open(driver_path, 'w') as driver_file:
+    with timed_open(driver_path, 'w') as driver_file:
         if enable:
             driver_file.write('1')
         else:
@@ -9,6 +9,8 @@ import types
 import dbus
 import dbus.service
 
+from openrazer_daemon.misc.metrics import SENDER_KEYWORD
+
 
 def copy_func(function_reference, name=None):
     """
@@ -65,6 +67,8 @@ class DBusService(dbus.service.Object):
     Allows for dynamic method adding
     """
     BUS_TYPE = 'session'
+    # Set to a openrazer_daemon.misc.metrics.MetricsRegistry before adding methods to record endpoint metrics
+    METRICS = None
 
     def __init__(self, bus_name, object_path):
         """
@@ -109,12 +113,25 @@ class DBusService(dbus.service.Object):
         :type byte_arrays: bool
         """
 
+        self.register_dbus_method(interface_name, function_name)
+
+        source = (interface_name, function_name, in_signature, out_signature, byte_arrays, DBusService.METRICS)
+        if self._reuse_generated(source, function):
+            return
+
         # Get class key for use in the DBus introspection table
-        class_key = [key for key in self._dbus_class_table.keys() if key.endswith(self.__class__.__name__)][0]
+        class_key = self._get_class_key()
 
         # Create a copy of the function so that if its used multiple times it wont affect other instances if the names changed
         function_deepcopy = copy_func(function, function_name)
-        func = dbus.service.method(interface_name, in_signature=in_signature, out_signature=out_signature, byte_arrays=byte_arrays)(function_deepcopy)
+        sender_keyword = None
+
+        if DBusService.METRICS is not None:
+            function_deepcopy = DBusService.METRICS.instrument(function_deepcopy, interface_name, function_name)
+            sender_keyword = SENDER_KEYWORD
+
+        function_deepcopy = self.wrap_dbus_method(function_deepcopy, interface_name, function_name)
+        func = dbus.service.method(interface_name, in_signature=in_signature, out_signature=out_signature, byte_arrays=byte_arrays, sender_keyword=sender_keyword)(function_deepcopy)
 
         # Add method to DBus tables
         try:
@@ -124,6 +141,106 @@ class DBusService(dbus.service.Object):
 
         # Add method to class as DBus expects it to be there.
         setattr(self.__class__, function_name, func)
+        self._set_generated(source, function)
+
+    def _get_class_key(self):
+        """
+        Get the key of the object's class in the DBus introspection table
+        """
+        return [key for key in self._dbus_class_table.keys() if key.endswith(self.__class__.__name__)][0]
+
+    def _generated(self):
+        """
+        Get the methods generated for the object's class
+
+        The DBus tables and methods are kept in the class so every instance shares them, once a method has been
+        generated for one instance the rest reuse it instead of making their own.
+
+        :return: (interface, name): (arguments it was generated with, code it was generated from)
+        :rtype: dict
+        """
+        generated = self.__class__.__dict__.get('_dbus_generated')
+        if generated is None:
+            generated = {}
+            setattr(self.__class__, '_dbus_generated', generated)
+        return generated
+
+    def _reuse_generated(self, source, function):
+        """
+        If the class already has this method generated from the same function
+
+        Functions with a closure aren't reused as each instance could have different values in it.
+        """
+        if getattr(function, '__closure__', None) is not None:
+            return False
+        return self._generated().get(source[:2]) == (source, getattr(function, '__code__', None))
+
+    def _set_generated(self, source, function):
+        self._generated()[source[:2]] = (source, getattr(function, '__code__', None))
+
+    def register_dbus_method(self, interface_name, function_name):
+        """
+        Hook for subclasses to note each method added to the instance, whether it was generated or reused
+
+        :param interface_name: DBus interface name
+        :type interface_name: str
+
+        :param function_name: DBus function name
+        :type function_name: str
+        """
+
+    def wrap_dbus_method(self, function, interface_name, function_name):
+        """
+        Hook for subclasses to wrap methods as they are added to DBus
+
+        :param function: Function taking the DBus object as the first argument
+        :type function: func
+
+        :param interface_name: DBus interface name
+        :type interface_name: str
+
+        :param function_name: DBus function name
+        :type function_name: str
+
+        :return: Function to add
+        :rtype: func
+        """
+        return function
+
+    def add_dbus_signal(self, interface_name, signal_name, function, signature=None):
+        """
+        Add signal to DBus Object
+
+        Calling the added method on the object emits the signal with the arguments given.
+
+        :param interface_name: DBus interface name
+        :type interface_name: str
+
+        :param signal_name: DBus signal name
+        :type signal_name: str
+
+        :param function: Function reference, ran before the signal is sent
+        :type function: object
+
+        :param signature: DBus signal signature
+        :type signature: str
+        """
+        source = (interface_name, signal_name, signature)
+        if self._reuse_generated(source, function):
+            return
+
+        class_key = self._get_class_key()
+
+        function_deepcopy = copy_func(function, signal_name)
+        func = dbus.service.signal(interface_name, signature=signature)(function_deepcopy)
+
+        try:
+            self._dbus_class_table[class_key][interface_name][signal_name] = func
+        except KeyError:
+            self._dbus_class_table[class_key][interface_name] = {signal_name: func}
+
+        setattr(self.__class__, signal_name, func)
+        self._set_generated(source, function)
 
     def del_dbus_method(self, interface_name, function_name):
         """
@@ -137,7 +254,8 @@ class DBusService(dbus.service.Object):
         """
 
         # Get class key for use in the DBus introspection table
-        class_key = [key for key in self._dbus_class_table.keys() if key.endswith(self.__class__.__name__)][0]
+        class_key = self._get_class_key()
+        self._generated().pop((interface_name, function_name), None)
 
         # Remove method from DBus tables
         # Remove method from class
@@ -1,18 +1,57 @@
 """
 Class to hold a device and collections of them
 """
+import collections
+import concurrent.futures
+import logging
+import threading
+import time
+
+from openrazer_daemon.misc.effect_coalescer import EffectCoalescer, effect_family
+from openrazer_daemon.misc.effect_sync import get_effect_table
+from openrazer_daemon.misc.io_worker import IOWorker
+
+# Seconds a device can spend on a synced effect before it is reported as stalled
+SYNC_TIMEOUT = 2.0
+
+
+def _sync_key(msg):
+    """
+    Get what a message replaces earlier messages by, its source and effect family
+    """
+    if len(msg) > 2 and msg[0] == 'effect':
+        return msg[1], effect_family(msg[2])
+    # Anything else is never replaced
+    return id(msg)
 
 
 class Device(object):
     """
     Razer Device (High level not dbus)
+
+    There is one per device for the life of the daemon so it has slots instead of a __dict__
     """
+    __slots__ = ('_parent', '_id', '_serial', '_dbus', '_io_worker', '_logger', '_sync_lock', '_sync_future',
+                 '_sync_start', '_sync_pending', '_sync_stalled', '_is_closed', 'sync_replaced')
+
     def __init__(self, device_id, device_serial, device_dbus_object):
         self._parent = None
 
         self._id = device_id
         self._serial = device_serial
         self._dbus = device_dbus_object
+        self._io_worker = None
+
+        self._logger = logging.getLogger('razer.device.{0}'.format(device_serial))
+        self._sync_lock = threading.RLock()
+        self._sync_future = None
+        self._sync_start = 0
+        # (source, effect family): latest message, in the order they were last sent
+        self._sync_pending = collections.OrderedDict()
+        self._sync_stalled = False
+        self._is_closed = False
+        self.sync_replaced = 0
+
         # Register as parent
         self._dbus.register_parent(self)
 
@@ -44,6 +83,30 @@ class Device(object):
         """
         return self._dbus
 
+    @property
+    def io_worker(self):
+        """
+        Device's I/O worker, created on first use
+
+        :return: Worker which serialises blocking calls to the device
+        :rtype: openrazer_daemon.misc.io_worker.IOWorker
+        """
+        if self._io_worker is None:
+            self._io_worker = IOWorker(self._serial)
+        return self._io_worker
+
+    def close(self):
+        """
+        Stop the I/O worker if one was started
+        """
+        with self._sync_lock:
+            self._is_closed = True
+            self._sync_pending.clear()
+
+        if self._io_worker is not None:
+            self._io_worker.close()
+            self._io_worker = None
+
     def register_parent(self, parent):
         """
         Register the parent as an observer to be optionally notified (sends to other devices)
@@ -72,16 +135,114 @@ class Device(object):
         # Message from DBus object
         self._dbus.notify(msg)
 
+    @property
+    def sync_stalled(self):
+        """
+        If the device has been busy with a synced effect for longer than the timeout
+
+        :return: Stalled
+        :rtype: bool
+        """
+        return self._sync_stalled
+
+    def sync_child(self, msg, timeout=SYNC_TIMEOUT):
+        """
+        Deliver a message on the device's I/O worker
+
+        Only one message is run at a time. Messages sent while one is running are kept per source and effect family,
+        a later message replaces an earlier one of the same family from the same source. They are run in order once it
+        finishes, so a slow or sleeping device never builds up a backlog and still ends up with the last of each.
+
+        :param msg: Tuple with first element a string
+        :type msg: tuple
+
+        :param timeout: Seconds the running message can take before the device is reported as stalled
+        :type timeout: float
+        """
+        with self._sync_lock:
+            if self._is_closed:
+                return
+
+            if self._sync_future is None:
+                self._start_sync(msg)
+                return
+
+            key = _sync_key(msg)
+            if key in self._sync_pending:
+                self.sync_replaced += 1
+                del self._sync_pending[key]
+            self._sync_pending[key] = msg
+
+            if not self._sync_stalled and time.monotonic() - self._sync_start > timeout:
+                self._sync_stalled = True
+                self._logger.warning("Device has not finished syncing an effect after %.1fs, only the latest of each effect is kept", timeout)
+
+    def _start_sync(self, msg):
+        """
+        Submit a message to the I/O worker, called with the sync lock held
+        """
+        self._sync_start = time.monotonic()
+        try:
+            self._sync_future = self.io_worker.submit(self.notify_child, msg)
+        except RuntimeError:
+            # Closed
+            self._sync_future = None
+            return
+
+        self._sync_future.add_done_callback(self._sync_done)
+
+    def _sync_done(self, future):
+        """
+        Run the message that came in while the last one was running, if any
+        """
+        if future.exception() is not None:
+            self._logger.error("Failed to sync effect: %s", future.exception())
+
+        with self._sync_lock:
+            if self._sync_stalled:
+                self._logger.info("Device finished syncing after %.1fs", time.monotonic() - self._sync_start)
+                self._sync_stalled = False
+
+            self._sync_future = None
+            if self._sync_pending and not self._is_closed:
+                _, msg = self._sync_pending.popitem(last=False)
+                self._start_sync(msg)
+
 
 class DeviceCollection(object):
     """
     Multimap of devices
 
     Can be referenced by either ID or serial
+
+    Effect events sent between devices can be coalesced so only the latest per (device, effect family) goes out in
+    each window. They are run on each receiving device's I/O worker so the sender doesnt wait for the other devices.
     """
-    def __init__(self):
+    def __init__(self, sync_window=0, sync_timeout=SYNC_TIMEOUT):
+        """
+        :param sync_window: Seconds to coalesce effect events over, 0 to send every event as it comes
+        :type sync_window: float
+
+        :param sync_timeout: Seconds a device can take to run an effect event before it is reported as stalled
+        :type sync_timeout: float
+        """
         self._id_map = {}
         self._serial_map = {}
+        self._sync_timeout = sync_timeout
+
+        self._coalescer = None
+        if sync_window > 0:
+            self._coalescer = EffectCoalescer(sync_window, self._deliver)
+
+    @property
+    def coalescer(self):
+        """
+        Effect event coalescer
+
+        :return: Coalescer or None if events aren't coalesced
+        :rtype: openrazer_daemon.misc.effect_coalescer.EffectCoalescer or None
+        """
+        return self._coalescer
 
     def add(self, device_id, device_serial, device_dbus):
         """
@@ -99,6 +260,13 @@ class DeviceCollection(object):
         device_object = Device(device_id, device_serial, device_dbus)
         device_object.register_parent(self)
 
+        # Compile effect sync tables between the new device and the rest both ways
+        device_class = type(device_dbus)
+        for other in self._id_map.values():
+            other_class = type(other.dbus)
+            get_effect_table(device_class, other_class)
+            get_effect_table(other_class, device_class)
+
         self._id_map[device_id] = device_object
         self._serial_map[device_serial] = device_object
 
@@ -189,12 +357,16 @@ class DeviceCollection(object):
         """
         if key in self._id_map:
             serial = self._id_map[key].serial
-            self._id_map.pop(key, None)
+            device = self._id_map.pop(key, None)
             self._serial_map.pop(serial, None)
         elif key in self._serial_map:
             device_id = self._serial_map[key].device_id
             self._id_map.pop(device_id, None)
-            self._serial_map.pop(key, None)
+            device = self._serial_map.pop(key, None)
+        else:
+            return
+
+        device.close()
 
     def __contains__(self, item):
         """
@@ -227,6 +399,35 @@ class DeviceCollection(object):
         """
         return list(self._id_map.values())
 
+    def call_all(self, method_name, timeout=None):
+        """
+        Call a method on every device's DBus object at the same time
+
+        Each call runs on the device's I/O worker, a device which does not finish within the timeout is reported as
+        failed but its call is left to complete in the background.
+
+        :param method_name: Name of the method on the DBus object, e.g. suspend_device
+        :type method_name: str
+
+        :param timeout: Seconds to wait for the devices
+        :type timeout: float or None
+
+        :return: Dict of serial: exception for devices that failed or timed out
+        :rtype: dict
+        """
+        futures = {}
+        for device in self._id_map.values():
+            futures[device.io_worker.submit(getattr(device.dbus, method_name))] = device.serial
+
+        done, not_done = concurrent.futures.wait(futures, timeout=timeout)
+
+        errors = {futures[future]: concurrent.futures.TimeoutError() for future in not_done}
+        for future in done:
+            if future.exception() is not None:
+                errors[futures[future]] = future.exception()
+
+        return errors
+
     def notify(self, active_child, msg):
         """
         Send messages between children
@@ -237,6 +438,33 @@ class DeviceCollection(object):
         :param msg: Messgae
         :type msg: tuple
         """
-        for child in self._id_map.values():
+        if msg[0] != 'effect':
+            for child in list(self._id_map.values()):
+                if child is not active_child:
+                    child.notify_child(msg)
+        elif self._coalescer is not None:
+            self._coalescer.submit((active_child, effect_family(msg[2])), msg)
+        else:
+            self._deliver((active_child,), msg)
+
+    def _deliver(self, key, msg):
+        """
+        Queue an effect event on every child but the one it came from
+
+        :param key: Tuple starting with the child sending the message
+        :type key: tuple
+
+        :param msg: Message
+        :type msg: tuple
+        """
+        active_child = key[0]
+        for child in list(self._id_map.values()):
             if child is not active_child:
-                child.notify_child(msg)
+                child.sync_child(msg, self._sync_timeout)
+
+    def close(self):
+        """
+        Send any held effect events
+        """
+        if self._coalescer is not None:
+            self._coalescer.close()
@@ -8,10 +8,24 @@ import logging
 import time
 import json
 import random
+import threading
+import configparser
+
+import dbus
 
 from openrazer_daemon.dbus_services.service import DBusService
+from openrazer_daemon.device import Device, DeviceCollection
 import openrazer_daemon.dbus_services.dbus_methods
 from openrazer_daemon.misc import effect_sync
+from openrazer_daemon.misc.battery_telemetry import BatteryMonitor
+from openrazer_daemon.misc.device_profile import DeviceProfile, DEFAULT_ORDER
+from openrazer_daemon.misc.device_snapshot import DeviceSnapshot
+from openrazer_daemon.misc.device_state import DeviceState, STATE_INTERFACE, wrap as wrap_state_method
+from openrazer_daemon.misc.frame_ring import FrameRing
+from openrazer_daemon.misc.memory_report import component_sizes, deep_size, logger_sizes
+from openrazer_daemon.misc.metrics import MetricsRegistry, timed_open
+from openrazer_daemon.misc.timer_service import TimerService
+from openrazer_daemon.misc.transition import DeviceTransitions, DEFAULT_RATE as DEFAULT_TRANSITION_RATE
 
 
 # pylint: disable=too-many-instance-attributes
@@ -27,6 +41,15 @@ class RazerDevice(DBusService):
 
     EVENT_FILE_REGEX = None
 
+    # ProfileStore shared by all devices, set by the daemon. Saved profiles aren't kept across restarts without one
+    PROFILE_STORE = None
+    # Properties and effect families in the order profiles write them
+    PROFILE_ORDER = DEFAULT_ORDER
+    # SnapshotStore shared by all devices, set by the daemon. Device state isn't restored after restarts without one
+    SNAPSHOT_STORE = None
+    # Steps per second brightness and colour transitions aim for
+    TRANSITION_RATE = DEFAULT_TRANSITION_RATE
+
     USB_VID = None
     USB_PID = None
     HAS_MATRIX = False
@@ -51,7 +74,8 @@ class RazerDevice(DBusService):
 
         self._observer_list = []
         self._effect_sync_propagate_up = False
-        self._disable_notifications = False
+        # Thread local, a synced effect or fade step on the I/O worker doesnt silence DBus calls on the main loop
+        self._notifications = threading.local()
         self.additional_interfaces = []
         if additional_interfaces is not None:
             self.additional_interfaces.extend(additional_interfaces)
@@ -66,6 +90,15 @@ class RazerDevice(DBusService):
         self._effect_sync = effect_sync.EffectSync(self, device_number)
 
         self._is_closed = False
+        self._frame_ring = None
+        self._battery_monitor = None
+        self.device_state = DeviceState(self, device_number)
+        self._profile_lock = threading.Lock()
+        self._saved_profiles = None
+        self._snapshot = DeviceSnapshot(self, device_number, self.SNAPSHOT_STORE)
+        self.device_state.on_change = self._snapshot.changed
+        self._transitions = DeviceTransitions(self, device_number, self.TRANSITION_RATE)
+        self.device_state.on_write = self._transitions.superseded
 
         # Find event files in /dev/input/by-id/ by matching against regex
         self.event_files = []
@@ -98,6 +131,7 @@ class RazerDevice(DBusService):
             ('razer.device.misc', 'getVidPid', self.get_vid_pid, None, 'ai'),
             ('razer.device.misc', 'getDriverVersion', openrazer_daemon.dbus_services.dbus_methods.version, None, 's'),
             ('razer.device.misc', 'hasDedicatedMacroKeys', self.dedicated_macro_keys, None, 'b'),
+            ('razer.device.misc', 'getMemoryReport', self.get_memory_report, None, 's'),
         }
 
         for m in methods:
@@ -107,6 +141,43 @@ class RazerDevice(DBusService):
         # Load additional DBus methods
         self.load_methods()
 
+        # Devices which take custom frames can also take them through shared memory
+        if 'set_key_row' in self.METHODS:
+            self.logger.debug("Adding razer.device.lighting.chroma.getFrameRing method to DBus")
+            self.add_dbus_method('razer.device.lighting.chroma', 'getFrameRing', self.get_frame_ring, None, 'hhuu')
+
+        self.logger.debug("Adding %s.getState method to DBus", STATE_INTERFACE)
+        self.add_dbus_method(STATE_INTERFACE, 'getState', self.get_state, None, 'a{sv}')
+        self.add_dbus_signal(STATE_INTERFACE, 'PropertiesChanged', self.properties_changed, 'a{sv}')
+
+        profile_methods = (
+            ('razer.device.profile', 'getProfile', self.get_profile, None, 's'),
+            ('razer.device.profile', 'applyProfile', self.apply_profile, 's', 's'),
+            ('razer.device.profile', 'saveProfile', self.save_profile, 'ss', None),
+            ('razer.device.profile', 'applySavedProfile', self.apply_saved_profile, 's', 's'),
+            ('razer.device.profile', 'getSavedProfiles', self.get_saved_profiles, None, 'as'),
+            ('razer.device.profile', 'deleteSavedProfile', self.delete_saved_profile, 's', None),
+        )
+        for m in profile_methods:
+            self.logger.debug("Adding {}.{} method to DBus".format(m[0], m[1]))
+            self.add_dbus_method(m[0], m[1], m[2], in_signature=m[3], out_signature=m[4])
+
+        # Fades done in the daemon so clients make one call instead of one per step
+        if 'brightness' in self.device_state.settable:
+            self.logger.debug("Adding razer.device.lighting.brightness.setBrightnessTransition method to DBus")
+            self.add_dbus_method('razer.device.lighting.brightness', 'setBrightnessTransition', self.set_brightness_transition, 'du', None)
+        if 'set_static_effect' in self.METHODS:
+            self.logger.debug("Adding razer.device.lighting.chroma.setStaticTransition method to DBus")
+            self.add_dbus_method('razer.device.lighting.chroma', 'setStaticTransition', self.set_static_transition, 'yyyu', None)
+
+        # Wireless devices keep a battery history and signal changes so clients dont have to poll
+        if 'get_battery' in self.METHODS and 'is_charging' in self.METHODS:
+            self.logger.debug("Adding razer.device.power.getBatteryHistory method to DBus")
+            self.add_dbus_method('razer.device.power', 'getBatteryHistory', self.get_battery_history, 'dd', 'adadab')
+            self.add_dbus_signal('razer.device.power', 'batteryThresholdCrossed', self.battery_threshold_crossed, 'dby')
+            self.add_dbus_signal('razer.device.power', 'chargingChanged', self.charging_changed, 'bd')
+            self._battery_monitor = BatteryMonitor(self, device_number)
+
     def send_effect_event(self, effect_name, *args):
         """
         Send effect event
@@ -154,22 +225,24 @@ class RazerDevice(DBusService):
     @property
     def disable_notify(self):
         """
-        Disable notifications flag
+        Disable notifications flag, for the calling thread only
 
         :return: Flag
         :rtype: bool
         """
-        return self._disable_notifications
+        return getattr(self._notifications, 'disabled', False)
 
     @disable_notify.setter
     def disable_notify(self, value):
         """
-        Set the disable notifications flag
+        Set the disable notifications flag for the calling thread
+
+        Effects set by the thread while it is set aren't sent to observers, other threads still send theirs.
 
         :param value: Disable
         :type value: bool
         """
-        self._disable_notifications = value
+        self._notifications.disabled = value
 
     def get_driver_path(self, driver_filename):
         """
@@ -226,7 +299,7 @@ class RazerDevice(DBusService):
         :rtype: str
         """
         device_mode_path = os.path.join(self._device_path, 'device_mode')
-        with open(device_mode_path, 'r') as mode_file:
+        with timed_open(device_mode_path, 'r') as mode_file:
             count = 0
             mode = mode_file.read().strip()
             while len(mode) == 0:
@@ -250,7 +323,7 @@ class RazerDevice(DBusService):
         :type param: int
         """
         device_mode_path = os.path.join(self._device_path, 'device_mode')
-        with open(device_mode_path, 'wb') as mode_file:
+        with timed_open(device_mode_path, 'wb') as mode_file:
 
             # Do some validation (even though its in the driver)
             if mode_id not in (0, 3):
@@ -273,6 +346,336 @@ class RazerDevice(DBusService):
     def get_image_json(self):
         return json.dumps(self.RAZER_URLS)
 
+    def get_frame_ring(self):
+        """
+        Get a shared memory frame ring
+
+        A ring has one writer, so each call makes a new ring and the ring handed out before is closed. The previous
+        writer sees the closed flag on its next frame.
+
+        :return: Memory fd, notification fd, slot size, slot count
+        :rtype: tuple
+        """
+        rows, cols = self.MATRIX_DIMS
+        slot_size = rows * (3 + cols * 3)
+        ring = FrameRing('device{0}'.format(self._device_number), slot_size, self._present_ring_frame)
+
+        previous, self._frame_ring = self._frame_ring, ring
+        if previous is not None:
+            previous.close()
+            self.logger.info("Handed frame ring over to a new writer, %d slots of %d bytes", ring.slot_count, slot_size)
+        else:
+            self.logger.info("Created frame ring, %d slots of %d bytes", ring.slot_count, slot_size)
+
+        return dbus.types.UnixFd(ring.memory_fd), dbus.types.UnixFd(ring.notify_fd), ring.slot_size, ring.slot_count
+
+    def get_state(self):
+        """
+        Get the device's state, properties not read yet are read from the device
+
+        :return: Property name: value
+        :rtype: dict
+        """
+        return self.device_state.get()
+
+    def properties_changed(self, changed):
+        """
+        Signal sent when properties of the device's state change
+
+        :param changed: Property name: new value
+        :type changed: dict
+        """
+
+    def get_profile(self):
+        """
+        Get the device's current state as a profile, properties not read yet are read from the device
+
+        :return: Profile JSON
+        :rtype: str
+        """
+        state = self.device_state
+        properties = {name: value for name, value in state.get().items() if name in state.settable}
+
+        macros = None
+        if getattr(self, 'key_manager', None) is not None:
+            macros = json.loads(self.key_manager.dbus_get_macros())
+
+        return DeviceProfile(properties, state.effects, macros).to_json()
+
+    def apply_profile(self, profile_json):
+        """
+        Put the device in the state a profile describes, only what differs from the current state is written
+
+        :param profile_json: Profile JSON, as returned by getProfile
+        :type profile_json: str
+
+        :return: JSON of writes, skipped (writes not needed), written and unsupported (profile keys the device can't set)
+        :rtype: str
+
+        :raises ValueError: If the profile is invalid
+        """
+        result = self.apply_profile_object(DeviceProfile.from_json(profile_json))
+
+        self.logger.info("Applied profile, %d writes, %d skipped", result['writes'], result['skipped'])
+        return json.dumps(result)
+
+    def apply_profile_object(self, profile):
+        """
+        Apply a profile, one at a time
+
+        :param profile: Profile
+        :type profile: openrazer_daemon.misc.device_profile.DeviceProfile
+
+        :return: Dict of writes, skipped, written and unsupported
+        :rtype: dict
+        """
+        with self._profile_lock:
+            return profile.apply(self, self.PROFILE_ORDER)
+
+    def restore_snapshot(self):
+        """
+        Put the device back in the state it was last in, from the snapshot store
+        """
+        try:
+            self._snapshot.restore()
+        except Exception as err:
+            self.logger.exception("Failed to restore snapshot", exc_info=err)
+
+    def set_brightness_transition(self, brightness, duration):
+        """
+        Fade the brightness to a value, the brightness is only signalled and synced to other devices once it gets there
+
+        :param brightness: Brightness
+        :type brightness: float
+
+        :param duration: Milliseconds
+        :type duration: int
+        """
+        self._transitions.brightness(brightness, duration)
+
+    def set_static_transition(self, red, green, blue, duration):
+        """
+        Fade to a static colour, from the current static colour or black if the effect isn't static
+
+        :param red: Red component
+        :type red: int
+
+        :param green: Green component
+        :type green: int
+
+        :param blue: Blue component
+        :type blue: int
+
+        :param duration: Milliseconds
+        :type duration: int
+        """
+        self._transitions.static(red, green, blue, duration)
+
+    def _get_saved_profiles(self):
+        """
+        Get the saved profiles, loaded from the profile store on first use
+        """
+        if self._saved_profiles is None:
+            self._saved_profiles = {}
+            if self.PROFILE_STORE is not None:
+                self._saved_profiles.update(self.PROFILE_STORE.load(self.serial))
+
+        return self._saved_profiles
+
+    def _profiles_changed(self):
+        if self.PROFILE_STORE is not None:
+            self.PROFILE_STORE.save(self.serial, self._saved_profiles)
+
+    def save_profile(self, name, profile_json):
+        """
+        Save a profile under a name
+
+        :param name: Profile name
+        :type name: str
+
+        :param profile_json: Profile JSON, empty to save the device's current state
+        :type profile_json: str
+
+        :raises ValueError: If the profile is invalid
+        """
+        profile = DeviceProfile.from_json(profile_json or self.get_profile())
+
+        with self._profile_lock:
+            self._get_saved_profiles()[str(name)] = profile.to_dict()
+            self._profiles_changed()
+
+    def apply_saved_profile(self, name):
+        """
+        Apply a saved profile
+
+        :param name: Profile name
+        :type name: str
+
+        :return: JSON of writes, skipped (writes not needed), written and unsupported (profile keys the device can't set)
+        :rtype: str
+
+        :raises ValueError: If there is no profile with that name
+        """
+        with self._profile_lock:
+            data = self._get_saved_profiles().get(name)
+
+        if data is None:
+            raise ValueError("No profile named {0}".format(name))
+
+        result = self.apply_profile_object(DeviceProfile.from_dict(data))
+
+        self.logger.info("Applied profile %s, %d writes, %d skipped", name, result['writes'], result['skipped'])
+        return json.dumps(result)
+
+    def get_saved_profiles(self):
+        """
+        Get the names of the saved profiles
+
+        :return: Profile names
+        :rtype: list of str
+        """
+        with self._profile_lock:
+            return sorted(self._get_saved_profiles())
+
+    def delete_saved_profile(self, name):
+        """
+        Delete a saved profile
+
+        :param name: Profile name
+        :type name: str
+        """
+        with self._profile_lock:
+            if self._get_saved_profiles().pop(name, None) is not None:
+                self._profiles_changed()
+
+    def wrap_dbus_method(self, function, interface_name, function_name):
+        """
+        Keep the device state up to date when getters and setters are called
+        """
+        return wrap_state_method(function, interface_name, function_name)
+
+    def register_dbus_method(self, interface_name, function_name):
+        """
+        Note the properties and effects the device can get and set
+        """
+        self.device_state.register(interface_name, function_name)
+
+    def get_memory_report(self):
+        """
+        Get an estimate of the memory the device uses, by component
+
+        Objects shared by components are counted in the first one listed. The method table is shared by every device
+        of the same class so it is reported apart from the device's own total.
+
+        :return: JSON of components (name: bytes), total and shared (method_table bytes and methods)
+        :rtype: str
+        """
+        parent = self._parent
+        # Walks stop at other devices and at what every device shares, the bus, config, metrics and timers
+        boundaries = (RazerDevice, Device, DeviceCollection, effect_sync.EffectSync, dbus.connection.Connection, dbus.service.BusName,
+                      configparser.RawConfigParser, MetricsRegistry, TimerService)
+
+        components = component_sizes((
+            ('state', self.device_state),
+            ('snapshot', self._snapshot),
+            ('effect_sync', self._effect_sync),
+            ('transitions', self._transitions),
+            ('frame_ring', self._frame_ring),
+            ('battery', self._battery_monitor),
+            ('key_manager', getattr(self, 'key_manager', None)),
+            ('io_worker', getattr(parent, '_io_worker', None)),
+            ('wrapper', parent),
+            ('device', self),
+        ), boundaries=boundaries)
+        components['loggers'] = (logger_sizes('razer.device{0}'.format(self._device_number)) +
+                                 logger_sizes('razer.device.{0}'.format(self.serial)) +
+                                 logger_sizes('razer.ioworker.{0}'.format(self.serial)))
+
+        method_table = self._dbus_class_table[self._get_class_key()]
+
+        return json.dumps({
+            'components': components,
+            'total': sum(components.values()),
+            'shared': {
+                'method_table': deep_size(method_table, boundaries=boundaries),
+                'methods': sum(len(methods) for methods in method_table.values()),
+            },
+        })
+
+    def get_battery_history(self, start, end):
+        """
+        Get the battery samples taken between two times
+
+        :param start: Seconds since the epoch, 0 for the oldest sample
+        :type start: float
+
+        :param end: Seconds since the epoch, 0 for the newest sample
+        :type end: float
+
+        :return: Sample times, battery levels in percent and charging states, oldest first
+        :rtype: tuple
+        """
+        return self._battery_monitor.telemetry.get_range(start, end)
+
+    def battery_threshold_crossed(self, level, charging, threshold):
+        """
+        Signal sent when the battery level goes past a threshold
+
+        :param level: Battery level in percent
+        :type level: float
+
+        :param charging: If the device is charging
+        :type charging: bool
+
+        :param threshold: Threshold in percent
+        :type threshold: int
+        """
+
+    def charging_changed(self, charging, level):
+        """
+        Signal sent when the device starts or stops charging
+
+        :param charging: If the device is charging
+        :type charging: bool
+
+        :param level: Battery level in percent
+        :type level: float
+        """
+
+    @property
+    def battery_telemetry(self):
+        """
+        Get the battery history kept for a wireless device
+
+        :return: Telemetry or None if the device has no battery
+        :rtype: openrazer_daemon.misc.battery_telemetry.BatteryTelemetry or None
+        """
+        if self._battery_monitor is None:
+            return None
+        return self._battery_monitor.telemetry
+
+    @property
+    def io_worker(self):
+        """
+        Get the I/O worker of the device this object belongs to
+
+        :return: I/O worker or None if no device has been registered
+        :rtype: openrazer_daemon.misc.io_worker.IOWorker or None
+        """
+        if self._parent is None:
+            return None
+        return self._parent.io_worker
+
+    def _present_ring_frame(self, payload):
+        """
+        Display a frame from the frame ring, ran on the frame ring's thread
+
+        :param payload: Driver payload as would be given to setKeyRow
+        :type payload: bytes
+        """
+        self.setKeyRow(payload)
+        self.setCustom()
+
     def load_methods(self):
         """
         Load DBus methods
@@ -299,7 +702,9 @@ class RazerDevice(DBusService):
         Suspend device
         """
         self.logger.info("Suspending %s", self.__class__.__name__)
+        self._snapshot.suspend()
         self._suspend_device()
+        self.device_state.refresh()
 
     def resume_device(self):
         """
@@ -307,6 +712,9 @@ class RazerDevice(DBusService):
         """
         self.logger.info("Resuming %s", self.__class__.__name__)
         self._resume_device()
+        self.device_state.refresh()
+        # Anything the device lost which _resume_device doesnt put back
+        self._snapshot.resume()
 
     def _suspend_device(self):
         """
@@ -327,6 +735,18 @@ class RazerDevice(DBusService):
         # Clear observer list
         self._observer_list.clear()
 
+        if self._frame_ring is not None:
+            self._frame_ring.close()
+            self._frame_ring = None
+
+        if self._battery_monitor is not None:
+            self._battery_monitor.close()
+            self._battery_monitor = None
+
+        self._transitions.close()
+
+        self._snapshot.close()
+
     def close(self):
         """
         Close any resources opened by subclasses
@@ -355,6 +775,10 @@ class RazerDevice(DBusService):
         """
         self._parent = parent
 
+        # Battery reads go on the parent's I/O worker so wait for it
+        if self._battery_monitor is not None:
+            self._battery_monitor.start()
+
     def remove_observer(self, observer):
         """
         Obsever design pattern, remove
@@ -374,7 +798,7 @@ class RazerDevice(DBusService):
         :param msg: Tuple with first element a string
         :type msg: tuple
         """
-        if not self._disable_notifications:
+        if not self.disable_notify:
             self.logger.debug("Sending observer message: %s", str(msg))
 
             if self._effect_sync_propagate_up and self._parent is not None:
@@ -2,12 +2,16 @@
 Module to handle custom colours
 """
 
-import gi
-gi.require_version('Gdk', '3.0')
-from gi.repository import Gdk
-import struct
 import subprocess
 
+try:
+    import gi
+    gi.require_version('Gdk', '3.0')
+    from gi.repository import Gdk
+except (ImportError, ValueError):
+    # Colours can still be given as RGB tuples
+    Gdk = None
+
 
 KEY_MAPPING = {
     # Row 0
@@ -275,6 +279,7 @@ class NoBackupError(Exception):
 
 
 class RGB(object):
+    __slots__ = ('_red', '_green', '_blue')
 
     @staticmethod
     def clamp(value):
@@ -402,6 +407,10 @@ class RGB(object):
 class KeyboardColour(object):
     """
     Keyboard class which represents the colour state of the keyboard.
+
+    The colours are held in a single buffer which is already in the driver's wire format, each row is a 3 byte header
+    (row, start column, end column) followed by the RGB bytes of that row. The binary payloads are a copy of part of
+    this buffer so nothing is rebuilt when a frame is sent.
     """
 
     @staticmethod
@@ -418,7 +427,7 @@ class KeyboardColour(object):
         if isinstance(gdk_color, (list, tuple)):
             return gdk_color
 
-        assert type(gdk_color) is Gdk.Color, "Is not of type Gdk.Color"
+        assert Gdk is not None and type(gdk_color) is Gdk.Color, "Is not of type Gdk.Color"
 
         red = int(gdk_color.red_float * 255)
         green = int(gdk_color.green_float * 255)
@@ -426,19 +435,59 @@ class KeyboardColour(object):
 
         return red, green, blue
 
-    def __init__(self):
-        self.rows = []
+    @staticmethod
+    def colour_to_bytes(colour):
+        """
+        Converts a colour to 3 clamped RGB bytes
+
+        :param colour: Colour
+        :type colour: Gdk.Color or tuple
+
+        :return: RGB bytes
+        :rtype: bytes
+        """
+        return bytes(map(RGB.clamp, KeyboardColour.gdk_colour_to_rgb(colour)))
+
+    def __init__(self, rows=6, cols=22):
+        self._rows = rows
+        self._cols = cols
+        self._row_stride = 3 + cols * 3
+
+        # Cleared buffer with the row headers filled in
+        self._blank = bytearray(rows * self._row_stride)
+        for row_id in range(0, rows):
+            self._blank[row_id * self._row_stride:row_id * self._row_stride + 3] = bytes((row_id, 0x00, cols - 1))
+
+        self._buffer = bytearray(self._blank)
 
         self.backup = None
 
-        self.reset_rows()
+    @property
+    def dimensions(self):
+        """
+        Get the dimensions of the grid
+
+        :return: Rows, Columns
+        :rtype: tuple of int
+        """
+        return self._rows, self._cols
+
+    def _offset(self, row, col):
+        """
+        Get the offset of a key's red byte in the buffer
+
+        :raises KeyDoesNotExistError: If the position is outside of the grid
+        """
+        if not (0 <= row < self._rows and 0 <= col < self._cols):
+            raise KeyDoesNotExistError("The key at {0},{1} does not exist".format(row, col))
+
+        return row * self._row_stride + 3 + col * 3
 
     def backup_configuration(self):
         """
         Backs up the current configuration
         """
-        self.backup = KeyboardColour()
-        self.backup.get_from_total_binary(self.get_total_binary())
+        self.backup = bytes(self._buffer)
 
     def restore_configuration(self):
         """
@@ -447,27 +496,24 @@ class KeyboardColour(object):
         if self.backup is None:
             raise NoBackupError()
 
-        self.rows = self.backup.rows
+        self._buffer[:] = self.backup
         self.backup = None
 
     def get_rows_raw(self):
         """
         Gets the raw representation of the rows
 
-        :return: Rows
+        :return: Rows of RGB tuples
         :rtype: list
         """
-        return self.rows
+        return [[tuple(self._buffer[offset:offset + 3]) for offset in range(row_id * self._row_stride + 3, (row_id + 1) * self._row_stride, 3)]
+                for row_id in range(0, self._rows)]
 
     def reset_rows(self):
         """
         Reset the rows of the keyboard
         """
-        self.rows.clear()
-
-        for row in range(0, 6):
-            # Create 22 rgb values
-            self.rows.append([RGB() for _ in range(0,22)])
+        self._buffer[:] = self._blank
 
     def set_key_colour(self, row, col, colour):
         """
@@ -484,7 +530,73 @@ class KeyboardColour(object):
 
         :raises KeyDoesNotExistError: If given key does not exist
         """
-        self.rows[row][col].set(KeyboardColour.gdk_colour_to_rgb(colour))
+        offset = self._offset(row, col)
+        self._buffer[offset:offset + 3] = KeyboardColour.colour_to_bytes(colour)
+
+    def set_keys_colour(self, keys, colour):
+        """
+        Set the colour of many keys
+
+        :param keys: Iterable of (row, col)
+        :type keys: iterable
+
+        :param colour: Colour to set
+        :type colour: Gdk.Color or tuple
+
+        :raises KeyDoesNotExistError: If given key does not exist
+        """
+        rgb = KeyboardColour.colour_to_bytes(colour)
+
+        for row, col in keys:
+            offset = self._offset(row, col)
+            self._buffer[offset:offset + 3] = rgb
+
+    def fill(self, colour, row=None):
+        """
+        Set every key, or every key in a row, to a colour
+
+        :param colour: Colour to set
+        :type colour: Gdk.Color or tuple
+
+        :param row: Row ID or None for all rows
+        :type row: int or None
+        """
+        rgb_row = KeyboardColour.colour_to_bytes(colour) * self._cols
+        rows = range(0, self._rows) if row is None else (row,)
+
+        for row_id in rows:
+            offset = self._offset(row_id, 0)
+            self._buffer[offset:offset + len(rgb_row)] = rgb_row
+
+    def blit(self, row, col, data, width):
+        """
+        Copy a block of colours onto the grid, anything outside of the grid is clipped
+
+        :param row: Row of the top left of the block
+        :type row: int
+
+        :param col: Column of the top left of the block
+        :type col: int
+
+        :param data: Row-major RGB bytes of the block
+        :type data: bytes
+
+        :param width: Width of the block in keys
+        :type width: int
+        """
+        data = memoryview(data)
+        height = len(data) // (width * 3)
+
+        first_col = max(col, 0)
+        last_col = min(col + width, self._cols)
+        if first_col >= last_col:
+            return
+
+        for block_row in range(max(0, -row), min(height, self._rows - row)):
+            src = block_row * width * 3 + (first_col - col) * 3
+            dst = self._offset(row + block_row, first_col)
+            length = (last_col - first_col) * 3
+            self._buffer[dst:dst + length] = data[src:src + length]
 
     def get_key_colour(self, key):
         """
@@ -498,8 +610,8 @@ class KeyboardColour(object):
         if key not in KEY_MAPPING:
             raise KeyDoesNotExistError("The key \"{0}\" does not exist".format(key))
 
-        row_id, col_id = KEY_MAPPING[key]
-        return self.rows[row_id][col_id].get()
+        offset = self._offset(*KEY_MAPPING[key])
+        return tuple(self._buffer[offset:offset + 3])
 
     def reset_key(self, row, col):
         """
@@ -513,7 +625,7 @@ class KeyboardColour(object):
 
         :raises KeyDoesNotExistError: If given key does not exist
         """
-        self.rows[row][col].set((0, 0, 0))
+        self.set_key_colour(row, col, (0, 0, 0))
 
     def get_row_binary(self, row_id):
         """
@@ -522,49 +634,35 @@ class KeyboardColour(object):
         :param row_id: Row ID
         :type row_id: int
 
-        :return: Byte string of 67 bytes, Row ID byte then 22 RGB bytes
-        :rtype: bytearray
+        :return: Row ID, start and end byte then the RGB bytes of the row
+        :rtype: bytes
         """
         assert isinstance(row_id, int), "Row ID is not an int"
 
-        payload = bytes([row_id, 0x00, len(self.rows[row_id])-1])
-
-        for rgb in self.rows[row_id]:
-            payload += bytes(rgb)
-
-        return payload
+        return bytes(self._buffer[row_id * self._row_stride:(row_id + 1) * self._row_stride])
 
     def get_total_binary(self):
         """
         Gets the binary payload for the whole keyboard
 
-        :return: Byte string of 6*67 bytes, (Row ID byte then 22 RGB bytes) * 6
-        :rtype: bytearray
+        :return: Every row's binary payload back to back
+        :rtype: bytes
         """
-        payload = b''
-
-        for row in range(0,6):
-            payload += self.get_row_binary(row)
-
-        return payload
+        return bytes(self._buffer)
 
     def get_from_total_binary(self, binary_blob):
         """
         Load in a binary blob which is the output from get_total_binary
 
         :param binary_blob: Binary blob
-        :type binary_blob: bytearray
-        """
-        self.reset_rows()
-
-        for row_id in range (0, 6):
-            binary_blob = binary_blob[1:] # Skip first byte
+        :type binary_blob: bytes
 
-            for col_id, binary_rgb in enumerate([binary_blob[i:i+3] for i in range(0, 66, 3)]):
-                rgb = struct.unpack('=BBB', binary_rgb)
-                self.rows[row_id][col_id].set(rgb)
+        :raises ValueError: If the blob is not the size of the grid
+        """
+        if len(binary_blob) != len(self._buffer):
+            raise ValueError("Binary is {0} bytes, expected {1}".format(len(binary_blob), len(self._buffer)))
 
-            binary_blob = binary_blob[66:] # Skip the current row
+        self._buffer[:] = binary_blob
 
 
 def get_keyboard_layout():
@@ -1,16 +1,18 @@
 """
 This will do until I can be bothered to create indicator applet to do battery level
+
+Battery checks are timed on the daemon's timer service so there is no thread per device. The level comes from the
+device's battery telemetry rather than another wireless read, notifications are shown from the device's I/O worker.
 """
 import logging
-import threading
 import datetime
-import time
 
 try:
     import notify2
 except ImportError:
     notify2 = None
 
+from openrazer_daemon.misc.timer_service import get_timer_service
 
 
 # TODO https://askubuntu.com/questions/110969/notify-send-ignores-timeout
@@ -18,16 +20,14 @@ INTERVAL_FREQ = 60 * 10
 NOTIFY_TIMEOUT = 4000
 
 
-class BatteryNotifier(threading.Thread):
+class BatteryNotifier(object):
     """
-    Thread to notify about battery
+    Notifies about the battery level
     """
-    def __init__(self, parent, device_id, device_name):
-        super(BatteryNotifier, self).__init__()
+    def __init__(self, parent, device_id, device_name, timer_service=None):
         self._logger = logging.getLogger('razer.device{0}.batterynotifier'.format(device_id))
         self._notify2 = notify2 is not None
-
-        self.event = threading.Event()
+        self._timer_service = timer_service if timer_service is not None else get_timer_service()
 
         if self._notify2:
             try:
@@ -36,11 +36,10 @@ class BatteryNotifier(threading.Thread):
                 self._logger.warning("Failed to init notification daemon, err: {0}".format(err))
                 self._notify2 = False
 
-        self._shutdown = False
         self._device_name = device_name
+        self._timer = None
 
-        # Could save reference to parent but only need battery level function
-        self._get_battery_func = parent.getBattery
+        self._parent = parent
 
         if self._notify2:
             self._notification = notify2.Notification(summary="{0}")
@@ -49,60 +48,67 @@ class BatteryNotifier(threading.Thread):
         self._last_notify_time = datetime.datetime(1970, 1, 1)
 
     @property
-    def shutdown(self):
-        """
-        Get the shutdown flag
+    def active(self):
         """
-        return self._shutdown
+        If the battery is being checked
 
-    @shutdown.setter
-    def shutdown(self, value):
+        :return: Active
+        :rtype: bool
         """
-        Set the shutdown flag
+        return self._timer is not None
 
-        :param value: Shutdown
-        :type value: bool
+    def start(self):
         """
-        self._shutdown = value
-
-    def notify_battery(self):
-        now = datetime.datetime.now()
-
-        if (now - self._last_notify_time).seconds > INTERVAL_FREQ:
-            # Update last notified
-            self._last_notify_time = now
-
-            battery_level = self._get_battery_func()
-
-            # Sometimes on wifi dont get batt
-            if battery_level == -1.0:
-                time.sleep(0.2)
-                battery_level = self._get_battery_func()
+        Check the battery every INTERVAL_FREQ seconds, the first check is as soon as it has been that long since the last
+        """
+        if self._timer is None:
+            since_last = (datetime.datetime.now() - self._last_notify_time).total_seconds()
+            self._timer = self._timer_service.call_every(INTERVAL_FREQ, self._schedule_notify, delay=max(0, INTERVAL_FREQ - since_last))
 
-            if battery_level < 10.0:
-                if self._notify2:
-                    self._notification.update(summary="{0} Battery at {1:.1f}%".format(self._device_name, battery_level), message='Please charge your device', icon='notification-battery-low')
-                    self._notification.show()
-            else:
-                if self._notify2:
-                    self._notification.update(summary="{0} Battery at {1:.1f}%".format(self._device_name, battery_level))
-                    self._notification.show()
+    def stop(self):
+        """
+        Stop checking the battery
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
 
-            if self._notify2:
-                self._logger.debug("{0} Battery at {1:.1f}%".format(self._device_name, battery_level))
+    def _schedule_notify(self):
+        """
+        Show the notification on the device's I/O worker, ran on the timer thread
+        """
+        io_worker = self._parent.io_worker
+        if io_worker is None:
+            self.notify_battery()
+        else:
+            try:
+                io_worker.submit(self.notify_battery)
+            except RuntimeError:
+                pass  # Device is going away
 
-    def run(self):
+    def notify_battery(self):
         """
-        Main thread function
+        Show a notification with the last battery level sampled
         """
+        self._last_notify_time = datetime.datetime.now()
 
-        while not self._shutdown:
-            if self.event.is_set():
-                self.notify_battery()
+        latest = self._parent.battery_telemetry.latest
+        if latest is None:
+            self._logger.debug("No battery sample yet")
+            return
+        battery_level = latest[1]
 
-            time.sleep(0.1)
+        if battery_level < 10.0:
+            if self._notify2:
+                self._notification.update(summary="{0} Battery at {1:.1f}%".format(self._device_name, battery_level), message='Please charge your device', icon='notification-battery-low')
+                self._notification.show()
+        else:
+            if self._notify2:
+                self._notification.update(summary="{0} Battery at {1:.1f}%".format(self._device_name, battery_level))
+                self._notification.show()
 
-        self._logger.debug("Shutting down battery notifier")
+        if self._notify2:
+            self._logger.debug("{0} Battery at {1:.1f}%".format(self._device_name, battery_level))
 
 
 class BatteryManager(object):
@@ -113,34 +119,30 @@ class BatteryManager(object):
         self._logger = logging.getLogger('razer.device{0}.batterymanager'.format(device_number))
         self._parent = parent
 
-        self._battery_thread = BatteryNotifier(parent, device_number, device_name)
-        self._battery_thread.start()
+        self._battery_notifier = BatteryNotifier(parent, device_number, device_name)
 
         self._is_closed = False
 
     def close(self):
         """
-        Close the manager, stop ripple thread
+        Close the manager, stop checking the battery
         """
         if not self._is_closed:
             self._logger.debug("Closing Battery Manager")
             self._is_closed = True
 
-            self._battery_thread.shutdown = True
-            self._battery_thread.join(timeout=2)
-            if self._battery_thread.is_alive():
-                self._logger.error("Could not stop BatteryNotify thread")
+            self._battery_notifier.stop()
 
     def __del__(self):
         self.close()
 
     @property
     def active(self):
-        return self._battery_thread.event.is_set()
+        return self._battery_notifier.active
 
     @active.setter
     def active(self, value):
-        if value:
-            self._battery_thread.event.set()
+        if value and not self._is_closed:
+            self._battery_notifier.start()
         else:
-            self._battery_thread.event.clear()
+            self._battery_notifier.stop()
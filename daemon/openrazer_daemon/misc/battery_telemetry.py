@@ -0,0 +1,195 @@
+"""
+Battery and charging history of wireless devices
+
+The daemon reads the battery on its own schedule into a fixed size ring of samples so clients can get the history
+and be told about threshold crossings without each of them polling the device, every read is a wireless transaction.
+"""
+import array
+import bisect
+import logging
+import time
+
+from openrazer_daemon.misc.timer_service import get_timer_service
+
+SAMPLE_INTERVAL = 60
+SAMPLE_COUNT = 24 * 60  # A day at one a minute
+
+# Percentages a signal is sent for when the level goes past them, in either direction
+THRESHOLDS = (5, 10, 20, 50, 80, 100)
+
+
+def crossed_thresholds(previous_level, level, thresholds=THRESHOLDS):
+    """
+    Get the thresholds the battery went past between two samples
+
+    Rising past a threshold means reaching it, falling means going below it.
+
+    :param previous_level: Last level in percent
+    :type previous_level: float
+
+    :param level: New level in percent
+    :type level: float
+
+    :param thresholds: Thresholds in percent
+    :type thresholds: tuple of int
+
+    :return: Thresholds crossed
+    :rtype: list of int
+    """
+    if level > previous_level:
+        return [threshold for threshold in thresholds if previous_level < threshold <= level]
+    return [threshold for threshold in thresholds if level < threshold <= previous_level]
+
+
+class BatteryTelemetry(object):
+    """
+    Ring of (time, level, charging) samples kept in arrays
+    """
+    def __init__(self, size=SAMPLE_COUNT):
+        self._size = size
+        self._times = array.array('d', bytes(8 * size))
+        self._levels = array.array('d', bytes(8 * size))
+        self._charging = array.array('B', bytes(size))
+        # Next slot to write and the number of slots filled
+        self._head = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def size(self):
+        return self._size
+
+    def append(self, timestamp, level, charging):
+        """
+        Add a sample, replacing the oldest once full
+
+        :param timestamp: Seconds since the epoch
+        :type timestamp: float
+
+        :param level: Battery level in percent
+        :type level: float
+
+        :param charging: If the device is charging
+        :type charging: bool
+        """
+        self._times[self._head] = timestamp
+        self._levels[self._head] = level
+        self._charging[self._head] = charging
+        self._head = (self._head + 1) % self._size
+        self._count = min(self._count + 1, self._size)
+
+    @property
+    def latest(self):
+        """
+        Get the newest sample
+
+        :return: (time, level, charging) or None if there are no samples
+        :rtype: tuple or None
+        """
+        if self._count == 0:
+            return None
+        index = self._head - 1
+        return self._times[index], self._levels[index], bool(self._charging[index])
+
+    def _ordered(self, values):
+        """
+        Get a ring array oldest first
+        """
+        if self._count < self._size:
+            return values[:self._count]
+        return values[self._head:] + values[:self._head]
+
+    def get_range(self, start, end):
+        """
+        Get the samples taken between two times, oldest first
+
+        :param start: Seconds since the epoch, 0 for the oldest
+        :type start: float
+
+        :param end: Seconds since the epoch, 0 for the newest
+        :type end: float
+
+        :return: Times, levels and charging states
+        :rtype: tuple of list
+        """
+        times = self._ordered(self._times)
+        first = bisect.bisect_left(times, start) if start > 0 else 0
+        last = bisect.bisect_right(times, end) if end > 0 else len(times)
+
+        charging = self._ordered(self._charging)[first:last]
+        return times[first:last].tolist(), self._ordered(self._levels)[first:last].tolist(), [bool(value) for value in charging]
+
+
+class BatteryMonitor(object):
+    """
+    Samples a device's battery into its telemetry and emits a signal when a threshold is crossed or charging changes
+
+    The device needs getBattery and isCharging methods and batteryThresholdCrossed and chargingChanged signals.
+    Reads are run on the device's I/O worker, sampling starts once the device has been registered and has one.
+    """
+    def __init__(self, parent, device_number, interval=SAMPLE_INTERVAL, size=SAMPLE_COUNT, timer_service=None):
+        self._logger = logging.getLogger('razer.device{0}.batterymonitor'.format(device_number))
+        self._parent = parent
+        self._interval = interval
+        self._timer_service = timer_service if timer_service is not None else get_timer_service()
+        self._timer = None
+        self.telemetry = BatteryTelemetry(size)
+
+    def start(self):
+        """
+        Sample the battery now and every interval after
+        """
+        if self._timer is None:
+            self._timer = self._timer_service.call_every(self._interval, self._schedule_sample, delay=0)
+
+    def _schedule_sample(self):
+        """
+        Take a sample on the device's I/O worker so the timer thread never waits on the device
+        """
+        io_worker = self._parent.io_worker
+        if io_worker is None:
+            self._logger.debug("Device not registered, skipping battery sample")
+            return
+
+        try:
+            io_worker.submit(self.sample)
+        except RuntimeError:
+            pass  # Device is going away
+
+    def sample(self):
+        """
+        Read the battery and charging state and record them
+        """
+        try:
+            level = float(self._parent.getBattery())
+            charging = bool(self._parent.isCharging())
+        except (OSError, ValueError) as err:
+            self._logger.debug("Failed to read battery: %s", err)
+            return
+
+        if level < 0:
+            # Sometimes on wifi dont get batt
+            return
+
+        previous = self.telemetry.latest
+        self.telemetry.append(time.time(), level, charging)
+        if previous is None:
+            return
+
+        _, previous_level, previous_charging = previous
+        for threshold in crossed_thresholds(previous_level, level):
+            self._logger.debug("Battery crossed %d%%, now %.1f%%", threshold, level)
+            self._parent.batteryThresholdCrossed(level, charging, threshold)
+
+        if charging != previous_charging:
+            self._parent.chargingChanged(charging, level)
+
+    def close(self):
+        """
+        Stop sampling
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
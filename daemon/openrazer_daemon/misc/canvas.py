@@ -0,0 +1,220 @@
+"""
+Composite canvas spanning the LED matrices of several devices
+
+Clients submit one frame for the whole canvas, it is then cut up into the per device setKeyRow payloads. Each
+device uploads its part on its own I/O worker and then waits for a shared present time before calling setCustom
+so that all devices switch to the new frame at (roughly) the same moment.
+"""
+import json
+import logging
+import threading
+import time
+
+# Initial guess at how long a frame takes to upload to a device
+PRESENT_DELAY = 0.005
+# Upper bound on the delay between submitting and presenting a frame
+MAX_PRESENT_DELAY = 0.05
+# How quickly the present delay shrinks back down after a slow upload
+PRESENT_DELAY_DECAY = 0.95
+
+
+class Canvas(object):
+    """
+    Shared canvas
+
+    The layout maps a device serial to the (x, y) position of the top left LED of that device on the canvas. The
+    canvas is sized to fit all the devices in the layout, frames are row-major RGB byte strings of that size.
+    """
+    def __init__(self, devices):
+        self._logger = logging.getLogger('razer.canvas')
+        self._devices = devices
+
+        self._lock = threading.Lock()
+        self._layout = {}
+        self._rows = 0
+        self._cols = 0
+
+        # serial -> (payload, present_time), only the newest frame per device is kept
+        self._pending = {}
+        self._present_delay = PRESENT_DELAY
+
+    @property
+    def dimensions(self):
+        """
+        Get the size of the canvas
+
+        :return: Rows, Columns
+        :rtype: tuple of int
+        """
+        return self._rows, self._cols
+
+    @property
+    def present_delay(self):
+        """
+        Current delay between a frame being submitted and it being presented
+
+        :return: Delay in seconds
+        :rtype: float
+        """
+        return self._present_delay
+
+    def get_layout(self):
+        """
+        Get the current layout
+
+        :return: JSON object of serial: [x, y]
+        :rtype: str
+        """
+        with self._lock:
+            return json.dumps({serial: [x, y] for serial, (x, y, _, _) in self._layout.items()})
+
+    def set_layout(self, layout_json):
+        """
+        Set the position of devices on the canvas
+
+        :param layout_json: JSON object of serial: [x, y]
+        :type layout_json: str
+
+        :raises ValueError: If the layout is invalid or references an unusable device
+        """
+        layout = json.loads(layout_json)
+        if not isinstance(layout, dict):
+            raise ValueError("Layout must be a JSON object")
+
+        new_layout = {}
+        for serial, position in layout.items():
+            if serial not in self._devices:
+                raise ValueError("Unknown device {0}".format(serial))
+
+            device = self._devices[serial].dbus
+            if not getattr(device, 'HAS_MATRIX', False) or not hasattr(device, 'setKeyRow'):
+                raise ValueError("Device {0} does not support custom frames".format(serial))
+
+            x, y = (int(value) for value in position)
+            if x < 0 or y < 0:
+                raise ValueError("Device {0} has a negative position".format(serial))
+
+            rows, cols = device.MATRIX_DIMS
+            new_layout[serial] = (x, y, rows, cols)
+
+        with self._lock:
+            self._layout = new_layout
+            self._resize()
+            self._pending.clear()
+
+        self._logger.info("Canvas layout set, {0} device(s), {1}x{2}".format(len(new_layout), self._rows, self._cols))
+
+    def remove_device(self, serial):
+        """
+        Drop a device from the layout
+
+        :param serial: Device serial
+        :type serial: str
+        """
+        with self._lock:
+            if self._layout.pop(serial, None) is not None:
+                self._pending.pop(serial, None)
+                self._resize()
+
+    def _resize(self):
+        """
+        Recalculate the canvas size from the layout, lock must be held
+        """
+        self._rows = max([y + rows for x, y, rows, cols in self._layout.values()], default=0)
+        self._cols = max([x + cols for x, y, rows, cols in self._layout.values()], default=0)
+
+    def slice_frame(self, frame):
+        """
+        Cut a canvas frame into per device setKeyRow payloads
+
+        :param frame: Row-major RGB frame the size of the canvas
+        :type frame: bytes
+
+        :return: Dict of serial: payload
+        :rtype: dict
+
+        :raises ValueError: If the frame is the wrong size
+        """
+        with self._lock:
+            layout = dict(self._layout)
+            row_stride = self._cols * 3
+            expected = self._rows * row_stride
+
+        if len(frame) != expected:
+            raise ValueError("Frame is {0} bytes, canvas needs {1}".format(len(frame), expected))
+
+        view = memoryview(frame)
+        payloads = {}
+        for serial, (x, y, rows, cols) in layout.items():
+            payload = bytearray()
+            for row in range(rows):
+                start = (y + row) * row_stride + x * 3
+                payload += bytes((row, 0, cols - 1))
+                payload += view[start:start + cols * 3]
+            payloads[serial] = bytes(payload)
+
+        return payloads
+
+    def submit_frame(self, frame):
+        """
+        Queue a frame to be displayed across all devices in the layout
+
+        :param frame: Row-major RGB frame the size of the canvas
+        :type frame: bytes
+
+        :return: Monotonic time the frame is due to be presented
+        :rtype: float
+        """
+        payloads = self.slice_frame(frame)
+        present_time = time.monotonic() + self._present_delay
+
+        for serial, payload in payloads.items():
+            with self._lock:
+                already_queued = serial in self._pending
+                self._pending[serial] = (payload, present_time)
+
+            if not already_queued:
+                try:
+                    self._devices[serial].io_worker.submit(self._present, serial)
+                except (IndexError, RuntimeError):
+                    self.remove_device(serial)
+
+        return present_time
+
+    def _present(self, serial):
+        """
+        Upload then present the newest pending frame for a device, runs on the device's I/O worker
+
+        :param serial: Device serial
+        :type serial: str
+        """
+        with self._lock:
+            pending = self._pending.pop(serial, None)
+        if pending is None:
+            return
+
+        payload, present_time = pending
+        device = self._devices[serial].dbus
+
+        try:
+            start = time.monotonic()
+            device.setKeyRow(payload)
+            self._update_present_delay(time.monotonic() - start)
+
+            delay = present_time - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+            device.setCustom()
+        except Exception:
+            self._logger.exception("Failed to present frame on {0}".format(serial))
+
+    def _update_present_delay(self, upload_time):
+        """
+        Track the slowest recent upload so the present time leaves every device enough time
+
+        :param upload_time: Time the last upload took
+        :type upload_time: float
+        """
+        delay = max(upload_time, self._present_delay * PRESENT_DELAY_DECAY, PRESENT_DELAY)
+        self._present_delay = min(delay, MAX_PRESENT_DELAY)
@@ -0,0 +1,233 @@
+"""
+Device profiles
+
+A profile is the state a device should be in: property values like brightness and DPI, the effect of each lighting
+zone and the bound macros. Applying one compares it against the device state cache and only writes what differs, in
+an order the device class picks, so applying the profile a device is already in doesn't touch the hardware at all.
+"""
+import json
+import logging
+
+from openrazer_daemon.misc.device_state import PROPERTIES
+from openrazer_daemon.misc.serial_store import SerialStore
+
+PROFILE_VERSION = 1
+
+# Properties and effect families in the order they are written. Zones are switched on before their effects are set
+# and brightness is set last so the effects show at the profile's brightness
+DEFAULT_ORDER = (
+    'poll_rate', 'dpi',
+    'game_mode_led', 'macro_mode_led', 'macro_mode_led_effect',
+    'logo_active', 'scroll_active', 'backlight_active',
+    'effect', 'Logo', 'Scroll', 'Backlight',
+    'logo_brightness', 'scroll_brightness', 'brightness',
+)
+
+
+class ProfileStore(SerialStore):
+    """
+    Directory of per device saved profiles
+
+    load and save take and return a dict of profile name: profile dict, as made by DeviceProfile.to_dict
+    """
+    def __init__(self, directory):
+        super(ProfileStore, self).__init__(directory, 'profiles')
+
+
+class DeviceProfile(object):
+    """
+    Desired device state
+    """
+    def __init__(self, properties=None, effects=None, macros=None):
+        """
+        :param properties: Property name: value, see openrazer_daemon.misc.device_state.PROPERTIES
+        :type properties: dict or None
+
+        :param effects: Effect family: (setter, args)
+        :type effects: dict or None
+
+        :param macros: Bind key: list of macro dicts like razer.device.macro.getMacros, None leaves macros alone
+        :type macros: dict or None
+        """
+        self._logger = logging.getLogger('razer.profile')
+        self.properties = dict(properties or {})
+        self.effects = {family: (effect[0], list(effect[1])) for family, effect in (effects or {}).items()}
+        self.macros = macros
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Create a profile from a dict
+
+        :param data: Dict as made by to_dict
+        :type data: dict
+
+        :return: Profile
+        :rtype: DeviceProfile
+
+        :raises ValueError: If the dict is not a valid profile
+        """
+        if not isinstance(data, dict) or data.get('version', PROFILE_VERSION) != PROFILE_VERSION:
+            raise ValueError("Not a version {0} profile".format(PROFILE_VERSION))
+
+        properties = data.get('properties', {})
+        effects = data.get('effects', {})
+        macros = data.get('macros')
+
+        if not isinstance(properties, dict) or not isinstance(effects, dict) or not isinstance(macros, (dict, type(None))):
+            raise ValueError("Profile properties, effects and macros must be objects")
+
+        unknown = set(properties).difference(PROPERTIES)
+        if unknown:
+            raise ValueError("Unknown properties: {0}".format(', '.join(sorted(unknown))))
+
+        for family, effect in effects.items():
+            if not isinstance(effect, (list, tuple)) or len(effect) != 2 or not isinstance(effect[0], str) or not isinstance(effect[1], (list, tuple)):
+                raise ValueError("Effect {0} must be [setter, [args...]]".format(family))
+
+        return cls(properties, effects, macros)
+
+    @classmethod
+    def from_json(cls, profile_json):
+        """
+        Create a profile from JSON
+
+        :param profile_json: JSON as made by to_json
+        :type profile_json: str
+
+        :return: Profile
+        :rtype: DeviceProfile
+
+        :raises ValueError: If the JSON is not a valid profile
+        """
+        return cls.from_dict(json.loads(profile_json))
+
+    def to_dict(self):
+        data = {
+            'version': PROFILE_VERSION,
+            'properties': self.properties,
+            'effects': {family: [effect[0], effect[1]] for family, effect in self.effects.items()},
+        }
+        if self.macros is not None:
+            data['macros'] = self.macros
+        return data
+
+    def to_json(self):
+        return json.dumps(self.to_dict())
+
+    def plan(self, device_state, order=DEFAULT_ORDER):
+        """
+        Work out the writes needed to get a device from its cached state to this profile
+
+        Properties and effects whose cached value already matches are skipped, ones never read or set are written.
+
+        :param device_state: Device state cache
+        :type device_state: openrazer_daemon.misc.device_state.DeviceState
+
+        :param order: Properties and effect families in the order to write them, others go after in name order
+        :type order: tuple of str
+
+        :return: Writes as (key, setter, args, old value or None), number skipped and keys the device doesn't support
+        :rtype: tuple
+        """
+        known = device_state.known()
+        effects = device_state.effects
+        settable = device_state.settable
+        effect_methods = device_state.effect_methods
+
+        keys = set(self.properties).union(self.effects)
+        ordered = [key for key in order if key in keys] + sorted(keys.difference(order))
+
+        writes = []
+        skipped = 0
+        unsupported = []
+
+        for key in ordered:
+            if key in self.properties:
+                value = self.properties[key]
+                if key not in settable:
+                    unsupported.append(key)
+                elif key in known and known[key] == value:
+                    skipped += 1
+                else:
+                    args = list(value) if isinstance(value, (list, tuple)) else [value]
+                    old = known.get(key)
+                    writes.append((key, PROPERTIES[key][2], args, None if old is None else (PROPERTIES[key][2], list(old) if isinstance(old, (list, tuple)) else [old])))
+
+            if key in self.effects:
+                effect = self.effects[key]
+                if effect[0] not in effect_methods:
+                    unsupported.append(key)
+                elif effects.get(key) == effect:
+                    skipped += 1
+                else:
+                    writes.append((key, effect[0], effect[1], effects.get(key)))
+
+        return writes, skipped, unsupported
+
+    def apply(self, device, order=DEFAULT_ORDER):
+        """
+        Write the differences between the device's state and this profile
+
+        Macros go first as they are all checked before any is replaced. If a device write fails the ones already done
+        are undone where the old value is known, the macros are put back as they were, then the error is raised.
+
+        :param device: DBus device object
+        :type device: openrazer_daemon.hardware.device_base.RazerDevice
+
+        :param order: Properties and effect families in the order to write them
+        :type order: tuple of str
+
+        :return: Dict of writes, skipped (writes not needed), written (keys written) and unsupported (keys the device
+                 can't set)
+        :rtype: dict
+
+        :raises ValueError: If a macro is invalid, nothing is written then
+        """
+        writes, skipped, unsupported = self.plan(device.device_state, order)
+        written = []
+        write_count = 0
+        key_manager = getattr(device, 'key_manager', None)
+        old_macros = None
+
+        if self.macros is not None:
+            if key_manager is None:
+                unsupported.append('macros')
+            else:
+                macros = json.loads(key_manager.dbus_get_macros())
+                macro_writes, macro_skipped = key_manager.set_macros(self.macros)
+                write_count += macro_writes
+                skipped += macro_skipped
+                if macro_writes:
+                    written.append('macros')
+                    old_macros = macros
+
+        done = []
+        try:
+            for key, setter, args, old in writes:
+                getattr(device, setter)(*args)
+                done.append((key, old))
+        except Exception:
+            self._logger.warning("Failed to write %s, undoing %d writes", writes[len(done)][0], len(done))
+            for key, old in reversed(done):
+                if old is not None:
+                    try:
+                        getattr(device, old[0])(*old[1])
+                    except Exception as err:
+                        self._logger.error("Failed to undo %s: %s", key, err)
+
+            if old_macros is not None:
+                try:
+                    key_manager.set_macros(old_macros)
+                except Exception as err:
+                    self._logger.error("Failed to undo macros: %s", err)
+            raise
+
+        written.extend(key for key, _ in done)
+
+        return {
+            'writes': write_count + len(done),
+            'skipped': skipped,
+            'written': written,
+            'unsupported': unsupported,
+        }
@@ -0,0 +1,211 @@
+"""
+Device snapshots
+
+The last state set on a device, its properties, the effect on each zone and the last custom frame, is kept per
+serial so it can be put back when the device is replugged, the daemon restarts or the devices resume. Restoring is a
+profile apply so only what differs from what the device is known to be in is written.
+
+Snapshots are saved a little after a property or effect changes, custom frames change too often for that so the
+latest frame is saved along with the next change, on suspend and when the device is closed.
+"""
+import base64
+import binascii
+import logging
+import threading
+import time
+
+from openrazer_daemon.misc.device_profile import DeviceProfile
+from openrazer_daemon.misc.serial_store import SerialStore
+from openrazer_daemon.misc.timer_service import get_timer_service
+
+# Seconds after a change the snapshot is saved, changes in between are saved with it
+SAVE_DELAY = 2.0
+
+
+class SnapshotStore(SerialStore):
+    """
+    Directory of per device snapshots
+
+    load and save take and return a snapshot dict, as made by DeviceSnapshot.take
+    """
+    def __init__(self, directory):
+        super(SnapshotStore, self).__init__(directory, 'snapshot')
+
+
+class DeviceSnapshot(object):
+    """
+    Keeps a device's snapshot saved and restores it
+    """
+    def __init__(self, parent, device_number, store=None, timer_service=None):
+        """
+        :param parent: DBus device object
+        :type parent: openrazer_daemon.hardware.device_base.RazerDevice
+
+        :param device_number: Device number, for logging
+        :type device_number: int
+
+        :param store: Snapshot store, without one snapshots are only kept over suspend and resume
+        :type store: SnapshotStore or None
+
+        :param timer_service: Timer service to delay saves on, defaults to the daemon's
+        :type timer_service: openrazer_daemon.misc.timer_service.TimerService or None
+        """
+        self._logger = logging.getLogger('razer.device{0}.snapshot'.format(device_number))
+        self._parent = parent
+        self._store = store
+        self._timer_service = timer_service if timer_service is not None else get_timer_service()
+
+        self._lock = threading.Lock()
+        self._save_timer = None
+        # Last snapshot saved or restored from the store
+        self._saved = None
+        # Snapshot taken on suspend, while set nothing is saved as the device isn't in the state to keep
+        self._suspended = None
+        self._is_closed = False
+
+    def take(self):
+        """
+        Get the device's state from its state cache
+
+        :return: Dict of profile (as made by DeviceProfile.to_dict) and frame (base64 setKeyRow payload, if any)
+        :rtype: dict
+        """
+        state = self._parent.device_state
+        properties = {name: value for name, value in state.known().items() if name in state.settable}
+
+        snapshot = {'profile': DeviceProfile(properties, state.effects).to_dict()}
+        frame = state.frame
+        if frame:
+            snapshot['frame'] = base64.b64encode(frame).decode('ascii')
+        return snapshot
+
+    def changed(self):
+        """
+        Save the snapshot soon, called when the device's state changes
+        """
+        with self._lock:
+            if self._store is None or self._save_timer is not None or self._suspended is not None or self._is_closed:
+                return
+            self._save_timer = self._timer_service.call_later(SAVE_DELAY, self._save_due)
+
+    def _save_due(self):
+        """
+        Save the snapshot, ran on the timer thread so the write goes to the device's I/O worker if it has one
+        """
+        with self._lock:
+            self._save_timer = None
+
+        io_worker = self._parent.io_worker
+        if io_worker is None:
+            self.save()
+        else:
+            try:
+                io_worker.submit(self.save)
+            except RuntimeError:
+                pass  # Device is going away, it saves on close
+
+    def save(self, snapshot=None):
+        """
+        Write the snapshot to the store if it changed since it was last written
+
+        :param snapshot: Snapshot to write, defaults to the current state
+        :type snapshot: dict or None
+        """
+        if self._store is None:
+            return
+
+        if snapshot is None:
+            snapshot = self.take()
+
+        with self._lock:
+            if snapshot == self._saved:
+                return
+            if self._saved is None and not (snapshot['profile']['properties'] or snapshot['profile']['effects'] or 'frame' in snapshot):
+                # Nothing was ever set, keep whatever is stored
+                return
+            self._saved = snapshot
+
+        self._store.save(self._parent.serial, snapshot)
+
+    def restore(self, snapshot=None):
+        """
+        Put the device back in a snapshot's state in one batch, effects aren't synced to other devices
+
+        :param snapshot: Snapshot, defaults to the stored one
+        :type snapshot: dict or None
+
+        :return: Result of the profile apply, see DeviceProfile.apply, or None if there was nothing to restore
+        :rtype: dict or None
+        """
+        if snapshot is None:
+            if self._store is None:
+                return None
+            snapshot = self._store.load(self._parent.serial)
+            with self._lock:
+                self._saved = snapshot or None
+        if not snapshot:
+            return None
+
+        start = time.monotonic()
+        try:
+            profile = DeviceProfile.from_dict(snapshot.get('profile', {}))
+            frame = base64.b64decode(snapshot.get('frame', ''))
+        except (ValueError, binascii.Error) as err:
+            self._logger.warning("Ignoring invalid snapshot: %s", err)
+            return None
+
+        parent = self._parent
+        parent.disable_notify = True
+        try:
+            # The frame is only shown by setCustom so it is only sent if that is the effect to restore
+            if frame and profile.effects.get('effect', (None,))[0] == 'setCustom' and 'set_key_row' in parent.METHODS:
+                parent.setKeyRow(frame)
+            result = parent.apply_profile_object(profile)
+        finally:
+            parent.disable_notify = False
+
+        self._logger.info("Restored snapshot in %.1fms, %d writes, %d skipped", (time.monotonic() - start) * 1000, result['writes'], result['skipped'])
+        return result
+
+    def suspend(self):
+        """
+        Keep the current state to restore on resume and save it
+        """
+        snapshot = self.take()
+        with self._lock:
+            self._suspended = snapshot
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+        self.save(snapshot)
+
+    def resume(self):
+        """
+        Restore the state kept on suspend
+
+        :return: Result of the profile apply or None if the device wasn't suspended
+        :rtype: dict or None
+        """
+        with self._lock:
+            snapshot = self._suspended
+        if snapshot is None:
+            return None
+
+        try:
+            return self.restore(snapshot)
+        finally:
+            with self._lock:
+                self._suspended = None
+
+    def close(self):
+        """
+        Save anything not saved yet and stop saving
+        """
+        with self._lock:
+            self._is_closed = True
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            snapshot = self._suspended
+
+        self.save(snapshot)
@@ -0,0 +1,417 @@
+"""
+Device state cache
+
+Keeps the last value set or read of the state clients show, brightness, DPI, LED modes and so on. When a value
+changes, from a setter, effect sync or a suspend and resume, a razer.device.state.PropertiesChanged signal is sent so
+clients can keep their own copy instead of polling the driver.
+"""
+import contextlib
+import inspect
+import logging
+import threading
+
+from openrazer_daemon.misc.effect_coalescer import effect_family
+
+STATE_INTERFACE = 'razer.device.state'
+
+# Property name: (interface, getter, setter or None)
+PROPERTIES = {
+    'brightness': ('razer.device.lighting.brightness', 'getBrightness', 'setBrightness'),
+    'dpi': ('razer.device.dpi', 'getDPI', 'setDPI'),
+    'poll_rate': ('razer.device.misc', 'getPollRate', 'setPollRate'),
+    'game_mode_led': ('razer.device.led.gamemode', 'getGameMode', 'setGameMode'),
+    'macro_mode_led': ('razer.device.led.macromode', 'getMacroMode', 'setMacroMode'),
+    'macro_mode_led_effect': ('razer.device.led.macromode', 'getMacroEffect', 'setMacroEffect'),
+    'logo_active': ('razer.device.lighting.logo', 'getLogoActive', 'setLogoActive'),
+    'logo_brightness': ('razer.device.lighting.logo', 'getLogoBrightness', 'setLogoBrightness'),
+    'logo_effect': ('razer.device.lighting.logo', 'getLogoEffect', None),
+    'scroll_active': ('razer.device.lighting.scroll', 'getScrollActive', 'setScrollActive'),
+    'scroll_brightness': ('razer.device.lighting.scroll', 'getScrollBrightness', 'setScrollBrightness'),
+    'scroll_effect': ('razer.device.lighting.scroll', 'getScrollEffect', None),
+    'backlight_active': ('razer.device.lighting.backlight', 'getBacklightActive', 'setBacklightActive'),
+    'current_effect': ('razer.device.lighting.kraken', 'getCurrentEffect', None),
+}
+
+# Properties without a setter of their own, any other setter on these interfaces can change them so they are read back
+READ_BACK = {
+    'logo_effect': 'razer.device.lighting.logo',
+    'scroll_effect': 'razer.device.lighting.scroll',
+    'current_effect': 'razer.device.lighting.chroma',
+}
+
+# Setters on interfaces starting with this are effects, the last one of each family is kept
+EFFECT_INTERFACE_PREFIX = 'razer.device.lighting'
+# Lighting setters which are not effects, custom frames are uploaded with these before setCustom shows them
+NOT_EFFECTS = ('setKey', 'setKeyRow')
+# Setters which start a transition, they aren't tracked as the setter the transition ends with updates the state
+TRANSITIONS = ('setBrightnessTransition', 'setStaticTransition')
+
+_GETTERS = {(interface, getter): name for name, (interface, getter, _) in PROPERTIES.items()}
+_SETTERS = {(interface, setter): name for name, (interface, _, setter) in PROPERTIES.items() if setter is not None}
+
+
+def _wrap(function, after):
+    """
+    Wrap a DBus method to call after(dbus_object, args, result) once it returns
+
+    The signature is kept as dbus-python reads the arguments from it.
+    """
+    def wrapper(dbus_object, *args, **kwargs):
+        result = function(dbus_object, *args, **kwargs)
+        after(dbus_object, args, result)
+        return result
+
+    wrapper.__name__ = function.__name__
+    wrapper.__doc__ = function.__doc__
+    wrapper.__signature__ = inspect.signature(function)
+
+    return wrapper
+
+
+def _after_get(name):
+    def after(dbus_object, args, result):
+        dbus_object.device_state.update({name: result})
+    return after
+
+
+def _after_set(name):
+    def after(dbus_object, args, result):
+        state = dbus_object.device_state
+        if not state.is_quiet:
+            state.update({name: args[0] if len(args) == 1 else list(args)})
+            state.written(name)
+    return after
+
+
+def _after_set_read_back(interface_name):
+    def after(dbus_object, args, result):
+        dbus_object.device_state.read_back(interface_name)
+    return after
+
+
+def _after_set_frame(dbus_object, args, result):
+    dbus_object.device_state.set_frame(args[0])
+
+
+def _after_set_effect(interface_name, function_name):
+    family = effect_family(function_name)
+
+    def after(dbus_object, args, result):
+        state = dbus_object.device_state
+        if not state.is_quiet:
+            state.set_effect(family, function_name, args)
+            state.read_back(interface_name)
+            state.written(family)
+    return after
+
+
+def _is_effect(interface_name, function_name):
+    return (function_name.startswith('set') and interface_name.startswith(EFFECT_INTERFACE_PREFIX) and
+            function_name not in NOT_EFFECTS and function_name not in TRANSITIONS)
+
+
+def wrap(function, interface_name, function_name):
+    """
+    Wrap a DBus method if it gets or sets a property
+
+    The wrapper updates the state of the DBus object it is called on so it can be shared between devices.
+
+    :param function: DBus method taking the DBus object as the first argument
+    :type function: func
+
+    :param interface_name: DBus interface
+    :type interface_name: str
+
+    :param function_name: DBus method name
+    :type function_name: str
+
+    :return: Wrapped or the same method
+    :rtype: func
+    """
+    key = (interface_name, function_name)
+
+    if function_name in TRANSITIONS:
+        return function
+
+    if key in _GETTERS:
+        return _wrap(function, _after_get(_GETTERS[key]))
+
+    if key in _SETTERS:
+        return _wrap(function, _after_set(_SETTERS[key]))
+
+    if function_name == 'setKeyRow':
+        return _wrap(function, _after_set_frame)
+
+    if _is_effect(interface_name, function_name):
+        return _wrap(function, _after_set_effect(interface_name, function_name))
+
+    if function_name.startswith('set'):
+        # Getters might be added after their setters so the properties are looked up when called
+        return _wrap(function, _after_set_read_back(interface_name))
+
+    return function
+
+
+class DeviceState(object):
+    """
+    State of one device
+
+    Methods are wrapped through track(), or wrap() and register(), as they are added to DBus, getters and setters of a
+    property then update it.
+    The device needs a PropertiesChanged signal taking the changed properties.
+
+    on_change, if set, is called after any property or effect changes. on_write, if set, is called with the property
+    name or effect family after a setter for it is called, whether or not it changed.
+
+    Setters called in a quiet() block don't update the state, for the steps of a transition where only the last value
+    is kept and signalled.
+    """
+    def __init__(self, parent, device_number):
+        self._logger = logging.getLogger('razer.device{0}.state'.format(device_number))
+        self._parent = parent
+
+        self._lock = threading.Lock()
+        self._values = {}
+        # Properties the device has a getter for
+        self._properties = set()
+        # Properties the device has a setter for
+        self._settable = set()
+        # Interface: properties read back after its setters
+        self._read_back = {}
+        # Effect family: (setter, args) of the last effect set
+        self._effects = {}
+        # Effect setters the device has
+        self._effect_methods = set()
+        # Row: last setKeyRow payload for the row
+        self._frame_rows = {}
+
+        # Thread local so only the thread writing the steps is quiet
+        self._local = threading.local()
+
+        self.on_change = None
+        self.on_write = None
+
+    @property
+    def properties(self):
+        return frozenset(self._properties)
+
+    @property
+    def settable(self):
+        return frozenset(self._settable)
+
+    @property
+    def effect_methods(self):
+        return frozenset(self._effect_methods)
+
+    def track(self, function, interface_name, function_name):
+        """
+        Register a DBus method and wrap it if it gets or sets a property
+
+        :param function: DBus method taking the DBus object as the first argument
+        :type function: func
+
+        :param interface_name: DBus interface
+        :type interface_name: str
+
+        :param function_name: DBus method name
+        :type function_name: str
+
+        :return: Wrapped or the same method
+        :rtype: func
+        """
+        self.register(interface_name, function_name)
+        return wrap(function, interface_name, function_name)
+
+    def register(self, interface_name, function_name):
+        """
+        Note the properties and effects a DBus method of the device gets or sets
+
+        Called for every method the device has, wrapped methods are shared by every device of a class so this is
+        kept apart from wrap().
+
+        :param interface_name: DBus interface
+        :type interface_name: str
+
+        :param function_name: DBus method name
+        :type function_name: str
+        """
+        key = (interface_name, function_name)
+
+        if key in _GETTERS:
+            name = _GETTERS[key]
+            self._properties.add(name)
+            if name in READ_BACK:
+                self._read_back.setdefault(READ_BACK[name], set()).add(name)
+        elif key in _SETTERS:
+            self._settable.add(_SETTERS[key])
+        elif _is_effect(interface_name, function_name):
+            self._effect_methods.add(function_name)
+
+    def update(self, values):
+        """
+        Store new property values and signal the ones which changed
+
+        :param values: Property name: value
+        :type values: dict
+        """
+        with self._lock:
+            changed = {name: value for name, value in values.items() if name not in self._values or self._values[name] != value}
+            self._values.update(changed)
+
+        if changed:
+            self._logger.debug("Properties changed: %s", ', '.join(sorted(changed)))
+            try:
+                self._parent.PropertiesChanged(changed)
+            except Exception as err:
+                self._logger.warning("Failed to send PropertiesChanged: %s", err)
+
+            self._changed()
+
+    def _changed(self):
+        if self.on_change is not None:
+            self.on_change()
+
+    def written(self, key):
+        """
+        Called after a setter of a property or effect family
+        """
+        if self.on_write is not None:
+            self.on_write(key)
+
+    @property
+    def is_quiet(self):
+        return getattr(self._local, 'quiet', False)
+
+    @contextlib.contextmanager
+    def quiet(self):
+        """
+        Don't update the state from setters called by this thread in the block
+        """
+        self._local.quiet = True
+        try:
+            yield
+        finally:
+            self._local.quiet = False
+
+    def set_effect(self, family, function_name, args):
+        """
+        Store the last effect set on a family
+
+        :param family: Effect family, see openrazer_daemon.misc.effect_coalescer.effect_family
+        :type family: str
+
+        :param function_name: DBus setter
+        :type function_name: str
+
+        :param args: Setter arguments
+        :type args: tuple
+        """
+        effect = (function_name, list(args))
+        with self._lock:
+            changed = self._effects.get(family) != effect
+            self._effects[family] = effect
+
+        if changed:
+            self._changed()
+
+    @property
+    def effects(self):
+        """
+        Get the last effect set on each family
+
+        :return: Family: (setter, args)
+        :rtype: dict
+        """
+        with self._lock:
+            return dict(self._effects)
+
+    def set_frame(self, payload):
+        """
+        Store the rows of a custom frame, kept per row as a frame is often sent a few rows at a time
+
+        Rows are kept as last sent, a row sent for only some of its columns replaces the whole row.
+
+        :param payload: setKeyRow payload of one or more (row, start column, end column, RGB...)
+        :type payload: bytes
+        """
+        payload = bytes(payload)
+        rows = {}
+        index = 0
+        while index + 3 <= len(payload):
+            row, start, end = payload[index:index + 3]
+            length = 3 + (end - start + 1) * 3
+            rows[row] = payload[index:index + length]
+            index += length
+
+        with self._lock:
+            self._frame_rows.update(rows)
+
+    @property
+    def frame(self):
+        """
+        Get the last custom frame
+
+        :return: setKeyRow payload of every row sent, empty if none were
+        :rtype: bytes
+        """
+        with self._lock:
+            return b''.join(self._frame_rows[row] for row in sorted(self._frame_rows))
+
+    def known(self):
+        """
+        Get the properties known without reading the device
+
+        :return: Property name: value
+        :rtype: dict
+        """
+        with self._lock:
+            return dict(self._values)
+
+    def read_back(self, interface_name):
+        """
+        Read the properties changed by a setter on an interface which have been read before
+
+        :param interface_name: DBus interface of the setter
+        :type interface_name: str
+        """
+        with self._lock:
+            names = [name for name in self._read_back.get(interface_name, ()) if name in self._values]
+
+        for name in names:
+            self._read(name)
+
+    def _read(self, name):
+        """
+        Read a property through its getter, the getter stores it
+        """
+        try:
+            return getattr(self._parent, PROPERTIES[name][1])()
+        except (OSError, ValueError) as err:
+            self._logger.warning("Failed to read %s: %s", name, err)
+            return None
+
+    def get(self):
+        """
+        Get every property, ones not known yet are read
+
+        :return: Property name: value
+        :rtype: dict
+        """
+        with self._lock:
+            missing = self._properties.difference(self._values)
+
+        for name in sorted(missing):
+            self._read(name)
+
+        with self._lock:
+            return dict(self._values)
+
+    def refresh(self):
+        """
+        Read every known property again, for when the device changed behind the setters like on suspend
+        """
+        with self._lock:
+            names = list(self._values)
+
+        for name in names:
+            self._read(name)
@@ -0,0 +1,153 @@
+"""
+Coalesces effect events sent between devices
+
+Dragging a brightness slider sends an effect event per step and each one used to be written to every other device.
+Events are grouped by (sending device, effect family) and only the latest one in a window is passed on. The first
+event of a burst goes out straight away and the last one when the window closes, so the final value always lands.
+"""
+import logging
+import threading
+
+from openrazer_daemon.misc.timer_service import get_timer_service
+
+# Effects on these zones replace each other but not the effect on another zone
+ZONES = ('Logo', 'Scroll', 'Backlight')
+
+
+def effect_family(effect_name):
+    """
+    Get the family of an effect, an event only replaces earlier events of the same family
+
+    Each brightness is its own family, all other set effects on a zone are one family as the latest replaces them.
+    Anything else like triggerReactive is kept as its own family.
+
+    :param effect_name: Effect name
+    :type effect_name: str
+
+    :return: Family name
+    :rtype: str
+    """
+    if not effect_name.startswith('set') or 'Brightness' in effect_name:
+        return effect_name
+
+    for zone in ZONES:
+        if effect_name.startswith(zone, 3):
+            return zone
+
+    return 'effect'
+
+
+class EffectCoalescer(object):
+    """
+    Passes on the latest event per key at most once a window, with leading and trailing delivery
+
+    Deliveries are serialised so a trailing event can never overtake the leading one.
+    """
+    def __init__(self, window, deliver, timer_service=None):
+        """
+        :param window: Window in seconds
+        :type window: float
+
+        :param deliver: Called with (key, msg) for every event passed on
+        :type deliver: callable
+
+        :param timer_service: Timer service to close windows on, defaults to the daemon's
+        :type timer_service: openrazer_daemon.misc.timer_service.TimerService or None
+        """
+        self._logger = logging.getLogger('razer.coalescer')
+        self._window = window
+        self._deliver = deliver
+        self._timer_service = timer_service if timer_service is not None else get_timer_service()
+
+        self._lock = threading.RLock()
+        # key: latest event not yet passed on or None, only there while the key's window is open
+        self._pending = {}
+        self._timers = {}
+        self._is_closed = False
+
+        self.delivered = 0
+        self.coalesced = 0
+
+    @property
+    def window(self):
+        return self._window
+
+    def submit(self, key, msg):
+        """
+        Pass on an event now if its key has no open window, otherwise hold it until the window closes
+
+        :param key: Key, events with the same key replace each other
+        :type key: object
+
+        :param msg: Event
+        :type msg: tuple
+        """
+        with self._lock:
+            if self._is_closed:
+                return
+
+            if key in self._pending:
+                if self._pending[key] is not None:
+                    self.coalesced += 1
+                self._pending[key] = msg
+                return
+
+            self._open_window(key)
+            self._send(key, msg)
+
+    def _open_window(self, key):
+        self._pending[key] = None
+        self._timers[key] = self._timer_service.call_later(self._window, self._close_window, key)
+
+    def _close_window(self, key):
+        """
+        Pass on the held event and open a new window, or forget the key if nothing came in
+        """
+        with self._lock:
+            if self._is_closed:
+                return
+
+            msg = self._pending.pop(key, None)
+            self._timers.pop(key, None)
+            if msg is not None:
+                self._open_window(key)
+                self._send(key, msg)
+
+    def _send(self, key, msg):
+        self.delivered += 1
+        try:
+            self._deliver(key, msg)
+        except Exception as err:
+            self._logger.exception("Failed to deliver %s", str(msg), exc_info=err)
+
+    def flush(self):
+        """
+        Pass on every held event now
+        """
+        with self._lock:
+            for key in list(self._timers):
+                self._timers.pop(key).cancel()
+                msg = self._pending.pop(key, None)
+                if msg is not None:
+                    self._send(key, msg)
+
+    def close(self):
+        """
+        Deliver anything held and stop the timers
+        """
+        with self._lock:
+            self.flush()
+            self._is_closed = True
+
+    def as_dict(self):
+        """
+        Get the counters
+
+        :return: Dict of window (ms), delivered and coalesced (events replaced by a later one)
+        :rtype: dict
+        """
+        return {
+            'window': self._window * 1000,
+            'delivered': self.delivered,
+            'coalesced': self.coalesced
+        }
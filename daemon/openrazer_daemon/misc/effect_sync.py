@@ -1,8 +1,185 @@
 """
 Class to manage syncing of effects
+
+Effects are translated from one device to another with a table compiled per (source class, target class) pair, so
+running a synced effect is one dictionary lookup and a call. Tables are compiled when a device is added to the
+collection, anything not seen then is compiled the first time it is synced.
 """
 import inspect
 import logging
+import re
+import threading
+
+from openrazer_daemon.misc.metrics import SENDER_KEYWORD
+
+# Methods on a source device which could send an effect event
+EFFECT_METHOD_REGEX = re.compile(r'^(set|trigger)[A-Z]')
+
+BREATH_EFFECTS = ('setBreathSingle', 'setBreathRandom', 'setBreathDual')
+SYNC_GREEN = (0x00, 0xFF, 0x00)
+
+# (source class, target class): EffectTable
+_tables = {}
+_tables_lock = threading.Lock()
+
+
+def get_num_parameters(func):
+    """
+    Get the number of arguments an effect method takes
+
+    Leaves out the sender argument added to methods when endpoint metrics are recorded
+
+    :param func: Function or method
+    :type func: callable
+
+    :return: Number of arguments
+    :rtype: int
+    """
+    return len([name for name in inspect.signature(func).parameters if name != SENDER_KEYWORD])
+
+
+class EffectTable(object):
+    """
+    Translations of the effects sent by one device class into calls on another
+
+    Entries are keyed by (effect name, number of arguments) and hold (function, arguments). The function is the one on
+    the target class so it is called with the target device, a None for arguments means pass the effect's own. An entry
+    of None means the target has nothing to translate that effect to.
+    """
+    def __init__(self, source_class, target_class):
+        self.source_class = source_class
+        self.target_class = target_class
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+
+        for name, func in inspect.getmembers(source_class, callable):
+            if EFFECT_METHOD_REGEX.match(name) is None:
+                continue
+            try:
+                key = (name, get_num_parameters(func) - 1)  # Dont count self
+            except (TypeError, ValueError):
+                continue
+            self._entries[key] = self.translate(*key)
+
+    def translate(self, effect_name, num_args):
+        """
+        Work out what an effect becomes on the target class
+
+        :param effect_name: Name of the effect
+        :type effect_name: str
+
+        :param num_args: Number of arguments the effect was sent with
+        :type num_args: int
+
+        :return: (function, arguments) or None
+        :rtype: tuple or None
+        """
+        effect_func = getattr(self.target_class, effect_name, None)
+        if effect_func is not None:
+            # We have method, does it have the correct num arguments
+            actual_args = get_num_parameters(effect_func) - 1
+            if actual_args == num_args:
+                # method should be same
+                return effect_func, None
+
+            # Method same but wrong args, try alternatives
+            if effect_name == 'setStatic':
+                # Could be static from chroma to non chroma
+                if actual_args == 0:
+                    # Chroma -> BW
+                    return effect_func, ()
+                # BW -> Chroma
+                return effect_func, SYNC_GREEN
+
+        elif effect_name == 'setPulsate':
+            # BW -> Chroma?
+            effect_func = getattr(self.target_class, 'setBreathSingle', None)
+            if effect_func is not None:
+                return effect_func, SYNC_GREEN
+
+        elif effect_name in BREATH_EFFECTS:
+            # Chroma -> BW?
+            effect_func = getattr(self.target_class, 'setPulsate', None)
+            if effect_func is not None:
+                return effect_func, ()
+
+        return None
+
+    def lookup(self, effect_name, num_args):
+        """
+        Get the translation of an effect, compiling it if it wasnt seen when the table was made
+
+        :param effect_name: Name of the effect
+        :type effect_name: str
+
+        :param num_args: Number of arguments the effect was sent with
+        :type num_args: int
+
+        :return: (function, arguments) or None
+        :rtype: tuple or None
+        """
+        key = (effect_name, num_args)
+        try:
+            entry = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            entry = self._entries[key] = self.translate(effect_name, num_args)
+        else:
+            self.hits += 1
+
+        return entry
+
+    def as_dict(self):
+        """
+        Get the table's coverage and counters
+
+        :return: Dict of source, target, effects (entries in the table), translated (entries the target can run), hits
+                 and misses
+        :rtype: dict
+        """
+        return {
+            'source': self.source_class.__name__,
+            'target': self.target_class.__name__,
+            'effects': len(self._entries),
+            'translated': len([entry for entry in self._entries.values() if entry is not None]),
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+
+def get_effect_table(source_class, target_class):
+    """
+    Get the effect table for a pair of classes, compiling it the first time
+
+    :param source_class: Class of the device sending effects
+    :type source_class: type
+
+    :param target_class: Class of the device receiving them
+    :type target_class: type
+
+    :return: Effect table
+    :rtype: EffectTable
+    """
+    key = (source_class, target_class)
+    table = _tables.get(key)
+    if table is None:
+        with _tables_lock:
+            table = _tables.get(key)
+            if table is None:
+                table = _tables[key] = EffectTable(source_class, target_class)
+    return table
+
+
+def get_effect_tables():
+    """
+    Get every compiled effect table
+
+    :return: List of effect tables
+    :rtype: list of EffectTable
+    """
+    return list(_tables.values())
+
 
 class EffectSync(object):
     """
@@ -36,9 +213,9 @@ class EffectSync(object):
             # Device is the device the msg originated from (could be parent device)
             if msg[1] is not self._parent:
                 # Msg from another device
-                self.run_effect(msg[2], *msg[3:])
+                self.run_effect(msg[2], *msg[3:], source=msg[1])
 
-    def run_effect(self, effect_name, *args):
+    def run_effect(self, effect_name, *args, source=None):
         """
         Run the specified effect with the given arguments
 
@@ -47,42 +224,18 @@ class EffectSync(object):
 
         :param args: Arguments for the specified effect
         :type args: list
+
+        :param source: Device the effect came from
+        :type source: object
         """
         # Disable notifications
         self._parent.disable_notify = True
 
         try:
-            # Does parent have method
-            effect_func = getattr(self._parent, effect_name, None)
-            if effect_func is not None:
-                # We have method, does it have the correct num arguments
-                actual_args = self.get_num_arguments(effect_func)
-                if actual_args == len(args):
-                    # method should be same
-                    effect_func(*args)
-                else:
-                    # Method same but wrong args, try alternatives
-                    if effect_name == 'setStatic':
-                        # Could be static from chroma to non chroma
-                        if actual_args == 0:
-                            # Chroma -> BW
-                            effect_func()
-                        else:
-                            # BW -> Chroma
-                            effect_func(0x0, 0xFF, 0x00) # Green
-
-            else:
-                # We dont have method
-                if effect_name == 'setPulsate':
-                    # BW -> Chroma?
-                    effect_func = getattr(self._parent, 'setBreathSingle', None)
-                    if effect_func is not None:
-                        effect_func(0x00, 0xFF, 0x00) # Green
-                if effect_name in ('setBreathSingle', 'setBreathRandom', 'setBreathDual'):
-                    # Chroma -> BW?
-                    effect_func = getattr(self._parent, 'setPulsate', None)
-                    if effect_func is not None:
-                        effect_func() # Pulsate
+            entry = get_effect_table(type(source), type(self._parent)).lookup(effect_name, len(args))
+            if entry is not None:
+                effect_func, effect_args = entry
+                effect_func(self._parent, *(args if effect_args is None else effect_args))
 
         except Exception as err:
             self._logger.exception("Caught exception trying to sync effects.", exc_info=err)
@@ -0,0 +1,193 @@
+"""
+Shared memory frame transport
+
+Instead of sending every frame as a DBus byte array a client can ask for a frame ring. This is a small ring buffer
+in a memfd (or an unlinked file in /dev/shm when memfd is unavailable) plus a notification fd (an eventfd, or a pipe
+as fallback). Both fds are passed to the client over DBus. The client writes frames into the ring and pokes the
+notification fd, a thread in the daemon wakes up and sends the newest frame to the device.
+
+A ring has a single writer. The write sequence and slots aren't safe to share, so every getFrameRing call makes a new
+ring and closes the one handed out before it. The daemon sets the closed flag in the header of a ring it stops
+reading, a writer checks it before each frame and goes back to DBus or asks for a new ring.
+
+Layout, all little endian:
+  Header (64 bytes):  magic 'RZFR', version u32, slot count u32, slot size u32, write sequence u64, flags u32
+  Slot (16 + slot size bytes each): sequence u64, length u32, padding u32, payload
+
+A writer sets the slot sequence to 0, writes the payload and length, then sets the slot sequence and finally the
+header write sequence. The reader checks the slot sequence before and after copying the payload so it can discard
+a slot that was overwritten mid-read.
+
+This needs to stay in sync with openrazer.client.frame_ring
+"""
+import logging
+import mmap
+import os
+import select
+import struct
+import tempfile
+import threading
+
+MAGIC = b'RZFR'
+VERSION = 1
+
+HEADER_FORMAT = '<4sIIIQ'
+HEADER_SIZE = 64
+WRITE_SEQ_OFFSET = struct.calcsize('<4sIII')
+FLAGS_OFFSET = struct.calcsize(HEADER_FORMAT)
+
+# Set in the header flags when the daemon no longer reads the ring
+FLAG_CLOSED = 1
+
+SLOT_HEADER_FORMAT = '<QI'
+SLOT_HEADER_SIZE = 16
+
+DEFAULT_SLOT_COUNT = 4
+
+
+def _create_shared_fd(name, size):
+    """
+    Create an anonymous shared memory file
+
+    :param name: Name used for debugging
+    :type name: str
+
+    :param size: Size in bytes
+    :type size: int
+
+    :return: File descriptor
+    :rtype: int
+    """
+    if hasattr(os, 'memfd_create'):
+        fd = os.memfd_create('openrazer-{0}'.format(name), getattr(os, 'MFD_CLOEXEC', 0))
+    else:
+        shm_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+        fd, path = tempfile.mkstemp(prefix='openrazer-{0}-'.format(name), dir=shm_dir)
+        os.unlink(path)
+
+    os.ftruncate(fd, size)
+    return fd
+
+
+def _create_notify_fds():
+    """
+    Create the notification fd(s)
+
+    :return: Tuple of (read fd, write fd), they are the same fd for an eventfd
+    :rtype: tuple of int
+    """
+    if hasattr(os, 'eventfd'):
+        fd = os.eventfd(0, os.EFD_CLOEXEC | os.EFD_NONBLOCK)
+        return fd, fd
+
+    read_fd, write_fd = os.pipe()
+    os.set_blocking(read_fd, False)
+    return read_fd, write_fd
+
+
+class FrameRing(object):
+    """
+    Daemon side of the shared memory frame transport
+
+    The callback is ran on the ring's thread with the newest frame whenever the client signals, frames which were
+    overwritten before the daemon got to them are dropped. Only one client may write to a ring, see the module
+    docstring.
+    """
+    def __init__(self, name, slot_size, callback, slot_count=DEFAULT_SLOT_COUNT):
+        self._logger = logging.getLogger('razer.framering.{0}'.format(name))
+        self._callback = callback
+
+        self.slot_size = slot_size
+        self.slot_count = slot_count
+        self._stride = SLOT_HEADER_SIZE + slot_size
+        size = HEADER_SIZE + self._stride * slot_count
+
+        self.memory_fd = _create_shared_fd(name, size)
+        self._mmap = mmap.mmap(self.memory_fd, size)
+        struct.pack_into(HEADER_FORMAT, self._mmap, 0, MAGIC, VERSION, slot_count, slot_size, 0)
+
+        self._notify_read_fd, self.notify_fd = _create_notify_fds()
+        self._stop_read_fd, self._stop_write_fd = os.pipe()
+
+        self._last_seq = 0
+        self.frames_received = 0
+        self.frames_dropped = 0
+
+        self._thread = threading.Thread(target=self._run, name='FrameRing-{0}'.format(name), daemon=True)
+        self._thread.start()
+
+    def read_latest(self):
+        """
+        Read the newest frame from the ring
+
+        :return: Payload or None if there is no new complete frame
+        :rtype: bytes or None
+        """
+        write_seq = struct.unpack_from('<Q', self._mmap, WRITE_SEQ_OFFSET)[0]
+        if write_seq <= self._last_seq:
+            return None
+
+        offset = HEADER_SIZE + (write_seq % self.slot_count) * self._stride
+        seq_before, length = struct.unpack_from(SLOT_HEADER_FORMAT, self._mmap, offset)
+        if seq_before != write_seq or length > self.slot_size:
+            return None
+
+        payload = self._mmap[offset + SLOT_HEADER_SIZE:offset + SLOT_HEADER_SIZE + length]
+
+        seq_after = struct.unpack_from('<Q', self._mmap, offset)[0]
+        if seq_after != write_seq:
+            return None
+
+        self.frames_dropped += write_seq - self._last_seq - 1
+        self.frames_received += 1
+        self._last_seq = write_seq
+        return payload
+
+    def _drain_notify(self):
+        """
+        Clear the notification fd
+        """
+        try:
+            while os.read(self._notify_read_fd, 8):
+                if self._notify_read_fd == self.notify_fd:
+                    break  # eventfd reads always clear the whole counter
+        except BlockingIOError:
+            pass
+
+    def _run(self):
+        """
+        Thread function
+        """
+        while True:
+            readable, _, _ = select.select([self._notify_read_fd, self._stop_read_fd], [], [])
+            if self._stop_read_fd in readable:
+                break
+
+            self._drain_notify()
+
+            payload = self.read_latest()
+            if payload is not None:
+                try:
+                    self._callback(payload)
+                except Exception:
+                    self._logger.exception("Failed to present frame")
+
+        self._logger.debug("Shutting down frame ring")
+
+    def close(self):
+        """
+        Stop the thread, tell the writer the ring is closed and release the shared memory
+        """
+        if self._thread is None:
+            return
+
+        os.write(self._stop_write_fd, b'\x00')
+        self._thread.join(timeout=2)
+        self._thread = None
+
+        # The writer keeps its mapping, so it sees this after ours is gone
+        struct.pack_into('<I', self._mmap, FLAGS_OFFSET, FLAG_CLOSED)
+        self._mmap.close()
+        fds = {self.memory_fd, self._notify_read_fd, self.notify_fd, self._stop_read_fd, self._stop_write_fd}
+        for fd in fds:
+            os.close(fd)
@@ -0,0 +1,101 @@
+"""
+Per device worker used to run blocking driver I/O away from the calling thread
+"""
+import concurrent.futures
+import logging
+import queue
+import threading
+
+
+class IOWorker(object):
+    """
+    Runs jobs for a single device one after another on its own thread
+
+    Jobs submitted to the same worker keep their order, jobs on different workers run in parallel. The thread
+    is only started once the first job is submitted so devices that never use it dont cost a thread.
+    """
+    def __init__(self, name):
+        self._logger = logging.getLogger('razer.ioworker.{0}'.format(name))
+        self._name = name
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._is_closed = False
+
+    @property
+    def queue_depth(self):
+        """
+        Number of jobs waiting to be run
+
+        :return: Queue depth
+        :rtype: int
+        """
+        return self._queue.qsize()
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Queue a job on the worker
+
+        :param func: Callable to run
+        :type func: callable
+
+        :return: Future which will hold the result
+        :rtype: concurrent.futures.Future
+
+        :raises RuntimeError: If the worker has been closed
+        """
+        future = concurrent.futures.Future()
+
+        with self._lock:
+            if self._is_closed:
+                raise RuntimeError("IOWorker {0} is closed".format(self._name))
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='IOWorker-{0}'.format(self._name), daemon=True)
+                self._thread.start()
+
+            self._queue.put((future, func, args, kwargs))
+
+        return future
+
+    def _run(self):
+        """
+        Thread function
+        """
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+
+            future, func, args, kwargs = job
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            try:
+                result = func(*args, **kwargs)
+            except Exception as err:
+                future.set_exception(err)
+            else:
+                future.set_result(result)
+
+        self._logger.debug("Shutting down IO worker")
+
+    def close(self, timeout=2):
+        """
+        Stop the worker once the queued jobs have run
+
+        :param timeout: Time to wait for the thread to finish
+        :type timeout: float
+        """
+        with self._lock:
+            if self._is_closed:
+                return
+            self._is_closed = True
+            thread = self._thread
+
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout=timeout)
+            if thread.is_alive():
+                self._logger.error("Could not stop IOWorker thread")
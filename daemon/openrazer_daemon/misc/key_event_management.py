@@ -11,6 +11,9 @@ Each event is in the format of
 * unsigned short of event type
 * unsigned short code
 * signed int value
+
+Records are decoded a read buffer at a time and their timestamps carried around as integer nanoseconds on the
+time.monotonic_ns() clock, datetimes are only made for the hourly statistics buckets.
 """
 import datetime
 import fcntl
@@ -26,16 +29,23 @@ import time
 
 # pylint: disable=import-error
 from openrazer_daemon.keyboard import KEY_MAPPING, TARTARUS_KEY_MAPPING, EVENT_MAPPING, TARTARUS_EVENT_MAPPING, NAGA_HEX_V2_EVENT_MAPPING, NAGA_HEX_V2_KEY_MAPPING, ORBWEAVER_EVENT_MAPPING, ORBWEAVER_KEY_MAPPING
-from .macro import MacroKey, MacroRunner, macro_dict_to_obj
+from .macro import MacroExecutor, MacroJob, MacroKey, MacroProgram, MacroRunner, macro_dict_to_obj
 
 EVENT_FORMAT = '@llHHI'
 EVENT_SIZE = struct.calcsize(EVENT_FORMAT)
+READ_SIZE = EVENT_SIZE * 64
+
+EV_KEY = 0x01  # input-event-codes.h
+KEY_ACTIONS = {0: 'release', 1: 'press', 2: 'autorepeat'}
 
-EPOLL_TIMEOUT = 0.01
-SPIN_SLEEP = 0.01
+NS_PER_SECOND = 1000000000
+TEMP_KEY_EXPIRE = 2 * NS_PER_SECOND
 
 EVIOCGRAB = 0x40044590
 
+# Events older than this when they arrive have a bogus timestamp, they are left out of the latency metrics
+MAX_EVENT_LATENCY = 60 * NS_PER_SECOND
+
 COLOUR_CHOICES = (
     (255, 0, 0),    # Red
     (0, 255, 0),    # Green
@@ -70,38 +80,29 @@ class KeyWatcher(threading.Thread):
     Thread to watch keyboard event files and return keypresses
     """
     @staticmethod
-    def parse_event_record(data):
+    def parse_event_buffer(data):
         """
-        Parse Input event record
+        Parse a buffer of input event records
+
+        Event timestamps are on the wall clock, they are moved to the time.monotonic_ns() clock so they can be
+        compared with the current time without making datetimes.
 
-        :param data: Binary data
+        :param data: Binary data, a whole number of records
         :type data: bytes
 
-        :return: Tuple of event time, key_action, key_code
-        :rtype: tuple
+        :return: List of (event time in ns, key_action, key_code) for each key event
+        :rtype: list of tuple
         """
-        # Event Seconds, Event Microseconds, Event Type, Event Code, Event Value
-        ev_sec, ev_usec, ev_type, ev_code, ev_value = struct.unpack(EVENT_FORMAT, data)
-
-        if ev_type != 0x01: # input-event-codes.h EV_KEY 0x01
-            return None, None, None
+        clock_offset = time.monotonic_ns() - time.time_ns()
+        result = []
 
-        if ev_value == 0:
-            key_action = 'release'
-        elif ev_value == 1:
-            key_action = 'press'
-        elif ev_value == 2:
-            key_action = 'autorepeat'
-        else:
-            key_action = 'unknown'
-
-        seconds = ev_sec + (ev_usec * 0.000001)
-        date = datetime.datetime.fromtimestamp(seconds)
-
-        result = (date, key_action, ev_code)
+        # Event Seconds, Event Microseconds, Event Type, Event Code, Event Value
+        for ev_sec, ev_usec, ev_type, ev_code, ev_value in struct.iter_unpack(EVENT_FORMAT, data):
+            if ev_type != EV_KEY:
+                continue
 
-        if ev_type == ev_code == ev_value == 0:
-            return None, None, None
+            event_time = ev_sec * NS_PER_SECOND + ev_usec * 1000 + clock_offset
+            result.append((event_time, KEY_ACTIONS.get(ev_value, 'unknown'), ev_code))
 
         return result
 
@@ -111,10 +112,15 @@ class KeyWatcher(threading.Thread):
         self._logger = logging.getLogger('razer.device{0}.keywatcher'.format(device_id))
         self._event_files = event_files
         self._shutdown = False
+        # Written to on shutdown so the thread doesnt have to wake up to check, only open while the thread runs
+        self._wake_lock = threading.Lock()
+        self._wake_read = None
+        self._wake_write = None
         self._use_epoll = use_epoll
         self._parent = parent
+        self._partial_records = {}
 
-        self.open_event_files = [open(event_file, 'rb') for event_file in self._event_files]
+        self.open_event_files = [open(event_file, 'rb', buffering=0) for event_file in self._event_files]
         # Set open files to non blocking mode
         if not use_epoll:
             for event_file in self.open_event_files:
@@ -124,7 +130,12 @@ class KeyWatcher(threading.Thread):
     def run(self):
         """
         Main event loop
+
+        Blocks until an event file or the shutdown pipe is readable, there are no wakeups while no keys are pressed.
         """
+        with self._wake_lock:
+            self._wake_read, self._wake_write = os.pipe()
+
         # Create dict of Event File Descriptor: Event File Object
         event_file_map = {event_file.fileno(): event_file for event_file in self.open_event_files}
 
@@ -134,6 +145,7 @@ class KeyWatcher(threading.Thread):
         # Register files with select
         for event_fd in event_file_map.keys():
             poll_object.register(event_fd, select.EPOLLIN | select.EPOLLPRI)
+        poll_object.register(self._wake_read, select.EPOLLIN)
 
         # Loop
         while not self._shutdown:
@@ -145,9 +157,9 @@ class KeyWatcher(threading.Thread):
                 else:
                     self._poll_read()
             except (IOError, OSError):  # Basically if theres an error, most likely device has been removed then it'll get deleted properly
-                pass
-
-            time.sleep(SPIN_SLEEP)
+                if not self._shutdown:
+                    # Dont spin on a removed device while waiting to be shut down
+                    select.select([self._wake_read], [], [])
 
         # Unbind files and close them
         for event_fd, event_file in event_file_map.items():
@@ -156,38 +168,48 @@ class KeyWatcher(threading.Thread):
 
         poll_object.close()
 
-    def _poll_epoll(self, poll_object, event_file_map):
-        events = poll_object.poll(EPOLL_TIMEOUT)
+        with self._wake_lock:
+            os.close(self._wake_read)
+            os.close(self._wake_write)
+            self._wake_read = self._wake_write = None
 
-        if len(events) != 0:
-            # pylint: disable=unused-variable
-            for event_fd, mask in events:
-                key_data = event_file_map[event_fd].read(EVENT_SIZE)
+    def _read_events(self, event_file):
+        """
+        Read every waiting event from a file and pass the key events to the key manager
 
-                date, key_action, key_code = self.parse_event_record(key_data)
+        :param event_file: Event file
+        :type event_file: io.FileIO
+        """
+        event_fd = event_file.fileno()
+        try:
+            data = os.read(event_fd, READ_SIZE)
+        except BlockingIOError:
+            return
 
-                # Skip if date, key_action and key_code is none as thats a spacer record
-                if date is None:
-                    continue
+        # evdev only returns whole records, a FIFO might not
+        data = self._partial_records.pop(event_fd, b'') + data
+        remainder = len(data) % EVENT_SIZE
+        if remainder:
+            self._partial_records[event_fd] = data[-remainder:]
+            data = data[:-remainder]
 
-                # Now if key is pressed then we record
-                self._parent.key_action(date, key_code, key_action)
+        for event_time, key_action, key_code in self.parse_event_buffer(data):
+            self._parent.key_action(event_time, key_code, key_action)
 
-    def _poll_read(self):
-        for event_file in self.open_event_files:
-            key_data = event_file.read(EVENT_SIZE)
-
-            if key_data is None:
-                continue
+    def _poll_epoll(self, poll_object, event_file_map):
+        events = poll_object.poll()
 
-            date, key_action, key_code = self.parse_event_record(key_data)
+        # pylint: disable=unused-variable
+        for event_fd, mask in events:
+            if event_fd in event_file_map:
+                self._read_events(event_file_map[event_fd])
 
-            # Skip if date, key_action and key_code is none as thats a spacer record
-            if date is None:
-                continue
+    def _poll_read(self):
+        # Wait for any file to be readable then try them all, they are non blocking
+        select.select(self.open_event_files + [self._wake_read], [], [])
 
-            # Now if key is pressed then we record
-            self._parent.key_action(date, key_code, key_action)
+        for event_file in self.open_event_files:
+            self._read_events(event_file)
 
     @property
     def shutdown(self):
@@ -207,6 +229,10 @@ class KeyWatcher(threading.Thread):
         :type value: str
         """
         self._shutdown = value
+        if value:
+            with self._wake_lock:
+                if self._wake_write is not None:
+                    os.write(self._wake_write, b'\0')
 
 
 class KeyboardKeyManager(object):
@@ -225,6 +251,9 @@ class KeyboardKeyManager(object):
     KEY_MAP = KEY_MAPPING
     EVENT_MAP = EVENT_MAPPING
 
+    # MacroStore shared by all key managers, set by the daemon. Macros aren't kept across restarts without one
+    MACRO_STORE = None
+
     # pylint: disable=too-many-instance-attributes
     def __init__(self, device_id, event_files, parent, use_epoll=False, testing=False, should_grab_event_files=False):
 
@@ -250,16 +279,19 @@ class KeyboardKeyManager(object):
 
         self._recording_macro = False
         self._macros = {}
+        self._macros_json = None
 
         self._current_macro_bind_key = None
         self._current_macro_combo = []
 
-        self._threads = set()
-        self._clean_counter = 0
+        self._macro_executor = MacroExecutor(device_id)
 
         self._temp_key_store_active = False
         self._temp_key_store = []
-        self._temp_expire_time = datetime.timedelta(seconds=2)
+        self._temp_expire_time = TEMP_KEY_EXPIRE
+
+        self._stats_bucket = None
+        self._stats_bucket_expire = 0
 
         self._last_colour_choice = None
 
@@ -269,6 +301,7 @@ class KeyboardKeyManager(object):
         if self._should_grab_event_files:
             self.grab_event_files(True)
 
+        self.load_macros()
 
     #TODO add property for enabling key stats?
 
@@ -277,12 +310,12 @@ class KeyboardKeyManager(object):
         """
         Get the temporary key store
 
-        :return: List of keys
+        :return: List of (expire time in ns, (row, column), colour)
         :rtype: list
         """
         # Locking so it doesnt mutate whilst copying
         self._access_lock.acquire()
-        now = datetime.datetime.now()
+        now = time.monotonic_ns()
 
         # Remove expired keys from store
         try:
@@ -329,6 +362,52 @@ class KeyboardKeyManager(object):
                 fcntl.ioctl(event_file.fileno(), EVIOCGRAB, int(grab))
         self._event_files_locked = grab
 
+    def record_event_latency(self, event_time):
+        """
+        Record how long a key event took to reach the key manager, only done when endpoint metrics are enabled
+
+        :param event_time: Time event occured in ns, time.monotonic_ns() clock
+        :type event_time: int
+        """
+        latency = time.monotonic_ns() - event_time
+        if 0 <= latency < MAX_EVENT_LATENCY:
+            self.record_latency('key_event', latency / NS_PER_SECOND)
+
+    def record_latency(self, name, duration):
+        """
+        Record a latency against the device if endpoint metrics are enabled
+
+        :param name: Name of what was timed
+        :type name: str
+
+        :param duration: Seconds
+        :type duration: float
+        """
+        metrics = getattr(self._parent, 'METRICS', None)
+        if metrics is not None:
+            metrics.record_latency(self._parent.object_path, name, duration)
+
+    def get_storage_bucket(self, now):
+        """
+        Get the statistics bucket for the current hour
+
+        The bucket name is only worked out again once the hour is up instead of for every key.
+
+        :param now: Current time in ns, time.monotonic_ns() clock
+        :type now: int
+
+        :return: Bucket name like 2017010112
+        :rtype: str
+        """
+        if now >= self._stats_bucket_expire:
+            wall_time = datetime.datetime.now()
+            next_hour = wall_time.replace(minute=0, second=0, microsecond=0) + datetime.timedelta(hours=1)
+
+            self._stats_bucket = wall_time.strftime('%Y%m%d%H')
+            self._stats_bucket_expire = now + int((next_hour - wall_time).total_seconds() * NS_PER_SECOND)
+
+        return self._stats_bucket
+
     def key_action(self, event_time, key_id, key_press='press'):
         """
         Process a key press event
@@ -342,8 +421,8 @@ class KeyboardKeyManager(object):
         * Pressing FN+F10 will toggle game mode.
         * Pressing any key will increment a statistical number in a dictionary used for generating
           heatmaps.
-        :param event_time: Time event occured
-        :type event_time: datetime.datetime
+        :param event_time: Time event occured in ns, time.monotonic_ns() clock
+        :type event_time: int
 
         :param key_id: Key Event ID
         :type key_id: int
@@ -353,6 +432,7 @@ class KeyboardKeyManager(object):
         """
         # Disable pylints complaining for this part, #PerformanceOverNeatness
         # pylint: disable=too-many-branches,too-many-statements
+        self.record_event_latency(event_time)
 
         # Get event files if they arnt locked #nasty hack
         if not self._event_files_locked and self._should_grab_event_files:
@@ -366,7 +446,7 @@ class KeyboardKeyManager(object):
                # Quit out early
                return
 
-        now = datetime.datetime.now()
+        now = time.monotonic_ns()
 
         # Remove expired keys from store
         try:
@@ -376,11 +456,6 @@ class KeyboardKeyManager(object):
         except IndexError:
             pass
 
-        # Clean up any threads
-        if self._clean_counter > 20 and len(self._threads) > 0:
-            self._clean_counter = 0
-            self.clean_macro_threads()
-
         try:
             # Convert event ID to key name
             key_name = self.EVENT_MAP[key_id]
@@ -399,7 +474,7 @@ class KeyboardKeyManager(object):
                 # Key press
 
                 # This is the key for storing stats, by generating hour timestamps it will bucket data nicely.
-                storage_bucket = event_time.strftime('%Y%m%d%H')
+                storage_bucket = self.get_storage_bucket(now)
 
                 try:
                     # Try and increment key in bucket
@@ -508,6 +583,34 @@ class KeyboardKeyManager(object):
             self._logger.exception("Got key error. Couldn't convert event to key name", exc_info=err)
 
 
+    def load_macros(self):
+        """
+        Load the device's macros from the macro store
+
+        They are stored compiled so nothing is parsed beyond the JSON. Bad entries are skipped.
+        """
+        if self.MACRO_STORE is None:
+            return
+
+        for macro_key, stored in self.MACRO_STORE.load(self._parent.serial).items():
+            try:
+                self._macros[macro_key] = MacroProgram.from_store(stored)
+            except ValueError as err:
+                self._logger.warning("Skipping stored macro %s: %s", macro_key, err)
+
+        if self._macros:
+            self._logger.info("Loaded %d macros from %s", len(self._macros), self.MACRO_STORE.path(self._parent.serial))
+
+    def macros_changed(self):
+        """
+        Drop the cached getMacros JSON and write the macros to the macro store
+        """
+        self._macros_json = None
+
+        if self.MACRO_STORE is not None:
+            stored = {macro_key: program.to_store() for macro_key, program in self._macros.items()}
+            self.MACRO_STORE.save(self._parent.serial, stored)
+
     def add_kb_macro(self):
         """
         Tidy up the recorded macro and add it to the store
@@ -518,41 +621,25 @@ class KeyboardKeyManager(object):
 
         start_time = self._current_macro_combo[0][0]
         for event_time, key, state in self._current_macro_combo:
-            delay = (event_time - start_time).microseconds
+            delay = (event_time - start_time) // 1000
             start_time = event_time
             new_macro.append(MacroKey(key, delay, state))
 
-        self._macros[self._current_macro_bind_key] = new_macro
-
-    def clean_macro_threads(self):
-        """
-        Threadless-threadpool
-
-        Goes though the threads (macro play jobs) and removed the threads if they have finished.
-        #SetMagic
-        """
-        self._logger.debug("Cleaning up macro threads")
-        to_remove = set()
-
-        for macro_thread in self._threads:
-            macro_thread.join(timeout=0.05)
-            if not macro_thread.is_alive():
-                to_remove.add(macro_thread)
-
-        self._threads -= to_remove
+        self._macros[self._current_macro_bind_key] = MacroProgram.compile(new_macro)
+        self.macros_changed()
 
     def play_macro(self, macro_key):
         """
         Play macro for a given key
 
-        Launches a thread and adds it to the pool
+        Queues it on the macro executor, the key's policy decides what happens if it is already playing
         :param macro_key: Macro Key
         :type macro_key: str
         """
         self._logger.info("Running Macro %s:%s", macro_key, str(self._macros[macro_key]))
-        macro_thread = MacroRunner(self._device_id, macro_key, self._macros[macro_key])
-        macro_thread.start()
-        self._threads.add(macro_thread)
+        macro_job = MacroRunner(self._device_id, macro_key, self._macros[macro_key], record_latency=self.record_latency)
+        if not self._macro_executor.submit(macro_key, macro_job):
+            self._logger.debug("Dropped macro %s, policy %s", macro_key, self._macro_executor.get_policy(macro_key))
 
     def play_media_key(self, media_key):
         """
@@ -561,9 +648,7 @@ class KeyboardKeyManager(object):
         :param media_key: Media key name
         :type media_key: str
         """
-        media_key_thread = MediaKeyPress(media_key)
-        media_key_thread.start()
-        self._threads.add(media_key_thread)
+        self._macro_executor.submit(media_key, MediaKeyPress(media_key))
 
     # Methods to be used with DBus
     def dbus_delete_macro(self, key_name):
@@ -577,6 +662,8 @@ class KeyboardKeyManager(object):
             del self._macros[key_name]
         except KeyError:
             pass
+        else:
+            self.macros_changed()
 
     def dbus_get_macros(self):
         """
@@ -588,21 +675,26 @@ class KeyboardKeyManager(object):
         MACRO_DICT is a dict representation of an action that can be performed. The dict will have a
         type key which determins what type of action it will perform.
         For example there are key press macros, URL opening macros, Script running macros etc...
+
+        The JSON is cached until the macros change.
         :return: JSON of macros
         :rtype: str
         """
-        result_dict = {}
-        for macro_key, macro_combo in self._macros.items():
-            str_combo = [value.to_dict() for value in macro_combo]
-            result_dict[macro_key] = str_combo
+        if self._macros_json is None:
+            result_dict = {}
+            for macro_key, program in self._macros.items():
+                result_dict[macro_key] = program.to_dicts()
 
-        return json.dumps(result_dict)
+            self._macros_json = json.dumps(result_dict)
+
+        return self._macros_json
 
     def dbus_add_macro(self, macro_key, macro_json):
         """
         Add macro from JSON
 
-        The macro_json will be a list of macro objects which is then converted into JSON
+        The macro_json will be a list of macro objects which is then converted into JSON and compiled, so nothing
+        has to be parsed or converted when it is played.
         :param macro_key: Macro bind key
         :type macro_key: str
 
@@ -610,12 +702,84 @@ class KeyboardKeyManager(object):
         :type macro_json: str
         """
         macro_list = [macro_dict_to_obj(macro_object_dict) for macro_object_dict in json.loads(macro_json)]
-        self._macros[macro_key] = macro_list
+        self._macros[macro_key] = MacroProgram.compile(macro_list)
+        self.macros_changed()
+
+    def set_macros(self, macros):
+        """
+        Replace all macros, only bind keys whose macro changed are compiled
+
+        Every new macro is compiled before any is replaced so an invalid one leaves the macros as they were.
+        :param macros: Bind key: list of macro dicts as returned in getMacros
+        :type macros: dict
+
+        :return: Number of bind keys changed and number left as they were
+        :rtype: tuple of int
+
+        :raises ValueError: If a macro is invalid
+        """
+        current = json.loads(self.dbus_get_macros())
+
+        compiled = {}
+        for macro_key, macro_dicts in macros.items():
+            if current.get(macro_key) != macro_dicts:
+                try:
+                    compiled[macro_key] = MacroProgram.compile([macro_dict_to_obj(macro_dict) for macro_dict in macro_dicts])
+                except (KeyError, TypeError) as err:
+                    raise ValueError("Invalid macro for {0}: {1}".format(macro_key, err))
+
+        removed = [macro_key for macro_key in self._macros if macro_key not in macros]
+        for macro_key in removed:
+            del self._macros[macro_key]
+        self._macros.update(compiled)
+
+        changed = len(compiled) + len(removed)
+        if changed:
+            self.macros_changed()
+
+        return changed, len(macros) - len(compiled)
+
+    def dbus_get_macro_policy(self, macro_key):
+        """
+        Get what happens when a macro key is pressed while its macro is still playing
+
+        :param macro_key: Macro bind key
+        :type macro_key: str
+
+        :return: queue, restart or ignore
+        :rtype: str
+        """
+        return self._macro_executor.get_policy(macro_key)
+
+    def dbus_set_macro_policy(self, macro_key, policy):
+        """
+        Set what happens when a macro key is pressed while its macro is still playing
+
+        :param macro_key: Macro bind key
+        :type macro_key: str
+
+        :param policy: queue, restart or ignore
+        :type policy: str
+
+        :raises ValueError: If the policy is unknown
+        """
+        self._macro_executor.set_policy(macro_key, policy)
+
+    def dbus_get_macro_queue_depth(self):
+        """
+        Get the number of macros waiting to play
+
+        :return: Queued macros
+        :rtype: int
+        """
+        return self._macro_executor.queue_depth
 
     def close(self):
         """
         Cleanup function
         """
+        self._macro_executor.close()
+
         if self._keywatcher.is_alive():
             self._parent.remove_observer(self)
 
@@ -678,8 +842,8 @@ class GamepadKeyManager(KeyboardKeyManager):
         * Pressing FN+F10 will toggle game mode.
         * Pressing any key will increment a statistical number in a dictionary used for generating
           heatmaps.
-        :param event_time: Time event occured
-        :type event_time: datetime.datetime
+        :param event_time: Time event occured in ns, time.monotonic_ns() clock
+        :type event_time: int
 
         :param key_id: Key Event ID
         :type key_id: int
@@ -689,13 +853,14 @@ class GamepadKeyManager(KeyboardKeyManager):
         """
         # Disable pylints complaining for this part, #PerformanceOverNeatness
         # pylint: disable=too-many-branches,too-many-statements
+        self.record_event_latency(event_time)
         self._access_lock.acquire()
 
         if not self._event_files_locked:
             self.grab_event_files(True)
 
 
-        now = datetime.datetime.now()
+        now = time.monotonic_ns()
 
         # Remove expired keys from store
         try:
@@ -705,11 +870,6 @@ class GamepadKeyManager(KeyboardKeyManager):
         except IndexError:
             pass
 
-        # Clean up any threads
-        if self._clean_counter > 20 and len(self._threads) > 0:
-            self._clean_counter = 0
-            self.clean_macro_threads()
-
         try:
             # Convert event ID to key name
 
@@ -717,7 +877,7 @@ class GamepadKeyManager(KeyboardKeyManager):
             # Key press
 
             # This is the key for storing stats, by generating hour timestamps it will bucket data nicely.
-            storage_bucket = event_time.strftime('%Y%m%d%H')
+            storage_bucket = self.get_storage_bucket(now)
 
             try:
                 # Try and increment key in bucket
@@ -799,7 +959,7 @@ class OrbweaverKeyManager(GamepadKeyManager):
     GAMEPAD_KEY_MAPPING = ORBWEAVER_KEY_MAPPING
 
 
-class MediaKeyPress(threading.Thread):
+class MediaKeyPress(MacroJob):
     """
     Class to run xdotool to execute media/volume keypresses
     """
@@ -3,21 +3,151 @@ Macro stuff
 
 Has objects representing key events
 Launching programs etc...
+
+Key events are played through a virtual keyboard on /dev/uinput which lives as long as the daemon, with each event
+sent at its recorded spacing. If uinput can't be opened they are fed to xte instead.
+
+Macros are played as jobs on a MacroExecutor, a few worker threads per key manager with a bounded queue. What happens
+when a macro key is pressed again while its macro is still running is set per key by a policy.
 """
+import collections
+import fcntl
 import logging
+import os
+import struct
 import subprocess
 import threading
+import time
 
 # pylint: disable=import-error
-from openrazer_daemon.keyboard import XTE_MAPPING
+from openrazer_daemon.keyboard import XTE_MAPPING, EVENT_MAPPING
 
 # This determins if the macro keys are executed with their natural spacing
 XTE_SLEEP = False
 
+UINPUT_PATH = '/dev/uinput'
+UINPUT_NAME = b'OpenRazer Macro Keyboard'
+UI_SET_EVBIT = 0x40045564
+UI_SET_KEYBIT = 0x40045565
+UI_DEV_CREATE = 0x5501
+UI_DEV_DESTROY = 0x5502
+BUS_VIRTUAL = 0x06
+
+# struct uinput_user_dev, name, input_id, ff_effects_max then absmax, absmin, absfuzz and absflat
+UINPUT_USER_DEV_FORMAT = '80sHHHHi' + '64i' * 4
+INPUT_EVENT_FORMAT = '@llHHi'
+
+EV_SYN = 0x00
+EV_KEY = 0x01
+SYN_REPORT = 0
+
+KEY_CODES = {key_name: key_code for key_code, key_name in EVENT_MAPPING.items()}
+
+# Policies for a key triggered while its job is queued or running
+POLICY_QUEUE = 'queue'  # Run again once the current run finishes
+POLICY_RESTART = 'restart'  # Cancel the current run and start again
+POLICY_IGNORE = 'ignore'  # Drop the new trigger
+POLICIES = (POLICY_QUEUE, POLICY_RESTART, POLICY_IGNORE)
+
+MAX_WORKERS = 2
+MAX_QUEUE = 32
+
+
+class UInputKeyboard(object):
+    """
+    Virtual keyboard on /dev/uinput which can press every key in EVENT_MAPPING
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._fd = os.open(UINPUT_PATH, os.O_WRONLY | os.O_NONBLOCK)
+
+        try:
+            fcntl.ioctl(self._fd, UI_SET_EVBIT, EV_KEY)
+            for key_code in sorted(set(KEY_CODES.values())):
+                fcntl.ioctl(self._fd, UI_SET_KEYBIT, key_code)
+
+            os.write(self._fd, struct.pack(UINPUT_USER_DEV_FORMAT, UINPUT_NAME, BUS_VIRTUAL, 0x1532, 0, 1, 0, *([0] * 256)))
+            fcntl.ioctl(self._fd, UI_DEV_CREATE)
+        except OSError:
+            os.close(self._fd)
+            raise
+
+    def send_key(self, key_code, down):
+        """
+        Press or release a key
+
+        :param key_code: evdev key code
+        :type key_code: int
+
+        :param down: True to press, False to release
+        :type down: bool
+        """
+        data = struct.pack(INPUT_EVENT_FORMAT, 0, 0, EV_KEY, key_code, 1 if down else 0) + \
+            struct.pack(INPUT_EVENT_FORMAT, 0, 0, EV_SYN, SYN_REPORT, 0)
+
+        # One write so events from macros running at the same time dont interleave
+        with self._lock:
+            os.write(self._fd, data)
+
+    def close(self):
+        """
+        Remove the virtual keyboard
+        """
+        with self._lock:
+            if self._fd is not None:
+                try:
+                    fcntl.ioctl(self._fd, UI_DEV_DESTROY)
+                finally:
+                    os.close(self._fd)
+                    self._fd = None
+
+
+_uinput_lock = threading.Lock()
+_uinput_keyboard = None
+_uinput_failed = False
+
+
+def get_uinput_keyboard():
+    """
+    Get the daemon's virtual keyboard, created on first use
+
+    :return: Keyboard or None if uinput isn't usable in which case xte is used
+    :rtype: UInputKeyboard or None
+    """
+    # pylint: disable=global-statement
+    global _uinput_keyboard, _uinput_failed
+
+    with _uinput_lock:
+        if _uinput_keyboard is None and not _uinput_failed:
+            try:
+                _uinput_keyboard = UInputKeyboard()
+            except OSError as err:
+                _uinput_failed = True
+                logging.getLogger('razer.macro').warning("Could not create uinput keyboard, falling back to xte: %s", err)
+
+        return _uinput_keyboard
+
+
+def close_uinput_keyboard():
+    """
+    Remove the virtual keyboard if it was created
+    """
+    # pylint: disable=global-statement
+    global _uinput_keyboard
+
+    with _uinput_lock:
+        if _uinput_keyboard is not None:
+            _uinput_keyboard.close()
+            _uinput_keyboard = None
+
 class MacroObject(object):
     """
     Macro base object
+
+    Macros can hold a lot of these so they have slots instead of a __dict__
     """
+    __slots__ = ()
+
     def to_dict(self):
         """
         Convert the object to a dict to be sent over DBus
@@ -44,6 +174,8 @@ class MacroKey(MacroObject):
     """
     Is an object of a key event used in macros
     """
+    __slots__ = ('key_id', 'pre_pause', 'state')
+
     def __init__(self, key_id, pre_pause, state):
         self.key_id = key_id
         self.pre_pause = pre_pause
@@ -78,6 +210,8 @@ class MacroURL(MacroObject):
     """
     Is an object of a key event used in macros
     """
+    __slots__ = ('url',)
+
     def __init__(self, url):
         self.url = url
 
@@ -104,6 +238,8 @@ class MacroScript(MacroObject):
     """
     Is an object of a key event used in macros
     """
+    __slots__ = ('script', 'args')
+
     def __init__(self, script, args=None):
         self.script = script
         if isinstance(args, str):
@@ -121,7 +257,7 @@ class MacroScript(MacroObject):
         return {
             'type': 'MacroScript',
             'script': self.script,
-            'args': self.args
+            'args': self.args[1:]  # Without the space __init__ adds, so it survives a round trip
         }
 
     def execute(self):
@@ -131,16 +267,18 @@ class MacroScript(MacroObject):
         proc = subprocess.Popen(self.script + self.args, shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
         proc.communicate()
 
-class MacroRunner(threading.Thread):
-    """
-    Thread to run macros
+KeyBlock = collections.namedtuple('KeyBlock', ['events', 'xte_script'])
+
+
+class MacroProgram(collections.namedtuple('MacroProgram', ['macro_data', 'steps', 'key_count'])):
     """
-    def __init__(self, device_id, macro_bind, macro_data):
-        super(MacroRunner, self).__init__()
+    Macro compiled once when it is bound so playing it only has to run the steps
 
-        self._logger = logging.getLogger('razer.device{0}.macro{1}'.format(device_id, macro_bind))
-        self._macro_data = macro_data
-        self._macro_bind = macro_bind
+    Steps are either a KeyBlock, a run of key events as (delay in seconds, key code, down) tuples along with the same
+    run as an xte script, or the URL and script objects between them. macro_data holds the objects the program was
+    compiled from so it can be sent back over DBus.
+    """
+    __slots__ = ()
 
     @staticmethod
     def xte_line(key_event):
@@ -169,33 +307,424 @@ class MacroRunner(threading.Thread):
 
         return cmd
 
-    def run(self):
-        """
-        Main thread function
+    @classmethod
+    def compile(cls, macro_data):
         """
+        Compile a list of macro objects
 
-        # TODO move the xte-munging to the init
-        xte = ''
+        :param macro_data: Macro objects
+        :type macro_data: list
 
-        for event in self._macro_data:
-            if isinstance(event, MacroKey):
-                xte += self.xte_line(event)
+        :return: Program
+        :rtype: MacroProgram
+        """
+        steps = []
+        events = []
+        xte = ''
+        delay = 0.0
+        key_count = 0
+
+        for macro_object in macro_data:
+            if isinstance(macro_object, MacroKey):
+                delay += macro_object.pre_pause / 1000000
+                xte += cls.xte_line(macro_object)
+
+                key_code = KEY_CODES.get(macro_object.key_id)
+                if key_code is None:
+                    # The pause carries over to the next key
+                    logging.getLogger('razer.macro').warning("No key code for %s, it will be skipped", macro_object.key_id)
+                else:
+                    events.append((delay, key_code, macro_object.state != 'UP'))
+                    delay = 0.0
             else:
-                if xte != '':
-                    proc = subprocess.Popen(['xte'], stdin=subprocess.PIPE)
-                    proc.communicate(input=xte.encode('ascii'))
+                if events or xte:
+                    steps.append(KeyBlock(tuple(events), xte.encode('ascii')))
+                    key_count += len(events)
+                    events = []
                     xte = ''
+                delay = 0.0
+                steps.append(macro_object)
+
+        if events or xte:
+            steps.append(KeyBlock(tuple(events), xte.encode('ascii')))
+            key_count += len(events)
+
+        return cls(tuple(macro_data), tuple(steps), key_count)
 
-                # Now run everything else (this just allows for less calls to xte
-                if not isinstance(event, MacroKey):
-                    event.execute()
+    def to_dicts(self):
+        """
+        Convert the macro objects to dicts to be sent over DBus
+
+        :return: List of dicts
+        :rtype: list
+        """
+        return [macro_object.to_dict() for macro_object in self.macro_data]
 
-        if xte != '':
-            proc = subprocess.Popen(['xte'], stdin=subprocess.PIPE)
-            proc.communicate(input=xte.encode('ascii'))
+    def to_store(self):
+        """
+        Convert the program to a JSON safe dict for the macro store
+
+        The compiled steps are kept so loading doesn't compile again. Steps which aren't a KeyBlock are kept as their
+        index in macro_data.
+
+        :return: Dict of macro, steps and key_count
+        :rtype: dict
+        """
+        object_index = {id(macro_object): index for index, macro_object in enumerate(self.macro_data)}
+        steps = []
+        for step in self.steps:
+            if isinstance(step, KeyBlock):
+                steps.append({'events': [list(event) for event in step.events], 'xte': step.xte_script.decode('ascii')})
+            else:
+                steps.append({'object': object_index[id(step)]})
+
+        return {'macro': self.to_dicts(), 'steps': steps, 'key_count': self.key_count}
+
+    @classmethod
+    def from_store(cls, stored):
+        """
+        Rebuild a program from the macro store
+
+        :param stored: Dict made by to_store
+        :type stored: dict
+
+        :return: Program
+        :rtype: MacroProgram
+
+        :raises ValueError: If the stored program is malformed
+        """
+        try:
+            macro_data = tuple(macro_dict_to_obj(macro_dict) for macro_dict in stored['macro'])
+            steps = []
+            for step in stored['steps']:
+                if 'object' in step:
+                    steps.append(macro_data[step['object']])
+                else:
+                    events = tuple((float(delay), int(key_code), bool(down)) for delay, key_code, down in step['events'])
+                    steps.append(KeyBlock(events, step['xte'].encode('ascii')))
+            return cls(macro_data, tuple(steps), int(stored['key_count']))
+        except (KeyError, IndexError, TypeError, AttributeError) as err:
+            raise ValueError("malformed stored macro: {0}".format(err))
+
+    def __repr__(self):
+        return repr(list(self.macro_data))
+
+
+class MacroJob(object):
+    """
+    Something run on a MacroExecutor which can be cancelled
+    """
+    def __init__(self):
+        self._cancel_event = threading.Event()
+
+    @property
+    def cancelled(self):
+        """
+        If the job has been cancelled
+
+        :return: Cancelled
+        :rtype: bool
+        """
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        """
+        Ask the job to stop, it stops at the next point it checks
+        """
+        self._cancel_event.set()
+
+    def run(self):
+        """
+        Run the job, called on an executor thread
+        """
+        raise NotImplementedError()
+
+
+class MacroExecutor(object):
+    """
+    Runs macro jobs on a bounded number of worker threads
+
+    Jobs are submitted against a key. Only one job per key runs at a time, the key's policy decides what happens to
+    a job submitted while one is already queued or running. Workers are started as they are needed.
+    """
+    def __init__(self, device_id, max_workers=MAX_WORKERS, max_queue=MAX_QUEUE):
+        self._logger = logging.getLogger('razer.device{0}.macroexecutor'.format(device_id))
+        self._device_id = device_id
+        self._max_workers = max_workers
+        self._max_queue = max_queue
+
+        self._condition = threading.Condition()
+        self._queue = collections.deque()
+        self._running = {}
+        self._policies = {}
+        self._workers = []
+        self._idle_workers = 0
+        self._closed = False
+
+        self.dropped = 0
+
+    @property
+    def queue_depth(self):
+        """
+        Number of jobs waiting to run
+
+        :return: Queued jobs
+        :rtype: int
+        """
+        with self._condition:
+            return len(self._queue)
+
+    @property
+    def running(self):
+        """
+        Number of jobs running
+
+        :return: Running jobs
+        :rtype: int
+        """
+        with self._condition:
+            return len(self._running)
+
+    def get_policy(self, key):
+        """
+        Get the policy for a key
+
+        :param key: Key name
+        :type key: str
+
+        :return: Policy
+        :rtype: str
+        """
+        return self._policies.get(key, POLICY_QUEUE)
+
+    def set_policy(self, key, policy):
+        """
+        Set the policy for a key
+
+        :param key: Key name
+        :type key: str
+
+        :param policy: One of POLICIES
+        :type policy: str
+
+        :raises ValueError: If the policy is unknown
+        """
+        if policy not in POLICIES:
+            raise ValueError("Unknown policy {0}, expected one of {1}".format(policy, ', '.join(POLICIES)))
+        self._policies[key] = policy
+
+    def submit(self, key, job):
+        """
+        Queue a job
+
+        :param key: Key which triggered the job
+        :type key: str
+
+        :param job: Job
+        :type job: MacroJob
+
+        :return: True if the job was queued, False if it was dropped
+        :rtype: bool
+        """
+        with self._condition:
+            if self._closed:
+                return False
+
+            policy = self.get_policy(key)
+            busy = key in self._running or any(queued_key == key for queued_key, _ in self._queue)
+
+            if busy and policy == POLICY_IGNORE:
+                self.dropped += 1
+                return False
+
+            if busy and policy == POLICY_RESTART:
+                if key in self._running:
+                    self._running[key].cancel()
+                self._queue = collections.deque(entry for entry in self._queue if entry[0] != key)
+
+            if len(self._queue) >= self._max_queue:
+                self._logger.warning("Macro queue full, dropping %s", key)
+                self.dropped += 1
+                return False
+
+            self._queue.append((key, job))
+
+            if self._idle_workers == 0 and len(self._workers) < self._max_workers:
+                worker = threading.Thread(target=self._worker, name='MacroExecutor-{0}-{1}'.format(self._device_id, len(self._workers)), daemon=True)
+                self._workers.append(worker)
+                worker.start()
+
+            self._condition.notify()
+            return True
+
+    def _next_job(self):
+        """
+        Wait for a job whose key isn't already running, must be called with the condition held
+
+        :return: Key and job or None when closed
+        :rtype: tuple or None
+        """
+        while not self._closed:
+            for index, (key, job) in enumerate(self._queue):
+                if key not in self._running:
+                    del self._queue[index]
+                    self._running[key] = job
+                    return key, job
+
+            self._idle_workers += 1
+            self._condition.wait()
+            self._idle_workers -= 1
+
+        return None
+
+    def _worker(self):
+        """
+        Worker thread function
+        """
+        while True:
+            with self._condition:
+                entry = self._next_job()
+            if entry is None:
+                break
+
+            key, job = entry
+            try:
+                if not job.cancelled:
+                    job.run()
+            except Exception:  # pylint: disable=broad-except
+                self._logger.exception("Macro job for %s failed", key)
+            finally:
+                with self._condition:
+                    del self._running[key]
+                    self._condition.notify_all()
+
+    def cancel_all(self):
+        """
+        Cancel the running jobs and drop the queued ones
+        """
+        with self._condition:
+            for job in self._running.values():
+                job.cancel()
+            self._queue.clear()
+
+    def close(self, timeout=2):
+        """
+        Cancel all jobs and stop the workers
+
+        :param timeout: Seconds to wait for each worker
+        :type timeout: float
+        """
+        with self._condition:
+            self._closed = True
+            for job in self._running.values():
+                job.cancel()
+            self._queue.clear()
+            self._condition.notify_all()
+
+        for worker in self._workers:
+            worker.join(timeout)
+            if worker.is_alive():
+                self._logger.warning("Macro worker %s did not stop", worker.name)
+
+
+class MacroRunner(MacroJob):
+    """
+    Job to run a macro
+    """
+    def __init__(self, device_id, macro_bind, program, keyboard=None, record_latency=None):
+        super(MacroRunner, self).__init__()
+
+        self._logger = logging.getLogger('razer.device{0}.macro{1}'.format(device_id, macro_bind))
+        self._program = program
+        self._macro_bind = macro_bind
+        self._keyboard = keyboard
+        self._record_latency = record_latency
+        self._created = time.monotonic()
+
+        self.jitter = []
+
+    def run_uinput(self, keyboard):
+        """
+        Play the macro through the virtual keyboard with each key event at its recorded spacing
+
+        :param keyboard: Virtual keyboard
+        :type keyboard: UInputKeyboard
+        """
+        deadline = time.monotonic()
+        held_keys = set()
+
+        for step in self._program.steps:
+            if isinstance(step, KeyBlock):
+                for delay, key_code, down in step.events:
+                    # Sleeping to the deadline rather than for the pause stops the errors adding up over a long macro
+                    deadline += delay
+                    remaining = deadline - time.monotonic()
+                    if remaining > 0 and self._cancel_event.wait(remaining):
+                        break
+                    if self.cancelled:
+                        break
+
+                    keyboard.send_key(key_code, down)
+                    self.jitter.append(time.monotonic() - deadline)
+
+                    if down:
+                        held_keys.add(key_code)
+                    else:
+                        held_keys.discard(key_code)
+            elif not self.cancelled:
+                step.execute()
+                # Spacing restarts after a URL or script
+                deadline = time.monotonic()
+
+            if self.cancelled:
+                # Dont leave keys stuck down
+                for key_code in held_keys:
+                    keyboard.send_key(key_code, False)
+                self._logger.debug("Cancelled macro %s", self._macro_bind)
+                return
+
+        if self.jitter:
+            mean_jitter = sum(self.jitter) / len(self.jitter)
+            max_jitter = max(self.jitter)
+            self._logger.debug("Finished running macro %s, %d key events, jitter mean %.3fms max %.3fms",
+                               self._macro_bind, len(self.jitter), mean_jitter * 1000, max_jitter * 1000)
+
+            if self._record_latency is not None:
+                self._record_latency('macro_jitter', max_jitter)
+        else:
+            self._logger.debug("Finished running macro %s", self._macro_bind)
+
+    def run_xte(self):
+        """
+        Play the macro with xte, one xte process per run of key events
+        """
+        for step in self._program.steps:
+            if self.cancelled:
+                self._logger.debug("Cancelled macro %s", self._macro_bind)
+                return
+
+            if isinstance(step, KeyBlock):
+                if step.xte_script:
+                    proc = subprocess.Popen(['xte'], stdin=subprocess.PIPE)
+                    proc.communicate(input=step.xte_script)
+            else:
+                step.execute()
 
         self._logger.debug("Finished running macro %s", self._macro_bind)
 
+    def run(self):
+        """
+        Play the macro
+        """
+        if self._record_latency is not None:
+            self._record_latency('macro_start', time.monotonic() - self._created)
+
+        keyboard = self._keyboard if self._keyboard is not None else get_uinput_keyboard()
+        if keyboard is not None:
+            self.run_uinput(keyboard)
+        else:
+            self.run_xte()
+
 def macro_dict_to_obj(macro_dict):
     """
     Converts a macro string to its relevant object
@@ -0,0 +1,16 @@
+"""
+On disk store of bound macros
+
+Macros are stored already compiled so loading them is just reading the file, see MacroProgram.to_store.
+"""
+from openrazer_daemon.misc.serial_store import SerialStore
+
+
+class MacroStore(SerialStore):
+    """
+    Directory of per device macro files
+
+    load and save take and return a dict of macro key: stored program, as made by MacroProgram.to_store
+    """
+    def __init__(self, directory):
+        super(MacroStore, self).__init__(directory, 'macros')
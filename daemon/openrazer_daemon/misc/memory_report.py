@@ -0,0 +1,137 @@
+"""
+Memory accounting
+
+Sizes are found by walking an object's references and adding up sys.getsizeof, so they are estimates of what a device
+keeps alive rather than exact allocator figures. Objects shared by every device, classes, modules, code and loggers,
+aren't walked into, and neither are the types given as boundaries so the walk stays within one device.
+"""
+import logging
+import sys
+import types
+import weakref
+
+# Never walked into, shared by the whole daemon
+SHARED_TYPES = (type, types.ModuleType, types.CodeType, types.MethodType, types.BuiltinFunctionType,
+                logging.Logger, weakref.ref)
+
+
+def _references(obj):
+    """
+    Get the objects an object refers to that are counted as part of it
+    """
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            yield key
+            yield value
+        return
+
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        yield from obj
+        return
+
+    if isinstance(obj, types.FunctionType):
+        # Generated wrappers keep what they wrap in their closure, globals and code are shared
+        for cell in obj.__closure__ or ():
+            yield cell
+        yield obj.__defaults__
+        yield obj.__kwdefaults__
+        yield obj.__dict__
+        return
+
+    if type(obj).__name__ == 'cell':
+        try:
+            yield obj.cell_contents
+        except ValueError:
+            pass
+        return
+
+    instance_dict = getattr(obj, '__dict__', None)
+    if isinstance(instance_dict, dict):
+        yield instance_dict
+
+    for cls in type(obj).__mro__:
+        for name in cls.__dict__.get('__slots__', ()):
+            if name in ('__dict__', '__weakref__'):
+                continue
+            try:
+                yield getattr(obj, name)
+            except AttributeError:
+                pass
+
+    if type(obj).__module__ == 'collections' and hasattr(obj, '__iter__') and not isinstance(obj, (str, bytes)):
+        # deque, OrderedDict and friends
+        yield from list(obj)
+
+
+def deep_size(obj, seen=None, boundaries=()):
+    """
+    Get the size of an object and everything it refers to
+
+    :param obj: Object
+    :type obj: object
+
+    :param seen: IDs of objects already counted, updated with the ones counted here
+    :type seen: set or None
+
+    :param boundaries: Types which aren't walked into or counted unless they are obj itself
+    :type boundaries: tuple of type
+
+    :return: Bytes
+    :rtype: int
+    """
+    if seen is None:
+        seen = set()
+
+    total = 0
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if current is None or id(current) in seen:
+            continue
+        if current is not obj and (isinstance(current, SHARED_TYPES) or isinstance(current, boundaries)):
+            continue
+
+        seen.add(id(current))
+        total += sys.getsizeof(current, 0)
+        stack.extend(_references(current))
+
+    return total
+
+
+def component_sizes(components, seen=None, boundaries=()):
+    """
+    Get the size of each of a set of components, an object shared between components is counted in the first
+
+    :param components: (name, object) pairs, an object of None is reported as 0
+    :type components: list of tuple
+
+    :param seen: IDs of objects already counted or not to count
+    :type seen: set or None
+
+    :param boundaries: Types which aren't walked into, see deep_size
+    :type boundaries: tuple of type
+
+    :return: Name: bytes
+    :rtype: dict
+    """
+    if seen is None:
+        seen = set()
+
+    return {name: deep_size(obj, seen, boundaries) if obj is not None else 0 for name, obj in components}
+
+
+def logger_sizes(prefix):
+    """
+    Get the size of the loggers under a name, loggers are kept for the life of the process once made
+
+    :param prefix: Logger name, children of it are counted too
+    :type prefix: str
+
+    :return: Bytes
+    :rtype: int
+    """
+    total = 0
+    for name, logger in list(logging.Logger.manager.loggerDict.items()):
+        if (name == prefix or name.startswith(prefix + '.')) and isinstance(logger, logging.Logger):
+            total += sys.getsizeof(logger, 0) + sys.getsizeof(logger.__dict__, 0) + sys.getsizeof(name, 0)
+    return total
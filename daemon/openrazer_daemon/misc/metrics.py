@@ -0,0 +1,346 @@
+"""
+Endpoint metrics
+
+When enabled every DBus method added through DBusService.add_dbus_method is wrapped so that call counts, error
+counts and a latency histogram are recorded per object, interface and method. The sysfs reads and writes done by
+the method are timed separately, the DBus methods open driver files with timed_open which adds the time spent to a
+per thread counter. I/O outside a metered call only adds to a counter nobody reads.
+
+Latencies which are not a method call, like a key event taking time to reach the key manager, can be recorded per
+object with record_latency.
+"""
+import inspect
+import json
+import threading
+import time
+
+# Keyword the DBus sender (unique bus name) is passed to the wrapper with
+SENDER_KEYWORD = '_metrics_sender'
+
+# Upper bounds of the latency histogram buckets in seconds, the last bucket catches everything else
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+_io_state = threading.local()
+
+
+def _add_io_time(duration):
+    """
+    Add I/O time to the current thread's counter
+
+    :param duration: Seconds
+    :type duration: float
+    """
+    _io_state.total = getattr(_io_state, 'total', 0.0) + duration
+
+
+def _get_io_time():
+    """
+    Get the current thread's I/O time counter
+
+    :return: Seconds
+    :rtype: float
+    """
+    return getattr(_io_state, 'total', 0.0)
+
+
+class TimedFile(object):
+    """
+    File wrapper which adds the time spent reading, writing and closing to the thread's I/O counter
+    """
+    def __init__(self, file_object):
+        self._file = file_object
+
+    def _timed(self, func, *args):
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            _add_io_time(time.perf_counter() - start)
+
+    def read(self, *args):
+        return self._timed(self._file.read, *args)
+
+    def readline(self, *args):
+        return self._timed(self._file.readline, *args)
+
+    def write(self, data):
+        return self._timed(self._file.write, data)
+
+    def flush(self):
+        return self._timed(self._file.flush)
+
+    def close(self):
+        return self._timed(self._file.close)
+
+    def __iter__(self):
+        return iter(self.readline, self._file.read(0))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __getattr__(self, item):
+        return getattr(self._file, item)
+
+
+def timed_open(*args, **kwargs):
+    """
+    Drop in replacement for open which times the file I/O, used for the sysfs files of DBus methods
+
+    :return: Timed file object
+    :rtype: TimedFile
+    """
+    start = time.perf_counter()
+    try:
+        return TimedFile(open(*args, **kwargs))
+    finally:
+        _add_io_time(time.perf_counter() - start)
+
+
+class EndpointStats(object):
+    """
+    Statistics for one method on one object
+    """
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.io_time = 0.0
+        self.max_time = 0.0
+        self.histogram = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def add(self, duration, io_time, error):
+        """
+        Record a call
+
+        :param duration: Total seconds spent in the method
+        :type duration: float
+
+        :param io_time: Seconds of that spent doing file I/O
+        :type io_time: float
+
+        :param error: If the method raised
+        :type error: bool
+        """
+        self.calls += 1
+        if error:
+            self.errors += 1
+        self.total_time += duration
+        self.io_time += io_time
+        self.max_time = max(self.max_time, duration)
+
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if duration <= bound:
+                self.histogram[index] += 1
+                break
+        else:
+            self.histogram[-1] += 1
+
+    def as_dict(self):
+        """
+        Get the stats as a dict
+
+        :return: Stats
+        :rtype: dict
+        """
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'total_time': self.total_time,
+            'io_time': self.io_time,
+            'python_time': self.total_time - self.io_time,
+            'max_time': self.max_time,
+            'histogram': self.histogram,
+        }
+
+
+class MetricsRegistry(object):
+    """
+    Collects endpoint metrics from all DBus objects
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self._latencies = {}
+        self._senders = {}
+        self._start_time = time.time()
+
+    def record(self, object_path, interface, method, duration, io_time, error=False, sender=None):
+        """
+        Record a method call
+
+        :param object_path: DBus object path the method was called on
+        :type object_path: str
+
+        :param interface: DBus interface
+        :type interface: str
+
+        :param method: DBus method name
+        :type method: str
+
+        :param duration: Total seconds spent in the method
+        :type duration: float
+
+        :param io_time: Seconds of that spent doing file I/O
+        :type io_time: float
+
+        :param error: If the method raised
+        :type error: bool
+
+        :param sender: Unique bus name of the caller
+        :type sender: str or None
+        """
+        key = (object_path, interface, method)
+
+        with self._lock:
+            stats = self._endpoints.get(key)
+            if stats is None:
+                stats = self._endpoints[key] = EndpointStats()
+            stats.add(duration, io_time, error)
+
+            if sender is not None:
+                self._senders[sender] = self._senders.get(sender, 0) + 1
+
+    def record_latency(self, object_path, name, duration):
+        """
+        Record a latency which isn't a method call
+
+        :param object_path: DBus object path the latency belongs to
+        :type object_path: str
+
+        :param name: Name of what was timed, e.g. key_event
+        :type name: str
+
+        :param duration: Seconds
+        :type duration: float
+        """
+        key = (object_path, name)
+
+        with self._lock:
+            stats = self._latencies.get(key)
+            if stats is None:
+                stats = self._latencies[key] = EndpointStats()
+            stats.add(duration, 0.0, False)
+
+    def reset(self):
+        """
+        Clear all collected metrics
+        """
+        with self._lock:
+            self._endpoints.clear()
+            self._latencies.clear()
+            self._senders.clear()
+            self._start_time = time.time()
+
+    def instrument(self, function, interface, method):
+        """
+        Wrap a DBus method so its calls are recorded
+
+        The wrapper takes an extra SENDER_KEYWORD argument so dbus-python can pass in the caller's bus name.
+
+        :param function: Method taking the DBus object as the first argument
+        :type function: func
+
+        :param interface: DBus interface
+        :type interface: str
+
+        :param method: DBus method name
+        :type method: str
+
+        :return: Wrapped method
+        :rtype: func
+        """
+        def wrapper(dbus_object, *args, **kwargs):
+            sender = kwargs.pop(SENDER_KEYWORD, None)
+            io_before = _get_io_time()
+            start = time.perf_counter()
+            error = False
+
+            try:
+                return function(dbus_object, *args, **kwargs)
+            except Exception:
+                error = True
+                raise
+            finally:
+                duration = time.perf_counter() - start
+                self.record(dbus_object.object_path, interface, method, duration, _get_io_time() - io_before, error, sender)
+
+        signature = inspect.signature(function)
+        parameters = list(signature.parameters.values())
+        parameters.append(inspect.Parameter(SENDER_KEYWORD, inspect.Parameter.POSITIONAL_OR_KEYWORD, default=None))
+
+        wrapper.__name__ = method
+        wrapper.__doc__ = function.__doc__
+        wrapper.__signature__ = signature.replace(parameters=parameters)
+
+        return wrapper
+
+    def as_dict(self):
+        """
+        Get all metrics
+
+        :return: Dict with the histogram buckets, per endpoint stats, other latencies and per sender call counts
+        :rtype: dict
+        """
+        with self._lock:
+            endpoints = [
+                dict(stats.as_dict(), object=object_path, interface=interface, method=method)
+                for (object_path, interface, method), stats in self._endpoints.items()
+            ]
+            latencies = [
+                {'object': object_path, 'name': name, 'count': stats.calls, 'total_time': stats.total_time, 'max_time': stats.max_time, 'histogram': stats.histogram}
+                for (object_path, name), stats in self._latencies.items()
+            ]
+            senders = dict(self._senders)
+
+        return {
+            'since': self._start_time,
+            'buckets': list(LATENCY_BUCKETS),
+            'endpoints': endpoints,
+            'latencies': latencies,
+            'senders': senders,
+        }
+
+    def to_json(self):
+        """
+        Get all metrics as JSON
+
+        :return: JSON string
+        :rtype: str
+        """
+        return json.dumps(self.as_dict())
+
+    def to_text(self):
+        """
+        Get a human readable table of the metrics, slowest endpoints first
+
+        :return: Text dump
+        :rtype: str
+        """
+        data = self.as_dict()
+        lines = ["{0:<40} {1:<36} {2:<24} {3:>8} {4:>6} {5:>10} {6:>10} {7:>10} {8:>10}".format(
+            'object', 'interface', 'method', 'calls', 'errors', 'total ms', 'io ms', 'avg ms', 'max ms')]
+
+        for endpoint in sorted(data['endpoints'], key=lambda item: item['total_time'], reverse=True):
+            lines.append("{0:<40} {1:<36} {2:<24} {3:>8} {4:>6} {5:>10.2f} {6:>10.2f} {7:>10.3f} {8:>10.3f}".format(
+                endpoint['object'], endpoint['interface'], endpoint['method'], endpoint['calls'], endpoint['errors'],
+                endpoint['total_time'] * 1000, endpoint['io_time'] * 1000,
+                endpoint['total_time'] / endpoint['calls'] * 1000, endpoint['max_time'] * 1000))
+
+        if data['latencies']:
+            lines.append('')
+            lines.append("{0:<40} {1:<24} {2:>8} {3:>10} {4:>10}".format('object', 'latency', 'count', 'avg ms', 'max ms'))
+            for latency in sorted(data['latencies'], key=lambda item: (item['object'], item['name'])):
+                lines.append("{0:<40} {1:<24} {2:>8} {3:>10.3f} {4:>10.3f}".format(
+                    latency['object'], latency['name'], latency['count'],
+                    latency['total_time'] / latency['count'] * 1000, latency['max_time'] * 1000))
+
+        if data['senders']:
+            lines.append('')
+            lines.append("{0:<24} {1:>8}".format('sender', 'calls'))
+            for sender, calls in sorted(data['senders'].items(), key=lambda item: item[1], reverse=True):
+                lines.append("{0:<24} {1:>8}".format(sender, calls))
+
+        return '\n'.join(lines)
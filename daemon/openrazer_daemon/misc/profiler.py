@@ -0,0 +1,155 @@
+"""
+On demand profiler for the running daemon
+
+A session samples the stacks of every thread at a fixed interval and writes them as collapsed stacks (the format
+used by flamegraph.pl and speedscope). The thread which starts the session, normally the main loop, is also profiled
+with cProfile and written out as pstats.
+"""
+import cProfile
+import datetime
+import logging
+import os
+import sys
+import threading
+import time
+
+DEFAULT_INTERVAL = 0.005
+
+
+def _frame_label(frame):
+    """
+    Get a short label for a stack frame
+
+    :param frame: Stack frame
+    :type frame: frame
+
+    :return: file:function:line
+    :rtype: str
+    """
+    code = frame.f_code
+    return '{0}:{1}:{2}'.format(os.path.basename(code.co_filename), code.co_name, code.co_firstlineno)
+
+
+def _thread_label(thread):
+    """
+    Get a label for a thread, the class and thread name identify daemon threads like KeyWatcher or TimerService
+
+    :param thread: Thread
+    :type thread: threading.Thread
+
+    :return: Label
+    :rtype: str
+    """
+    if thread is threading.main_thread():
+        return 'MainLoop'
+    return '{0}({1})'.format(type(thread).__name__, thread.name).replace(';', '_').replace(' ', '_')
+
+
+class SamplingProfiler(threading.Thread):
+    """
+    Samples every thread's stack, low overhead as the profiled threads are never interrupted
+    """
+    def __init__(self, interval=DEFAULT_INTERVAL):
+        super(SamplingProfiler, self).__init__(name='SamplingProfiler', daemon=True)
+
+        self._interval = interval
+        self._stop_event = threading.Event()
+
+        self.samples = {}
+        self.sample_count = 0
+
+    def sample(self):
+        """
+        Take one sample of all threads
+        """
+        threads = {thread.ident: thread for thread in threading.enumerate()}
+
+        for ident, frame in sys._current_frames().items():
+            if ident == self.ident:
+                continue
+
+            thread = threads.get(ident)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+
+            stack.append(_thread_label(thread) if thread is not None else 'Thread-{0}'.format(ident))
+            key = ';'.join(reversed(stack))
+            self.samples[key] = self.samples.get(key, 0) + 1
+
+        self.sample_count += 1
+
+    def run(self):
+        """
+        Thread function
+        """
+        while not self._stop_event.wait(self._interval):
+            self.sample()
+
+    def stop(self):
+        """
+        Stop sampling
+        """
+        self._stop_event.set()
+        if self.is_alive():
+            self.join()
+
+    def write_collapsed(self, path):
+        """
+        Write the samples as collapsed stacks, one "frame;frame;frame count" line per unique stack
+
+        :param path: Output file
+        :type path: str
+        """
+        with open(path, 'w') as collapsed_file:
+            for stack, count in sorted(self.samples.items()):
+                collapsed_file.write('{0} {1}\n'.format(stack, count))
+
+
+class ProfilerSession(object):
+    """
+    One profiling run
+    """
+    def __init__(self, output_dir, interval=DEFAULT_INTERVAL):
+        self._logger = logging.getLogger('razer.profiler')
+        self._output_dir = output_dir
+
+        timestamp = datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
+        self.output_prefix = os.path.join(output_dir, 'razer-profile-{0}'.format(timestamp))
+
+        self._sampler = SamplingProfiler(interval)
+        self._profile = cProfile.Profile()
+        self._start_time = None
+
+    def start(self):
+        """
+        Start sampling all threads and cProfile on the calling thread
+        """
+        self._start_time = time.monotonic()
+        self._sampler.start()
+        self._profile.enable()
+        self._logger.info("Profiling started, writing to %s.*", self.output_prefix)
+
+    def stop(self):
+        """
+        Stop profiling and write the results
+
+        Must be called from the thread which started the session
+
+        :return: Paths of the collapsed stacks and pstats files
+        :rtype: tuple of str
+        """
+        self._profile.disable()
+        self._sampler.stop()
+
+        os.makedirs(self._output_dir, exist_ok=True)
+        collapsed_path = self.output_prefix + '.collapsed'
+        pstats_path = self.output_prefix + '.pstats'
+
+        self._sampler.write_collapsed(collapsed_path)
+        self._profile.dump_stats(pstats_path)
+
+        self._logger.info("Profiling stopped after %.1fs, %d samples", time.monotonic() - self._start_time, self._sampler.sample_count)
+
+        return collapsed_path, pstats_path
@@ -1,7 +1,10 @@
 """
 Contains the functions and classes to perform ripple effects
+
+Frames are timed by a periodic job on the daemon's timer service which only exists while the effect is active. They
+are drawn and written on the device's I/O worker, a tick is skipped while the last frame is still being written so a
+slow keyboard never holds up the timer thread or builds up a backlog.
 """
-import datetime
 import logging
 import math
 import threading
@@ -9,51 +12,47 @@ import time
 
 # pylint: disable=import-error
 from openrazer_daemon.keyboard import KeyboardColour
+from openrazer_daemon.misc.key_event_management import NS_PER_SECOND, TEMP_KEY_EXPIRE
+from openrazer_daemon.misc.timer_service import get_timer_service
 
-class RippleEffectThread(threading.Thread):
-    """
-    Ripple thread.
+# On 6x22 keyboards the logo sits below the keyboard but is addressed as row 0, column 20
+LOGO_DIMS = (6, 22)
+LOGO_KEY = (0, 20)
+LOGO_POSITION = (6, 11)
 
-    This thread contains the run loop which performs all the circle calculations and generating of the binary payload
+class RippleEffect(object):
     """
-    def __init__(self, parent, device_number):
-        super(RippleEffectThread, self).__init__()
+    Ripple effect.
 
-        self._logger = logging.getLogger('razer.device{0}.ripplethread'.format(device_number))
+    Each frame performs all the circle calculations and generates the binary payload
+    """
+    def __init__(self, parent, device_number, timer_service=None):
+        self._logger = logging.getLogger('razer.device{0}.rippleeffect'.format(device_number))
         self._parent = parent
+        self._timer_service = timer_service if timer_service is not None else get_timer_service()
 
         self._colour = (0, 255, 0)
         self._refresh_rate = 0.100
 
-        self._shutdown = False
-        self._active = False
+        self._timer = None
+        self._last_frame = None
+        self._lock = threading.Lock()
+        self._drawing = False
+        self.skipped = 0
 
-        self._kerboard_grid = KeyboardColour()
+        self._rows, self._cols = parent.matrix_dims
+        self._kerboard_grid = KeyboardColour(self._rows, self._cols)
+        self._has_logo = (self._rows, self._cols) == LOGO_DIMS
 
     @property
-    def shutdown(self):
-        """
-        Get the shutdown flag
-        """
-        return self._shutdown
-    @shutdown.setter
-    def shutdown(self, value):
-        """
-        Set the shutdown flag
-
-        :param value: Shutdown
-        :type value: bool
-        """
-        self._shutdown = value
-    @property
     def active(self):
         """
-        Get if the thread is active
+        Get if the effect is active
 
         :return: Active
         :rtype: bool
         """
-        return self._active
+        return self._timer is not None
     @property
     def key_list(self):
         """
@@ -80,68 +79,110 @@ class RippleEffectThread(threading.Thread):
         else:
             self._colour = colour
         self._refresh_rate = refresh_rate
-        self._active = True
+
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = self._timer_service.call_every(refresh_rate, self._schedule_frame, delay=0)
 
     def disable(self):
         """
         Disable the ripple effect
         """
-        self._active = False
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._last_frame = None
 
-    def run(self):
+    def _schedule_frame(self):
         """
-        Event loop
+        Draw a frame on the device's I/O worker, ran on the timer thread
+        """
+        io_worker = self._parent.io_worker
+        if io_worker is None:
+            self.frame()
+            return
+
+        with self._lock:
+            if self._drawing:
+                self.skipped += 1
+                return
+            self._drawing = True
+
+        try:
+            io_worker.submit(self._draw)
+        except RuntimeError:
+            # Device is going away
+            with self._lock:
+                self._drawing = False
+
+    def _draw(self):
+        try:
+            if self._timer is not None:
+                self.frame()
+        except Exception as err:
+            self._logger.warning("Failed to draw ripple frame: %s", err)
+        finally:
+            with self._lock:
+                self._drawing = False
+
+    def frame(self):
+        """
+        Draw a frame
         """
         # pylint: disable=too-many-nested-blocks,too-many-branches
-        expire_diff = datetime.timedelta(seconds=2)
-
-        # TODO time execution and then sleep for _refresh_rate - time_taken
-        while not self._shutdown:
-            if self._active:
-                # Clear keyboard
-                self._kerboard_grid.reset_rows()
-
-                now = datetime.datetime.now()
-
-                radiuses = []
-
-                for expire_time, (key_row, key_col), colour in self.key_list:
-                    event_time = expire_time - expire_diff
-
-                    now_diff = now - event_time
-
-                    # Current radius is based off a time metric
-                    if self._colour is not None:
-                        colour = self._colour
-                    radiuses.append((key_row, key_col, now_diff.total_seconds() * 12, colour))
-
-                for row in range(0, 7):
-                    for col in range(0, 22):
-                        if row == 0 and col == 20:
-                            continue
-                        if row == 6:
-                            if col != 11:
-                                continue
-                            else:
-                                # To account for logo placement
-                                for cirlce_centre_row, circle_centre_col, rad, colour in radiuses:
-                                    radius = math.sqrt(math.pow(cirlce_centre_row-row, 2) + math.pow(circle_centre_col-col, 2))
-                                    if rad >= radius >= rad-1:
-                                        self._kerboard_grid.set_key_colour(0, 20, colour)
-                                        break
-                        else:
-                            for cirlce_centre_row, circle_centre_col, rad, colour in radiuses:
-                                radius = math.sqrt(math.pow(cirlce_centre_row-row, 2) + math.pow(circle_centre_col-col, 2))
-                                if rad >= radius >= rad-1:
-                                    self._kerboard_grid.set_key_colour(row, col, colour)
-                                    break
-
-                payload = self._kerboard_grid.get_total_binary()
-
-                self._parent.set_rgb_matrix(payload)
-                self._parent.refresh_keyboard()
-
-            time.sleep(self._refresh_rate)
+        last_frame = self._last_frame
+
+        # Clear keyboard
+        self._kerboard_grid.reset_rows()
+
+        now = time.monotonic_ns()
+
+        radiuses = []
+        new_keys = []
+
+        for expire_time, (key_row, key_col), colour in self.key_list:
+            event_time = expire_time - TEMP_KEY_EXPIRE
+
+            now_diff = now - event_time
+            if last_frame is None or event_time > last_frame:
+                new_keys.append(event_time)
+
+            # Current radius is based off a time metric
+            if self._colour is not None:
+                colour = self._colour
+            radiuses.append((key_row, key_col, now_diff / NS_PER_SECOND * 12, colour))
+
+        for row in range(0, self._rows):
+            for col in range(0, self._cols):
+                if self._has_logo and (row, col) == LOGO_KEY:
+                    continue
+
+                for cirlce_centre_row, circle_centre_col, rad, colour in radiuses:
+                    radius = math.sqrt(math.pow(cirlce_centre_row-row, 2) + math.pow(circle_centre_col-col, 2))
+                    if rad >= radius >= rad-1:
+                        self._kerboard_grid.set_key_colour(row, col, colour)
+                        break
+
+        if self._has_logo:
+            # To account for logo placement
+            row, col = LOGO_POSITION
+            for cirlce_centre_row, circle_centre_col, rad, colour in radiuses:
+                radius = math.sqrt(math.pow(cirlce_centre_row-row, 2) + math.pow(circle_centre_col-col, 2))
+                if rad >= radius >= rad-1:
+                    self._kerboard_grid.set_key_colour(LOGO_KEY[0], LOGO_KEY[1], colour)
+                    break
+
+        payload = self._kerboard_grid.get_total_binary()
+
+        self._parent.set_rgb_matrix(payload)
+
+        # Time from the key manager getting a key to its first ripple frame being written
+        written = time.monotonic_ns()
+        for event_time in new_keys:
+            self._parent.record_latency('ripple_frame', (written - event_time) / NS_PER_SECOND)
+        self._last_frame = now
+
+        self._parent.refresh_keyboard()
 
 class RippleManager(object):
     """
@@ -154,15 +195,14 @@ class RippleManager(object):
 
         self._is_closed = False
 
-        self._ripple_thread = RippleEffectThread(self, device_number)
-        self._ripple_thread.start()
+        self._ripple_effect = RippleEffect(self, device_number)
 
     @property
     def key_list(self):
         """
         Get the list of keys from the key manager
 
-        :return: List of tuples (expire_time, (key_row, key_col), random_colour)
+        :return: List of tuples (expire_time in ns, (key_row, key_col), random_colour)
         :rtype: list of tuple
         """
         result = []
@@ -171,6 +211,41 @@ class RippleManager(object):
 
         return result
 
+    @property
+    def matrix_dims(self):
+        """
+        Get the dimensions of the device's LED matrix
+
+        :return: Rows, Columns
+        :rtype: tuple of int
+        """
+        rows, cols = self._parent.MATRIX_DIMS
+        return rows, cols
+
+    def record_latency(self, name, duration):
+        """
+        Record a latency against the device if endpoint metrics are enabled
+
+        :param name: Name of what was timed
+        :type name: str
+
+        :param duration: Seconds
+        :type duration: float
+        """
+        metrics = getattr(self._parent, 'METRICS', None)
+        if metrics is not None:
+            metrics.record_latency(self._parent.object_path, name, duration)
+
+    @property
+    def io_worker(self):
+        """
+        Keyboard's I/O worker
+
+        :return: Worker or None if the keyboard isn't in the device collection
+        :rtype: openrazer_daemon.misc.io_worker.IOWorker or None
+        """
+        return self._parent.io_worker
+
     def set_rgb_matrix(self, payload):
         """
         Set the LED matrix on the keyboard
@@ -204,25 +279,23 @@ class RippleManager(object):
             if msg[2] == 'setRipple':
                 # Get (red, green, blue) tuple (args 3:6), and refreshrate arg 6
                 self._parent.key_manager.temp_key_store_state = True
-                self._ripple_thread.enable(msg[3:6], msg[6])
+                self._ripple_effect.enable(msg[3:6], msg[6])
             else:
                 # Effect other than ripple so stop
-                self._ripple_thread.disable()
+                self._ripple_effect.disable()
 
                 self._parent.key_manager.temp_key_store_state = False
 
     def close(self):
         """
-        Close the manager, stop ripple thread
+        Close the manager, stop the ripple effect
         """
         if not self._is_closed:
             self._logger.debug("Closing Ripple Manager")
             self._is_closed = True
 
-            self._ripple_thread.shutdown = True
-            self._ripple_thread.join(timeout=2)
-            if self._ripple_thread.is_alive():
-                self._logger.error("Could not stop RippleEffect thread")
+            self._parent.remove_observer(self)
+            self._ripple_effect.disable()
 
     def __del__(self):
         self.close()
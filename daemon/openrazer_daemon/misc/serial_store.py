@@ -0,0 +1,116 @@
+"""
+On disk per device stores
+
+Each device gets a JSON file named after its serial so what is stored survives the daemon restarting and the device
+being replugged. Files are written to a temporary file in the same directory and renamed over the old one so a crash
+mid write never leaves a half written store behind.
+"""
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+
+STORE_VERSION = 1
+
+# Serials come from the device, keep them from walking out of the store directory
+SAFE_SERIAL_REGEX = re.compile(r'[^A-Za-z0-9_.-]')
+
+
+class SerialStore(object):
+    """
+    Directory of per device JSON files
+
+    Files are {"version": STORE_VERSION, name: dict}
+    """
+    def __init__(self, directory, name):
+        """
+        :param directory: Directory to keep the files in
+        :type directory: str
+
+        :param name: Name of what is stored, used in the file names and as the key in them
+        :type name: str
+        """
+        self._logger = logging.getLogger('razer.store.{0}'.format(name))
+        self._directory = directory
+        self._name = name
+        self._lock = threading.Lock()
+
+    @property
+    def directory(self):
+        return self._directory
+
+    def path(self, serial):
+        """
+        Get the file kept for a device
+
+        :param serial: Device serial
+        :type serial: str
+
+        :return: Path
+        :rtype: str
+        """
+        return os.path.join(self._directory, '{0}-{1}.json'.format(self._name, SAFE_SERIAL_REGEX.sub('_', serial)))
+
+    def load(self, serial):
+        """
+        Load what is stored for a device
+
+        A missing, unreadable or unknown version file is treated as empty
+
+        :param serial: Device serial
+        :type serial: str
+
+        :return: Stored dict
+        :rtype: dict
+        """
+        path = self.path(serial)
+        try:
+            with open(path, 'r') as store_file:
+                store = json.load(store_file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as err:
+            self._logger.warning("Could not read %s store %s: %s", self._name, path, err)
+            return {}
+
+        if not isinstance(store, dict) or store.get('version') != STORE_VERSION or not isinstance(store.get(self._name), dict):
+            self._logger.warning("Ignoring %s store %s, unknown format", self._name, path)
+            return {}
+
+        return store[self._name]
+
+    def save(self, serial, data):
+        """
+        Atomically replace what is stored for a device
+
+        :param serial: Device serial
+        :type serial: str
+
+        :param data: Dict to store, must be JSON serialisable
+        :type data: dict
+
+        :return: True if the store was written
+        :rtype: bool
+        """
+        path = self.path(serial)
+        data = json.dumps({'version': STORE_VERSION, self._name: data}, separators=(',', ':'))
+
+        with self._lock:
+            tmp_path = None
+            try:
+                os.makedirs(self._directory, exist_ok=True)
+                tmp_fd, tmp_path = tempfile.mkstemp(prefix='.{0}-'.format(self._name), suffix='.tmp', dir=self._directory)
+                with os.fdopen(tmp_fd, 'w') as tmp_file:
+                    tmp_file.write(data)
+                    tmp_file.flush()
+                    os.fsync(tmp_file.fileno())
+                os.replace(tmp_path, path)
+            except OSError as err:
+                self._logger.error("Could not write %s store %s: %s", self._name, path, err)
+                if tmp_path is not None and os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                return False
+
+        return True
@@ -0,0 +1,225 @@
+"""
+Daemon wide timers
+
+One thread runs every one-shot and periodic job in the daemon, battery checks, ripple frames and so on. Timers are
+kept in a heap ordered by when they are due and the thread sleeps on a condition until the first one is, so when
+nothing is due it doesn't wake at all.
+
+Jobs run on the timer thread one after another, anything that can block for long should be handed to an I/O worker.
+"""
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+
+class Timer(object):
+    """
+    Handle for a scheduled job
+    """
+    __slots__ = ('func', 'args', 'interval', 'due', 'cancelled')
+
+    def __init__(self, func, args, due, interval=None):
+        self.func = func
+        self.args = args
+        self.due = due
+        self.interval = interval
+        self.cancelled = False
+
+    @property
+    def periodic(self):
+        return self.interval is not None
+
+    def cancel(self):
+        """
+        Stop the job, if it is running now it finishes but isn't run again
+        """
+        self.cancelled = True
+
+
+class TimerService(object):
+    """
+    Heap of timers run on a single thread
+    """
+    def __init__(self, name='TimerService'):
+        self._logger = logging.getLogger('razer.timers')
+        self._name = name
+
+        self._condition = threading.Condition()
+        self._heap = []
+        self._counter = itertools.count()
+        self._thread = None
+        self._is_closed = False
+
+        self.wakeups = 0
+        self.runs = 0
+
+    def __len__(self):
+        with self._condition:
+            return len([entry for entry in self._heap if not entry[2].cancelled])
+
+    def call_later(self, delay, func, *args):
+        """
+        Run a function once after a delay
+
+        :param delay: Seconds
+        :type delay: float
+
+        :param func: Function
+        :type func: callable
+
+        :return: Timer handle
+        :rtype: Timer
+
+        :raises RuntimeError: If the service has been closed
+        """
+        return self._schedule(Timer(func, args, time.monotonic() + delay))
+
+    def call_every(self, interval, func, *args, delay=None):
+        """
+        Run a function every interval
+
+        Runs are scheduled from when the last one was due rather than when it finished so they dont drift, runs which
+        were missed because the thread was busy are skipped.
+
+        :param interval: Seconds between runs
+        :type interval: float
+
+        :param func: Function
+        :type func: callable
+
+        :param delay: Seconds until the first run, defaults to the interval
+        :type delay: float or None
+
+        :return: Timer handle
+        :rtype: Timer
+
+        :raises RuntimeError: If the service has been closed
+        """
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+
+        if delay is None:
+            delay = interval
+        return self._schedule(Timer(func, args, time.monotonic() + delay, interval))
+
+    def _schedule(self, timer):
+        with self._condition:
+            if self._is_closed:
+                raise RuntimeError("{0} is closed".format(self._name))
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+                self._thread.start()
+
+            heapq.heappush(self._heap, (timer.due, next(self._counter), timer))
+            # Only need waking if this is now the first timer due
+            if self._heap[0][2] is timer:
+                self._condition.notify()
+
+        return timer
+
+    def _next_timer(self):
+        """
+        Wait until a timer is due and take it off the heap
+
+        :return: Timer or None once closed
+        :rtype: Timer or None
+        """
+        with self._condition:
+            while not self._is_closed:
+                # Drop cancelled timers so they dont set the wait
+                while self._heap and self._heap[0][2].cancelled:
+                    heapq.heappop(self._heap)
+
+                if not self._heap:
+                    self._condition.wait()
+                else:
+                    wait = self._heap[0][0] - time.monotonic()
+                    if wait <= 0:
+                        return heapq.heappop(self._heap)[2]
+                    self._condition.wait(wait)
+
+                self.wakeups += 1
+
+        return None
+
+    def _run(self):
+        """
+        Thread function
+        """
+        while True:
+            timer = self._next_timer()
+            if timer is None:
+                break
+
+            self.runs += 1
+            try:
+                timer.func(*timer.args)
+            except Exception as err:
+                self._logger.exception("Timer job %s failed", getattr(timer.func, '__qualname__', timer.func), exc_info=err)
+
+            if timer.periodic and not timer.cancelled:
+                now = time.monotonic()
+                timer.due += timer.interval
+                if timer.due < now:
+                    # Skip the runs that were missed
+                    timer.due += ((now - timer.due) // timer.interval + 1) * timer.interval
+
+                with self._condition:
+                    if not self._is_closed:
+                        heapq.heappush(self._heap, (timer.due, next(self._counter), timer))
+
+        self._logger.debug("Shutting down timer service")
+
+    def close(self, timeout=2):
+        """
+        Stop the thread, timers not yet due are dropped
+
+        :param timeout: Time to wait for the thread to finish
+        :type timeout: float
+        """
+        with self._condition:
+            if self._is_closed:
+                return
+            self._is_closed = True
+            self._heap.clear()
+            self._condition.notify()
+            thread = self._thread
+
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=timeout)
+            if thread.is_alive():
+                self._logger.error("Could not stop timer thread")
+
+
+_timer_service = None
+_timer_service_lock = threading.Lock()
+
+
+def get_timer_service():
+    """
+    Get the daemon's timer service, it is created on first use
+
+    :return: Timer service
+    :rtype: TimerService
+    """
+    global _timer_service
+
+    with _timer_service_lock:
+        if _timer_service is None:
+            _timer_service = TimerService()
+        return _timer_service
+
+
+def close_timer_service():
+    """
+    Stop the daemon's timer service
+    """
+    global _timer_service
+
+    with _timer_service_lock:
+        if _timer_service is not None:
+            _timer_service.close()
+            _timer_service = None
@@ -0,0 +1,295 @@
+"""
+Smooth brightness and colour transitions
+
+A transition goes from a start to an end value over a duration with one DBus call instead of a client sending every
+step. Steps are timed on the timer service and written on the device's I/O worker, a step is only started once the
+previous one has been written so a slow device gets fewer, later steps rather than falling behind. The end value is
+always written last.
+"""
+import logging
+import threading
+import time
+
+from openrazer_daemon.misc.timer_service import get_timer_service
+
+# Steps per second to aim for
+DEFAULT_RATE = 30
+
+
+def interpolate(start, end, progress):
+    """
+    Get the values part way between two sets of values
+
+    :param start: Start values
+    :type start: tuple of float
+
+    :param end: End values
+    :type end: tuple of float
+
+    :param progress: 0 for start to 1 for end
+    :type progress: float
+
+    :return: Values
+    :rtype: tuple of float
+    """
+    return tuple(first + (last - first) * progress for first, last in zip(start, end))
+
+
+class Transition(object):
+    """
+    One running transition
+    """
+    def __init__(self, start, end, duration, step, finish, rate=DEFAULT_RATE, submit=None, timer_service=None):
+        """
+        :param start: Start values
+        :type start: tuple of float
+
+        :param end: End values
+        :type end: tuple of float
+
+        :param duration: Seconds
+        :type duration: float
+
+        :param step: Called with the values of each step but the last
+        :type step: callable
+
+        :param finish: Called with the end values
+        :type finish: callable
+
+        :param rate: Steps per second to aim for
+        :type rate: float
+
+        :param submit: Called with (func, *args) to run writes, defaults to running them on the timer thread
+        :type submit: callable or None
+
+        :param timer_service: Timer service to time steps on, defaults to the daemon's
+        :type timer_service: openrazer_daemon.misc.timer_service.TimerService or None
+        """
+        self._logger = logging.getLogger('razer.transition')
+        self._start = tuple(start)
+        self._end = tuple(end)
+        self._duration = duration
+        self._step = step
+        self._finish = finish
+        self._interval = 1.0 / rate
+        self._submit = submit if submit is not None else lambda func, *args: func(*args)
+        self._timer_service = timer_service if timer_service is not None else get_timer_service()
+
+        self._lock = threading.Lock()
+        self._timer = None
+        self._start_time = None
+        self._busy = False
+        self.cancelled = False
+        self.finished = False
+
+        self.steps = 0
+        self.skipped = 0
+
+    @property
+    def end(self):
+        return self._end
+
+    def start(self):
+        """
+        Start stepping, a transition with no duration goes straight to the end
+        """
+        self._start_time = time.monotonic()
+        if self._duration <= 0:
+            self._submit(self._run_finish)
+        else:
+            self._timer = self._timer_service.call_every(self._interval, self._tick, delay=0)
+
+    def _tick(self):
+        """
+        Start the next step if the last one has been written, ran on the timer thread
+        """
+        progress = (time.monotonic() - self._start_time) / self._duration
+
+        with self._lock:
+            if self.cancelled:
+                return
+
+            if progress >= 1:
+                self._timer.cancel()
+                run = self._run_finish
+                args = ()
+            elif self._busy:
+                self.skipped += 1
+                return
+            else:
+                self._busy = True
+                run = self._run_step
+                args = (interpolate(self._start, self._end, progress),)
+
+        try:
+            self._submit(run, *args)
+        except RuntimeError:
+            # Device is going away
+            self.cancel()
+
+    def _run_step(self, values):
+        try:
+            if not self.cancelled:
+                self._step(values)
+                self.steps += 1
+        except Exception as err:
+            self._logger.warning("Transition step failed, stopping: %s", err)
+            self.cancel()
+        finally:
+            with self._lock:
+                self._busy = False
+
+    def _run_finish(self):
+        if self.cancelled:
+            return
+
+        self.finished = True
+        self._finish(self._end)
+        self._logger.debug("Transition to %s done, %d steps, %d skipped", self._end, self.steps, self.skipped)
+
+    def cancel(self):
+        """
+        Stop the transition where it is
+        """
+        with self._lock:
+            self.cancelled = True
+            if self._timer is not None:
+                self._timer.cancel()
+
+
+class DeviceTransitions(object):
+    """
+    The brightness and static colour transitions of one device
+
+    Setting a property or effect family directly, or starting another transition on it, stops the running one. The
+    device's DeviceState.on_write is pointed at superseded() for that.
+    """
+    def __init__(self, parent, device_number, rate=DEFAULT_RATE, timer_service=None):
+        """
+        :param parent: DBus device object
+        :type parent: openrazer_daemon.hardware.device_base.RazerDevice
+
+        :param device_number: Device number, for logging
+        :type device_number: int
+
+        :param rate: Steps per second to aim for
+        :type rate: float
+
+        :param timer_service: Timer service to time steps on, defaults to the daemon's
+        :type timer_service: openrazer_daemon.misc.timer_service.TimerService or None
+        """
+        self._logger = logging.getLogger('razer.device{0}.transition'.format(device_number))
+        self._parent = parent
+        self._rate = rate
+        self._timer_service = timer_service
+
+        self._lock = threading.Lock()
+        # Property name or effect family: running transition
+        self._transitions = {}
+
+    def brightness(self, brightness, duration):
+        """
+        Fade the brightness to a value
+
+        :param brightness: Brightness
+        :type brightness: float
+
+        :param duration: Milliseconds
+        :type duration: int
+        """
+        parent = self._parent
+        start = parent.device_state.known().get('brightness')
+        if start is None:
+            start = parent.getBrightness()
+
+        self.start('brightness', (float(start),), (float(brightness),), duration,
+                   lambda values: parent.setBrightness(values[0]))
+
+    def static(self, red, green, blue, duration):
+        """
+        Fade to a static colour, from the current static colour or black if the effect isn't static
+
+        :param red: Red component
+        :type red: int
+
+        :param green: Green component
+        :type green: int
+
+        :param blue: Blue component
+        :type blue: int
+
+        :param duration: Milliseconds
+        :type duration: int
+        """
+        parent = self._parent
+        effect = parent.device_state.effects.get('effect')
+        if effect is not None and effect[0] == 'setStatic':
+            start = tuple(effect[1])
+        else:
+            start = (0, 0, 0)
+
+        self.start('effect', start, (red, green, blue), duration,
+                   lambda values: parent.setStatic(*(int(round(value)) for value in values)))
+
+    def start(self, key, start, end, duration, write):
+        """
+        Start a transition, replacing any running on the same property or effect family
+
+        :param key: Property name or effect family
+        :type key: str
+
+        :param start: Start values
+        :type start: tuple
+
+        :param end: End values
+        :type end: tuple
+
+        :param duration: Milliseconds
+        :type duration: int
+
+        :param write: Called with the values to write, the wrapped DBus setter so the last write updates the state
+        :type write: callable
+        """
+        parent = self._parent
+
+        def step(values):
+            # Steps aren't kept in the state or synced, only where the transition ends up
+            with parent.device_state.quiet():
+                parent.disable_notify = True
+                try:
+                    write(values)
+                finally:
+                    parent.disable_notify = False
+
+        io_worker = parent.io_worker
+        transition = Transition(start, end, duration / 1000.0, step, write, rate=self._rate,
+                                submit=io_worker.submit if io_worker is not None else None,
+                                timer_service=self._timer_service)
+
+        with self._lock:
+            previous = self._transitions.get(key)
+            self._transitions[key] = transition
+        if previous is not None:
+            previous.cancel()
+
+        self._logger.debug("Transition of %s to %s over %dms", key, end, duration)
+        transition.start()
+
+    def superseded(self, key):
+        """
+        Stop the transition on a property or effect family, called when its setter is called
+        """
+        with self._lock:
+            transition = self._transitions.pop(key, None)
+        if transition is not None:
+            transition.cancel()
+
+    def close(self):
+        """
+        Stop every transition
+        """
+        with self._lock:
+            transitions = list(self._transitions.values())
+            self._transitions.clear()
+        for transition in transitions:
+            transition.cancel()
@@ -44,6 +44,7 @@ def parse_args():
     parser.add_argument('--config', type=str, help='Location of the config file', default=CONF_FILE)
     parser.add_argument('--run-dir', type=str, help='Location of the run directory', default=RAZER_RUNTIME_DIR)
     parser.add_argument('--log-dir', type=str, help='Location of the log directory', default=LOG_PATH)
+    parser.add_argument('--data-dir', type=str, help='Location of the data directory, where macros, saved profiles and device snapshots are kept', default=RAZER_DATA_HOME)
 
     parser.add_argument('--test-dir', type=str, help='Directory containing test driver structure')
 
@@ -119,7 +120,8 @@ def run_daemon():
                          log_dir=args.log_dir,
                          console_log=args.foreground,
                          config_file=args.config,
-                         test_dir=args.test_dir)
+                         test_dir=args.test_dir,
+                         data_dir=args.data_dir)
     try:
         daemon.run()
     except KeyboardInterrupt:
@@ -0,0 +1,149 @@
+import unittest
+
+import openrazer_daemon.misc.battery_notifier as battery_notifier
+import openrazer_daemon.misc.battery_telemetry as battery_telemetry
+import openrazer_daemon.misc.timer_service as timer_service
+
+
+class DummyDevice(object):
+    io_worker = None
+    battery_telemetry = None
+
+    def __init__(self, levels):
+        self.levels = list(levels)
+        self.charging = False
+        self.signals = []
+
+    def getBattery(self):
+        return self.levels.pop(0)
+
+    def isCharging(self):
+        return self.charging
+
+    def batteryThresholdCrossed(self, level, charging, threshold):
+        self.signals.append(('batteryThresholdCrossed', level, charging, threshold))
+
+    def chargingChanged(self, charging, level):
+        self.signals.append(('chargingChanged', charging, level))
+
+
+class DummyTimerService(object):
+    """
+    Never runs anything so samples are only taken by hand
+    """
+    def __init__(self):
+        self.timers = []
+
+    def call_every(self, interval, func, *args, delay=None):
+        timer = timer_service.Timer(func, args, 0, interval)
+        self.timers.append(timer)
+        return timer
+
+
+class DummyIOWorker(object):
+    def __init__(self):
+        self.jobs = []
+
+    def submit(self, func, *args):
+        self.jobs.append((func, args))
+
+
+class DummyNotification(object):
+    def __init__(self):
+        self.summaries = []
+
+    def update(self, summary, message=None, icon=None):
+        self.summaries.append(summary)
+
+    def show(self):
+        pass
+
+
+class BatteryTelemetryTest(unittest.TestCase):
+    def test_ring_wraps(self):
+        telemetry = battery_telemetry.BatteryTelemetry(4)
+        for index in range(6):
+            telemetry.append(float(index), 100.0 - index, index % 2 == 1)
+
+        self.assertEqual(len(telemetry), 4)
+        self.assertEqual(telemetry.latest, (5.0, 95.0, True))
+        self.assertEqual(telemetry.get_range(0, 0), ([2.0, 3.0, 4.0, 5.0], [98.0, 97.0, 96.0, 95.0], [False, True, False, True]))
+
+    def test_range(self):
+        telemetry = battery_telemetry.BatteryTelemetry(8)
+        self.assertEqual(telemetry.get_range(0, 0), ([], [], []))
+
+        for index in range(5):
+            telemetry.append(float(index), 50.0, False)
+
+        self.assertEqual(telemetry.get_range(1.0, 3.0)[0], [1.0, 2.0, 3.0])
+        self.assertEqual(telemetry.get_range(3.5, 0)[0], [4.0])
+        self.assertEqual(telemetry.get_range(10.0, 0)[0], [])
+
+    def test_crossed_thresholds(self):
+        self.assertEqual(battery_telemetry.crossed_thresholds(55, 45), [50])
+        self.assertEqual(battery_telemetry.crossed_thresholds(25, 4), [5, 10, 20])
+        self.assertEqual(battery_telemetry.crossed_thresholds(79, 80), [80])
+        self.assertEqual(battery_telemetry.crossed_thresholds(50, 50), [])
+        self.assertEqual(battery_telemetry.crossed_thresholds(50, 51), [])
+
+    def test_monitor_signals(self):
+        device = DummyDevice([55.0, -1.0, 45.0, 46.0])
+        monitor = battery_telemetry.BatteryMonitor(device, 0, size=8, timer_service=DummyTimerService())
+        for _ in range(3):
+            monitor.sample()
+        device.charging = True
+        monitor.sample()
+        monitor.close()
+
+        self.assertEqual(len(monitor.telemetry), 3)
+        self.assertEqual(device.signals, [
+            ('batteryThresholdCrossed', 45.0, False, 50),
+            ('chargingChanged', True, 46.0),
+        ])
+
+    def test_monitor_waits_for_io_worker(self):
+        device = DummyDevice([60.0])
+        timers = DummyTimerService()
+        monitor = battery_telemetry.BatteryMonitor(device, 0, size=8, timer_service=timers)
+
+        # Nothing is scheduled until the device is registered
+        self.assertEqual(timers.timers, [])
+        monitor.start()
+        monitor.start()
+        self.assertEqual(len(timers.timers), 1)
+
+        # Never read on the timer thread
+        monitor._schedule_sample()
+        self.assertEqual(device.levels, [60.0])
+
+        device.io_worker = DummyIOWorker()
+        monitor._schedule_sample()
+        self.assertEqual(device.io_worker.jobs, [(monitor.sample, ())])
+        self.assertEqual(device.levels, [60.0])
+
+        monitor.close()
+        self.assertTrue(timers.timers[0].cancelled)
+
+    def test_notifier_uses_telemetry(self):
+        device = DummyDevice([])
+        device.io_worker = DummyIOWorker()
+        device.battery_telemetry = battery_telemetry.BatteryTelemetry(8)
+        notifier = battery_notifier.BatteryNotifier(device, 0, 'Dummy', timer_service=DummyTimerService())
+        notifier._notify2 = True
+        notifier._notification = DummyNotification()
+
+        # The timer thread only hands the notification to the worker
+        notifier._schedule_notify()
+        self.assertEqual(device.io_worker.jobs, [(notifier.notify_battery, ())])
+
+        # Nothing to show until a sample is taken, the device itself is never read
+        notifier.notify_battery()
+        self.assertEqual(notifier._notification.summaries, [])
+
+        device.battery_telemetry.append(1.0, 40.0, False)
+        notifier.notify_battery()
+        self.assertEqual(notifier._notification.summaries, ['Dummy Battery at 40.0%'])
+
+if __name__ == '__main__':
+    unittest.main()
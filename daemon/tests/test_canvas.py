@@ -0,0 +1,100 @@
+import json
+import threading
+import time
+import unittest
+
+import openrazer_daemon.device
+import openrazer_daemon.misc.canvas
+
+KEYBOARD_SERIAL = 'XX000000'
+KEYBOARD_ID = '0000:0000:0000.0000'
+
+MOUSEMAT_SERIAL = 'XX000001'
+MOUSEMAT_ID = '0000:0000:0000.0001'
+
+class DummyMatrixDevice(object):
+    HAS_MATRIX = True
+
+    def __init__(self, rows, cols):
+        self.MATRIX_DIMS = [rows, cols]
+        self.parent = None
+        self.payloads = []
+        self.presented = threading.Event()
+        self.present_times = []
+
+    def register_parent(self, parent):
+        self.parent = parent
+
+    def setKeyRow(self, payload):
+        self.payloads.append(payload)
+
+    def setCustom(self):
+        self.present_times.append(time.monotonic())
+        self.presented.set()
+
+class DummyDevice(object):
+    HAS_MATRIX = False
+
+    def register_parent(self, parent):
+        pass
+
+
+class CanvasTest(unittest.TestCase):
+    def setUp(self):
+        self.keyboard = DummyMatrixDevice(2, 3)
+        self.mousemat = DummyMatrixDevice(1, 4)
+
+        self.devices = openrazer_daemon.device.DeviceCollection()
+        self.devices.add(KEYBOARD_ID, KEYBOARD_SERIAL, self.keyboard)
+        self.devices.add(MOUSEMAT_ID, MOUSEMAT_SERIAL, self.mousemat)
+
+        self.canvas = openrazer_daemon.misc.canvas.Canvas(self.devices)
+        self.canvas.set_layout(json.dumps({KEYBOARD_SERIAL: [0, 0], MOUSEMAT_SERIAL: [3, 1]}))
+
+    def tearDown(self):
+        for device in self.devices:
+            device.close()
+
+    def test_dimensions(self):
+        self.assertEqual(self.canvas.dimensions, (2, 7))
+
+        self.canvas.remove_device(MOUSEMAT_SERIAL)
+        self.assertEqual(self.canvas.dimensions, (2, 3))
+
+    def test_get_layout(self):
+        self.assertEqual(json.loads(self.canvas.get_layout()), {KEYBOARD_SERIAL: [0, 0], MOUSEMAT_SERIAL: [3, 1]})
+
+    def test_set_layout_invalid(self):
+        self.devices.add('0000:0000:0000.0002', 'XX000002', DummyDevice())
+
+        with self.assertRaises(ValueError):
+            self.canvas.set_layout(json.dumps({'XX999999': [0, 0]}))
+        with self.assertRaises(ValueError):
+            self.canvas.set_layout(json.dumps({'XX000002': [0, 0]}))
+        with self.assertRaises(ValueError):
+            self.canvas.set_layout(json.dumps({KEYBOARD_SERIAL: [-1, 0]}))
+
+    def test_slice_frame(self):
+        rows, cols = self.canvas.dimensions
+        frame = bytes(range(rows * cols * 3))
+
+        payloads = self.canvas.slice_frame(frame)
+
+        self.assertEqual(payloads[KEYBOARD_SERIAL], bytes([0, 0, 2]) + frame[0:9] + bytes([1, 0, 2]) + frame[21:30])
+        self.assertEqual(payloads[MOUSEMAT_SERIAL], bytes([0, 0, 3]) + frame[30:42])
+
+    def test_slice_frame_wrong_size(self):
+        with self.assertRaises(ValueError):
+            self.canvas.slice_frame(b'\x00' * 3)
+
+    def test_submit_frame(self):
+        rows, cols = self.canvas.dimensions
+        present_time = self.canvas.submit_frame(b'\xff' * (rows * cols * 3))
+
+        self.assertTrue(self.keyboard.presented.wait(1))
+        self.assertTrue(self.mousemat.presented.wait(1))
+
+        self.assertEqual(len(self.keyboard.payloads), 1)
+        self.assertEqual(len(self.mousemat.payloads), 1)
+        self.assertGreaterEqual(self.keyboard.present_times[0], present_time)
+        self.assertGreaterEqual(self.mousemat.present_times[0], present_time)
@@ -0,0 +1,119 @@
+import json
+import unittest
+
+from openrazer_daemon.misc.device_profile import DeviceProfile
+from openrazer_daemon.misc.device_state import DeviceState
+
+
+def set_brightness(self, brightness):
+    self.writes.append(('setBrightness', brightness))
+
+
+def set_dpi(self, dpi_x, dpi_y):
+    self.writes.append(('setDPI', dpi_x, dpi_y))
+
+
+def set_static(self, red, green, blue):
+    self.writes.append(('setStatic', red, green, blue))
+
+
+def set_wave(self, direction):
+    if self.fail_wave:
+        raise OSError("Write failed")
+    self.writes.append(('setWave', direction))
+
+
+class DummyDevice(object):
+    def __init__(self):
+        self.device_state = DeviceState(self, 0)
+        self.writes = []
+        self.fail_wave = False
+
+        for function, interface_name, function_name in ((set_brightness, 'razer.device.lighting.brightness', 'setBrightness'),
+                                                         (set_dpi, 'razer.device.dpi', 'setDPI'),
+                                                         (set_static, 'razer.device.lighting.chroma', 'setStatic'),
+                                                         (set_wave, 'razer.device.lighting.chroma', 'setWave')):
+            setattr(self.__class__, function_name, self.device_state.track(function, interface_name, function_name))
+
+    def PropertiesChanged(self, changed):
+        pass
+
+
+class DummyKeyManager(object):
+    def __init__(self, macros):
+        self.macros = macros
+
+    def dbus_get_macros(self):
+        return json.dumps(self.macros)
+
+    def set_macros(self, macros):
+        changed = sum(1 for macro_key in set(macros) | set(self.macros) if macros.get(macro_key) != self.macros.get(macro_key))
+        self.macros = dict(macros)
+        return changed, len(macros) - changed
+
+
+class DeviceProfileTest(unittest.TestCase):
+    def setUp(self):
+        self.device = DummyDevice()
+        self.profile = DeviceProfile.from_json('{"properties": {"brightness": 40.0, "dpi": [800, 800]}, "effects": {"effect": ["setStatic", [0, 255, 0]]}}')
+
+    def test_order_and_skip(self):
+        result = self.profile.apply(self.device)
+
+        # Brightness goes after the effect
+        self.assertEqual(self.device.writes, [('setDPI', 800, 800), ('setStatic', 0, 255, 0), ('setBrightness', 40.0)])
+        self.assertEqual(result['writes'], 3)
+        self.assertEqual(result['skipped'], 0)
+
+        self.device.writes.clear()
+        self.device.setDPI(1600, 1600)
+        self.device.writes.clear()
+
+        result = self.profile.apply(self.device)
+        self.assertEqual(self.device.writes, [('setDPI', 800, 800)])
+        self.assertEqual(result['skipped'], 2)
+        self.assertEqual(result['written'], ['dpi'])
+
+    def test_unsupported(self):
+        profile = DeviceProfile.from_dict({'properties': {'poll_rate': 500}, 'effects': {'Logo': ['setLogoStatic', [0, 0, 0]]}, 'macros': {}})
+
+        result = profile.apply(self.device)
+        self.assertEqual(result['writes'], 0)
+        self.assertEqual(sorted(result['unsupported']), ['Logo', 'macros', 'poll_rate'])
+
+    def test_failed_write_is_undone(self):
+        self.profile.apply(self.device)
+        self.device.writes.clear()
+        self.device.fail_wave = True
+
+        profile = DeviceProfile.from_dict({'properties': {'dpi': [400, 400]}, 'effects': {'effect': ['setWave', [1]]}})
+        with self.assertRaises(OSError):
+            profile.apply(self.device)
+
+        self.assertEqual(self.device.writes, [('setDPI', 400, 400), ('setDPI', 800, 800)])
+
+    def test_failed_write_undoes_macros(self):
+        old_macros = {'M1': [{'type': 'MacroURL', 'url': 'https://example.com'}]}
+        self.device.key_manager = DummyKeyManager(dict(old_macros))
+        self.device.fail_wave = True
+
+        profile = DeviceProfile.from_dict({'effects': {'effect': ['setWave', [1]]}, 'macros': {}})
+        with self.assertRaises(OSError):
+            profile.apply(self.device)
+
+        self.assertEqual(self.device.key_manager.macros, old_macros)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            DeviceProfile.from_dict({'properties': {'colour': 1}})
+        with self.assertRaises(ValueError):
+            DeviceProfile.from_dict({'effects': {'effect': 'setStatic'}})
+        with self.assertRaises(ValueError):
+            DeviceProfile.from_dict({'version': 2})
+
+    def test_round_trip(self):
+        self.assertEqual(DeviceProfile.from_json(self.profile.to_json()).to_dict(), self.profile.to_dict())
+
+
+if __name__ == '__main__':
+    unittest.main()
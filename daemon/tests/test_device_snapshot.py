@@ -0,0 +1,124 @@
+import os
+import tempfile
+import unittest
+
+import openrazer_daemon.misc.timer_service as timer_service
+from openrazer_daemon.misc.device_profile import DeviceProfile
+from openrazer_daemon.misc.device_snapshot import DeviceSnapshot, SnapshotStore
+from openrazer_daemon.misc.device_state import DeviceState
+
+FRAME = bytes([0, 0, 1, 255, 0, 0, 0, 255, 0, 1, 0, 1, 0, 0, 255, 255, 255, 255])
+
+
+def set_brightness(self, brightness):
+    self.writes.append(('setBrightness', brightness))
+
+
+def set_key_row(self, payload):
+    self.writes.append(('setKeyRow', bytes(payload)))
+
+
+def set_custom(self):
+    self.writes.append(('setCustom',))
+
+
+def set_static(self, red, green, blue):
+    self.writes.append(('setStatic', red, green, blue))
+
+
+class DummyTimerService(object):
+    """
+    Never runs anything so saves are only done by hand
+    """
+    def call_later(self, delay, func, *args):
+        return timer_service.Timer(func, args, 0)
+
+
+class DummyDevice(object):
+    METHODS = ['set_key_row']
+    io_worker = None
+
+    def __init__(self, store):
+        self.serial = 'XX0000000000'
+        self.disable_notify = False
+        self.writes = []
+
+        self.device_state = DeviceState(self, 0)
+        self.snapshot = DeviceSnapshot(self, 0, store, timer_service=DummyTimerService())
+        self.device_state.on_change = self.snapshot.changed
+
+        for function, interface_name, function_name in ((set_brightness, 'razer.device.lighting.brightness', 'setBrightness'),
+                                                         (set_key_row, 'razer.device.lighting.chroma', 'setKeyRow'),
+                                                         (set_custom, 'razer.device.lighting.chroma', 'setCustom'),
+                                                         (set_static, 'razer.device.lighting.chroma', 'setStatic')):
+            setattr(self.__class__, function_name, self.device_state.track(function, interface_name, function_name))
+
+    def PropertiesChanged(self, changed):
+        pass
+
+    def apply_profile_object(self, profile):
+        return profile.apply(self)
+
+
+class DeviceSnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = SnapshotStore(os.path.join(self.tmp_dir.name, 'snapshots'))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_restore_after_restart(self):
+        device = DummyDevice(self.store)
+        device.setBrightness(30.0)
+        device.setKeyRow(FRAME)
+        device.setCustom()
+        device.snapshot.close()
+
+        # A new daemon puts the frame back before showing it
+        device = DummyDevice(self.store)
+        result = device.snapshot.restore()
+
+        self.assertEqual(device.writes, [('setKeyRow', FRAME), ('setCustom',), ('setBrightness', 30.0)])
+        self.assertEqual(result['writes'], 2)
+
+        # Restoring doesnt write the same snapshot back
+        mtime = os.stat(self.store.path(device.serial)).st_mtime_ns
+        device.snapshot.close()
+        self.assertEqual(os.stat(self.store.path(device.serial)).st_mtime_ns, mtime)
+
+    def test_nothing_set_keeps_store(self):
+        device = DummyDevice(self.store)
+        device.setStatic(255, 0, 0)
+        device.snapshot.close()
+
+        DummyDevice(self.store).snapshot.close()
+        self.assertEqual(self.store.load('XX0000000000')['profile']['effects'], {'effect': ['setStatic', [255, 0, 0]]})
+
+    def test_suspend_resume(self):
+        device = DummyDevice(self.store)
+        device.setBrightness(30.0)
+        device.setStatic(0, 255, 0)
+        device.snapshot.suspend()
+
+        # Like a suspend turning the brightness down behind the setters
+        device.device_state.update({'brightness': 0.0})
+        device.writes.clear()
+
+        result = device.snapshot.resume()
+        self.assertEqual(device.writes, [('setBrightness', 30.0)])
+        self.assertEqual(result['skipped'], 1)
+        self.assertIsNone(device.snapshot.resume())
+
+        # The suspended state was never saved
+        self.assertEqual(self.store.load(device.serial)['profile']['properties'], {'brightness': 30.0})
+
+    def test_invalid_snapshot(self):
+        device = DummyDevice(self.store)
+        self.assertIsNone(device.snapshot.restore({'profile': {'properties': {'colour': 1}}}))
+        self.assertIsNone(device.snapshot.restore())
+        self.assertEqual(device.writes, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import inspect
+import unittest
+
+from openrazer_daemon.misc.device_state import DeviceState
+
+
+def get_brightness(self):
+    self.reads += 1
+    return self.brightness
+
+
+def set_brightness(self, brightness):
+    self.brightness = brightness
+
+
+def set_dpi(self, dpi_x, dpi_y):
+    pass
+
+
+def get_current_effect(self):
+    self.reads += 1
+    return self.effect
+
+
+def set_static(self, red, green, blue):
+    self.effect = 1
+
+
+class DummyDevice(object):
+    def __init__(self):
+        self.device_state = DeviceState(self, 0)
+        self.brightness = 50.0
+        self.effect = 0
+        self.reads = 0
+        self.signals = []
+
+    def add(self, function, interface_name, function_name):
+        setattr(self.__class__, function_name, self.device_state.track(function, interface_name, function_name))
+
+    def PropertiesChanged(self, changed):
+        self.signals.append(changed)
+
+
+class DeviceStateTest(unittest.TestCase):
+    def setUp(self):
+        self.device = DummyDevice()
+        self.device.add(get_brightness, 'razer.device.lighting.brightness', 'getBrightness')
+        self.device.add(set_brightness, 'razer.device.lighting.brightness', 'setBrightness')
+        self.device.add(set_dpi, 'razer.device.dpi', 'setDPI')
+        self.device.add(get_current_effect, 'razer.device.lighting.kraken', 'getCurrentEffect')
+        self.device.add(set_static, 'razer.device.lighting.chroma', 'setStatic')
+
+    def test_signature_kept(self):
+        self.assertEqual(list(inspect.signature(DummyDevice.setDPI).parameters), ['self', 'dpi_x', 'dpi_y'])
+
+    def test_setters_signal_changes(self):
+        self.device.setBrightness(20.0)
+        self.device.setBrightness(20.0)
+        self.device.setDPI(800, 800)
+
+        self.assertEqual(self.device.signals, [{'brightness': 20.0}, {'dpi': [800, 800]}])
+
+    def test_get_reads_once(self):
+        self.assertEqual(self.device.device_state.get(), {'brightness': 50.0, 'current_effect': 0})
+        self.assertEqual(self.device.device_state.get(), {'brightness': 50.0, 'current_effect': 0})
+        self.assertEqual(self.device.reads, 2)
+
+    def test_read_back(self):
+        # Not read back until something has read it
+        self.device.setStatic(255, 0, 0)
+        self.assertEqual(self.device.reads, 0)
+
+        self.device.device_state.get()
+        self.device.effect = 0
+        self.device.setStatic(255, 0, 0)
+
+        self.assertEqual(self.device.reads, 3)
+        self.assertEqual(self.device.signals[-1], {'current_effect': 1})
+
+    def test_refresh(self):
+        self.device.device_state.get()
+        self.device.brightness = 0.0
+        self.device.device_state.refresh()
+
+        self.assertEqual(self.device.signals[-1], {'brightness': 0.0})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import threading
+import time
+import unittest
+
+import openrazer_daemon.misc.effect_coalescer as effect_coalescer
+
+WINDOW = 0.05
+
+
+class EffectCoalescerTest(unittest.TestCase):
+    def setUp(self):
+        self.delivered = []
+        self.trailing = threading.Event()
+        self.coalescer = effect_coalescer.EffectCoalescer(WINDOW, self.deliver)
+
+    def tearDown(self):
+        self.coalescer.close()
+
+    def deliver(self, key, msg):
+        self.delivered.append((key, msg))
+        if len(self.delivered) > 1:
+            self.trailing.set()
+
+    def test_effect_family(self):
+        self.assertEqual(effect_coalescer.effect_family('setBrightness'), 'setBrightness')
+        self.assertEqual(effect_coalescer.effect_family('setLogoBrightness'), 'setLogoBrightness')
+        self.assertEqual(effect_coalescer.effect_family('setStatic'), 'effect')
+        self.assertEqual(effect_coalescer.effect_family('setSpectrum'), 'effect')
+        self.assertEqual(effect_coalescer.effect_family('setLogoStatic'), 'Logo')
+        self.assertEqual(effect_coalescer.effect_family('triggerReactive'), 'triggerReactive')
+
+    def test_leading_and_trailing(self):
+        for brightness in range(10):
+            self.coalescer.submit('dev', ('effect', None, 'setBrightness', brightness))
+
+        # First goes straight out
+        self.assertEqual(self.delivered, [('dev', ('effect', None, 'setBrightness', 0))])
+
+        # Latest lands when the window closes
+        self.assertTrue(self.trailing.wait(1))
+        self.assertEqual(self.delivered[1], ('dev', ('effect', None, 'setBrightness', 9)))
+        self.assertEqual(self.coalescer.coalesced, 8)
+        self.assertEqual(self.coalescer.delivered, 2)
+
+    def test_keys_are_independent(self):
+        self.coalescer.submit('dev1', ('effect', None, 'setBrightness', 1))
+        self.coalescer.submit('dev2', ('effect', None, 'setBrightness', 2))
+
+        self.assertEqual(len(self.delivered), 2)
+        self.assertEqual(self.coalescer.coalesced, 0)
+
+    def test_window_closes(self):
+        self.coalescer.submit('dev', ('effect', None, 'setBrightness', 1))
+        time.sleep(WINDOW * 3)
+
+        # Nothing held so the next event is a new burst
+        self.coalescer.submit('dev', ('effect', None, 'setBrightness', 2))
+        self.assertEqual([msg[3] for _, msg in self.delivered], [1, 2])
+
+    def test_close_flushes(self):
+        self.coalescer.submit('dev', ('effect', None, 'setBrightness', 1))
+        self.coalescer.submit('dev', ('effect', None, 'setBrightness', 2))
+        self.coalescer.close()
+
+        self.assertEqual([msg[3] for _, msg in self.delivered], [1, 2])
+
+        self.coalescer.submit('dev', ('effect', None, 'setBrightness', 3))
+        self.assertEqual(len(self.delivered), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
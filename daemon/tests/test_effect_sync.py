@@ -153,5 +153,27 @@ class EffectSyncTest(unittest.TestCase):
         # Logger should have called .exception
         self.assertTrue(self.effect_sync._logger.exception.called)
 
+    def test_effect_table(self):
+        table = openrazer_daemon.misc.effect_sync.EffectTable(DummyHardwareBlackWidowChroma, DummyHardwareBlackWidowStandard)
 
+        # Compiled from the source's effect methods
+        self.assertEqual(table.as_dict()['effects'], 3)
+        self.assertEqual(table.as_dict()['translated'], 3)
 
+        self.assertEqual(table.lookup('setStatic', 3), (DummyHardwareBlackWidowStandard.setStatic, ()))
+        self.assertEqual(table.lookup('setBreathSingle', 3), (DummyHardwareBlackWidowStandard.setPulsate, ()))
+        self.assertIsNone(table.lookup('setWave', 1))
+
+        self.assertEqual(table.hits, 2)
+        self.assertEqual(table.misses, 1)
+
+    def test_notify_run_effect_from_device(self):
+        self.hardware_device = DummyHardwareBlackWidowChroma()
+        self.effect_sync._parent = self.hardware_device
+
+        self.effect_sync.notify(('effect', DummyHardwareBlackWidowStandard(), 'setPulsate'))
+        self.assertTupleEqual(self.hardware_device.effect_call, ('setBreathSingle', 0, 255, 0))
+
+        table = openrazer_daemon.misc.effect_sync.get_effect_table(DummyHardwareBlackWidowStandard, DummyHardwareBlackWidowChroma)
+        self.assertIn(table, openrazer_daemon.misc.effect_sync.get_effect_tables())
+        self.assertEqual(table.hits, 1)
@@ -0,0 +1,91 @@
+import mmap
+import os
+import struct
+import threading
+import unittest
+
+import openrazer_daemon.misc.frame_ring as frame_ring
+
+
+class DummyWriter(object):
+    """
+    Minimal writer following the protocol of openrazer.client.frame_ring
+    """
+    def __init__(self, ring):
+        self._mmap = mmap.mmap(ring.memory_fd, os.fstat(ring.memory_fd).st_size)
+        self._notify_fd = ring.notify_fd
+        self._stride = frame_ring.SLOT_HEADER_SIZE + ring.slot_size
+        self._slot_count = ring.slot_count
+        self.seq = 0
+
+    def write(self, payload, notify=True):
+        self.seq += 1
+        offset = frame_ring.HEADER_SIZE + (self.seq % self._slot_count) * self._stride
+        struct.pack_into('<Q', self._mmap, offset, 0)
+        self._mmap[offset + frame_ring.SLOT_HEADER_SIZE:offset + frame_ring.SLOT_HEADER_SIZE + len(payload)] = payload
+        struct.pack_into(frame_ring.SLOT_HEADER_FORMAT, self._mmap, offset, self.seq, len(payload))
+        struct.pack_into('<Q', self._mmap, frame_ring.WRITE_SEQ_OFFSET, self.seq)
+
+        if notify:
+            os.write(self._notify_fd, (1).to_bytes(8, byteorder='little'))
+
+    def close(self):
+        self._mmap.close()
+
+
+class FrameRingTest(unittest.TestCase):
+    def setUp(self):
+        self.frames = []
+        self.frame_event = threading.Event()
+
+        self.ring = frame_ring.FrameRing('test', 16, self.callback)
+        self.writer = DummyWriter(self.ring)
+
+    def tearDown(self):
+        self.writer.close()
+        self.ring.close()
+
+    def callback(self, payload):
+        self.frames.append(payload)
+        self.frame_event.set()
+
+    def test_header(self):
+        magic, version, slot_count, slot_size, write_seq = struct.unpack_from(frame_ring.HEADER_FORMAT, self.writer._mmap, 0)
+
+        self.assertEqual(magic, frame_ring.MAGIC)
+        self.assertEqual(version, frame_ring.VERSION)
+        self.assertEqual(slot_count, frame_ring.DEFAULT_SLOT_COUNT)
+        self.assertEqual(slot_size, 16)
+        self.assertEqual(write_seq, 0)
+
+    def test_notify_delivers_frame(self):
+        self.writer.write(b'\x01\x02\x03')
+
+        self.assertTrue(self.frame_event.wait(1))
+        self.assertEqual(self.frames, [b'\x01\x02\x03'])
+
+    def test_read_latest_drops_stale_frames(self):
+        self.writer.write(b'old', notify=False)
+        self.writer.write(b'new', notify=False)
+
+        self.assertEqual(self.ring.read_latest(), b'new')
+        self.assertIsNone(self.ring.read_latest())
+        self.assertEqual(self.ring.frames_dropped, 1)
+
+    def test_close_flags_writer(self):
+        flags = struct.unpack_from('<I', self.writer._mmap, frame_ring.FLAGS_OFFSET)[0]
+        self.assertEqual(flags, 0)
+
+        # A new writer gets a new ring, the old writer can see its ring is no longer read
+        second = frame_ring.FrameRing('test', 16, self.callback)
+        self.addCleanup(second.close)
+        self.ring.close()
+
+        flags = struct.unpack_from('<I', self.writer._mmap, frame_ring.FLAGS_OFFSET)[0]
+        self.assertEqual(flags & frame_ring.FLAG_CLOSED, frame_ring.FLAG_CLOSED)
+
+        second_writer = DummyWriter(second)
+        self.addCleanup(second_writer.close)
+        second_writer.write(b'new')
+        self.assertTrue(self.frame_event.wait(1))
+        self.assertEqual(self.frames, [b'new'])
@@ -1,3 +1,5 @@
+import concurrent.futures
+import time
 import unittest
 
 import openrazer_daemon.device
@@ -22,6 +24,29 @@ class DummyDBusObject(object):
     def notify_parent(self, msg):
         self.parent.notify_parent(msg)
 
+class DummySuspendObject(DummyDBusObject):
+    def __init__(self, delay=0, error=None):
+        super(DummySuspendObject, self).__init__()
+        self.delay = delay
+        self.error = error
+        self.suspended = False
+
+    def suspend_device(self):
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        self.suspended = True
+
+class DummySlowObject(DummyDBusObject):
+    def __init__(self, delay):
+        super(DummySlowObject, self).__init__()
+        self.delay = delay
+        self.notify_msgs = []
+
+    def notify(self, msg):
+        time.sleep(self.delay)
+        self.notify_msgs.append(msg)
+
 class DummyParentObject(object):
     def __init__(self):
         self.notify_msg = None
@@ -204,3 +229,88 @@ class DeviceCollectionTest(unittest.TestCase):
         # Ensure message gets sent to other devices and not itself
         self.assertIs(dbus_object1.notify_msg, None)
         self.assertIs(dbus_object2.notify_msg, msg)
+
+    def test_cross_device_effect_async(self):
+        dbus_object1 = DummyDBusObject()
+        dbus_object2 = DummySlowObject(delay=0.2)
+        dbus_object3 = DummySlowObject(delay=0.2)
+
+        self.device_collection.add(DEVICE1_ID, DEVICE1_SERIAL, dbus_object1)
+        self.device_collection.add(DEVICE2_ID, DEVICE2_SERIAL, dbus_object2)
+        self.device_collection.add('0000:0000:0000.0002', 'XX000002', dbus_object3)
+
+        start = time.monotonic()
+        for brightness in range(4):
+            dbus_object1.notify_parent(('effect', dbus_object1, 'setBrightness', brightness))
+        # Sender doesnt wait for the slow devices
+        self.assertLess(time.monotonic() - start, 0.1)
+
+        while len(dbus_object2.notify_msgs) < 2 or len(dbus_object3.notify_msgs) < 2:
+            time.sleep(0.01)
+            if time.monotonic() - start > 2:
+                break
+
+        # Devices run in parallel, the first effect and then only the latest
+        self.assertLess(time.monotonic() - start, 0.6)
+        for dbus_object in (dbus_object2, dbus_object3):
+            self.assertEqual([msg[3] for msg in dbus_object.notify_msgs], [0, 3])
+        self.assertEqual(self.device_collection.get(DEVICE2_SERIAL).sync_replaced, 2)
+
+        for device in self.device_collection.devices:
+            device.close()
+
+    def test_cross_device_effect_families(self):
+        dbus_object1 = DummyDBusObject()
+        dbus_object2 = DummySlowObject(delay=0.1)
+
+        self.device_collection.add(DEVICE1_ID, DEVICE1_SERIAL, dbus_object1)
+        self.device_collection.add(DEVICE2_ID, DEVICE2_SERIAL, dbus_object2)
+
+        msgs = [('effect', dbus_object1, 'setStatic', 255, 0, 0),
+                ('effect', dbus_object1, 'setBrightness', 50),
+                ('effect', dbus_object1, 'setLogoStatic', 0, 255, 0),
+                ('effect', dbus_object1, 'setStatic', 0, 0, 255),
+                ('effect', dbus_object1, 'setBrightness', 60)]
+        for msg in msgs:
+            dbus_object1.notify_parent(msg)
+
+        start = time.monotonic()
+        while len(dbus_object2.notify_msgs) < 4 and time.monotonic() - start < 2:
+            time.sleep(0.01)
+
+        # While the first runs the rest are kept per family, the later brightness replaces the earlier one
+        self.assertEqual([msg[2:] for msg in dbus_object2.notify_msgs],
+                         [('setStatic', 255, 0, 0), ('setLogoStatic', 0, 255, 0), ('setStatic', 0, 0, 255), ('setBrightness', 60)])
+        self.assertEqual(self.device_collection.get(DEVICE2_SERIAL).sync_replaced, 1)
+
+        for device in self.device_collection.devices:
+            device.close()
+
+    def test_call_all_concurrent(self):
+        dbus_object1 = DummySuspendObject(delay=0.2)
+        dbus_object2 = DummySuspendObject(delay=0.2)
+
+        self.device_collection.add(DEVICE1_ID, DEVICE1_SERIAL, dbus_object1)
+        self.device_collection.add(DEVICE2_ID, DEVICE2_SERIAL, dbus_object2)
+
+        start = time.monotonic()
+        errors = self.device_collection.call_all('suspend_device', timeout=1)
+        elapsed = time.monotonic() - start
+
+        self.assertEqual(errors, {})
+        self.assertTrue(dbus_object1.suspended)
+        self.assertTrue(dbus_object2.suspended)
+        self.assertLess(elapsed, 0.35)
+
+    def test_call_all_errors(self):
+        error = OSError('Device went away')
+        dbus_object1 = DummySuspendObject(delay=0.5)
+        dbus_object2 = DummySuspendObject(error=error)
+
+        self.device_collection.add(DEVICE1_ID, DEVICE1_SERIAL, dbus_object1)
+        self.device_collection.add(DEVICE2_ID, DEVICE2_SERIAL, dbus_object2)
+
+        errors = self.device_collection.call_all('suspend_device', timeout=0.1)
+
+        self.assertIsInstance(errors[DEVICE1_SERIAL], concurrent.futures.TimeoutError)
+        self.assertIs(errors[DEVICE2_SERIAL], error)
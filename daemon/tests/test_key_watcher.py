@@ -0,0 +1,101 @@
+import os
+import struct
+import tempfile
+import time
+import unittest
+
+from openrazer_daemon.misc.key_event_management import EV_KEY, EVENT_FORMAT, EVENT_SIZE, NS_PER_SECOND, KeyWatcher
+
+EV_SYN = 0x00
+KEY_A = 30
+KEY_B = 48
+
+
+def record(ev_type, code, value, timestamp_ns=None):
+    if timestamp_ns is None:
+        timestamp_ns = time.time_ns()
+    return struct.pack(EVENT_FORMAT, timestamp_ns // NS_PER_SECOND, timestamp_ns % NS_PER_SECOND // 1000, ev_type, code, value)
+
+
+class DummyKeyManager(object):
+    def __init__(self):
+        self.actions = []
+
+    def key_action(self, event_time, key_code, key_action):
+        self.actions.append((key_code, key_action))
+
+
+class KeyWatcherTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.paths = [os.path.join(self.tmp_dir.name, 'event{0}'.format(index)) for index in range(2)]
+        for path in self.paths:
+            open(path, 'wb').close()
+
+        self.parent = DummyKeyManager()
+        self.watcher = KeyWatcher(0, self.paths, self.parent, use_epoll=False)
+
+    def tearDown(self):
+        for event_file in self.watcher.open_event_files:
+            event_file.close()
+        self.tmp_dir.cleanup()
+
+    def feed(self, index, data):
+        """
+        Append data to an event file and have the watcher read it, as if it arrived in one read
+        """
+        with open(self.paths[index], 'ab') as event_file:
+            event_file.write(data)
+        self.watcher._read_events(self.watcher.open_event_files[index])
+
+    def test_parse_event_buffer(self):
+        now = time.time_ns()
+        data = b''.join((record(EV_KEY, KEY_A, 1, now), record(EV_SYN, 0, 0, now), record(EV_KEY, KEY_A, 2, now),
+                         record(EV_KEY, KEY_A, 0, now), record(EV_KEY, KEY_B, 7, now)))
+
+        events = KeyWatcher.parse_event_buffer(data)
+
+        # Sync events are skipped
+        self.assertEqual([(action, code) for _, action, code in events],
+                         [('press', KEY_A), ('autorepeat', KEY_A), ('release', KEY_A), ('unknown', KEY_B)])
+
+        # Timestamps are moved onto the monotonic clock, to the microsecond
+        expected = now // 1000 * 1000 + time.monotonic_ns() - time.time_ns()
+        self.assertTrue(all(abs(event_time - expected) < 0.05 * NS_PER_SECOND for event_time, _, _ in events))
+
+        self.assertEqual(KeyWatcher.parse_event_buffer(b''), [])
+
+    def test_split_record(self):
+        press, release = record(EV_KEY, KEY_A, 1), record(EV_KEY, KEY_A, 0)
+
+        # The start of a record is carried to the next read
+        self.feed(0, press + release[:10])
+        self.assertEqual(self.parent.actions, [(KEY_A, 'press')])
+
+        self.feed(0, release[10:])
+        self.assertEqual(self.parent.actions, [(KEY_A, 'press'), (KEY_A, 'release')])
+
+    def test_record_over_many_reads(self):
+        press = record(EV_KEY, KEY_B, 1)
+
+        for start in range(0, EVENT_SIZE - 4, 4):
+            self.feed(0, press[start:start + 4])
+            self.assertEqual(self.parent.actions, [])
+
+        # The last piece completes the record and starts the next
+        self.feed(0, press[EVENT_SIZE - 4:] + press[:1])
+        self.assertEqual(self.parent.actions, [(KEY_B, 'press')])
+
+    def test_partial_records_per_file(self):
+        first, second = record(EV_KEY, KEY_A, 1), record(EV_KEY, KEY_B, 1)
+
+        self.feed(0, first[:5])
+        self.feed(1, second[:EVENT_SIZE - 1])
+        self.feed(0, first[5:])
+        self.feed(1, second[EVENT_SIZE - 1:])
+
+        self.assertEqual(self.parent.actions, [(KEY_A, 'press'), (KEY_B, 'press')])
+
+
+if __name__ == '__main__':
+    unittest.main()
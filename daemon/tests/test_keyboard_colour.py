@@ -0,0 +1,123 @@
+import unittest
+
+from openrazer_daemon.keyboard import KEY_MAPPING, KeyboardColour, KeyDoesNotExistError, NoBackupError
+
+ROWS = 3
+COLS = 4
+ROW_SIZE = 3 + COLS * 3
+
+
+def blank_row(row_id):
+    return bytes((row_id, 0, COLS - 1)) + bytes(COLS * 3)
+
+
+class KeyboardColourTest(unittest.TestCase):
+    def setUp(self):
+        self.grid = KeyboardColour(ROWS, COLS)
+
+    def key(self, row, col):
+        """
+        Get a key's RGB bytes from the whole payload
+        """
+        offset = row * ROW_SIZE + 3 + col * 3
+        return self.grid.get_total_binary()[offset:offset + 3]
+
+    def test_layout(self):
+        self.assertEqual(self.grid.dimensions, (ROWS, COLS))
+        self.assertEqual(self.grid.get_total_binary(), b''.join(blank_row(row_id) for row_id in range(ROWS)))
+        self.assertEqual(KeyboardColour().dimensions, (6, 22))
+
+    def test_set_key_colour(self):
+        self.grid.set_key_colour(1, 2, (300, 128, -5))
+
+        self.assertEqual(self.key(1, 2), b'\xff\x80\x00')
+        self.assertEqual(self.grid.get_row_binary(1), bytes((1, 0, COLS - 1)) + bytes(6) + b'\xff\x80\x00' + bytes(3))
+        self.assertEqual(self.grid.get_rows_raw()[1], [(0, 0, 0), (0, 0, 0), (255, 128, 0), (0, 0, 0)])
+
+        self.grid.reset_key(1, 2)
+        self.assertEqual(self.grid.get_row_binary(1), blank_row(1))
+
+    def test_missing_key(self):
+        for row, col in ((ROWS, 0), (0, COLS), (-1, 0)):
+            with self.assertRaises(KeyDoesNotExistError):
+                self.grid.set_key_colour(row, col, (1, 2, 3))
+
+        with self.assertRaises(KeyDoesNotExistError):
+            self.grid.get_key_colour('NOTAKEY')
+
+    def test_set_keys_colour(self):
+        self.grid.set_keys_colour(((0, 0), (2, 3)), (1, 2, 3))
+
+        self.assertEqual(self.key(0, 0), b'\x01\x02\x03')
+        self.assertEqual(self.key(2, 3), b'\x01\x02\x03')
+        self.assertEqual(self.grid.get_row_binary(1), blank_row(1))
+
+    def test_fill(self):
+        self.grid.fill((1, 2, 3), row=1)
+        self.assertEqual(self.grid.get_row_binary(0), blank_row(0))
+        self.assertEqual(self.grid.get_row_binary(1), bytes((1, 0, COLS - 1)) + b'\x01\x02\x03' * COLS)
+
+        self.grid.fill((4, 5, 6))
+        self.assertEqual(self.grid.get_rows_raw(), [[(4, 5, 6)] * COLS] * ROWS)
+
+        # Headers are left alone
+        self.grid.reset_rows()
+        self.assertEqual(self.grid.get_total_binary(), b''.join(blank_row(row_id) for row_id in range(ROWS)))
+
+    def test_blit(self):
+        # 2x2 block hanging off the bottom right corner
+        self.grid.blit(2, 3, bytes(range(1, 13)), 2)
+
+        self.assertEqual(self.grid.get_rows_raw()[2], [(0, 0, 0), (0, 0, 0), (0, 0, 0), (1, 2, 3)])
+        self.assertEqual(self.grid.get_row_binary(1), blank_row(1))
+
+        # And off the top left corner
+        self.grid.blit(-1, -1, bytes(range(1, 13)), 2)
+        self.assertEqual(self.grid.get_rows_raw()[0], [(10, 11, 12), (0, 0, 0), (0, 0, 0), (0, 0, 0)])
+
+        # Entirely outside of the grid
+        before = self.grid.get_total_binary()
+        self.grid.blit(0, COLS, bytes(6), 2)
+        self.assertEqual(self.grid.get_total_binary(), before)
+
+    def test_payloads_are_copies(self):
+        row = self.grid.get_row_binary(0)
+        total = self.grid.get_total_binary()
+        self.grid.fill((1, 2, 3))
+
+        self.assertIsInstance(total, bytes)
+        self.assertEqual(row, blank_row(0))
+        self.assertEqual(total, b''.join(blank_row(row_id) for row_id in range(ROWS)))
+
+    def test_from_total_binary(self):
+        self.grid.set_key_colour(2, 1, (7, 8, 9))
+        payload = self.grid.get_total_binary()
+
+        other = KeyboardColour(ROWS, COLS)
+        other.get_from_total_binary(payload)
+        self.assertEqual(other.get_total_binary(), payload)
+
+        with self.assertRaises(ValueError):
+            other.get_from_total_binary(payload[:-1])
+
+    def test_backup(self):
+        with self.assertRaises(NoBackupError):
+            self.grid.restore_configuration()
+
+        self.grid.set_key_colour(0, 0, (1, 1, 1))
+        self.grid.backup_configuration()
+        self.grid.fill((2, 2, 2))
+        self.grid.restore_configuration()
+
+        self.assertEqual(self.key(0, 0), b'\x01\x01\x01')
+        self.assertEqual(self.key(0, 1), b'\x00\x00\x00')
+
+    def test_get_key_colour(self):
+        grid = KeyboardColour()
+        grid.set_key_colour(*KEY_MAPPING['ESC'], colour=(1, 2, 3))
+
+        self.assertEqual(grid.get_key_colour('ESC'), (1, 2, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,207 @@
+import threading
+import time
+import unittest
+
+from openrazer_daemon.misc.macro import MacroExecutor, MacroJob, POLICY_IGNORE, POLICY_RESTART
+
+TIMEOUT = 2
+
+
+class BlockingJob(MacroJob):
+    """
+    Job which runs until it is released or cancelled
+    """
+    def __init__(self, name, log):
+        super(BlockingJob, self).__init__()
+        self.name = name
+        self.log = log
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.finished = threading.Event()
+
+    def run(self):
+        self.log.append(('start', self.name))
+        self.started.set()
+        while not self.cancelled and not self.release.wait(0.01):
+            pass
+        self.log.append(('end', self.name, self.cancelled))
+        self.finished.set()
+
+
+class FailingJob(MacroJob):
+    def run(self):
+        raise RuntimeError("Macro failed")
+
+
+def worker_threads(device_id):
+    prefix = 'MacroExecutor-{0}-'.format(device_id)
+    return [thread for thread in threading.enumerate() if thread.name.startswith(prefix)]
+
+
+def wait_idle(executor):
+    """
+    Wait for the executor to finish with every job, a job finishes just before its key is free again
+    """
+    deadline = time.monotonic() + TIMEOUT
+    while (executor.running or executor.queue_depth) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return not (executor.running or executor.queue_depth)
+
+
+class MacroExecutorTest(unittest.TestCase):
+    def setUp(self):
+        self.log = []
+        self.executors = []
+
+    def tearDown(self):
+        for executor in self.executors:
+            executor.close()
+
+    def executor(self, device_id, **kwargs):
+        executor = MacroExecutor(device_id, **kwargs)
+        self.executors.append(executor)
+        return executor
+
+    def job(self, name):
+        return BlockingJob(name, self.log)
+
+    def test_queue_policy(self):
+        executor = self.executor('queue')
+        first, second = self.job('first'), self.job('second')
+
+        self.assertTrue(executor.submit('M1', first))
+        self.assertTrue(first.started.wait(TIMEOUT))
+        self.assertTrue(executor.submit('M1', second))
+
+        # Waits for the run before it even though a worker is free
+        self.assertFalse(second.started.wait(0.1))
+        self.assertEqual(executor.queue_depth, 1)
+
+        first.release.set()
+        second.release.set()
+        self.assertTrue(second.finished.wait(TIMEOUT))
+        self.assertEqual(self.log, [('start', 'first'), ('end', 'first', False), ('start', 'second'), ('end', 'second', False)])
+
+    def test_restart_policy(self):
+        executor = self.executor('restart')
+        executor.set_policy('M1', POLICY_RESTART)
+        first, second, third = self.job('first'), self.job('second'), self.job('third')
+
+        executor.submit('M1', first)
+        self.assertTrue(first.started.wait(TIMEOUT))
+
+        # The running job is cancelled and a queued one replaced
+        self.assertTrue(executor.submit('M1', second))
+        self.assertTrue(executor.submit('M1', third))
+        self.assertTrue(third.started.wait(TIMEOUT))
+        third.release.set()
+        self.assertTrue(third.finished.wait(TIMEOUT))
+
+        self.assertTrue(first.cancelled)
+        self.assertFalse(second.started.is_set())
+        self.assertEqual(self.log, [('start', 'first'), ('end', 'first', True), ('start', 'third'), ('end', 'third', False)])
+
+    def test_ignore_policy(self):
+        executor = self.executor('ignore')
+        executor.set_policy('M1', POLICY_IGNORE)
+        first, second, third = self.job('first'), self.job('second'), self.job('third')
+
+        executor.submit('M1', first)
+        self.assertTrue(first.started.wait(TIMEOUT))
+        self.assertFalse(executor.submit('M1', second))
+        self.assertEqual(executor.dropped, 1)
+
+        first.release.set()
+        self.assertTrue(wait_idle(executor))
+        # Only dropped while the key is busy
+        third.release.set()
+        self.assertTrue(executor.submit('M1', third))
+        self.assertTrue(third.finished.wait(TIMEOUT))
+        self.assertFalse(second.started.is_set())
+
+        with self.assertRaises(ValueError):
+            executor.set_policy('M1', 'sometimes')
+
+    def test_full_queue(self):
+        executor = self.executor('full', max_workers=1, max_queue=2)
+        running = self.job('running')
+
+        executor.submit('M1', running)
+        self.assertTrue(running.started.wait(TIMEOUT))
+
+        self.assertTrue(executor.submit('M2', self.job('queued1')))
+        self.assertTrue(executor.submit('M3', self.job('queued2')))
+        self.assertFalse(executor.submit('M4', self.job('dropped')))
+
+        self.assertEqual(executor.queue_depth, 2)
+        self.assertEqual(executor.dropped, 1)
+
+    def test_one_job_per_key(self):
+        executor = self.executor('perkey', max_workers=2)
+        first, second, other = self.job('first'), self.job('second'), self.job('other')
+
+        executor.submit('M1', first)
+        executor.submit('M1', second)
+        executor.submit('M2', other)
+
+        # The free worker skips the key which is running and takes the next one
+        self.assertTrue(other.started.wait(TIMEOUT))
+        self.assertTrue(first.started.is_set())
+        self.assertFalse(second.started.is_set())
+        self.assertEqual(executor.running, 2)
+
+        for job in (first, second, other):
+            job.release.set()
+        self.assertTrue(second.finished.wait(TIMEOUT))
+
+        key_m1 = [entry for entry in self.log if entry[1] in ('first', 'second')]
+        self.assertEqual(key_m1, [('start', 'first'), ('end', 'first', False), ('start', 'second'), ('end', 'second', False)])
+
+    def test_worker_cap(self):
+        executor = self.executor('cap', max_workers=2)
+        jobs = [self.job(str(index)) for index in range(4)]
+
+        for index, job in enumerate(jobs):
+            executor.submit('M{0}'.format(index), job)
+        self.assertTrue(jobs[0].started.wait(TIMEOUT) and jobs[1].started.wait(TIMEOUT))
+
+        self.assertEqual(len(worker_threads('cap')), 2)
+        self.assertEqual(executor.running, 2)
+        self.assertEqual(executor.queue_depth, 2)
+
+        for job in jobs:
+            job.release.set()
+        self.assertTrue(all(job.finished.wait(TIMEOUT) for job in jobs))
+        self.assertEqual(len(worker_threads('cap')), 2)
+
+    def test_failing_job(self):
+        executor = self.executor('failing', max_workers=1)
+        after = self.job('after')
+        after.release.set()
+
+        executor.submit('M1', FailingJob())
+        executor.submit('M1', after)
+
+        # The worker carries on after a job raises
+        self.assertTrue(after.finished.wait(TIMEOUT))
+        self.assertTrue(wait_idle(executor))
+
+    def test_close(self):
+        executor = self.executor('close', max_workers=1)
+        running, queued = self.job('running'), self.job('queued')
+
+        executor.submit('M1', running)
+        self.assertTrue(running.started.wait(TIMEOUT))
+        executor.submit('M2', queued)
+
+        executor.close()
+
+        self.assertTrue(running.cancelled)
+        self.assertFalse(queued.started.is_set())
+        self.assertEqual(executor.queue_depth, 0)
+        self.assertEqual(worker_threads('close'), [])
+        self.assertFalse(executor.submit('M1', self.job('late')))
+
+
+if __name__ == '__main__':
+    unittest.main()
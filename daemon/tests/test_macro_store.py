@@ -0,0 +1,58 @@
+import json
+import os
+import tempfile
+import unittest
+
+import openrazer_daemon.misc.macro_store as macro_store
+from openrazer_daemon.misc.serial_store import STORE_VERSION
+
+STORED_MACRO = {
+    'macro': [{'type': 'MacroKey', 'key_id': 'A', 'pre_pause': 0, 'state': 'DOWN'},
+              {'type': 'MacroKey', 'key_id': 'A', 'pre_pause': 1000, 'state': 'UP'}],
+    'steps': [{'events': [[0.0, 30, True], [0.001, 30, False]], 'xte': 'keydown a\nkeyup a\n'}],
+    'key_count': 2
+}
+
+
+class MacroStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = macro_store.MacroStore(os.path.join(self.tmp_dir.name, 'macros'))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_round_trip(self):
+        self.assertEqual(self.store.load('XX0000000000'), {})
+
+        self.assertTrue(self.store.save('XX0000000000', {'M1': STORED_MACRO}))
+        self.assertEqual(self.store.load('XX0000000000'), {'M1': STORED_MACRO})
+        self.assertEqual(self.store.load('XX0000000001'), {})
+
+        # Only the store file is left behind
+        self.assertEqual(os.listdir(self.store.directory), ['macros-XX0000000000.json'])
+
+    def test_save_replaces(self):
+        self.store.save('XX0000000000', {'M1': STORED_MACRO, 'M2': STORED_MACRO})
+        self.store.save('XX0000000000', {'M2': STORED_MACRO})
+        self.assertEqual(list(self.store.load('XX0000000000')), ['M2'])
+
+    def test_bad_files_are_empty(self):
+        os.makedirs(self.store.directory)
+        path = self.store.path('XX0000000000')
+
+        with open(path, 'w') as store_file:
+            store_file.write('{"version": 1, "macros": {')
+        self.assertEqual(self.store.load('XX0000000000'), {})
+
+        with open(path, 'w') as store_file:
+            json.dump({'version': STORE_VERSION + 1, 'macros': {'M1': STORED_MACRO}}, store_file)
+        self.assertEqual(self.store.load('XX0000000000'), {})
+
+    def test_serial_stays_in_directory(self):
+        path = self.store.path('../../XX/0000')
+        self.assertEqual(os.path.dirname(path), self.store.directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,195 @@
+import threading
+import unittest
+import unittest.mock
+
+import openrazer_daemon.misc.timer_service as timer_service
+from openrazer_daemon.device import Device, DeviceCollection
+from openrazer_daemon.misc import device_state
+from openrazer_daemon.misc.device_snapshot import DeviceSnapshot
+from openrazer_daemon.misc.effect_sync import EffectSync
+from openrazer_daemon.misc.memory_report import component_sizes, deep_size
+
+try:
+    import dbus.service
+    from openrazer_daemon.dbus_services.service import DBusService
+except ImportError:
+    dbus = None
+    DBusService = object
+
+DEVICE_COUNT = 50
+
+
+def get_brightness(self):
+    return self.brightness
+
+
+def set_brightness(self, brightness):
+    self.brightness = brightness
+
+
+def set_static(self, red, green, blue):
+    pass
+
+
+METHODS = ((get_brightness, 'razer.device.lighting.brightness', 'getBrightness'),
+           (set_brightness, 'razer.device.lighting.brightness', 'setBrightness'),
+           (set_static, 'razer.device.lighting.chroma', 'setStatic'))
+
+
+class FakeDevice(object):
+    """
+    Device made of the parts of a RazerDevice which don't need DBus
+    """
+    def __init__(self, device_number, timer):
+        self.serial = 'XX{0:010}'.format(device_number)
+        self.brightness = 0.0
+        self.disable_notify = False
+        self.io_worker = None
+        self._observer_list = []
+
+        self.device_state = device_state.DeviceState(self, device_number)
+        self._effect_sync = EffectSync(self, device_number)
+        self._snapshot = DeviceSnapshot(self, device_number, timer_service=timer)
+        self.device_state.on_change = self._snapshot.changed
+
+        for function, interface_name, function_name in METHODS:
+            setattr(self.__class__, function_name, self.device_state.track(function, interface_name, function_name))
+
+    def register_observer(self, observer):
+        self._observer_list.append(observer)
+
+    def remove_observer(self, observer):
+        if observer in self._observer_list:
+            self._observer_list.remove(observer)
+
+    def register_parent(self, parent):
+        self._parent = parent
+
+    def PropertiesChanged(self, changed):
+        pass
+
+    def memory_report(self):
+        boundaries = (FakeDevice, Device, DeviceCollection, EffectSync, timer_service.TimerService)
+        return component_sizes((
+            ('state', self.device_state),
+            ('snapshot', self._snapshot),
+            ('effect_sync', self._effect_sync),
+            ('wrapper', self._parent),
+            ('device', self),
+        ), boundaries=boundaries)
+
+
+class MemoryReportTest(unittest.TestCase):
+    def test_shared_counted_once(self):
+        shared = list(range(1000))
+        sizes = component_sizes((('first', {'values': shared}), ('second', [shared])))
+
+        self.assertGreater(sizes['first'], deep_size(shared))
+        self.assertLess(sizes['second'], deep_size(shared))
+
+    def test_boundaries(self):
+        collection = DeviceCollection()
+        self.assertLess(deep_size({'collection': collection}, boundaries=(DeviceCollection,)),
+                        deep_size({'collection': collection}))
+
+    def test_scaling(self):
+        timer = timer_service.TimerService()
+        self.addCleanup(timer.close)
+        collection = DeviceCollection()
+
+        devices = []
+        for device_number in range(DEVICE_COUNT):
+            device = FakeDevice(device_number, timer)
+            collection.add('0000:1532:0000.{0:04}'.format(device_number), device.serial, device)
+            device.setBrightness(float(device_number))
+            device.setStatic(device_number, 0, 0)
+            devices.append(device)
+
+        self.assertTrue(all(device.device_state.settable == {'brightness'} for device in devices))
+        self.assertEqual(devices[-1].device_state.known(), {'brightness': float(DEVICE_COUNT - 1)})
+
+        # Wrappers have no __dict__
+        self.assertFalse(hasattr(collection[devices[0].serial], '__dict__'))
+
+        # A device's report doesn't grow with the number of devices
+        totals = [sum(device.memory_report().values()) for device in devices]
+        self.assertLess(max(totals) - min(totals), min(totals) * 0.1)
+        self.assertTrue(all(sizes['wrapper'] > 0 and sizes['state'] > 0 for sizes in (devices[0].memory_report(), devices[-1].memory_report())))
+
+
+class ServiceDevice(DBusService):
+    """
+    Adds its methods through DBusService like RazerDevice, without a bus
+    """
+    wrapped = 0
+
+    def __init__(self, serial):
+        self.brightness = 0.0
+        self.device_state = device_state.DeviceState(self, 0)
+        DBusService.__init__(self, 'org.razer.test', '/org/razer/device/{0}'.format(serial))
+
+        for function, interface_name, function_name in METHODS:
+            self.add_dbus_method(interface_name, function_name, function, in_signature='', out_signature='')
+        self.add_dbus_signal(device_state.STATE_INTERFACE, 'PropertiesChanged', self.properties_changed, 'a{sv}')
+
+        # Each instance has its own closure so this one is never shared
+        def get_serial(dbus_object):
+            return serial
+        self.add_dbus_method('razer.device.misc', 'getSerial', get_serial, out_signature='s')
+
+    def wrap_dbus_method(self, function, interface_name, function_name):
+        ServiceDevice.wrapped += 1
+        return device_state.wrap(function, interface_name, function_name)
+
+    def register_dbus_method(self, interface_name, function_name):
+        self.device_state.register(interface_name, function_name)
+
+    def properties_changed(self, changed):
+        pass
+
+
+def object_init(self, *args, **kwargs):
+    """
+    dbus.service.Object.__init__ without exporting the object, only what signals need
+    """
+    self._locations = []
+    self._locations_lock = threading.Lock()
+
+
+@unittest.skipIf(dbus is None, "dbus-python is not installed")
+class DBusServiceTest(unittest.TestCase):
+    def setUp(self):
+        for patcher in (unittest.mock.patch('dbus.SessionBus'),
+                        unittest.mock.patch('dbus.service.BusName'),
+                        unittest.mock.patch.object(dbus.service.Object, '__init__', object_init)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_methods_generated_once_per_class(self):
+        first = ServiceDevice('XX0000000001')
+        methods = {name: getattr(ServiceDevice, name) for _, _, name in METHODS}
+        signal = ServiceDevice.PropertiesChanged
+
+        second = ServiceDevice('XX0000000002')
+
+        # The second device reuses every method and signal, only the closure is made again
+        self.assertEqual(ServiceDevice.wrapped, len(METHODS) + 2)
+        for name, method in methods.items():
+            self.assertIs(getattr(ServiceDevice, name), method)
+        self.assertIs(ServiceDevice.PropertiesChanged, signal)
+
+        # And still knows what it can get and set
+        self.assertEqual(second.device_state.settable, {'brightness'})
+        self.assertEqual(second.device_state.properties, {'brightness'})
+        self.assertEqual(second.device_state.effect_methods, {'setStatic'})
+
+        # Shared methods update the state of the device they are called on
+        second.setBrightness(20.0)
+        self.assertEqual(second.device_state.known(), {'brightness': 20.0})
+        self.assertEqual(first.device_state.known(), {})
+
+        self.assertEqual(second.getSerial(), 'XX0000000002')
+
+
+if __name__ == '__main__':
+    unittest.main()
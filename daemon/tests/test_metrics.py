@@ -0,0 +1,96 @@
+import builtins
+import inspect
+import json
+import os
+import tempfile
+import unittest
+
+import openrazer_daemon.misc.metrics as metrics
+
+OBJECT_PATH = '/org/razer/device/XX000000'
+
+def write_brightness(self, brightness):
+    with metrics.timed_open(self.driver_file, 'wb') as driver_file:
+        driver_file.write(bytes([brightness]))
+
+def fail(self):
+    raise ValueError('Invalid')
+
+class DummyDBusObject(object):
+    def __init__(self, driver_file):
+        self.object_path = OBJECT_PATH
+        self.driver_file = driver_file
+
+
+class MetricsTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.dbus_object = DummyDBusObject(os.path.join(self.tmp_dir.name, 'brightness'))
+        self.registry = metrics.MetricsRegistry()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_signature(self):
+        wrapped = self.registry.instrument(write_brightness, 'razer.device.lighting.brightness', 'setBrightness')
+
+        self.assertEqual(wrapped.__name__, 'setBrightness')
+        # dbus-python inspects the argument names to find the sender keyword
+        self.assertEqual(inspect.getfullargspec(wrapped).args, ['self', 'brightness', metrics.SENDER_KEYWORD])
+
+    def test_record_call(self):
+        wrapped = self.registry.instrument(write_brightness, 'razer.device.lighting.brightness', 'setBrightness')
+        wrapped(self.dbus_object, 100, **{metrics.SENDER_KEYWORD: ':1.42'})
+
+        with open(self.dbus_object.driver_file, 'rb') as driver_file:
+            self.assertEqual(driver_file.read(), b'\x64')
+
+        data = self.registry.as_dict()
+        endpoint = data['endpoints'][0]
+
+        self.assertEqual(endpoint['object'], OBJECT_PATH)
+        self.assertEqual(endpoint['method'], 'setBrightness')
+        self.assertEqual(endpoint['calls'], 1)
+        self.assertEqual(endpoint['errors'], 0)
+        self.assertGreater(endpoint['io_time'], 0)
+        self.assertLessEqual(endpoint['io_time'], endpoint['total_time'])
+        self.assertEqual(sum(endpoint['histogram']), 1)
+        self.assertEqual(data['senders'], {':1.42': 1})
+
+    def test_module_untouched(self):
+        wrapped = self.registry.instrument(write_brightness, 'razer.device.lighting.brightness', 'setBrightness')
+        wrapped(self.dbus_object, 100)
+
+        # The method's module keeps the builtin open
+        self.assertNotIn('open', globals())
+        self.assertIs(open, builtins.open)
+
+    def test_record_error(self):
+        wrapped = self.registry.instrument(fail, 'razer.device.misc', 'fail')
+
+        with self.assertRaises(ValueError):
+            wrapped(self.dbus_object)
+
+        endpoint = self.registry.as_dict()['endpoints'][0]
+        self.assertEqual(endpoint['calls'], 1)
+        self.assertEqual(endpoint['errors'], 1)
+
+    def test_record_latency(self):
+        self.registry.record_latency(OBJECT_PATH, 'key_event', 0.002)
+        self.registry.record_latency(OBJECT_PATH, 'key_event', 0.004)
+
+        latency = self.registry.as_dict()['latencies'][0]
+        self.assertEqual(latency['name'], 'key_event')
+        self.assertEqual(latency['count'], 2)
+        self.assertAlmostEqual(latency['max_time'], 0.004)
+        self.assertIn('key_event', self.registry.to_text())
+
+    def test_dumps(self):
+        wrapped = self.registry.instrument(write_brightness, 'razer.device.lighting.brightness', 'setBrightness')
+        wrapped(self.dbus_object, 100)
+
+        self.assertEqual(len(json.loads(self.registry.to_json())['endpoints']), 1)
+        self.assertIn('setBrightness', self.registry.to_text())
+
+        self.registry.reset()
+        self.assertEqual(self.registry.as_dict()['endpoints'], [])
@@ -0,0 +1,76 @@
+import threading
+import time
+import unittest
+
+import openrazer_daemon.misc.timer_service as timer_service
+
+
+class TimerServiceTest(unittest.TestCase):
+    def setUp(self):
+        self.service = timer_service.TimerService()
+
+    def tearDown(self):
+        self.service.close()
+
+    def test_call_later_order(self):
+        calls = []
+        done = threading.Event()
+
+        self.service.call_later(0.06, done.set)
+        self.service.call_later(0.04, calls.append, 2)
+        self.service.call_later(0.02, calls.append, 1)
+
+        self.assertTrue(done.wait(1))
+        self.assertEqual(calls, [1, 2])
+
+    def test_cancel(self):
+        calls = []
+        done = threading.Event()
+
+        timer = self.service.call_later(0.02, calls.append, 1)
+        self.service.call_later(0.04, done.set)
+        timer.cancel()
+
+        self.assertTrue(done.wait(1))
+        self.assertEqual(calls, [])
+
+    def test_call_every(self):
+        calls = []
+
+        timer = self.service.call_every(0.02, calls.append, 1, delay=0)
+        time.sleep(0.11)
+        timer.cancel()
+        runs = len(calls)
+        time.sleep(0.05)
+
+        self.assertGreaterEqual(runs, 4)
+        self.assertLessEqual(runs, 7)
+        self.assertEqual(len(calls), runs)
+        self.assertEqual(len(self.service), 0)
+
+    def test_idle_has_no_wakeups(self):
+        done = threading.Event()
+        self.service.call_later(0, done.set)
+        self.assertTrue(done.wait(1))
+
+        wakeups = self.service.wakeups
+        time.sleep(0.1)
+        self.assertEqual(self.service.wakeups, wakeups)
+
+    def test_failing_job(self):
+        done = threading.Event()
+
+        self.service.call_later(0, lambda: 1 / 0)
+        self.service.call_later(0.01, done.set)
+
+        self.assertTrue(done.wait(1))
+
+    def test_closed(self):
+        self.service.close()
+
+        with self.assertRaises(RuntimeError):
+            self.service.call_later(0, print)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,170 @@
+import concurrent.futures
+import threading
+import time
+import unittest
+
+import openrazer_daemon.misc.timer_service as timer_service
+from openrazer_daemon.misc.device_state import DeviceState
+from openrazer_daemon.misc.transition import DeviceTransitions, Transition, interpolate
+
+
+def set_brightness(self, brightness):
+    time.sleep(self.write_time)
+    self.writes.append(brightness)
+
+
+class DummyDevice(object):
+    def __init__(self, write_time=0):
+        self.device_state = DeviceState(self, 0)
+        self.writes = []
+        self.signalled = []
+        self.write_time = write_time
+        self.done = threading.Event()
+        self.transition = None
+
+        self.device_state.on_write = self.superseded
+        setattr(self.__class__, 'setBrightness', self.device_state.track(set_brightness, 'razer.device.lighting.brightness', 'setBrightness'))
+
+    def PropertiesChanged(self, changed):
+        self.signalled.append(changed)
+
+    def superseded(self, key):
+        if self.transition is not None:
+            self.transition.cancel()
+
+    def fade(self, start, end, duration, service, rate=100, submit=None):
+        def step(values):
+            with self.device_state.quiet():
+                self.setBrightness(values[0])
+
+        def finish(values):
+            self.setBrightness(values[0])
+            self.done.set()
+
+        self.transition = Transition((start,), (end,), duration, step, finish, rate=rate, submit=submit, timer_service=service)
+        self.transition.start()
+
+
+def set_static(self, red, green, blue):
+    self.writes.append(('setStatic', red, green, blue))
+
+
+def get_brightness(self):
+    return 0.0
+
+
+def set_brightness_step(self, brightness):
+    self.writes.append(('setBrightness', brightness))
+
+
+def set_static_transition(self, red, green, blue, duration):
+    self.transitions.static(red, green, blue, duration)
+
+
+def set_brightness_transition(self, brightness, duration):
+    self.transitions.brightness(brightness, duration)
+
+
+class DBusDevice(object):
+    """
+    Methods wrapped the way they are added to DBus, transitions included
+    """
+    disable_notify = False
+    io_worker = None
+
+    def __init__(self, service):
+        self.device_state = DeviceState(self, 0)
+        self.transitions = DeviceTransitions(self, 0, rate=100, timer_service=service)
+        self.writes = []
+        self.written = []
+
+        self.device_state.on_write = self.on_write
+
+        for function, interface_name, function_name in ((set_static, 'razer.device.lighting.chroma', 'setStatic'),
+                                                         (set_static_transition, 'razer.device.lighting.chroma', 'setStaticTransition'),
+                                                         (get_brightness, 'razer.device.lighting.brightness', 'getBrightness'),
+                                                         (set_brightness_step, 'razer.device.lighting.brightness', 'setBrightness'),
+                                                         (set_brightness_transition, 'razer.device.lighting.brightness', 'setBrightnessTransition')):
+            setattr(self.__class__, function_name, self.device_state.track(function, interface_name, function_name))
+
+    def on_write(self, key):
+        self.written.append(key)
+        self.transitions.superseded(key)
+
+    def PropertiesChanged(self, changed):
+        pass
+
+
+class TransitionTest(unittest.TestCase):
+    def setUp(self):
+        self.service = timer_service.TimerService()
+
+    def tearDown(self):
+        self.service.close()
+
+    def test_interpolate(self):
+        self.assertEqual(interpolate((0, 100), (100, 0), 0.25), (25, 75))
+
+    def test_fade(self):
+        device = DummyDevice()
+        device.fade(0.0, 100.0, 0.2, self.service)
+        self.assertTrue(device.done.wait(2))
+
+        self.assertGreater(len(device.writes), 2)
+        self.assertEqual(device.writes, sorted(device.writes))
+        self.assertEqual(device.writes[-1], 100.0)
+
+        # Only where it ended up is kept and signalled
+        self.assertEqual(device.signalled, [{'brightness': 100.0}])
+
+    def test_slow_device_skips_steps(self):
+        device = DummyDevice(write_time=0.05)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as io_worker:
+            device.fade(0.0, 100.0, 0.3, self.service, submit=io_worker.submit)
+            self.assertTrue(device.done.wait(2))
+
+        self.assertGreater(device.transition.skipped, 0)
+        self.assertLess(len(device.writes), 30)
+        self.assertEqual(device.writes[-1], 100.0)
+
+    def test_superseded(self):
+        device = DummyDevice()
+        device.fade(0.0, 100.0, 0.5, self.service)
+        time.sleep(0.1)
+
+        device.setBrightness(20.0)
+        # A step already past the cancelled check can still land
+        time.sleep(0.05)
+        count = len(device.writes)
+        self.assertFalse(device.done.wait(0.6))
+
+        self.assertEqual(len(device.writes), count)
+        self.assertEqual(device.device_state.known(), {'brightness': 20.0})
+
+    def test_dbus_methods(self):
+        device = DBusDevice(self.service)
+        device.setStaticTransition(255, 0, 0, 150)
+        device.setBrightnessTransition(50.0, 150)
+
+        deadline = time.monotonic() + 2
+        while len(device.written) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        # Starting the transitions doesnt stop them, only the setters they end with are written
+        self.assertEqual(sorted(device.written), ['brightness', 'effect'])
+        self.assertIn(('setStatic', 255, 0, 0), device.writes)
+        self.assertIn(('setBrightness', 50.0), device.writes)
+        self.assertEqual(device.device_state.effects, {'effect': ('setStatic', [255, 0, 0])})
+        self.assertEqual(device.device_state.known(), {'brightness': 50.0})
+        self.assertEqual(device.device_state.effect_methods, {'setStatic'})
+
+    def test_no_duration(self):
+        device = DummyDevice()
+        device.fade(0.0, 50.0, 0, self.service)
+
+        self.assertTrue(device.done.is_set())
+        self.assertEqual(device.writes, [50.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
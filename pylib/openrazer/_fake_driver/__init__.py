@@ -1,13 +1,25 @@
 import struct
+import collections
 import configparser
+import fcntl
 import glob
+import json
 import os
+import random
 import shutil
+import signal
+import threading
+import time
 
 SPECS = {os.path.splitext(os.path.basename(spec_file))[0]: spec_file for spec_file in glob.glob(os.path.join(os.path.dirname(__file__), '*.cfg'))}
 EVENT_FORMAT = '@llHHI'
 EV_KEY = 0x01
 
+# From linux/fcntl.h, the fcntl module lacks them
+F_SETOWN_EX = 15
+F_OWNER_TID = 0
+LEASE_SIGNAL = signal.SIGRTMIN + 2
+
 KEY_ACTION = {
     'up': 0x00,
     'down': 0x01,
@@ -19,6 +31,201 @@ def touch(fname, times=None):
         os.utime(fname, times)
 
 
+WriteRecord = collections.namedtuple('WriteRecord', ['timestamp', 'monotonic', 'endpoint', 'data', 'idle'])
+
+
+class LatencyProfile(object):
+    """
+    How long the emulated firmware takes to handle writes
+
+    Every transfer keeps the device busy for delay +/- jitter seconds and transfers are never started faster than
+    max_report_rate per second. Delays can be overridden per attribute with attributes={'name': (delay, jitter)}.
+    """
+    def __init__(self, delay=0.0, jitter=0.0, max_report_rate=None, attributes=None, log_file=None):
+        self.delay = delay
+        self.jitter = jitter
+        self.max_report_rate = max_report_rate
+        self.attributes = dict(attributes or {})
+        self.log_file = log_file
+
+    def transfer_time(self, endpoint):
+        """
+        Get how long a transfer to the endpoint takes
+
+        :param endpoint: Attribute name
+        :type endpoint: str
+
+        :return: Seconds
+        :rtype: float
+        """
+        delay, jitter = self.attributes.get(endpoint, (self.delay, self.jitter))
+        return max(0.0, delay + random.uniform(-jitter, jitter))
+
+
+class LeaseEndpointServer(threading.Thread):
+    """
+    Serves a writable attribute so that writes cost time like they would on hardware
+
+    The attribute stays a plain file the server holds a read lease on, so reads go through untouched while opening it
+    for writing breaks the lease and blocks the writer in open() for the emulated transfer. Before letting the writer
+    in the server renames a leased copy of the file over the attribute, so writers coming along during the write wait
+    their turn on the copy. Once the writer has closed the file its data is recorded and put in place as another
+    leased copy, so reads give the old value until a moment after the writer closes the file. Transfers to every
+    attribute of a device share one lock as they would share the control endpoint.
+
+    Writers opening the same file at the same time are let in together and recorded as one transfer, writes from the
+    daemon are separated by a DBus round trip so this does not happen there. Needs Linux file leases.
+    """
+    def __init__(self, fake_device, endpoint, path, chmod):
+        super(LeaseEndpointServer, self).__init__(name='LeaseEndpoint-{0}'.format(endpoint), daemon=True)
+        self._device = fake_device
+        self._endpoint = endpoint
+        self._path = path
+        self._chmod = chmod
+        self._copies = 0
+        self._closing = False
+        self._ready = threading.Event()
+        self._error = None
+
+        # Inodes let in to writers and not yet put back in place, with a condition to wait for them
+        self._writing = set()
+        self._written = threading.Condition()
+
+        # Leased fd: inode, for the file at the path and any replaced ones writers may still be waiting on
+        self._held = {}
+
+    def start(self):
+        super(LeaseEndpointServer, self).start()
+        self._ready.wait()
+        if self._error is not None:
+            self.join()
+            raise self._error
+
+    def _lease(self, fd):
+        """
+        Take a read lease on the file, breaks are signalled to this thread
+        """
+        fcntl.fcntl(fd, fcntl.F_SETSIG, LEASE_SIGNAL)
+        fcntl.fcntl(fd, F_SETOWN_EX, struct.pack('ii', F_OWNER_TID, threading.get_native_id()))
+        fcntl.fcntl(fd, fcntl.F_SETLEASE, fcntl.F_RDLCK)
+        self._held[fd] = os.fstat(fd).st_ino
+
+    def _replace(self, data):
+        """
+        Rename a new leased file holding data over the attribute
+        """
+        self._copies += 1
+        copy_path = os.path.join(os.path.dirname(self._path), '.{0}.{1}'.format(self._endpoint, self._copies))
+
+        with open(copy_path, 'xb') as copy_file:
+            copy_file.write(data)
+        os.chmod(copy_path, self._chmod)
+
+        fd = os.open(copy_path, os.O_RDONLY)
+        self._lease(fd)
+        os.rename(copy_path, self._path)
+
+    @staticmethod
+    def _read(fd):
+        return os.pread(fd, os.fstat(fd).st_size, 0)
+
+    @staticmethod
+    def _is_breaking(fd):
+        # A lease being broken reads back as the type it is being broken to
+        return fcntl.fcntl(fd, fcntl.F_GETLEASE) == fcntl.F_UNLCK
+
+    def _drop_replaced(self, keep_fd):
+        """
+        Close replaced files nobody is waiting on, they have been unlinked so nobody else can open them
+        """
+        current = os.stat(self._path).st_ino
+
+        for fd, inode in list(self._held.items()):
+            if fd != keep_fd and inode != current and not self._is_breaking(fd):
+                del self._held[fd]
+                os.close(fd)
+
+    def _serve(self, fd, idle):
+        """
+        Let the writers waiting on a file in once the transfer time is up and record what they wrote
+        """
+        self._drop_replaced(fd)
+        inode = self._held[fd]
+        with self._written:
+            self._writing.add(inode)
+
+        started = self._device._transfer(self._endpoint)
+
+        if os.stat(self._path).st_ino == inode:
+            self._replace(self._read(fd))
+        fcntl.fcntl(fd, fcntl.F_SETLEASE, fcntl.F_UNLCK)
+
+        # A read lease can only be taken back once every writer has closed the file
+        while True:
+            try:
+                fcntl.fcntl(fd, fcntl.F_SETLEASE, fcntl.F_RDLCK)
+                break
+            except BlockingIOError:
+                time.sleep(0.0001)
+
+        data = self._read(fd)
+        del self._held[fd]
+        os.close(fd)
+
+        self._device._record_write(self._endpoint, data, started, idle)
+        self._replace(data)
+
+        with self._written:
+            self._writing.discard(inode)
+            self._written.notify_all()
+
+    def wait_written(self, inode, timeout=2):
+        """
+        Wait for a write to be put in place so reading the attribute gives it back
+
+        :param inode: Inode of the file written to
+        :type inode: int
+
+        :param timeout: Seconds to wait at most
+        :type timeout: float
+        """
+        with self._written:
+            self._written.wait_for(lambda: inode not in self._writing, timeout)
+
+    def run(self):
+        signal.pthread_sigmask(signal.SIG_BLOCK, [LEASE_SIGNAL])
+        try:
+            self._lease(os.open(self._path, os.O_RDONLY))
+        except OSError as err:
+            self._error = err
+        self._ready.set()
+
+        ready = time.monotonic()
+        while self._error is None:
+            signal.sigwaitinfo([LEASE_SIGNAL])
+            if self._closing:
+                break
+
+            idle = time.monotonic() - ready
+            while True:
+                breaking = [fd for fd in self._held if self._is_breaking(fd)]
+                if not breaking:
+                    break
+                for fd in breaking:
+                    self._serve(fd, idle)
+                    idle = 0.0
+            ready = time.monotonic()
+
+        for fd in self._held:
+            os.close(fd)
+        self._held.clear()
+
+    def stop(self):
+        self._closing = True
+        signal.pthread_kill(self.ident, LEASE_SIGNAL)
+        self.join(timeout=2)
+
+
 class FakeDevice(object):
     @staticmethod
     def parse_endpoint_line(line):
@@ -56,27 +263,39 @@ class FakeDevice(object):
             touch(path)
         os.chmod(path, chmod)
 
-    def __init__(self, spec_name, serial=None, tmp_dir=os.environ.get('TMPDIR', '/tmp')):
+    def __init__(self, spec_name, serial=None, tmp_dir=os.environ.get('TMPDIR', '/tmp'), instance=None, latency=None):
 
         if spec_name not in SPECS:
             raise ValueError("Spec {0} not in SPECS".format(spec_name))
 
-        self._tick = 1
         self.spec_name = spec_name
         self._config = configparser.ConfigParser()
         self._config.read(SPECS[spec_name])
         self._serial = serial
 
-        self._tmp_dir = os.path.join(tmp_dir, self._config.get('device', 'dir_name'))
+        # The instance number replaces the last part of the sysfs name so several of the same device can coexist
+        dir_name = self._config.get('device', 'dir_name')
+        if instance is not None:
+            dir_name = '{0}.{1:04X}'.format(dir_name.rsplit('.', 1)[0], instance)
+
+        self.dir_name = dir_name
+        self._tmp_dir = os.path.join(tmp_dir, dir_name)
         os.makedirs(self._tmp_dir, exist_ok=True)
 
+        self.latency = latency
+        self.write_log = []
+        self._lease_servers = {}
+        self._log_lock = threading.Lock()
+        self._transfer_lock = threading.Lock()
+        self._last_transfer = 0.0
+
         self.endpoints = {}
         self.events = {}
         self.create_endpoints()
         self.create_events()
 
         if serial is not None:
-            self.set('get_serial', serial)
+            self.set('device_serial', serial)
 
     def _get_endpoint_path(self, endpoint):
         return os.path.join(self._tmp_dir, endpoint)
@@ -111,10 +330,62 @@ class FakeDevice(object):
             chmod, name, default, orig_perm = self.parse_endpoint_line(endpoint_line)
             path = self._get_endpoint_path(name)
 
-            if name == 'get_serial' and self._serial is not None:
+            if name == 'device_serial' and self._serial is not None:
                 default = self._serial
             self.endpoints[name] = (chmod, default, orig_perm)
+
             self.create_endpoint(path, chmod, default)
+            if self.latency is not None and 'w' in orig_perm:
+                server = LeaseEndpointServer(self, name, path, chmod)
+                self._lease_servers[name] = server
+                server.start()
+
+    def _transfer(self, endpoint):
+        """
+        Keep the device busy for a transfer to an endpoint, the writer waits all the while
+
+        :param endpoint: Attribute name
+        :type endpoint: str
+
+        :return: Wall clock and monotonic time the transfer started
+        :rtype: tuple
+        """
+        with self._transfer_lock:
+            if self.latency.max_report_rate:
+                delay = self._last_transfer + 1.0 / self.latency.max_report_rate - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            self._last_transfer = time.monotonic()
+            started = (time.time(), self._last_transfer)
+
+            time.sleep(self.latency.transfer_time(endpoint))
+
+        return started
+
+    def _record_write(self, endpoint, data, started, idle):
+        """
+        Record a write to an endpoint
+
+        :param endpoint: Attribute name
+        :type endpoint: str
+
+        :param data: Data written
+        :type data: bytes
+
+        :param started: Wall clock and monotonic time the transfer started
+        :type started: tuple
+
+        :param idle: Seconds the attribute sat idle before the write
+        :type idle: float
+        """
+        record = WriteRecord(started[0], started[1], endpoint, data, idle)
+
+        with self._log_lock:
+            self.write_log.append(record)
+
+            if self.latency.log_file is not None:
+                with open(self.latency.log_file, 'a') as log_file:
+                    log_file.write(json.dumps({'timestamp': record.timestamp, 'monotonic': record.monotonic, 'endpoint': endpoint, 'data': data.hex()}) + '\n')
 
     def get(self, endpoint, binary=False):
         """
@@ -157,9 +428,30 @@ class FakeDevice(object):
 
         with open(path, write_mode) as open_endpoint:
             open_endpoint.write(value)
+            inode = os.fstat(open_endpoint.fileno()).st_ino
 
-    def emit_kb_event(self, file_id, key_code, value):
+        if endpoint in self._lease_servers:
+            self._lease_servers[endpoint].wait_written(inode)
 
+    def emit_kb_event(self, file_id, key_code, value, timestamp=None):
+        """
+        Write a key event to an event FIFO
+
+        :param file_id: Event file ID
+        :type file_id: str
+
+        :param key_code: evdev key code
+        :type key_code: int
+
+        :param value: up, down or repeat
+        :type value: str
+
+        :param timestamp: Event time in seconds since the epoch like evdev uses, defaults to now
+        :type timestamp: float or None
+
+        :return: Bytes written
+        :rtype: int
+        """
         if file_id not in self.events:
             raise ValueError("file_id {0} does not exist".format(file_id))
 
@@ -168,13 +460,21 @@ class FakeDevice(object):
         else:
             value = 0x00
 
-        event_binary = struct.pack(EVENT_FORMAT, self._tick, 0, EV_KEY, key_code, value)
+        if timestamp is None:
+            timestamp = time.time()
+        seconds = int(timestamp)
+
+        event_binary = struct.pack(EVENT_FORMAT, seconds, int((timestamp - seconds) * 1000000), EV_KEY, key_code, value)
         pipe_fd = self.events[file_id][1]
         os.write(pipe_fd, event_binary)
 
         return len(event_binary)
 
     def close(self):
+        for server in self._lease_servers.values():
+            server.stop()
+        self._lease_servers.clear()
+
         if os.path.exists(self._tmp_dir):
             # Allow deletion
             for endpoint in self.endpoints:
@@ -1,6 +1,7 @@
 import json
 import dbus as _dbus
 from openrazer.client.device import RazerDeviceFactory as _RazerDeviceFactory
+from openrazer.client.canvas import RazerCanvas as _RazerCanvas
 from openrazer.client import constants
 
 __version__ = '2.0.0'
@@ -30,6 +31,7 @@ class DeviceManager(object):
 
         self._device_serials = self._dbus_devices.getDevices()
         self._devices = []
+        self._canvas = None
 
         self._daemon_version = self._dbus_daemon.version()
 
@@ -85,6 +87,18 @@ class DeviceManager(object):
 
         self._dbus_devices.syncEffects(sync)
 
+    @property
+    def sync_effects_stats(self):
+        """
+        Counters of the daemon's effect sync tables and coalescer
+
+        :return: Dict of tables, a list of dicts of source, target, effects, translated, hits and misses, one per pair
+                 of device classes, coalescer, a dict of window (ms), delivered and coalesced or None, and devices, a
+                 dict of serial: dict of stalled and replaced
+        :rtype: dict
+        """
+        return json.loads(self._dbus_devices.getSyncEffectsStats())
+
     @property
     def supported_devices(self):
         json_data = self._dbus_daemon.supportedDevices()
@@ -102,6 +116,19 @@ class DeviceManager(object):
 
         return self._devices
 
+    @property
+    def canvas(self):
+        """
+        Composite canvas spanning multiple devices
+
+        :return: Canvas
+        :rtype: razer.client.canvas.RazerCanvas
+        """
+        if self._canvas is None:
+            self._canvas = _RazerCanvas(daemon_dbus=self._dbus)
+
+        return self._canvas
+
     @property
     def version(self):
         """
@@ -0,0 +1,74 @@
+import json as _json
+import dbus as _dbus
+
+from openrazer.client.fx import Frame
+
+
+class RazerCanvas(object):
+    """
+    Composite canvas spanning the LED matrices of several devices
+
+    Devices are positioned on the canvas with the layout, then the whole canvas is drawn with a single call and the
+    daemon presents the frame on every device at the same time.
+    """
+    def __init__(self, daemon_dbus=None):
+        if daemon_dbus is None:
+            session_bus = _dbus.SessionBus()
+            daemon_dbus = session_bus.get_object("org.razer", "/org/razer")
+
+        self._canvas_dbus = _dbus.Interface(daemon_dbus, "razer.canvas")
+
+        self.matrix = None
+        self._resize()
+
+    def _resize(self):
+        rows, cols = self.dimensions
+        self.matrix = Frame((rows, cols))
+
+    @property
+    def dimensions(self) -> tuple:
+        """
+        Size of the canvas
+
+        :return: Rows, Columns
+        :rtype: tuple
+        """
+        return tuple(int(dim) for dim in self._canvas_dbus.getDimensions())
+
+    @property
+    def layout(self) -> dict:
+        """
+        Device positions on the canvas
+
+        :return: Dict of serial: (x, y)
+        :rtype: dict
+        """
+        return {serial: tuple(pos) for serial, pos in _json.loads(str(self._canvas_dbus.getLayout())).items()}
+
+    @layout.setter
+    def layout(self, layout: dict):
+        """
+        Position devices on the canvas
+
+        This resets the matrix as the canvas size will change
+
+        :param layout: Dict of serial: (x, y) where x, y is the position of the device's top left LED
+        :type layout: dict
+        """
+        self._canvas_dbus.setLayout(_json.dumps({serial: [int(x), int(y)] for serial, (x, y) in layout.items()}))
+        self._resize()
+
+    def draw(self, frame=None) -> float:
+        """
+        Draw the canvas on all devices in the layout
+
+        :param frame: Frame to draw, defaults to the canvas matrix
+        :type frame: Frame
+
+        :return: Monotonic time the frame will be presented at
+        :rtype: float
+        """
+        if frame is None:
+            frame = self.matrix
+
+        return float(self._canvas_dbus.submitFrame(frame.to_canvas()))
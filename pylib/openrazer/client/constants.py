@@ -23,3 +23,9 @@ RIPPLE_REFRESH_RATE = 0.05
 POLL_1000HZ = 1000
 POLL_500HZ = 500
 POLL_125HZ = 125
+
+# Compositor blend modes
+BLEND_OVER = 'over'
+BLEND_ADD = 'add'
+BLEND_MULTIPLY = 'multiply'
+BLEND_MAX = 'max'
@@ -3,6 +3,7 @@ import dbus as _dbus
 from openrazer.client.fx import RazerFX as _RazerFX
 from xml.etree import ElementTree as _ET
 from openrazer.client.macro import RazerMacro as _RazerMacro
+from openrazer.client.state import RazerDeviceState as _RazerDeviceState, STATE_INTERFACE as _STATE_INTERFACE
 
 
 class RazerDevice(object):
@@ -41,14 +42,20 @@ class RazerDevice(object):
 
         self._serial = serial
 
+        # Property reads are answered from here when the daemon can send changes
+        self._state = _RazerDeviceState(self._dbus, enabled=self._has_feature(_STATE_INTERFACE))
+
         self._capabilities = {
             'name': True,
             'type': True,
             'firmware_version': True,
             'serial': True,
             'brightness': self._has_feature('razer.device.lighting.brightness'),
+            'brightness_transition': self._has_feature('razer.device.lighting.brightness', 'setBrightnessTransition'),
 
             'macro_logic': self._has_feature('razer.device.macro'),
+            'profile': self._has_feature('razer.device.profile'),
+            'memory_report': self._has_feature('razer.device.misc', 'getMemoryReport'),
 
             # Default device is a chroma so lighting capabilities
             'lighting': self._has_feature('razer.device.lighting.chroma'),
@@ -61,6 +68,7 @@ class RazerDevice(object):
             'lighting_none': self._has_feature('razer.device.lighting.chroma', 'setNone'),
             'lighting_spectrum': self._has_feature('razer.device.lighting.chroma', 'setSpectrum'),
             'lighting_static': self._has_feature('razer.device.lighting.chroma', 'setStatic'),
+            'lighting_static_transition': self._has_feature('razer.device.lighting.chroma', 'setStaticTransition'),
 
             'lighting_starlight_single': self._has_feature('razer.device.lighting.chroma', 'setStarlightSingle'),
             'lighting_starlight_dual': self._has_feature('razer.device.lighting.chroma', 'setStarlightDual'),
@@ -106,6 +114,9 @@ class RazerDevice(object):
             'lighting_backlight_active': self._has_feature('razer.device.lighting.backlight', 'setBacklightActive'),
         }
 
+        if self.has('profile'):
+            self._dbus_interfaces['profile'] = _dbus.Interface(self._dbus, "razer.device.profile")
+
         # Nasty hack to convert dbus.Int32 into native
         self._matrix_dimensions = tuple([int(dim) for dim in self._dbus_interfaces['device'].getMatrixDimensions()])
 
@@ -246,7 +257,7 @@ class RazerDevice(object):
         :return: Device brightness
         :rtype: float
         """
-        return self._dbus_interfaces['brightness'].getBrightness()
+        return self._state.get('brightness', self._dbus_interfaces['brightness'].getBrightness)
 
     @brightness.setter
     def brightness(self, value:float):
@@ -268,6 +279,132 @@ class RazerDevice(object):
             raise ValueError("Brightness must be between 0 and 100")
 
         self._dbus_interfaces['brightness'].setBrightness(value)
+        self._state.set('brightness', value)
+
+    def fade_brightness(self, value:float, duration:int):
+        """
+        Fade the device brightness, done by the daemon so it is one call
+
+        The brightness property changes once the fade is done.
+
+        :param value: Device brightness
+        :type value: float
+
+        :param duration: Fade length in milliseconds
+        :type duration: int
+
+        :raises ValueError: When brightness is not a float or not in range 0.0->100.0 or duration is negative
+        :raises NotImplementedError: If the daemon doesn't support brightness transitions
+        """
+        if isinstance(value, int):
+            value = float(value)
+
+        if not isinstance(value, float):
+            raise ValueError("Brightness must be a float")
+
+        if value < 0.0 or value > 100.0:
+            raise ValueError("Brightness must be between 0 and 100")
+
+        if not isinstance(duration, int) or duration < 0:
+            raise ValueError("Duration must be a positive integer")
+
+        if not self.has('brightness_transition'):
+            raise NotImplementedError()
+
+        self._dbus_interfaces['brightness'].setBrightnessTransition(value, duration)
+
+    def get_profile(self) -> dict:
+        """
+        Get the device's current state as a profile
+
+        :return: Profile of properties, effects and macros
+        :rtype: dict
+
+        :raises NotImplementedError: If the daemon doesn't support profiles
+        """
+        if not self.has('profile'):
+            raise NotImplementedError()
+
+        return json.loads(str(self._dbus_interfaces['profile'].getProfile()))
+
+    def apply_profile(self, profile:dict) -> dict:
+        """
+        Put the device in the state a profile describes in one call, the daemon only writes what differs
+
+        :param profile: Profile as returned by get_profile
+        :type profile: dict
+
+        :return: Dict of writes, skipped (writes not needed), written and unsupported keys
+        :rtype: dict
+
+        :raises NotImplementedError: If the daemon doesn't support profiles
+        """
+        if not self.has('profile'):
+            raise NotImplementedError()
+
+        return json.loads(str(self._dbus_interfaces['profile'].applyProfile(json.dumps(profile))))
+
+    def save_profile(self, name:str, profile:dict=None):
+        """
+        Save a profile in the daemon
+
+        :param name: Profile name
+        :type name: str
+
+        :param profile: Profile, None to save the device's current state
+        :type profile: dict or None
+
+        :raises NotImplementedError: If the daemon doesn't support profiles
+        """
+        if not self.has('profile'):
+            raise NotImplementedError()
+
+        self._dbus_interfaces['profile'].saveProfile(name, '' if profile is None else json.dumps(profile))
+
+    def apply_saved_profile(self, name:str) -> dict:
+        """
+        Apply a profile saved in the daemon
+
+        :param name: Profile name
+        :type name: str
+
+        :return: Dict of writes, skipped (writes not needed), written and unsupported keys
+        :rtype: dict
+
+        :raises NotImplementedError: If the daemon doesn't support profiles
+        """
+        if not self.has('profile'):
+            raise NotImplementedError()
+
+        return json.loads(str(self._dbus_interfaces['profile'].applySavedProfile(name)))
+
+    @property
+    def saved_profiles(self) -> list:
+        """
+        Names of the profiles saved in the daemon
+
+        :return: Profile names
+        :rtype: list
+        """
+        if not self.has('profile'):
+            return []
+
+        return [str(name) for name in self._dbus_interfaces['profile'].getSavedProfiles()]
+
+    def get_memory_report(self) -> dict:
+        """
+        Get the daemon's estimate of the memory the device uses
+
+        :return: Dict of components (name: bytes), total and shared (method_table bytes and methods, shared by
+                 every device of the same model)
+        :rtype: dict
+
+        :raises NotImplementedError: If the daemon doesn't report memory
+        """
+        if not self.has('memory_report'):
+            raise NotImplementedError()
+
+        return json.loads(str(self._dbus_interfaces['device'].getMemoryReport()))
 
     @property
     def capabilities(self) -> dict:
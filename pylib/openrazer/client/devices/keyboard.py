@@ -34,7 +34,7 @@ class RazerKeyboard(__RazerDevice):
         :rtype: bool
         """
         if self.has('game_mode_led'):
-            return self._dbus_interfaces['game_mode_led'].getGameMode()
+            return self._state.get('game_mode_led', self._dbus_interfaces['game_mode_led'].getGameMode)
         else:
             return False
 
@@ -51,6 +51,7 @@ class RazerKeyboard(__RazerDevice):
                 self._dbus_interfaces['game_mode_led'].setGameMode(True)
             else:
                 self._dbus_interfaces['game_mode_led'].setGameMode(False)
+            self._state.set('game_mode_led', bool(value))
 
     @property
     def macro_mode_led(self) -> bool:
@@ -61,7 +62,7 @@ class RazerKeyboard(__RazerDevice):
         :rtype: bool
         """
         if self.has('macro_mode_led'):
-            return self._dbus_interfaces['macro_mode_led'].getMacroMode()
+            return self._state.get('macro_mode_led', self._dbus_interfaces['macro_mode_led'].getMacroMode)
         else:
             return False
 
@@ -78,6 +79,7 @@ class RazerKeyboard(__RazerDevice):
                 self._dbus_interfaces['macro_mode_led'].setMacroMode(True)
             else:
                 self._dbus_interfaces['macro_mode_led'].setMacroMode(False)
+            self._state.set('macro_mode_led', bool(value))
 
     @property
     def macro_mode_led_effect(self) -> int:
@@ -89,7 +91,7 @@ class RazerKeyboard(__RazerDevice):
         :rtype: int
         """
         if self.has('macro_mode_led_effect'):
-            return self._dbus_interfaces['macro_mode_led'].getMacroEffect()
+            return self._state.get('macro_mode_led_effect', self._dbus_interfaces['macro_mode_led'].getMacroEffect)
         else:
             return False
 
@@ -104,6 +106,7 @@ class RazerKeyboard(__RazerDevice):
         """
         if self.has('macro_mode_led_effect') and value in (MACRO_LED_STATIC, MACRO_LED_BLINK):
             self._dbus_interfaces['macro_mode_led'].setMacroEffect(value)
+            self._state.set('macro_mode_led_effect', value)
 
 
 DEVICE_PID_MAP = {
@@ -43,7 +43,7 @@ class RazerMouse(__RazerDevice):
         :raises NotImplementedError: If function is not supported
         """
         if self.has('dpi'):
-            dpi_x, dpi_y = self._dbus_interfaces['dpi'].getDPI()
+            dpi_x, dpi_y = self._state.get('dpi', self._dbus_interfaces['dpi'].getDPI)
             # Converting to integers to remove the dbus types
             return int(dpi_x), int(dpi_y)
         else:
@@ -75,6 +75,7 @@ class RazerMouse(__RazerDevice):
                 raise ValueError("DPI Y either too small or too large, Y:{0}".format(dpi_y))
 
             self._dbus_interfaces['dpi'].setDPI(dpi_x, dpi_y)
+            self._state.set('dpi', [dpi_x, dpi_y])
         else:
             raise NotImplementedError()
 
@@ -89,7 +90,7 @@ class RazerMouse(__RazerDevice):
         :raises NotImplementedError: If function is not supported
         """
         if self.has('poll_rate'):
-            return int(self._dbus_interfaces['device'].getPollRate())
+            return int(self._state.get('poll_rate', self._dbus_interfaces['device'].getPollRate))
         else:
             raise NotImplementedError()
 
@@ -111,6 +112,7 @@ class RazerMouse(__RazerDevice):
                 raise ValueError('Poll rate "{0}" is not one of {1}'.format(poll_rate, (_c.POLL_125HZ, _c.POLL_500HZ, _c.POLL_1000HZ)))
 
             self._dbus_interfaces['device'].setPollRate(poll_rate)
+            self._state.set('poll_rate', poll_rate)
 
         else:
             raise NotImplementedError()
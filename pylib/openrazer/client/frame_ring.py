@@ -0,0 +1,93 @@
+"""
+Client side of the shared memory frame transport
+
+The daemon hands out a memfd backed ring buffer and a notification fd for a device, see
+openrazer_daemon.misc.frame_ring for the memory layout. This needs to stay in sync with it.
+
+A ring has a single writer. Asking the daemon for a ring closes the one it handed out before, so a writer whose ring
+was given to someone else gets FrameRingClosed instead of frames silently going nowhere.
+"""
+import mmap as _mmap
+import os as _os
+import struct as _struct
+
+MAGIC = b'RZFR'
+VERSION = 1
+
+HEADER_FORMAT = '<4sIIIQ'
+HEADER_SIZE = 64
+WRITE_SEQ_OFFSET = _struct.calcsize('<4sIII')
+FLAGS_OFFSET = _struct.calcsize(HEADER_FORMAT)
+
+FLAG_CLOSED = 1
+
+SLOT_HEADER_FORMAT = '<QI'
+SLOT_HEADER_SIZE = 16
+
+_NOTIFY = (1).to_bytes(8, byteorder='little')
+
+
+class FrameRingClosed(Exception):
+    """
+    The daemon no longer reads the ring, it was handed to another writer or the device went away
+    """
+
+
+class FrameRingWriter(object):
+    """
+    Writes frames into a ring handed out by the daemon
+    """
+    def __init__(self, memory_fd: int, notify_fd: int):
+        self._memory_fd = memory_fd
+        self._notify_fd = notify_fd
+        _os.set_blocking(notify_fd, False)
+
+        size = _os.fstat(memory_fd).st_size
+        self._mmap = _mmap.mmap(memory_fd, size)
+
+        magic, version, self.slot_count, self.slot_size, self._seq = _struct.unpack_from(HEADER_FORMAT, self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError("Unsupported frame ring")
+
+        self._stride = SLOT_HEADER_SIZE + self.slot_size
+
+    def write(self, payload: bytes):
+        """
+        Write a frame and notify the daemon
+
+        :param payload: Driver payload, as would be sent to setKeyRow
+        :type payload: bytes
+
+        :raises ValueError: If the payload is larger than a slot
+        :raises FrameRingClosed: If the daemon closed the ring
+        """
+        length = len(payload)
+        if length > self.slot_size:
+            raise ValueError("Payload is {0} bytes, slots are {1}".format(length, self.slot_size))
+        if _struct.unpack_from('<I', self._mmap, FLAGS_OFFSET)[0] & FLAG_CLOSED:
+            raise FrameRingClosed()
+
+        seq = self._seq + 1
+        offset = HEADER_SIZE + (seq % self.slot_count) * self._stride
+
+        _struct.pack_into('<Q', self._mmap, offset, 0)
+        self._mmap[offset + SLOT_HEADER_SIZE:offset + SLOT_HEADER_SIZE + length] = payload
+        _struct.pack_into(SLOT_HEADER_FORMAT, self._mmap, offset, seq, length)
+        _struct.pack_into('<Q', self._mmap, WRITE_SEQ_OFFSET, seq)
+        self._seq = seq
+
+        try:
+            _os.write(self._notify_fd, _NOTIFY)
+        except BlockingIOError:
+            pass  # Daemon already has a wakeup pending
+
+    def close(self):
+        """
+        Unmap the ring and close the fds
+        """
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+            _os.close(self._memory_fd)
+            _os.close(self._notify_fd)
@@ -1,5 +1,6 @@
 import numpy as _np
 import dbus as _dbus
+from openrazer.client.frame_ring import FrameRingClosed as _FrameRingClosed, FrameRingWriter as _FrameRingWriter
 #from openrazer.client.constants import WAVE_LEFT, WAVE_RIGHT, REACTIVE_500MS, REACTIVE_1000MS, REACTIVE_1500MS, REACTIVE_2000MS
 from openrazer.client import constants as c
 
@@ -148,6 +149,46 @@ class RazerFX(BaseRazerFX):
             return True
         return False
 
+    def static_transition(self, red:int, green:int, blue:int, duration:int) -> bool:
+        """
+        Fade to a static colour, done by the daemon so it is one call
+
+        :param red: Red component. Must be 0->255
+        :type red: int
+
+        :param green: Green component. Must be 0->255
+        :type green: int
+
+        :param blue: Blue component. Must be 0->255
+        :type blue: int
+
+        :param duration: Fade length in milliseconds
+        :type duration: int
+
+        :return: True if success, False otherwise
+        :rtype: bool
+
+        :raises ValueError: If parameters are invalid
+        """
+        if not isinstance(red, int):
+            raise ValueError("Red is not an integer")
+        if not isinstance(green, int):
+            raise ValueError("Green is not an integer")
+        if not isinstance(blue, int):
+            raise ValueError("Blue is not an integer")
+        if not isinstance(duration, int) or duration < 0:
+            raise ValueError("Duration must be a positive integer")
+
+        if self.has('static_transition'):
+            red = clamp_ubyte(red)
+            green = clamp_ubyte(green)
+            blue = clamp_ubyte(blue)
+
+            self._lighting_dbus.setStaticTransition(red, green, blue, duration)
+
+            return True
+        return False
+
     def reactive(self, red:int, green:int, blue:int, time:int) -> bool:
         """
         Reactive effect
@@ -565,6 +606,7 @@ class RazerAdvancedFX(BaseRazerFX):
         self._lighting_dbus = _dbus.Interface(daemon_dbus, "razer.device.lighting.chroma")
 
         self.matrix = Frame(matrix_dims)
+        self._frame_ring = None
 
     @property
     def cols(self):
@@ -586,7 +628,43 @@ class RazerAdvancedFX(BaseRazerFX):
         """
         return self._matrix_dims[0]
 
+    def enable_shared_memory(self) -> bool:
+        """
+        Send frames through shared memory instead of as DBus arguments
+
+        The daemon passes a ring buffer and notification fd over DBus, afterwards draw() only copies the frame into
+        the ring and pokes the daemon. A ring has one writer, if another client asks for one this goes back to DBus.
+
+        :return: True if the daemon supports the shared memory transport
+        :rtype: bool
+        """
+        if self._frame_ring is None:
+            try:
+                memory_fd, notify_fd, _, _ = self._lighting_dbus.getFrameRing()
+            except _dbus.DBusException:
+                return False
+
+            self._frame_ring = _FrameRingWriter(memory_fd.take(), notify_fd.take())
+
+        return True
+
+    def disable_shared_memory(self):
+        """
+        Go back to sending frames as DBus arguments
+        """
+        if self._frame_ring is not None:
+            self._frame_ring.close()
+            self._frame_ring = None
+
     def _draw(self, ba):
+        if self._frame_ring is not None:
+            try:
+                self._frame_ring.write(ba)
+                return
+            except _FrameRingClosed:
+                # Taking the ring back would close it for whoever has it now
+                self.disable_shared_memory()
+
         self._lighting_dbus.setKeyRow(ba)
 
         self._lighting_dbus.setCustom()
@@ -1039,6 +1117,15 @@ class Frame(object):
         """
         return bytes(self)
 
+    def to_canvas(self) -> bytes:
+        """
+        Get the matrix as row-major RGB bytes without the per row headers, as used by the composite canvas
+
+        :return: Binary payload
+        :rtype: bytes
+        """
+        return self._matrix.transpose(1, 2, 0).tobytes()
+
     # Simple FB
     def to_framebuffer(self):
         self._fb1 = _np.copy(self._matrix)
@@ -1049,3 +1136,229 @@ class Frame(object):
     def draw_with_fb_or(self):
         self._matrix = _np.bitwise_or(self._fb1, self._matrix)
         return bytes(self)
+
+
+class Layer(object):
+    """
+    Single layer of a Compositor
+
+    Colours are stored as float32 in the range 0.0->1.0 with the same (components, rows, cols) layout as Frame
+    """
+    BLEND_MODES = (c.BLEND_OVER, c.BLEND_ADD, c.BLEND_MULTIPLY, c.BLEND_MAX)
+
+    def __init__(self, dimensions:tuple, blend:str=c.BLEND_OVER, alpha:float=1.0, mask=None):
+        self._rows, self._cols = dimensions
+
+        self.matrix = _np.zeros((3, self._rows, self._cols), 'float32')
+        self.visible = True
+
+        self._blend = None
+        self._alpha = 1.0
+        self._mask = None
+
+        self.blend = blend
+        self.alpha = alpha
+        self.mask = mask
+
+    @property
+    def blend(self) -> str:
+        return self._blend
+
+    @blend.setter
+    def blend(self, blend:str):
+        """
+        Set how the layer is combined with the layers below it
+
+        :param blend: One of BLEND_OVER, BLEND_ADD, BLEND_MULTIPLY, BLEND_MAX
+        :type blend: str
+
+        :raises ValueError: If the blend mode is unknown
+        """
+        if blend not in self.BLEND_MODES:
+            raise ValueError("Unknown blend mode {0}".format(blend))
+        self._blend = blend
+
+    @property
+    def alpha(self) -> float:
+        return self._alpha
+
+    @alpha.setter
+    def alpha(self, alpha:float):
+        """
+        Set the layer opacity
+
+        :param alpha: Opacity 0.0->1.0
+        :type alpha: float
+        """
+        self._alpha = float(min(max(alpha, 0.0), 1.0))
+
+    @property
+    def mask(self):
+        return self._mask
+
+    @mask.setter
+    def mask(self, mask):
+        """
+        Set a per key opacity mask, multiplied with alpha
+
+        :param mask: Array of rows x cols with values 0.0->1.0, or None to disable
+        :type mask: numpy.ndarray or None
+
+        :raises ValueError: If the mask is the wrong shape
+        """
+        if mask is not None:
+            mask = _np.clip(_np.asarray(mask, 'float32'), 0.0, 1.0)
+            if mask.shape != (self._rows, self._cols):
+                raise ValueError("Mask must be {0}x{1}".format(self._rows, self._cols))
+        self._mask = mask
+
+    def set(self, y:int, x:int, rgb:tuple):
+        """
+        Set a key's colour
+
+        :param y: Row
+        :type y: int
+
+        :param x: Column
+        :type x: int
+
+        :param rgb: RGB tuple 0->255
+        :type rgb: tuple
+        """
+        self.matrix[:, y, x] = [component / 255.0 for component in rgb]
+
+    def fill(self, rgb:tuple):
+        """
+        Set every key to one colour
+
+        :param rgb: RGB tuple 0->255
+        :type rgb: tuple
+        """
+        for index, component in enumerate(rgb):
+            self.matrix[index].fill(component / 255.0)
+
+    def from_frame(self, frame):
+        """
+        Copy the colours of a Frame into the layer
+
+        :param frame: Frame of the same dimensions
+        :type frame: Frame
+        """
+        _np.multiply(frame._matrix, 1 / 255.0, out=self.matrix)
+
+    def clear(self):
+        """
+        Set every key to black
+        """
+        self.matrix.fill(0.0)
+
+
+class Compositor(object):
+    """
+    Combine a stack of layers into a Frame
+
+    Layers are blended bottom to top, every blend is done on the whole matrix at once.
+    """
+    def __init__(self, dimensions:tuple):
+        self._dimensions = tuple(dimensions)
+        self._layers = []
+
+        # Scratch buffers, reused every frame
+        self._result = _np.zeros((3,) + self._dimensions, 'float32')
+        self._blended = _np.zeros_like(self._result)
+        self._coverage = _np.zeros(self._dimensions, 'float32')
+
+    @property
+    def layers(self) -> list:
+        """
+        Layers from bottom to top
+
+        :return: List of layers
+        :rtype: list of Layer
+        """
+        return list(self._layers)
+
+    def add_layer(self, blend:str=c.BLEND_OVER, alpha:float=1.0, mask=None, index:int=None) -> Layer:
+        """
+        Create a layer
+
+        :param blend: Blend mode
+        :type blend: str
+
+        :param alpha: Opacity 0.0->1.0
+        :type alpha: float
+
+        :param mask: Per key opacity rows x cols
+        :type mask: numpy.ndarray or None
+
+        :param index: Position in the stack, defaults to the top
+        :type index: int or None
+
+        :return: New layer
+        :rtype: Layer
+        """
+        layer = Layer(self._dimensions, blend=blend, alpha=alpha, mask=mask)
+        if index is None:
+            self._layers.append(layer)
+        else:
+            self._layers.insert(index, layer)
+        return layer
+
+    def remove_layer(self, layer:Layer):
+        """
+        Remove a layer from the stack
+
+        :param layer: Layer
+        :type layer: Layer
+        """
+        self._layers.remove(layer)
+
+    def composite(self, frame:'Frame'=None) -> 'Frame':
+        """
+        Blend all visible layers
+
+        :param frame: Frame to write the result into, a new one is created if None
+        :type frame: Frame
+
+        :return: Frame
+        :rtype: Frame
+        """
+        result = self._result
+        blended = self._blended
+        coverage = self._coverage
+
+        result.fill(0.0)
+
+        for layer in self._layers:
+            if not layer.visible or layer.alpha == 0.0:
+                continue
+
+            top = layer.matrix
+
+            if layer.blend == c.BLEND_OVER:
+                _np.copyto(blended, top)
+            elif layer.blend == c.BLEND_ADD:
+                _np.add(result, top, out=blended)
+            elif layer.blend == c.BLEND_MULTIPLY:
+                _np.multiply(result, top, out=blended)
+            else:
+                _np.maximum(result, top, out=blended)
+
+            # result += (blended - result) * alpha * mask
+            _np.subtract(blended, result, out=blended)
+            if layer.mask is None:
+                blended *= layer.alpha
+            else:
+                _np.multiply(layer.mask, layer.alpha, out=coverage)
+                blended *= coverage
+            result += blended
+
+        if frame is None:
+            frame = Frame(self._dimensions)
+
+        _np.clip(result, 0.0, 1.0, out=blended)
+        blended *= 255.0
+        blended += 0.5
+        frame._matrix[:] = blended
+
+        return frame
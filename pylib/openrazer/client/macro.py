@@ -67,6 +67,42 @@ class RazerMacro(object):
         else:
             self._macro_dbus.deleteMacro(bind_key)
 
+    def get_macro_policy(self, bind_key:str) -> str:
+        """
+        Get what happens when a macro key is pressed while its macro is still playing
+
+        :param bind_key: Bind Key
+        :type bind_key: str
+
+        :return: queue, restart or ignore
+        :rtype: str
+        """
+        return str(self._macro_dbus.getMacroPolicy(bind_key))
+
+    def set_macro_policy(self, bind_key:str, policy:str):
+        """
+        Set what happens when a macro key is pressed while its macro is still playing
+
+        :param bind_key: Bind Key
+        :type bind_key: str
+
+        :param policy: One of openrazer_daemon.misc.macro.POLICIES
+        :type policy: str
+        """
+        if policy not in _daemon_macro.POLICIES:
+            raise ValueError("Policy {0} is not one of {1}".format(policy, ', '.join(_daemon_macro.POLICIES)))
+        self._macro_dbus.setMacroPolicy(bind_key, policy)
+
+    @property
+    def queue_depth(self) -> int:
+        """
+        Number of macros waiting to play
+
+        :return: Queued macros
+        :rtype: int
+        """
+        return int(self._macro_dbus.getMacroQueueDepth())
+
     @property
     def mode_modifier(self):
         if 'macro_tartarus_mode_modifier' in self._capabilities:
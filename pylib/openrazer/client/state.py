@@ -0,0 +1,84 @@
+"""
+Local copy of a device's state
+
+The daemon sends razer.device.state.PropertiesChanged whenever brightness, DPI, LED modes and so on change, so
+property reads can be answered from here without a DBus call. Signals are only delivered while a DBus main loop is
+running, without one the state is read from the daemon every time like before.
+"""
+import threading as _threading
+
+import dbus as _dbus
+
+STATE_INTERFACE = 'razer.device.state'
+
+
+class RazerDeviceState(object):
+    def __init__(self, daemon_dbus, enabled=True):
+        """
+        :param daemon_dbus: Device's DBus object
+        :type daemon_dbus: dbus.proxies.ProxyObject
+
+        :param enabled: False if the daemon doesnt have the state interface
+        :type enabled: bool
+        """
+        self._lock = _threading.Lock()
+        self._values = {}
+
+        self.mirrored = enabled and _dbus.get_default_main_loop() is not None
+        self._receiver = None
+
+        if self.mirrored:
+            state_dbus = _dbus.Interface(daemon_dbus, STATE_INTERFACE)
+
+            # Connect before getting the state so no change is missed in between
+            self._receiver = daemon_dbus.connect_to_signal('PropertiesChanged', self._properties_changed, dbus_interface=STATE_INTERFACE)
+            self._properties_changed(state_dbus.getState())
+
+    def _properties_changed(self, changed):
+        with self._lock:
+            self._values.update(changed)
+
+    def get(self, name:str, read):
+        """
+        Get a property
+
+        :param name: Property name
+        :type name: str
+
+        :param read: Called to read the property from the daemon if it is not known
+        :type read: callable
+
+        :return: Value
+        :rtype: object
+        """
+        if self.mirrored:
+            with self._lock:
+                if name in self._values:
+                    return self._values[name]
+
+        value = read()
+        self.set(name, value)
+        return value
+
+    def set(self, name:str, value):
+        """
+        Store a property value, for after it has been set through the daemon
+
+        :param name: Property name
+        :type name: str
+
+        :param value: Value
+        :type value: object
+        """
+        if self.mirrored:
+            with self._lock:
+                self._values[name] = value
+
+    def close(self):
+        """
+        Stop listening for changes
+        """
+        if self._receiver is not None:
+            self._receiver.remove()
+            self._receiver = None
+        self.mirrored = False
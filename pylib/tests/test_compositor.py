@@ -0,0 +1,125 @@
+import unittest
+
+try:
+    import numpy as np
+    from openrazer.client import constants as c
+    from openrazer.client.fx import Compositor, Frame, Layer
+except ImportError:
+    np = None
+
+# Bottom and top colours, chosen so every blend gives a different result
+BOTTOM = (102, 51, 204)
+TOP = (51, 153, 102)
+
+
+@unittest.skipIf(np is None, "numpy or dbus-python is not installed")
+class CompositorTest(unittest.TestCase):
+    def setUp(self):
+        self.compositor = Compositor((1, 3))
+        self.bottom = self.compositor.add_layer()
+        self.bottom.fill(BOTTOM)
+
+    def assertColour(self, frame, col, expected):
+        """
+        Colours go through float32 so each component may be 1 out
+        """
+        for actual, wanted in zip(frame.get(0, col), expected):
+            self.assertAlmostEqual(int(actual), wanted, delta=1, msg="{0} != {1}".format(frame.get(0, col), expected))
+
+    def composite_top(self, blend, alpha=1.0, mask=None):
+        top = self.compositor.add_layer(blend=blend, alpha=alpha, mask=mask)
+        top.fill(TOP)
+        return self.compositor.composite()
+
+    def test_blend_over(self):
+        self.assertColour(self.composite_top(c.BLEND_OVER), 0, TOP)
+
+    def test_blend_add(self):
+        # Blue is clipped
+        self.assertColour(self.composite_top(c.BLEND_ADD), 0, (153, 204, 255))
+
+    def test_blend_multiply(self):
+        self.assertColour(self.composite_top(c.BLEND_MULTIPLY), 0, (20, 31, 82))
+
+    def test_blend_max(self):
+        self.assertColour(self.composite_top(c.BLEND_MAX), 0, (102, 153, 204))
+
+    def test_alpha(self):
+        # Quarter of the way from bottom to top
+        self.assertColour(self.composite_top(c.BLEND_OVER, alpha=0.25), 0, (89, 76, 178))
+        # And a quarter of the way to the added colour, which is only clipped once every layer is blended
+        self.compositor.layers[-1].blend = c.BLEND_ADD
+        self.assertColour(self.compositor.composite(), 0, (115, 89, 230))
+
+    def test_mask(self):
+        frame = self.composite_top(c.BLEND_OVER, mask=[[1.0, 0.0, 0.5]])
+
+        self.assertColour(frame, 0, TOP)
+        self.assertColour(frame, 1, BOTTOM)
+        self.assertColour(frame, 2, (76, 102, 153))
+
+    def test_mask_with_alpha(self):
+        frame = self.composite_top(c.BLEND_OVER, alpha=0.5, mask=[[1.0, 0.0, 0.5]])
+
+        self.assertColour(frame, 0, (76, 102, 153))
+        self.assertColour(frame, 1, BOTTOM)
+        self.assertColour(frame, 2, (89, 76, 178))
+
+    def test_mask_checks(self):
+        layer = Layer((1, 3), mask=[[2.0, -1.0, 0.5]])
+        self.assertEqual(layer.mask.tolist(), [[1.0, 0.0, 0.5]])
+
+        with self.assertRaises(ValueError):
+            layer.mask = [[1.0, 1.0]]
+
+        layer.mask = None
+        self.assertIsNone(layer.mask)
+
+    def test_layer_checks(self):
+        layer = Layer((1, 3), alpha=2.0)
+        self.assertEqual(layer.alpha, 1.0)
+        layer.alpha = -1
+        self.assertEqual(layer.alpha, 0.0)
+
+        with self.assertRaises(ValueError):
+            layer.blend = 'screen'
+
+    def test_hidden_layers_skipped(self):
+        top = self.compositor.add_layer()
+        top.fill(TOP)
+
+        top.visible = False
+        self.assertColour(self.compositor.composite(), 0, BOTTOM)
+
+        top.visible = True
+        top.alpha = 0.0
+        self.assertColour(self.compositor.composite(), 0, BOTTOM)
+
+    def test_layer_order(self):
+        top = self.compositor.add_layer()
+        top.fill(TOP)
+        # Inserted under everything, so covered by the bottom layer
+        under = self.compositor.add_layer(index=0)
+        under.fill((255, 255, 255))
+
+        self.assertEqual(self.compositor.layers, [under, self.bottom, top])
+        self.assertColour(self.compositor.composite(), 0, TOP)
+
+        self.compositor.remove_layer(top)
+        self.assertColour(self.compositor.composite(), 0, BOTTOM)
+
+    def test_into_frame(self):
+        frame = Frame((1, 3))
+        frame.set(0, 1, (1, 1, 1))
+
+        self.assertIs(self.compositor.composite(frame), frame)
+        self.assertColour(frame, 1, BOTTOM)
+
+        # Colours from a frame keep their values
+        layer = self.compositor.add_layer()
+        layer.from_frame(frame)
+        self.assertColour(self.compositor.composite(), 2, BOTTOM)
+
+
+if __name__ == '__main__':
+    unittest.main()
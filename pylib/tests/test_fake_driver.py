@@ -0,0 +1,147 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from openrazer._fake_driver import FakeDevice, LatencyProfile
+
+SPEC = 'razerblackwidowchroma'
+DELAY = 0.2
+# Sleeps may end a little early or late
+TOLERANCE = 0.02
+
+
+def timed_write(path, data):
+    start = time.monotonic()
+    with open(path, 'wb') as endpoint_file:
+        endpoint_file.write(data)
+    return time.monotonic() - start
+
+
+def wait_for_log(fake_device, count, timeout=2):
+    """
+    Writes are recorded once the writer has closed the file, shortly after the write returns
+    """
+    deadline = time.monotonic() + timeout
+    while len(fake_device.write_log) < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return fake_device.write_log
+
+
+class FakeDriverLatencyTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.devices = []
+
+    def tearDown(self):
+        for fake_device in self.devices:
+            fake_device.close()
+        self.tmp_dir.cleanup()
+
+    def device(self, **kwargs):
+        fake_device = FakeDevice(SPEC, tmp_dir=self.tmp_dir.name, latency=LatencyProfile(**kwargs))
+        self.devices.append(fake_device)
+        return fake_device
+
+    def test_first_write_delayed(self):
+        fake_device = self.device(delay=DELAY)
+        path = fake_device._get_endpoint_path('matrix_effect_static')
+
+        # The writer itself waits out the transfer, not the one after it
+        self.assertGreaterEqual(timed_write(path, b'\x01\x02\x03'), DELAY - TOLERANCE)
+        self.assertGreaterEqual(timed_write(path, b'\x04\x05\x06'), DELAY - TOLERANCE)
+
+        self.assertEqual([record.data for record in wait_for_log(fake_device, 2)], [b'\x01\x02\x03', b'\x04\x05\x06'])
+
+    def test_read_write_attribute(self):
+        fake_device = self.device(delay=DELAY)
+
+        start = time.monotonic()
+        fake_device.set('matrix_brightness', '128')
+        self.assertGreaterEqual(time.monotonic() - start, DELAY - TOLERANCE)
+
+        # Reads are not held up and give back the last write
+        start = time.monotonic()
+        self.assertEqual(fake_device.get('matrix_brightness'), '128')
+        self.assertLess(time.monotonic() - start, DELAY / 2)
+
+        self.assertEqual([(record.endpoint, record.data) for record in fake_device.write_log], [('matrix_brightness', b'128')])
+
+    def test_read_during_write(self):
+        fake_device = self.device(delay=DELAY)
+        writer = threading.Thread(target=fake_device.set, args=('matrix_brightness', '200'))
+        writer.start()
+        time.sleep(DELAY / 4)
+
+        self.assertEqual(fake_device.get('matrix_brightness'), '0')
+        writer.join()
+        self.assertEqual(fake_device.get('matrix_brightness'), '200')
+
+    def test_max_report_rate(self):
+        fake_device = self.device(max_report_rate=10)
+
+        start = time.monotonic()
+        for value in range(3):
+            fake_device.set('matrix_brightness' if value % 2 else 'matrix_effect_static', str(value))
+
+        # Every attribute shares the rate cap, the first write goes straight through
+        self.assertGreaterEqual(time.monotonic() - start, 0.2 - TOLERANCE)
+        times = [record.monotonic for record in fake_device.write_log]
+        self.assertEqual(len(times), 3)
+        self.assertTrue(all(later - earlier >= 0.1 - TOLERANCE for earlier, later in zip(times, times[1:])))
+
+    def test_attribute_delay(self):
+        fake_device = self.device(delay=DELAY, attributes={'matrix_custom_frame': (0.0, 0.0)})
+
+        start = time.monotonic()
+        fake_device.set('matrix_custom_frame', b'\x00\x00\x00\x01\x02\x03', binary=True)
+        self.assertLess(time.monotonic() - start, DELAY / 2)
+
+    def test_write_log(self):
+        log_path = os.path.join(self.tmp_dir.name, 'writes.log')
+        fake_device = self.device(log_file=log_path)
+
+        fake_device.set('matrix_effect_none', '1')
+        fake_device.set('matrix_brightness', '50')
+        time.sleep(0.05)
+        fake_device.set('matrix_brightness', '60')
+
+        records = fake_device.write_log
+        self.assertEqual([(record.endpoint, record.data) for record in records],
+                         [('matrix_effect_none', b'1'), ('matrix_brightness', b'50'), ('matrix_brightness', b'60')])
+        # Idle time is counted per attribute
+        self.assertGreaterEqual(records[2].idle, 0.05 - TOLERANCE)
+
+        with open(log_path) as log_file:
+            lines = [json.loads(line) for line in log_file]
+        self.assertEqual([(line['endpoint'], bytes.fromhex(line['data'])) for line in lines],
+                         [(record.endpoint, record.data) for record in records])
+        self.assertEqual([line['monotonic'] for line in lines], [record.monotonic for record in records])
+
+    def test_read_only_untouched(self):
+        fake_device = self.device(delay=DELAY)
+
+        self.assertNotIn('device_serial', fake_device._lease_servers)
+        self.assertIn('matrix_brightness', fake_device._lease_servers)
+
+        start = time.monotonic()
+        fake_device.set('device_serial', 'XX0000000001')
+        self.assertLess(time.monotonic() - start, DELAY / 2)
+        self.assertEqual(fake_device.write_log, [])
+
+    def test_close(self):
+        fake_device = self.device(delay=DELAY)
+        fake_device.set('matrix_brightness', '1')
+        threads = list(fake_device._lease_servers.values())
+
+        fake_device.close()
+        self.devices.remove(fake_device)
+
+        self.assertFalse(any(thread.is_alive() for thread in threads))
+        self.assertFalse(os.path.exists(fake_device._tmp_dir))
+
+
+if __name__ == '__main__':
+    unittest.main()
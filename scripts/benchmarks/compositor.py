@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark the layered frame compositor
+
+Composites a base layer, a reactive highlight layer and a masked notification layer and compares it against doing
+the same blend key by key in Python. Does not need the daemon or any devices.
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+
+PYLIB = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'pylib')
+sys.path.insert(1, PYLIB)
+
+import numpy as np
+
+from openrazer.client import constants as c
+from openrazer.client.fx import Compositor, Frame
+
+
+def build_compositor(rows, cols):
+    compositor = Compositor((rows, cols))
+
+    base = compositor.add_layer()
+    base.fill((0, 64, 255))
+
+    highlights = compositor.add_layer(blend=c.BLEND_ADD, alpha=0.8)
+    for _ in range(max(1, rows * cols // 10)):
+        highlights.set(random.randrange(rows), random.randrange(cols), (255, 255, 255))
+
+    mask = np.zeros((rows, cols), 'float32')
+    mask[0, :] = 1.0
+    notification = compositor.add_layer(blend=c.BLEND_OVER, alpha=0.5, mask=mask)
+    notification.fill((255, 0, 0))
+
+    return compositor
+
+
+def per_key_composite(compositor, frame):
+    """
+    Same blend as the compositor but done one key at a time
+    """
+    rows, cols = compositor._dimensions
+    for row in range(rows):
+        for col in range(cols):
+            result = [0.0, 0.0, 0.0]
+            for layer in compositor.layers:
+                alpha = layer.alpha if layer.mask is None else layer.alpha * float(layer.mask[row, col])
+                for index in range(3):
+                    top = float(layer.matrix[index, row, col])
+                    if layer.blend == c.BLEND_ADD:
+                        top = result[index] + top
+                    elif layer.blend == c.BLEND_MULTIPLY:
+                        top = result[index] * top
+                    elif layer.blend == c.BLEND_MAX:
+                        top = max(result[index], top)
+                    result[index] += (top - result[index]) * alpha
+            frame.set(row, col, tuple(int(min(max(value, 0.0), 1.0) * 255 + 0.5) for value in result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=200, help='Frames per measurement')
+    parser.add_argument('--sizes', nargs='+', default=['6x22', '6x25', '12x44', '24x88', '64x256'], help='Matrix sizes as ROWSxCOLS')
+    parser.add_argument('--skip-per-key', action='store_true', help='Only time the compositor')
+    args = parser.parse_args()
+
+    print("{0:>8} {1:>16} {2:>16} {3:>10}".format('size', 'compositor us', 'per-key us', 'speedup'))
+
+    for size in args.sizes:
+        rows, cols = (int(dim) for dim in size.split('x'))
+        compositor = build_compositor(rows, cols)
+        frame = Frame((rows, cols))
+
+        vectorised = timeit.timeit(lambda: compositor.composite(frame), number=args.iterations) / args.iterations * 1e6
+
+        if args.skip_per_key:
+            print("{0:>8} {1:>16.1f}".format(size, vectorised))
+            continue
+
+        iterations = max(1, args.iterations // 20)
+        per_key = timeit.timeit(lambda: per_key_composite(compositor, frame), number=iterations) / iterations * 1e6
+        print("{0:>8} {1:>16.1f} {2:>16.1f} {3:>9.0f}x".format(size, vectorised, per_key, per_key / vectorised))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Daemon benchmark suite
+
+Starts the daemon on a private session bus against N fake devices and measures:
+  * startup time until every device is on the bus
+  * memory per device (compared against a daemon with no devices)
+  * DBus round trip latency of every argument-less getter, per endpoint
+  * custom frame throughput (setKeyRow + setCustom)
+  * CPU cost of rendering the ripple effect
+  * key event latency from writing to the fake event FIFO to the key showing up in a ripple frame
+
+Results are written as JSON, use --compare to diff two result files. With --delay-ms the writable attributes of
+the fake devices emulate the time the firmware takes to handle a write.
+
+Examples:
+  ./daemon_suite.py --devices 50 --output before.json
+  ./daemon_suite.py --devices 10 --delay-ms 1 --jitter-ms 0.5 --max-report-rate 500
+  ./daemon_suite.py --compare before.json after.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+from harness import DaemonHarness, ROOT, fake_driver
+
+import dbus
+
+# Getters which change daemon state or are expensive and should not be timed
+SKIP_METHODS = {'getFrameRing', 'getMemoryReport'}
+
+FRAME_DURATION = 2.0
+RIPPLE_DURATION = 5.0
+RIPPLE_REFRESH_RATE = 0.05
+KEY_PRESSES = 20
+
+# evdev key codes used for the key latency test, QWERTY top and home row
+KEY_CODES = [16, 25, 30, 38, 17, 24, 31, 37, 18, 23, 32, 36, 19, 22, 33, 35, 20, 21, 34, 44]
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def summarise(values):
+    """
+    Summarise a list of seconds as milliseconds
+    """
+    if not values:
+        return None
+    return {
+        'count': len(values),
+        'mean_ms': statistics.mean(values) * 1000,
+        'p50_ms': percentile(values, 0.5) * 1000,
+        'p95_ms': percentile(values, 0.95) * 1000,
+        'max_ms': max(values) * 1000,
+    }
+
+
+def pick_specs(count):
+    """
+    Cycle through every fake device spec until there are count devices
+    """
+    specs = sorted(fake_driver.SPECS)
+    return [specs[index % len(specs)] for index in range(count)]
+
+
+def bench_memory(harness, baseline_rss_kb):
+    rss_kb = harness.daemon_rss_kb()
+    result = {'rss_kb': rss_kb}
+    if baseline_rss_kb is not None and harness.fake_devices:
+        result['baseline_rss_kb'] = baseline_rss_kb
+        result['per_device_kb'] = (rss_kb - baseline_rss_kb) / len(harness.fake_devices)
+
+    # Mean per device of the daemon's own estimate, daemons older than getMemoryReport leave it out
+    components = {}
+    for serial in harness.fake_devices:
+        try:
+            report = json.loads(str(harness.device_object(serial).getMemoryReport(dbus_interface='razer.device.misc')))
+        except dbus.DBusException:
+            break
+        for name, size in report['components'].items():
+            components[name] = components.get(name, 0) + size
+    if components:
+        result['device_components_kb'] = {name: size / 1024 / len(harness.fake_devices) for name, size in sorted(components.items())}
+    return result
+
+
+def bench_endpoints(harness, iterations):
+    latencies = {}
+    errors = {}
+
+    for serial in harness.fake_devices:
+        device = harness.device_object(serial)
+        for interface, methods in harness.device_methods(serial).items():
+            if interface.startswith('org.freedesktop'):
+                continue
+
+            for method, in_sig in methods.items():
+                if in_sig or method in SKIP_METHODS or not method.startswith(('get', 'has', 'is')):
+                    continue
+
+                name = '{0}.{1}'.format(interface, method)
+                call = device.get_dbus_method(method, interface)
+                for _ in range(iterations):
+                    start = time.perf_counter()
+                    try:
+                        call()
+                    except dbus.DBusException:
+                        errors[name] = errors.get(name, 0) + 1
+                        break
+                    latencies.setdefault(name, []).append(time.perf_counter() - start)
+
+    return {
+        'latency': {name: summarise(values) for name, values in sorted(latencies.items())},
+        'errors': errors,
+    }
+
+
+def matrix_devices(harness):
+    result = []
+    for serial in harness.fake_devices:
+        methods = harness.device_methods(serial).get('razer.device.lighting.chroma', {})
+        if 'setKeyRow' in methods and 'setCustom' in methods:
+            rows, cols = harness.device_object(serial).getMatrixDimensions(dbus_interface='razer.device.misc')
+            result.append((serial, int(rows), int(cols)))
+    return result
+
+
+def bench_frames(harness, duration):
+    results = {}
+
+    for serial, rows, cols in matrix_devices(harness):
+        device = harness.device_object(serial)
+        set_key_row = device.get_dbus_method('setKeyRow', 'razer.device.lighting.chroma')
+        set_custom = device.get_dbus_method('setCustom', 'razer.device.lighting.chroma')
+        payload = dbus.ByteArray(b''.join(bytes([row, 0, cols - 1]) + b'\x40' * (cols * 3) for row in range(rows)))
+
+        frames = 0
+        start = time.monotonic()
+        while time.monotonic() - start < duration:
+            set_key_row(payload)
+            set_custom()
+            frames += 1
+        results[serial] = frames / (time.monotonic() - start)
+
+    if not results:
+        return None
+    return {'devices': len(results), 'mean_fps': statistics.mean(results.values()), 'min_fps': min(results.values())}
+
+
+def ripple_devices(harness):
+    return [serial for serial in harness.fake_devices if 'setRipple' in harness.device_methods(serial).get('razer.device.lighting.custom', {})]
+
+
+def bench_ripple(harness, duration):
+    serials = ripple_devices(harness)
+    if not serials:
+        return None
+
+    def cpu_percent():
+        cpu_start = harness.daemon_cpu_time()
+        time.sleep(duration)
+        return (harness.daemon_cpu_time() - cpu_start) / duration * 100
+
+    idle = cpu_percent()
+    for serial in serials:
+        harness.device_object(serial).setRipple(0, 255, 0, RIPPLE_REFRESH_RATE, dbus_interface='razer.device.lighting.custom')
+    active = cpu_percent()
+
+    return {
+        'devices': len(serials),
+        'refresh_rate': RIPPLE_REFRESH_RATE,
+        'idle_cpu_percent': idle,
+        'ripple_cpu_percent': active,
+        'cpu_percent_per_device': (active - idle) / len(serials),
+    }
+
+
+def key_lit(fake_device, offset):
+    frame = fake_device.get('matrix_custom_frame', binary=True)
+    return len(frame) >= offset + 3 and any(frame[offset:offset + 3])
+
+
+def wait_for(predicate, timeout):
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        if predicate():
+            return time.perf_counter() - start
+        time.sleep(0.0005)
+    return None
+
+
+def bench_key_latency(harness, presses):
+    """
+    Time from writing a key press to the event FIFO until the key is lit in a ripple frame
+    """
+    from openrazer_daemon.keyboard import EVENT_MAPPING, KEY_MAPPING
+
+    matrix = {serial: (rows, cols) for serial, rows, cols in matrix_devices(harness)}
+    serials = [serial for serial in ripple_devices(harness) if harness.fake_devices[serial].events and serial in matrix]
+    if not serials:
+        return None
+
+    serial = serials[0]
+    fake_device = harness.fake_devices[serial]
+    rows, cols = matrix[serial]
+    harness.device_object(serial).setRipple(0, 255, 0, RIPPLE_REFRESH_RATE, dbus_interface='razer.device.lighting.custom')
+
+    latencies = []
+    missed = 0
+    for index in range(presses):
+        key_code = KEY_CODES[index % len(KEY_CODES)]
+        row, col = KEY_MAPPING[EVENT_MAPPING[key_code]]
+        offset = row * (3 + cols * 3) + 3 + col * 3
+
+        # Another ripple may be passing over the key, wait for it to clear
+        wait_for(lambda: not key_lit(fake_device, offset), 3.0)
+
+        fake_device.emit_kb_event('0', key_code, 'down')
+        latency = wait_for(lambda: key_lit(fake_device, offset), 1.0)
+        fake_device.emit_kb_event('0', key_code, 'up')
+
+        if latency is None:
+            missed += 1
+        else:
+            latencies.append(latency)
+
+    return {'device': fake_device.spec_name, 'missed': missed, 'latency': summarise(latencies)}
+
+
+def git_version():
+    try:
+        return subprocess.check_output(['git', '-C', ROOT, 'describe', '--always', '--dirty'], universal_newlines=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def latency_profile(args):
+    if args.delay_ms is None and args.max_report_rate is None:
+        return None
+
+    return fake_driver.LatencyProfile(delay=(args.delay_ms or 0.0) / 1000, jitter=args.jitter_ms / 1000,
+                                      max_report_rate=args.max_report_rate, log_file=args.write_log)
+
+
+def run_suite(args):
+    specs = pick_specs(args.devices)
+    latency = latency_profile(args)
+
+    baseline_rss_kb = None
+    if not args.skip_baseline:
+        with DaemonHarness([]) as harness:
+            harness.start()
+            baseline_rss_kb = harness.daemon_rss_kb()
+
+    results = {
+        'version': git_version(),
+        'timestamp': datetime.datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'devices': len(specs),
+    }
+    if latency is not None:
+        results['latency_profile'] = {'delay_ms': latency.delay * 1000, 'jitter_ms': latency.jitter * 1000, 'max_report_rate': latency.max_report_rate}
+
+    with DaemonHarness(specs, keep_files=args.keep_files, latency=latency) as harness:
+        results['startup_s'] = harness.start()
+        print("Started daemon with {0} devices in {1:.2f}s".format(len(specs), results['startup_s']), file=sys.stderr)
+
+        results['memory'] = bench_memory(harness, baseline_rss_kb)
+        results['endpoints'] = bench_endpoints(harness, args.iterations)
+        results['frames'] = bench_frames(harness, args.frame_duration)
+        results['ripple'] = bench_ripple(harness, args.ripple_duration)
+        results['key_latency'] = bench_key_latency(harness, args.key_presses)
+
+        if latency is not None:
+            results['writes'] = sum(len(fake_device.write_log) for fake_device in harness.fake_devices.values())
+
+    return results
+
+
+def flatten(data, prefix=''):
+    """
+    Flatten nested dicts to {'a.b.c': number}
+    """
+    result = {}
+    if isinstance(data, dict):
+        for key, value in data.items():
+            result.update(flatten(value, '{0}{1}.'.format(prefix, key)))
+    elif isinstance(data, (int, float)) and not isinstance(data, bool):
+        result[prefix[:-1]] = data
+    return result
+
+
+def compare(old_path, new_path, threshold):
+    with open(old_path) as old_file, open(new_path) as new_file:
+        old = flatten(json.load(old_file))
+        new = flatten(json.load(new_file))
+
+    print("{0:<80} {1:>14} {2:>14} {3:>9}".format('metric', 'old', 'new', 'change'))
+    for key in sorted(set(old) & set(new)):
+        change = (new[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+        if abs(change) >= threshold:
+            print("{0:<80} {1:>14.3f} {2:>14.3f} {3:>8.1f}%".format(key, old[key], new[key], change))
+
+    for key in sorted(set(old) ^ set(new)):
+        print("{0:<80} only in {1}".format(key, 'old' if key in old else 'new'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--devices', type=int, default=len(fake_driver.SPECS), help='Number of fake devices')
+    parser.add_argument('--iterations', type=int, default=20, help='Calls per endpoint per device')
+    parser.add_argument('--frame-duration', type=float, default=FRAME_DURATION, help='Seconds of frames per device')
+    parser.add_argument('--ripple-duration', type=float, default=RIPPLE_DURATION, help='Seconds to measure ripple CPU')
+    parser.add_argument('--key-presses', type=int, default=KEY_PRESSES, help='Key presses for the latency test')
+    parser.add_argument('--delay-ms', type=float, help='Emulated firmware time per write to a writable attribute')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='Random +/- variation of the write time')
+    parser.add_argument('--max-report-rate', type=float, help='Most writes per second a device accepts')
+    parser.add_argument('--write-log', help='Append every emulated write to this JSON lines file')
+    parser.add_argument('--skip-baseline', action='store_true', help='Dont start an empty daemon to measure memory per device')
+    parser.add_argument('--keep-files', action='store_true', help='Keep the fake devices and daemon logs')
+    parser.add_argument('--output', help='Write JSON results here instead of stdout')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='Compare two result files')
+    parser.add_argument('--threshold', type=float, default=5.0, help='Only show changes of at least this many percent when comparing')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(args.compare[0], args.compare[1], args.threshold)
+        return
+
+    results = run_suite(args)
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(results, output_file, indent=2, sort_keys=True)
+    else:
+        json.dump(results, sys.stdout, indent=2, sort_keys=True)
+        print()
+
+
+if __name__ == '__main__':
+    main()
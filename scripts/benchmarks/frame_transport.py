@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Compare the DBus and shared memory frame transports
+
+Draws frames on a device at a fixed rate with each transport and reports the achieved frame rate and the CPU time
+used by this process and the daemon. Works against real devices or the fake driver.
+"""
+import argparse
+import os
+import sys
+import time
+
+PYLIB = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'pylib')
+sys.path.insert(1, PYLIB)
+
+from openrazer.client import DeviceManager
+
+
+def find_daemon_pid():
+    """
+    Find the daemon's pid by its process title
+    """
+    for pid in os.listdir('/proc'):
+        if not pid.isdigit():
+            continue
+        try:
+            with open('/proc/{0}/cmdline'.format(pid), 'rb') as cmdline_file:
+                if cmdline_file.read().split(b'\x00')[0] == b'openrazer-daemon':
+                    return int(pid)
+        except OSError:
+            pass
+    return None
+
+
+def process_cpu_time(pid):
+    """
+    User + system CPU time of a process in seconds
+    """
+    if pid is None:
+        return 0.0
+    with open('/proc/{0}/stat'.format(pid), 'r') as stat_file:
+        fields = stat_file.read().rsplit(')', 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+
+
+def run(device, fps, duration, daemon_pid):
+    """
+    Draw frames at the given rate, returns (achieved fps, client cpu %, daemon cpu %)
+    """
+    interval = 1.0 / fps
+    frame_count = 0
+
+    client_start = sum(os.times()[:2])
+    daemon_start = process_cpu_time(daemon_pid)
+    start = time.monotonic()
+    next_frame = start
+
+    while time.monotonic() - start < duration:
+        colour = frame_count % 256
+        device.fx.advanced.matrix.set(0, frame_count % device.fx.advanced.cols, (colour, 255 - colour, 0))
+        device.fx.advanced.draw()
+        frame_count += 1
+
+        next_frame += interval
+        delay = next_frame - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    elapsed = time.monotonic() - start
+    client_cpu = (sum(os.times()[:2]) - client_start) / elapsed * 100
+    daemon_cpu = (process_cpu_time(daemon_pid) - daemon_start) / elapsed * 100
+
+    return frame_count / elapsed, client_cpu, daemon_cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--serial', help='Device serial, defaults to the first device with a matrix')
+    parser.add_argument('--duration', type=float, default=5.0, help='Seconds per run')
+    parser.add_argument('--fps', type=int, nargs='+', default=[30, 60, 120], help='Target frame rates')
+    args = parser.parse_args()
+
+    devices = [device for device in DeviceManager().devices if device.fx.advanced is not None]
+    if args.serial is not None:
+        devices = [device for device in devices if device.serial == args.serial]
+    if not devices:
+        print("No device with a LED matrix found", file=sys.stderr)
+        sys.exit(1)
+    device = devices[0]
+
+    daemon_pid = find_daemon_pid()
+    if daemon_pid is None:
+        print("Could not find daemon process, daemon CPU will read 0", file=sys.stderr)
+
+    print("Device: {0} ({1})".format(device.name, device.serial))
+    print("{0:>10} {1:>6} {2:>10} {3:>12} {4:>12}".format('transport', 'target', 'fps', 'client cpu%', 'daemon cpu%'))
+
+    for fps in args.fps:
+        for transport in ('dbus', 'shm'):
+            if transport == 'shm':
+                if not device.fx.advanced.enable_shared_memory():
+                    print("{0:>10} {1:>6} {2:>10}".format(transport, fps, 'unsupported'))
+                    continue
+            else:
+                device.fx.advanced.disable_shared_memory()
+
+            achieved, client_cpu, daemon_cpu = run(device, fps, args.duration, daemon_pid)
+            print("{0:>10} {1:>6} {2:>10.1f} {3:>12.1f} {4:>12.1f}".format(transport, fps, achieved, client_cpu, daemon_cpu))
+
+    device.fx.advanced.disable_shared_memory()
+
+
+if __name__ == '__main__':
+    main()
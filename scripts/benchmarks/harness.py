@@ -0,0 +1,209 @@
+"""
+Run the daemon against fake devices on a private session bus
+
+Used by the benchmark scripts, nothing here touches the user's session bus or real hardware. Like the daemon itself
+this needs to be run by a member of the plugdev group.
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ElementTree
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+PYLIB = os.path.join(ROOT, 'pylib')
+DAEMON = os.path.join(ROOT, 'daemon')
+sys.path.insert(1, PYLIB)
+sys.path.insert(1, DAEMON)
+
+import dbus
+
+import openrazer._fake_driver as fake_driver
+
+CONFIG = """[General]
+verbose_logging = False
+
+[Startup]
+sync_effects_enabled = {sync_effects}
+devices_off_on_screensaver = False
+mouse_battery_notifier = {battery_notifier}
+
+[Statistics]
+key_statistics = False
+endpoint_metrics = {endpoint_metrics}
+"""
+
+
+class DaemonHarness(object):
+    """
+    Private dbus-daemon, a directory of fake devices and an openrazer-daemon started against them
+    """
+    def __init__(self, specs, endpoint_metrics=False, sync_effects=False, keep_files=False, latency=None, battery_notifier=False):
+        self.specs = list(specs)
+        self.latency = latency
+        self._endpoint_metrics = endpoint_metrics
+        self._sync_effects = sync_effects
+        self._battery_notifier = battery_notifier
+        self._keep_files = keep_files
+
+        self.work_dir = tempfile.mkdtemp(prefix='openrazer-bench-')
+        self.test_dir = os.path.join(self.work_dir, 'devices')
+        self.log_dir = os.path.join(self.work_dir, 'logs')
+        self.run_dir = os.path.join(self.work_dir, 'run')
+        self.data_dir = os.path.join(self.work_dir, 'data')
+        for path in (self.test_dir, self.log_dir, self.run_dir, self.data_dir):
+            os.makedirs(path)
+
+        self.fake_devices = {}
+        self.bus = None
+        self.bus_address = None
+        self._bus_process = None
+        self.daemon_process = None
+
+    def create_devices(self):
+        """
+        Create one fake device per spec, each with its own sysfs name and serial
+        """
+        for index, spec in enumerate(self.specs):
+            serial = 'BENCH{0:07d}'.format(index)
+            self.fake_devices[serial] = fake_driver.FakeDevice(spec, serial=serial, tmp_dir=self.test_dir, instance=index + 1,
+                                                                 latency=self.latency)
+
+    def start_bus(self):
+        """
+        Start a private session bus
+        """
+        self._bus_process = subprocess.Popen(['dbus-daemon', '--session', '--nofork', '--print-address=1'],
+                                             stdout=subprocess.PIPE, universal_newlines=True)
+        self.bus_address = self._bus_process.stdout.readline().strip()
+        self.bus = dbus.bus.BusConnection(self.bus_address)
+
+    def start_daemon(self, timeout=60):
+        """
+        Start the daemon and wait until it reports every fake device
+
+        :return: Seconds from starting the process to all devices being available
+        :rtype: float
+        """
+        config_file = os.path.join(self.work_dir, 'razer.conf')
+        with open(config_file, 'w') as config:
+            config.write(CONFIG.format(endpoint_metrics=self._endpoint_metrics, sync_effects=self._sync_effects,
+                                       battery_notifier=self._battery_notifier))
+
+        env = dict(os.environ)
+        env['DBUS_SESSION_BUS_ADDRESS'] = self.bus_address
+        env['PYTHONPATH'] = os.pathsep.join([PYLIB, DAEMON, env.get('PYTHONPATH', '')])
+
+        start = time.monotonic()
+        self.daemon_process = subprocess.Popen([
+            sys.executable, os.path.join(DAEMON, 'run_openrazer_daemon.py'), '--foreground',
+            '--config', config_file, '--test-dir', self.test_dir, '--run-dir', self.run_dir, '--log-dir', self.log_dir,
+            '--data-dir', self.data_dir
+        ], env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        while time.monotonic() - start < timeout:
+            if self.daemon_process.poll() is not None:
+                raise RuntimeError("Daemon exited with {0}, see {1}".format(self.daemon_process.returncode, self.log_dir))
+
+            if self.bus.name_has_owner('org.razer'):
+                try:
+                    devices = self.daemon_interface('razer.devices').getDevices()
+                except dbus.DBusException:
+                    devices = None  # Name is taken before the methods are added
+
+                if devices is not None and len(devices) >= len(self.fake_devices):
+                    return time.monotonic() - start
+
+            time.sleep(0.01)
+
+        raise RuntimeError("Daemon did not load all devices within {0}s".format(timeout))
+
+    def daemon_interface(self, interface):
+        return dbus.Interface(self.bus.get_object('org.razer', '/org/razer'), interface)
+
+    def device_object(self, serial):
+        return self.bus.get_object('org.razer', '/org/razer/device/{0}'.format(serial))
+
+    def device_methods(self, serial):
+        """
+        Get the DBus methods of a device
+
+        :return: Dict of interface: {method: in signature}
+        :rtype: dict
+        """
+        xml = dbus.Interface(self.device_object(serial), 'org.freedesktop.DBus.Introspectable').Introspect()
+        methods = {}
+        for interface in ElementTree.fromstring(xml).findall('interface'):
+            for method in interface.findall('method'):
+                in_sig = ''.join(arg.get('type') for arg in method.findall('arg') if arg.get('direction', 'in') == 'in')
+                methods.setdefault(interface.get('name'), {})[method.get('name')] = in_sig
+        return methods
+
+    @property
+    def daemon_pid(self):
+        return self.daemon_process.pid
+
+    def daemon_rss_kb(self):
+        """
+        Resident memory of the daemon in KiB
+        """
+        with open('/proc/{0}/status'.format(self.daemon_pid)) as status_file:
+            for line in status_file:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+        return 0
+
+    def daemon_wakeups(self):
+        """
+        Context switches of each daemon thread, every time a thread blocks and is woken counts once
+
+        :return: Dict of thread id: (thread name, switches)
+        :rtype: dict
+        """
+        result = {}
+        task_dir = '/proc/{0}/task'.format(self.daemon_pid)
+        for tid in os.listdir(task_dir):
+            try:
+                with open(os.path.join(task_dir, tid, 'status')) as status_file:
+                    status = dict(line.split(':', 1) for line in status_file if ':' in line)
+            except FileNotFoundError:
+                continue  # Thread exited
+            switches = int(status['voluntary_ctxt_switches']) + int(status['nonvoluntary_ctxt_switches'])
+            result[int(tid)] = (status['Name'].strip(), switches)
+        return result
+
+    def daemon_cpu_time(self):
+        """
+        User + system CPU seconds used by the daemon
+        """
+        with open('/proc/{0}/stat'.format(self.daemon_pid)) as stat_file:
+            fields = stat_file.read().rsplit(')', 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+
+    def start(self):
+        self.create_devices()
+        self.start_bus()
+        return self.start_daemon()
+
+    def stop(self):
+        for process in (self.daemon_process, self._bus_process):
+            if process is not None and process.poll() is None:
+                process.terminate()
+                try:
+                    process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+
+        for fake_device in self.fake_devices.values():
+            fake_device.close()
+
+        if not self._keep_files:
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Measure how often an idle daemon wakes up
+
+Starts the daemon against every fake keyboard with an event file plus the wireless mice with a battery notifier, lets
+it settle and then counts the context switches of each daemon thread while nothing is happening. Optionally does the
+same again with the ripple effect running on the keyboards.
+
+Examples:
+  ./idle_wakeups.py --duration 20
+  ./idle_wakeups.py --ripple --output wakeups.json
+"""
+import argparse
+import json
+import sys
+import time
+
+from harness import DaemonHarness, fake_driver
+from daemon_suite import ripple_devices, RIPPLE_REFRESH_RATE
+from key_load import keyboard_specs
+
+BATTERY_SPECS = ('razermamba2012wireless', 'razermambachroma')
+SETTLE_TIME = 2.0
+
+
+def measure(harness, duration):
+    """
+    Count daemon thread wakeups over a period
+
+    :return: Dict of wakeups_per_second, threads and the busiest threads as [tid, name, wakeups per second]
+    :rtype: dict
+    """
+    before = harness.daemon_wakeups()
+    time.sleep(duration)
+    after = harness.daemon_wakeups()
+
+    per_thread = []
+    for tid, (name, switches) in after.items():
+        per_thread.append([tid, name, (switches - before.get(tid, (name, 0))[1]) / duration])
+    per_thread.sort(key=lambda item: item[2], reverse=True)
+
+    return {
+        'wakeups_per_second': sum(item[2] for item in per_thread),
+        'threads': len(per_thread),
+        'busiest_threads': per_thread[:5],
+    }
+
+
+def run(args):
+    specs = keyboard_specs() + [spec for spec in BATTERY_SPECS if spec in fake_driver.SPECS]
+
+    with DaemonHarness(specs, battery_notifier=True, keep_files=args.keep_files) as harness:
+        harness.start()
+        time.sleep(SETTLE_TIME)
+
+        results = {
+            'devices': len(specs),
+            'duration': args.duration,
+            'idle': measure(harness, args.duration),
+        }
+
+        if args.ripple:
+            serials = ripple_devices(harness)
+            for serial in serials:
+                harness.device_object(serial).setRipple(0, 255, 0, RIPPLE_REFRESH_RATE, dbus_interface='razer.device.lighting.custom')
+            results['ripple'] = measure(harness, args.duration)
+            results['ripple']['devices'] = len(serials)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds to count wakeups over')
+    parser.add_argument('--ripple', action='store_true', help='Also measure with the ripple effect running')
+    parser.add_argument('--keep-files', action='store_true', help='Keep the fake devices and daemon logs')
+    parser.add_argument('--output', help='Write JSON results here instead of stdout')
+    args = parser.parse_args()
+
+    results = run(args)
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(results, output_file, indent=2, sort_keys=True)
+    else:
+        json.dump(results, sys.stdout, indent=2, sort_keys=True)
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Keystroke load generator
+
+Writes input_event records to the event FIFOs of fake keyboards at a configurable rate and key distribution while
+the ripple effect runs, then reports the latency from writing an event to:
+  * the key manager getting it (key_event, measured by the daemon)
+  * the key's first ripple frame being written (ripple_frame, measured by the daemon from the key manager)
+  * a matrix_custom_frame write lighting the key (frame_write, measured here from the fake driver's write log)
+  * a macro bound to M1 running (macro, measured from a marker file the macro appends to)
+
+It also reports the daemon CPU time per event written, over what the ripple effect uses with no keys pressed.
+
+The writable attributes are served with the fake driver's latency emulation so every frame write is timestamped. A
+key can be lit early by another key's ripple passing over it, presses where the key was already lit are left out of
+frame_write.
+
+Patterns:
+  typing   keys weighted by English letter frequency, steady rate
+  gaming   WASD heavy bursts at 4x the rate followed by pauses
+  uniform  every letter and digit equally likely, steady rate
+
+Examples:
+  ./key_load.py --pattern typing --rate 10 --duration 20
+  ./key_load.py --pattern gaming --rate 15 --devices 3 --macro-fraction 0.05 --output gaming.json
+"""
+import argparse
+import bisect
+import configparser
+import datetime
+import json
+import os
+import random
+import sys
+import time
+
+from harness import DaemonHarness, fake_driver
+from daemon_suite import matrix_devices, ripple_devices, summarise, RIPPLE_REFRESH_RATE
+
+TYPING_WEIGHTS = {
+    'E': 12.7, 'T': 9.1, 'A': 8.2, 'O': 7.5, 'I': 7.0, 'N': 6.7, 'S': 6.3, 'H': 6.1, 'R': 6.0, 'D': 4.3, 'L': 4.0,
+    'C': 2.8, 'U': 2.8, 'M': 2.4, 'W': 2.4, 'F': 2.2, 'G': 2.0, 'Y': 2.0, 'P': 1.9, 'B': 1.5, 'V': 1.0, 'K': 0.8,
+    'J': 0.2, 'X': 0.2, 'Q': 0.1, 'Z': 0.1, 'SPACE': 18.0, 'BACKSPACE': 3.0, 'RETURN': 1.0, 'LEFTSHIFT': 2.0,
+    'PERIOD': 1.0, 'COMMA': 1.0,
+}
+
+GAMING_WEIGHTS = {
+    'W': 30.0, 'A': 15.0, 'S': 12.0, 'D': 15.0, 'SPACE': 8.0, 'LEFTSHIFT': 6.0, 'LEFTCTRL': 4.0, 'E': 4.0, 'R': 4.0,
+    'Q': 2.0, 'F': 2.0, 'TAB': 1.0, '1': 1.0, '2': 1.0, '3': 1.0, '4': 1.0,
+}
+
+UNIFORM_WEIGHTS = {key: 1.0 for key in 'ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'}
+
+PATTERNS = {'typing': TYPING_WEIGHTS, 'gaming': GAMING_WEIGHTS, 'uniform': UNIFORM_WEIGHTS}
+
+GAMING_BURST = 8
+GAMING_BURST_SPEEDUP = 4
+HOLD_TIME = (0.04, 0.12)
+SETTLE_TIME = 1.0
+MACRO_KEY = 'M1'
+
+
+def schedule(pattern, rate, duration, serials, macro_serials, macro_fraction, rng):
+    """
+    Generate the key events to write
+
+    :return: Sorted list of (offset seconds, serial, key name, 'down' or 'up')
+    :rtype: list of tuple
+    """
+    from openrazer_daemon.keyboard import KEY_MAPPING
+
+    weights = PATTERNS[pattern]
+    keys = [key for key in weights if key in KEY_MAPPING]
+    key_weights = [weights[key] for key in keys]
+
+    events = []
+    for serial in serials:
+        offset = rng.uniform(0, 1.0 / rate)
+        burst = 0
+
+        while offset < duration:
+            if serial in macro_serials and rng.random() < macro_fraction:
+                key = MACRO_KEY
+            else:
+                key = rng.choices(keys, key_weights)[0]
+
+            hold = rng.uniform(*HOLD_TIME)
+            events.append((offset, serial, key, 'down'))
+            events.append((offset + hold, serial, key, 'up'))
+
+            if pattern == 'gaming':
+                burst += 1
+                if burst < GAMING_BURST:
+                    offset += rng.expovariate(rate * GAMING_BURST_SPEEDUP)
+                else:
+                    # Pause so the average rate is still the requested one
+                    burst = 0
+                    offset += GAMING_BURST / rate - (GAMING_BURST - 1) / (rate * GAMING_BURST_SPEEDUP)
+            else:
+                offset += rng.expovariate(rate)
+
+    events.sort(key=lambda event: event[0])
+    return events
+
+
+def play(harness, events, key_codes):
+    """
+    Write the events at their scheduled times
+
+    :return: List of (write time, serial, key name) for every key press and how far behind schedule writing got
+    :rtype: tuple
+    """
+    presses = []
+    max_lag = 0.0
+    start = time.monotonic()
+
+    for offset, serial, key, action in events:
+        delay = start + offset - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            max_lag = max(max_lag, -delay)
+
+        timestamp = time.time()
+        harness.fake_devices[serial].emit_kb_event('0', key_codes[key], action, timestamp=timestamp)
+        if action == 'down':
+            presses.append((timestamp, serial, key))
+
+    return presses, max_lag
+
+
+def key_lit(frame, offset):
+    return len(frame) >= offset + 3 and any(frame[offset:offset + 3])
+
+
+def frame_latencies(harness, presses, matrix):
+    """
+    Match each press to the first matrix_custom_frame write after it which lights the key
+
+    :return: Latencies in seconds, presses never seen lit and presses skipped as the key was already lit
+    :rtype: tuple
+    """
+    from openrazer_daemon.keyboard import KEY_MAPPING
+
+    frames = {}
+    for serial, fake_device in harness.fake_devices.items():
+        records = [record for record in fake_device.write_log if record.endpoint == 'matrix_custom_frame']
+        frames[serial] = ([record.timestamp for record in records], [record.data for record in records])
+
+    latencies = []
+    missed = 0
+    skipped = 0
+    for timestamp, serial, key in presses:
+        if key == MACRO_KEY:
+            continue
+
+        times, data = frames[serial]
+        rows, cols = matrix[serial]
+        row, col = KEY_MAPPING[key]
+        offset = row * (3 + cols * 3) + 3 + col * 3
+
+        index = bisect.bisect_left(times, timestamp)
+        if index > 0 and key_lit(data[index - 1], offset):
+            skipped += 1
+            continue
+
+        for frame_time, frame in zip(times[index:], data[index:]):
+            if key_lit(frame, offset):
+                latencies.append(frame_time - timestamp)
+                break
+        else:
+            missed += 1
+
+    return latencies, missed, skipped
+
+
+def macro_latencies(presses, marker_files):
+    """
+    Match M1 presses to the times the macro wrote to its marker file, in order
+
+    :return: Latencies in seconds and the number of presses with no macro run
+    :rtype: tuple
+    """
+    latencies = []
+    missed = 0
+
+    for serial, marker_file in marker_files.items():
+        press_times = [timestamp for timestamp, press_serial, key in presses if press_serial == serial and key == MACRO_KEY]
+        try:
+            with open(marker_file) as marker:
+                run_times = sorted(float(line) for line in marker if line.strip())
+        except FileNotFoundError:
+            run_times = []
+
+        latencies.extend(run_time - press_time for press_time, run_time in zip(press_times, run_times))
+        missed += max(0, len(press_times) - len(run_times))
+
+    return latencies, missed
+
+
+def bind_macros(harness, serials):
+    """
+    Bind a macro to M1 which appends the time it ran to a marker file
+
+    :return: Dict of serial: marker file
+    :rtype: dict
+    """
+    marker_files = {}
+    for serial in serials:
+        marker_file = os.path.join(harness.work_dir, 'macro-{0}'.format(serial))
+        macro = [{'type': 'MacroScript', 'script': 'date +%s.%N >> {0}'.format(marker_file)}]
+        harness.device_object(serial).addMacro(MACRO_KEY, json.dumps(macro), dbus_interface='razer.device.macro')
+        marker_files[serial] = marker_file
+    return marker_files
+
+
+def daemon_latencies(harness):
+    """
+    Get the key_event and ripple_frame latencies the daemon recorded, merged across devices
+
+    :return: Dict of name: {count, mean_ms, max_ms, histogram}
+    :rtype: dict
+    """
+    metrics = json.loads(harness.daemon_interface('razer.daemon.metrics').getMetrics())
+    result = {}
+
+    for latency in metrics.get('latencies', []):
+        merged = result.setdefault(latency['name'], {'count': 0, 'total_time': 0.0, 'max_time': 0.0, 'histogram': [0] * len(latency['histogram'])})
+        merged['count'] += latency['count']
+        merged['total_time'] += latency['total_time']
+        merged['max_time'] = max(merged['max_time'], latency['max_time'])
+        merged['histogram'] = [a + b for a, b in zip(merged['histogram'], latency['histogram'])]
+
+    return {
+        name: {
+            'count': merged['count'],
+            'mean_ms': merged['total_time'] / merged['count'] * 1000 if merged['count'] else None,
+            'max_ms': merged['max_time'] * 1000,
+            'buckets_ms': [bucket * 1000 for bucket in metrics['buckets']],
+            'histogram': merged['histogram'],
+        }
+        for name, merged in result.items()
+    }
+
+
+def keyboard_specs():
+    """
+    Fake devices with event files, the ones the daemon gives a key manager
+    """
+    specs = []
+    for spec in sorted(fake_driver.SPECS):
+        config = configparser.ConfigParser()
+        config.read(fake_driver.SPECS[spec])
+        if config.get('device', 'event', fallback=None):
+            specs.append(spec)
+    return specs
+
+
+def run_load(args):
+    from openrazer_daemon.keyboard import EVENT_MAPPING
+
+    key_codes = {key: code for code, key in EVENT_MAPPING.items()}
+    rng = random.Random(args.seed)
+
+    # Not every keyboard does ripple, start enough copies of each that --devices of them should
+    candidates = keyboard_specs()
+    specs = candidates * (1 + (args.devices - 1) // len(candidates))
+
+    with DaemonHarness(specs, endpoint_metrics=True, latency=fake_driver.LatencyProfile(), keep_files=args.keep_files) as harness:
+        harness.start()
+
+        matrix = {serial: (rows, cols) for serial, rows, cols in matrix_devices(harness)}
+        serials = [serial for serial in ripple_devices(harness) if serial in matrix][:args.devices]
+        if not serials:
+            raise RuntimeError("None of the fake keyboards support the ripple effect")
+
+        for serial in serials:
+            harness.device_object(serial).setRipple(0, 255, 0, args.refresh_rate, dbus_interface='razer.device.lighting.custom')
+
+        macro_serials = []
+        if args.macro_fraction > 0:
+            macro_serials = [serial for serial in serials if 'addMacro' in harness.device_methods(serial).get('razer.device.macro', {})]
+        marker_files = bind_macros(harness, macro_serials)
+
+        events = schedule(args.pattern, args.rate, args.duration, serials, macro_serials, args.macro_fraction, rng)
+
+        # CPU the ripple effect uses with no keys, taken off the CPU used while writing events
+        cpu_start = harness.daemon_cpu_time()
+        time.sleep(args.duration)
+        idle_cpu = harness.daemon_cpu_time() - cpu_start
+
+        harness.daemon_interface('razer.daemon.metrics').resetMetrics()
+
+        print("Writing {0} events to {1} devices over {2}s".format(len(events), len(serials), args.duration), file=sys.stderr)
+        cpu_start = harness.daemon_cpu_time()
+        presses, max_lag = play(harness, events, key_codes)
+        time.sleep(SETTLE_TIME)
+        load_cpu = harness.daemon_cpu_time() - cpu_start
+
+        frames, frames_missed, frames_skipped = frame_latencies(harness, presses, matrix)
+        macros, macros_missed = macro_latencies(presses, marker_files)
+
+        return {
+            'timestamp': datetime.datetime.now().isoformat(),
+            'pattern': args.pattern,
+            'rate': args.rate,
+            'duration': args.duration,
+            'devices': [harness.fake_devices[serial].spec_name for serial in serials],
+            'presses': len(presses),
+            'max_schedule_lag_ms': max_lag * 1000,
+            'cpu_per_event_us': (load_cpu - idle_cpu * (args.duration + SETTLE_TIME) / args.duration) / len(events) * 1000000 if events else None,
+            'daemon': daemon_latencies(harness),
+            'frame_write': {'latency': summarise(frames), 'missed': frames_missed, 'skipped': frames_skipped},
+            'macro': {'latency': summarise(macros), 'missed': macros_missed} if marker_files else None,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pattern', choices=sorted(PATTERNS), default='typing', help='Key distribution and timing')
+    parser.add_argument('--rate', type=float, default=8.0, help='Average key presses per second per device')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds to generate events for')
+    parser.add_argument('--devices', type=int, default=1, help='Number of fake keyboards to type on')
+    parser.add_argument('--refresh-rate', type=float, default=RIPPLE_REFRESH_RATE, help='Ripple refresh rate in seconds')
+    parser.add_argument('--macro-fraction', type=float, default=0.0, help='Fraction of presses which are M1, bound to a macro')
+    parser.add_argument('--seed', type=int, help='Random seed for a repeatable run')
+    parser.add_argument('--keep-files', action='store_true', help='Keep the fake devices and daemon logs')
+    parser.add_argument('--output', help='Write JSON results here instead of stdout')
+    args = parser.parse_args()
+
+    results = run_load(args)
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(results, output_file, indent=2, sort_keys=True)
+    else:
+        json.dump(results, sys.stdout, indent=2, sort_keys=True)
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark macro playback start latency
+
+Times compiling 10, 100 and 1000 event macros, which is done once when a macro is bound, and the time from submitting
+a MacroRunner to the macro executor to its first key event reaching the keyboard. Keys go to a keyboard which only
+records the time so neither uinput nor xte is needed.
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+import timeit
+
+DAEMON = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'daemon')
+sys.path.insert(1, DAEMON)
+
+from openrazer_daemon.misc.macro import MacroExecutor, MacroKey, MacroProgram, MacroRunner
+
+KEYS = ['A', 'S', 'D', 'F', 'J', 'K', 'L', 'SEMICOLON']
+
+
+class TimingKeyboard(object):
+    """
+    Stands in for UInputKeyboard, notes when the first key arrives
+    """
+    def __init__(self):
+        self.first_key = threading.Event()
+        self.first_key_time = None
+
+    def send_key(self, key_code, down):
+        if self.first_key_time is None:
+            self.first_key_time = time.perf_counter()
+            self.first_key.set()
+
+
+def build_macro(events):
+    macro = []
+    for index in range(events // 2):
+        key = KEYS[index % len(KEYS)]
+        macro.append(MacroKey(key, 0, 'DOWN'))
+        macro.append(MacroKey(key, 0, 'UP'))
+    return macro
+
+
+def start_latency(executor, program, runs):
+    """
+    Time from submitting a runner to its first key event
+
+    :return: Latencies in seconds
+    :rtype: list of float
+    """
+    latencies = []
+    for _ in range(runs):
+        keyboard = TimingKeyboard()
+        runner = MacroRunner(0, 'M1', program, keyboard=keyboard)
+
+        start = time.perf_counter()
+        executor.submit('M1', runner)
+        keyboard.first_key.wait()
+        latencies.append(keyboard.first_key_time - start)
+
+        # Let it finish so the next run isnt queued behind it
+        while executor.running:
+            time.sleep(0.0001)
+
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=200, help='Playbacks per macro size')
+    args = parser.parse_args()
+
+    executor = MacroExecutor(0)
+
+    print("{0:>8} {1:>12} {2:>14} {3:>14}".format('events', 'compile us', 'start p50 us', 'start p95 us'))
+    for events in (10, 100, 1000):
+        macro = build_macro(events)
+        compile_time = min(timeit.repeat(lambda: MacroProgram.compile(macro), number=10, repeat=5)) / 10
+
+        latencies = sorted(start_latency(executor, MacroProgram.compile(macro), args.runs))
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print("{0:>8} {1:>12.1f} {2:>14.1f} {3:>14.1f}".format(events, compile_time * 1e6, statistics.median(latencies) * 1e6, p95 * 1e6))
+
+    executor.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -12,5 +12,6 @@ python3 ./daemon/run_openrazer_daemon.py \
     --verbose \
     --run-dir /tmp/daemon_stuff/data \
     --log-dir /tmp/daemon_stuff/logs \
+    --data-dir /tmp/daemon_stuff/data \
     --test-dir /tmp/daemon_test \
     --config=$(pwd)/daemon/resources/razer.conf &
@@ -53,5 +53,5 @@ $terminal_cmd "$whereami/create_fake_device.py" --dest "$test_dir" $options &
 pkill -e openrazer-daemon
 
 # Start the daemon in a new terminal window.
-$terminal_cmd openrazer-daemon --verbose -F --run-dir "$config_dir/data" --log-dir "$config_dir/logs" --test-dir "$test_dir"
+$terminal_cmd openrazer-daemon --verbose -F --run-dir "$config_dir/data" --log-dir "$config_dir/logs" --data-dir "$config_dir/data" --test-dir "$test_dir"
 